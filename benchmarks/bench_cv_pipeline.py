@@ -0,0 +1,317 @@
+# benchmarks/bench_cv_pipeline.py - Time each CV analysis stage on small, typical and pathological CVs
+import io
+import os
+import sys
+import json
+import time
+import logging
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime, timezone
+
+# Make the sherlock-bot modules importable
+SHERLOCK_BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot')
+sys.path.insert(0, SHERLOCK_BOT_DIR)
+
+# Local storage and internal analysis only; read by Config on import
+os.environ['STORAGE_BACKEND'] = 'memory'
+os.environ['CV_ANALYSIS_API_URL'] = ''
+
+from config import Config
+from repositories import create_repositories, set_repositories
+from services.cv_service import (
+    extract_text_from_pdf, extract_text_from_docx, analyze_cv_structure, identify_sections,
+    analyze_cv_basic, analyze_cv_advanced, generate_pdf_report, process_basic_review
+)
+
+SIZES = ('small', 'typical', 'pathological')
+
+ROLES = [
+    ('Senior Software Engineer', 'Paystack', 'Lagos', 'March 2021 to Present'),
+    ('Software Engineer', 'Interswitch', 'Lagos', 'June 2018 to February 2021'),
+    ('Backend Developer', 'Andela', 'Remote', 'January 2016 to May 2018'),
+    ('Junior Developer', 'Konga', 'Lagos', 'July 2014 to December 2015')
+]
+
+BULLETS = [
+    'Led the migration of settlement jobs to an event-driven pipeline, cutting payout delays by 35%',
+    'Built REST APIs in Python and Flask serving 2 million requests per day',
+    'Reduced database query times by 40% through indexing and caching',
+    'Mentored four engineers and introduced weekly architecture reviews',
+    'Automated release checks, reducing failed deployments from 12 to 2 per quarter',
+    'Worked with product and design to ship a merchant dashboard used by 8,000 businesses'
+]
+
+def make_cv_lines(size, seed=7):
+    """
+    Text lines of a generated CV
+
+    'small' is a half-page CV with most sections missing, 'typical' a two-page
+    CV with every section, and 'pathological' a very long CV full of bullet
+    dashes, repeated headings, contact-like strings and unpunctuated text that
+    stresses the tokenizer and the section and contact regexes.
+
+    Returns:
+        list: Lines of text
+    """
+    rng = random.Random(seed)
+    header = ['ADA OKONKWO', 'ada.okonkwo@example.com | +234 801 234 5678 | linkedin.com/in/adaokonkwo', '']
+
+    if size == 'small':
+        return header + [
+            'EXPERIENCE', 'Software Engineer, Interswitch, Lagos - 2018 to Present',
+            '- Built payment APIs in Python', '',
+            'SKILLS', 'Python, Flask, PostgreSQL'
+        ]
+
+    lines = header + [
+        'SUMMARY', 'Backend engineer with ten years of experience building payment and messaging systems.', '',
+        'EXPERIENCE'
+    ]
+    for title, company, city, dates in ROLES:
+        lines.append(f"{title}, {company}, {city} - {dates}")
+        lines.extend(f"- {bullet}" for bullet in rng.sample(BULLETS, 4))
+        lines.append('')
+    lines += [
+        'EDUCATION', 'B.Sc. Computer Science, University of Lagos, 2014', '',
+        'SKILLS', 'Python, Flask, PostgreSQL, Redis, Docker, Kubernetes, Google Cloud', '',
+        'CERTIFICATIONS', 'Google Professional Cloud Developer', '',
+        'PROJECTS', 'Open-source WhatsApp bot framework with 1,200 stars on GitHub', '',
+        'LANGUAGES', 'English, Igbo, Yoruba', '',
+        'REFERENCES', 'Available on request'
+    ]
+    if size == 'typical':
+        return lines
+
+    # Thirty times the typical CV with every line a dash bullet
+    for repeat in range(30):
+        for title, company, city, dates in ROLES:
+            lines.append(f"EXPERIENCE {repeat}")
+            lines.append(f"{title} - {company} - {city} - {dates} - contact hr{repeat}@{company.lower()}.com - +234 80{repeat:02d} 000 0000")
+            lines.extend(f"- {bullet} - {rng.randint(1, 99)}% - {rng.choice(ROLES)[1]}" for bullet in BULLETS)
+
+    # Words without sentence punctuation, wrapped at 90 characters like a PDF text layer
+    words = ' '.join(rng.choice(BULLETS).replace(',', '').replace('%', '').split()[rng.randint(0, 5)] for _ in range(6000))
+    lines.extend(words[i:i + 90] for i in range(0, len(words), 90))
+    return lines
+
+def make_pdf(lines):
+    """Render CV lines to a PDF, one line per row"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    y = A4[1] - 50
+    for line in lines:
+        if y < 50:
+            pdf.showPage()
+            y = A4[1] - 50
+        pdf.drawString(40, y, line)
+        y -= 14
+    pdf.save()
+    return buffer.getvalue()
+
+def make_docx(lines):
+    """Write CV lines to a DOCX, one paragraph per line"""
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def measure(fn, iterations, warmup=1):
+    """Wall time percentiles in ms of calling fn"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[max(int(len(samples) * 0.95) - 1, 0)], 3),
+        'mean_ms': round(statistics.mean(samples), 3),
+        'min_ms': round(samples[0], 3)
+    }
+
+def build_cases(directory):
+    """
+    Benchmarks as name -> (function, input size)
+
+    The input size is file bytes for extraction and whole reviews, text
+    characters for analysis and insight count for reports. Every input is
+    built once up front so only the stage itself is timed.
+    """
+    # process_basic_review downloads from the repositories into ./uploads
+    repositories = create_repositories('memory')
+    set_repositories(repositories)
+
+    cases = {}
+    for size in SIZES:
+        lines = make_cv_lines(size)
+        text = '\n'.join(lines)
+        pdf, docx_bytes = make_pdf(lines), make_docx(lines)
+
+        pdf_path = os.path.join(directory, f"cv_{size}.pdf")
+        docx_path = os.path.join(directory, f"cv_{size}.docx")
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf)
+        with open(docx_path, 'wb') as f:
+            f.write(docx_bytes)
+
+        storage_path = f"cv-uploads/bench/cv_{size}.pdf"
+        repositories.blobs.upload_bytes(pdf, storage_path, 'application/pdf')
+
+        cv_data = extract_text_from_pdf(pdf_path)
+        review_result = analyze_cv_advanced(cv_data)
+        if size == 'pathological':
+            # Long reports with overlong insights stress wrapping and page breaks
+            review_result['insights'] = review_result['insights'] * 10 + [' '.join(BULLETS) * 5]
+
+        cases.update({
+            f"extract_text_from_pdf/{size}": (lambda p=pdf_path: extract_text_from_pdf(p), len(pdf)),
+            f"extract_text_from_docx/{size}": (lambda p=docx_path: extract_text_from_docx(p), len(docx_bytes)),
+            f"analyze_cv_structure/{size}": (lambda t=text: analyze_cv_structure(t), len(text)),
+            f"identify_sections/{size}": (lambda t=text: identify_sections(t), len(text)),
+            f"analyze_cv_basic/{size}": (lambda d=cv_data: analyze_cv_basic(d), len(text)),
+            f"analyze_cv_advanced/{size}": (lambda d=cv_data: analyze_cv_advanced(d), len(text)),
+            f"generate_pdf_report/{size}": (lambda r=review_result: generate_pdf_report(r), len(review_result.get('insights', []))),
+            f"process_basic_review/{size}": (lambda s=storage_path: check_review(process_basic_review(s)), len(pdf))
+        })
+    return cases
+
+def check_review(result):
+    """Fail loudly rather than time the error path"""
+    if not result.get('success'):
+        raise RuntimeError(f"Basic review failed: {result.get('error')}")
+    return result
+
+def run(iterations, only=None):
+    """
+    Run the selected benchmarks
+
+    Pathological inputs run a fifth of the iterations.
+
+    Returns:
+        dict: 'meta' and 'results' (benchmark name -> timings)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            cases = build_cases(directory)
+            results = {}
+            for name, (fn, input_bytes) in cases.items():
+                if not selected(name, only):
+                    continue
+                count = max(iterations // 5, 3) if name.endswith('/pathological') else iterations
+                results[name] = dict(measure(fn, count), input_size=input_bytes)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': iterations,
+            'report_renderer': Config.REPORT_RENDERER
+        },
+        'results': results
+    }
+
+def selected(name, only):
+    return not only or any(pattern in name for pattern in only)
+
+def compare(current, baseline, threshold, min_delta_ms, only=None):
+    """
+    Compare median times with a baseline run
+
+    A benchmark regresses when its p50 grew by more than threshold and by more
+    than min_delta_ms, so sub-millisecond noise is not reported. Baseline
+    entries left out by the --only patterns are not compared.
+
+    Returns:
+        list: Rows of (name, baseline p50, current p50, change %, status)
+    """
+    rows = []
+    baseline_names = {name for name in baseline['results'] if selected(name, only)}
+    for name in sorted(set(current['results']) | baseline_names):
+        now = current['results'].get(name)
+        before = baseline['results'].get(name)
+        if now is None or before is None:
+            rows.append((name, before and before['p50_ms'], now and now['p50_ms'], None, 'missing' if now is None else 'new'))
+            continue
+
+        change = (now['p50_ms'] - before['p50_ms']) / before['p50_ms'] if before['p50_ms'] else 0.0
+        delta_ms = now['p50_ms'] - before['p50_ms']
+        if change > threshold and delta_ms > min_delta_ms:
+            status = 'REGRESSION'
+        elif change < -threshold and -delta_ms > min_delta_ms:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, before['p50_ms'], now['p50_ms'], round(change * 100, 1), status))
+    return rows
+
+def main():
+    """Run the CV pipeline benchmarks"""
+    parser = argparse.ArgumentParser(description='Benchmark the CV extraction, analysis and report stages')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed calls per benchmark (a fifth for pathological inputs)')
+    parser.add_argument('--only', action='append', default=[], metavar='SUBSTRING', help='Run benchmarks whose name contains this (repeatable)')
+    parser.add_argument('--save', metavar='PATH', help='Write the results JSON to this file, e.g. as a new baseline')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare with a results JSON from an earlier --save')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative p50 increase counted as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='Smallest absolute p50 increase counted as a regression')
+    parser.add_argument('--log-level', default='ERROR', help='Application log level during the run')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    # Per-call log lines would be timed along with the stages
+    logging.getLogger('sherlock_bot').setLevel(args.log_level.upper())
+
+    current = run(args.iterations, args.only)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+
+    rows = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold, args.min_delta_ms, args.only)
+        current['comparison'] = {
+            'baseline': args.compare,
+            'regressions': [row[0] for row in rows if row[4] == 'REGRESSION'],
+            'rows': [dict(zip(('name', 'baseline_p50_ms', 'p50_ms', 'change_pct', 'status'), row)) for row in rows]
+        }
+
+    if args.json:
+        print(json.dumps(current, indent=2))
+    elif rows is not None:
+        print(f"{'benchmark':<36} {'base ms':>9} {'now ms':>9} {'change':>8} {'status':>10}")
+        for name, before, now, change, status in rows:
+            change = f"{change:+.1f}%" if change is not None else '-'
+            print(f"{name:<36} {before if before is not None else '-':>9} {now if now is not None else '-':>9} {change:>8} {status:>10}")
+    else:
+        print(f"{'benchmark':<36} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'input':>9}")
+        for name, result in current['results'].items():
+            print(f"{name:<36} {result['iterations']:>5} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['mean_ms']:>9} {result['input_size']:>9}")
+
+    return 1 if rows and any(row[4] == 'REGRESSION' for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# benchmarks/bench_logging.py - Measure the logging cost a webhook request pays on its own thread
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import statistics
+from logging.handlers import QueueListener
+
+# Make the sherlock-bot modules importable
+SHERLOCK_BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot')
+sys.path.insert(0, SHERLOCK_BOT_DIR)
+
+from utils.logger import AsyncQueueHandler, JsonFormatter, SamplingFilter, LOG_QUEUE_SIZE, lazy
+from utils.tracing import TraceIdFilter, begin_trace, end_trace
+
+# Form fields of a Twilio WhatsApp webhook
+FORM = {
+    'SmsMessageSid': 'SM' + 'a' * 32, 'NumMedia': '0', 'ProfileName': 'Ada', 'SmsSid': 'SM' + 'a' * 32,
+    'WaId': '2348012345678', 'SmsStatus': 'received', 'Body': 'Hello, I would like my CV reviewed please',
+    'To': 'whatsapp:+14155238886', 'NumSegments': '1', 'MessageSid': 'SM' + 'a' * 32,
+    'AccountSid': 'AC' + 'b' * 32, 'From': 'whatsapp:+2348012345678', 'ApiVersion': '2010-04-01'
+}
+
+# CV API response of the size the pipeline logged a prefix of
+API_RESULT = {
+    'success': True,
+    'insights': [f"Insight {i}: quantify the outcome of each role with numbers and timeframes." for i in range(12)],
+    'score': 71,
+    'sections': {name: {'score': 70, 'feedback': 'Solid but could be more specific.' * 4} for name in ('summary', 'experience', 'skills', 'education')}
+}
+
+def baseline_request(logger, form, result):
+    """Log lines of one webhook request as written before async logging"""
+    logger.info(f"🔄 POST /webhook/twilio")
+    logger.info(f"📝 Form data keys: {list(form.keys())}")
+    logger.info(f"📨 Received WhatsApp webhook from 10.0.0.1")
+    logger.info(f"🚀 Starting production WhatsApp message handler")
+    logger.info(f"📨 Message received from {form['From']}: {form['Body']}")
+    logger.info(f"📎 Number of media attachments: {form['NumMedia']}")
+    logger.info(f"👤 User state: awaiting_review_type")
+    logger.info(f"📊 API Response Keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
+    logger.info(f"📝 First 200 chars of response: {str(result)[:200]}")
+    logger.info(f"✅ Sent WhatsApp message to {form['From']} with SID: {form['MessageSid']}")
+    logger.info(f"✅ Response: 200 for /webhook/twilio")
+
+def current_request(logger, form, result):
+    """The same request's log lines as the code writes them now"""
+    logger.debug("🔄 %s %s", 'POST', '/webhook/twilio')
+    logger.debug("📝 Form data keys: %s", lazy(lambda: sorted(form.keys())))
+    logger.info("📨 Received WhatsApp webhook from %s", '10.0.0.1')
+    logger.debug("🚀 Starting production WhatsApp message handler")
+    logger.info("📨 Message received from %s (%d chars, %d attachments)", form['From'], len(form['Body']), int(form['NumMedia']))
+    logger.debug("💬 Message body: %s", form['Body'])
+    logger.debug("👤 User state: %s", 'awaiting_review_type')
+    logger.debug("📊 API Response Keys: %s", lazy(lambda: list(result.keys()) if isinstance(result, dict) else 'Not a dict'))
+    logger.info("✅ Sent WhatsApp message to %s with SID: %s", form['From'], form['MessageSid'])
+    logger.info("✅ Response: %s for %s %s", 200, 'POST', '/webhook/twilio')
+
+def make_logger(mode, stream):
+    """
+    Logger configured like one of the setups under comparison
+
+    Returns:
+        tuple: (logger, request function, listener or None)
+    """
+    logger = logging.getLogger(f"bench.{mode}")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    output = logging.StreamHandler(stream)
+    if mode == 'baseline':
+        output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'))
+        output.addFilter(TraceIdFilter())
+        logger.addHandler(output)
+        return logger, baseline_request, None
+
+    output.setFormatter(JsonFormatter())
+    filters = [TraceIdFilter(), SamplingFilter({})]
+    if mode == 'sync':
+        for log_filter in filters:
+            output.addFilter(log_filter)
+        logger.addHandler(output)
+        return logger, current_request, None
+
+    handler = AsyncQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    for log_filter in filters:
+        handler.addFilter(log_filter)
+    logger.addHandler(handler)
+    listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    return logger, current_request, listener
+
+def measure(mode, iterations, path):
+    """Per-request logging time in microseconds on the request thread"""
+    with open(path, 'w', encoding='utf-8') as stream:
+        logger, request, listener = make_logger(mode, stream)
+
+        samples = []
+        for _ in range(iterations):
+            handle = begin_trace('POST /webhook/twilio')
+            started = time.perf_counter()
+            request(logger, FORM, API_RESULT)
+            samples.append((time.perf_counter() - started) * 1e6)
+            end_trace(handle)
+
+        drain_started = time.perf_counter()
+        if listener is not None:
+            listener.stop()
+        drain_ms = (time.perf_counter() - drain_started) * 1000
+        stream.flush()
+        size = stream.tell()
+
+    samples.sort()
+    return {
+        'request_p50_us': round(statistics.median(samples), 1),
+        'request_p95_us': round(samples[int(len(samples) * 0.95) - 1], 1),
+        'request_mean_us': round(statistics.mean(samples), 1),
+        'drain_ms': round(drain_ms, 1),
+        'bytes_per_request': size // iterations
+    }
+
+def main():
+    """Run the logging benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark per-request logging overhead')
+    parser.add_argument('--iterations', type=int, default=5000, help='Simulated requests per mode')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('baseline', 'sync', 'async'):
+            results[mode] = measure(mode, args.iterations, os.path.join(directory, f"{mode}.log"))
+
+    baseline = results['baseline']['request_mean_us']
+    for result in results.values():
+        result['reduction_pct'] = round((1 - result['request_mean_us'] / baseline) * 100, 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'mode':<10} {'p50 us':>8} {'p95 us':>8} {'mean us':>8} {'vs base':>8} {'drain ms':>9} {'bytes':>7}")
+    for mode, result in results.items():
+        print(f"{mode:<10} {result['request_p50_us']:>8} {result['request_p95_us']:>8} {result['request_mean_us']:>8} "
+              f"{result['reduction_pct']:>7}% {result['drain_ms']:>9} {result['bytes_per_request']:>7}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
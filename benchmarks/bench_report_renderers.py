@@ -0,0 +1,94 @@
+# benchmarks/bench_report_renderers.py - Compare PDF report renderer backends
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Make the sherlock-bot modules importable
+SHERLOCK_BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot')
+sys.path.insert(0, SHERLOCK_BOT_DIR)
+
+from services.report_service import RENDERERS, render_report
+
+# Modules each backend has to import before its first render
+IMPORTS = {
+    'reportlab': 'import reportlab.lib.styles, reportlab.platypus',
+    'native': 'import utils.pdf_writer'
+}
+
+SAMPLE_RESULT = {
+    'improvement_score': 74,
+    'insights': [
+        "SUMMARY: Open with a two-line professional summary that names your target role and your strongest achievement.",
+        "EXPERIENCE: Start each bullet with an action verb and quantify the outcome (%, revenue, time saved).",
+        "SKILLS: Group technical skills by category and remove outdated tools that no longer support your target role.",
+        "EDUCATION: Move education below experience now that you have more than three years of work history.",
+        "FORMATTING: Maintain consistent formatting with a clear hierarchy throughout your document.",
+        "KEYWORDS: Your CV matches 58% of industry keywords. Consider adding more relevant terms.",
+        "ATS COMPATIBILITY: Avoid tables and text boxes, which many applicant tracking systems cannot parse.",
+        "RELEVANCE: Focus on your most recent and relevant experience for your target roles.",
+        "CERTIFICATIONS: List certification dates and issuing bodies so recruiters can verify them quickly.",
+        "LENGTH: Keep the document to two pages by trimming roles older than ten years."
+    ]
+}
+
+def measure_import(backend, runs):
+    """Median wall time in ms of importing a backend in a fresh interpreter"""
+    code = (
+        "import sys, time; sys.path.insert(0, {path!r}); t = time.perf_counter(); {stmt}; "
+        "print((time.perf_counter() - t) * 1000)"
+    ).format(path=SHERLOCK_BOT_DIR, stmt=IMPORTS[backend])
+
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        samples.append(float(output.stdout.strip()))
+    return statistics.median(samples)
+
+def measure_render(backend, iterations):
+    """Render latency percentiles in ms and output size for a backend"""
+    # First render builds the cached renderer (styles, etc.)
+    first = render_report(SAMPLE_RESULT, backend)
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        report = render_report(SAMPLE_RESULT, backend)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    return {
+        'first_render_ms': first['render_ms'],
+        'render_p50_ms': round(statistics.median(samples), 2),
+        'render_p95_ms': round(samples[int(len(samples) * 0.95) - 1], 2),
+        'size_bytes': report['size_bytes']
+    }
+
+def main():
+    """Run the renderer benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark PDF report renderers')
+    parser.add_argument('--iterations', type=int, default=200, help='Renders per backend')
+    parser.add_argument('--import-runs', type=int, default=5, help='Fresh interpreters per import measurement')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    for backend in RENDERERS:
+        results[backend] = measure_render(backend, args.iterations)
+        results[backend]['import_ms'] = round(measure_import(backend, args.import_runs), 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'backend':<10} {'import ms':>10} {'first ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>8}")
+    for backend, result in results.items():
+        print(f"{backend:<10} {result['import_ms']:>10} {result['first_render_ms']:>10} "
+              f"{result['render_p50_ms']:>8} {result['render_p95_ms']:>8} {result['size_bytes']:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
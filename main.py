@@ -1,4 +1,4 @@
-from firebase_functions import https_fn
+from firebase_functions import https_fn, scheduler_fn
 import sys
 import os
 import io
@@ -161,4 +161,43 @@ def app_function(req: https_fn.Request) -> https_fn.Response:
                 f"Function error: {str(e)}\nFallback error: {str(fallback_error)}",
                 status=500,
                 headers={'Content-Type': 'text/plain'}
-            )
\ No newline at end of file
+            )
+
+@scheduler_fn.on_schedule(
+    schedule="every day 02:00",
+    timezone="Africa/Lagos",
+    region="africa-south1",
+    memory=512,
+    timeout_sec=540,
+)
+def retention_job(event: scheduler_fn.ScheduledEvent) -> None:
+    """Daily archival of old reviews and sessions and expiry of old uploads."""
+    from firebase_init import initialize_firebase
+    from services.retention_service import run_retention
+    from utils.tracing import start_trace
+    from utils.firestore_accounting import accounting_scope
+    
+    with start_trace('retention_job'), accounting_scope('retention_job'):
+        initialize_firebase()
+        run_retention()
+
+@scheduler_fn.on_schedule(
+    schedule="every 5 minutes",
+    region="africa-south1",
+    memory=512,
+    timeout_sec=540,
+)
+def deferred_reviews_job(event: scheduler_fn.ScheduledEvent) -> None:
+    """Start reviews deferred because their instance lacked memory for them."""
+    from firebase_init import initialize_firebase
+    from controllers.webhook_controller import resume_deferred_reviews
+    from services.latency_service import flush
+    from utils.tracing import start_trace
+    from utils.firestore_accounting import accounting_scope
+    
+    with start_trace('deferred_reviews_job'), accounting_scope('deferred_reviews_job'):
+        initialize_firebase()
+        resume_deferred_reviews()
+        
+        # Job instances may not live until the next periodic flush
+        flush()
@@ -0,0 +1,35 @@
+# scripts/backfill_rollups.py - Build admin stats rollups from existing data
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Make the sherlock-bot modules importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot'))
+
+# Load environment variables
+load_dotenv()
+
+from firebase_init import initialize_firebase
+from models.rollup import Rollup
+
+def main():
+    """Rebuild hourly, daily and monthly rollup buckets"""
+    parser = argparse.ArgumentParser(description='Backfill /admin/stats rollup buckets from existing documents')
+    parser.add_argument('--metric', action='append', choices=sorted(Rollup.SOURCES),
+                        help='Metric to rebuild (repeatable, default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Compute buckets without writing them')
+    args = parser.parse_args()
+
+    if not initialize_firebase():
+        print("❌ Firebase initialization failed")
+        return 1
+
+    written = Rollup.backfill(args.metric, dry_run=args.dry_run)
+
+    for metric, count in written.items():
+        print(f"{'🔎' if args.dry_run else '✅'} {metric}: {count} buckets")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+# scripts/backfill_search_index.py - Build admin search index entries from existing data
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Make the sherlock-bot modules importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot'))
+
+# Load environment variables
+load_dotenv()
+
+from firebase_init import initialize_firebase
+from models.search_index import SearchIndex
+
+def main():
+    """Index existing users, reviews and payments for admin search"""
+    parser = argparse.ArgumentParser(description='Backfill the admin search index from existing documents')
+    parser.add_argument('--entity', action='append', choices=sorted(SearchIndex.ENTITIES),
+                        help='Entity to index (repeatable, default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Count documents without writing entries')
+    args = parser.parse_args()
+
+    if not initialize_firebase():
+        print("❌ Firebase initialization failed")
+        return 1
+
+    written = SearchIndex.backfill(args.entity, dry_run=args.dry_run)
+
+    for entity, count in written.items():
+        print(f"{'🔎' if args.dry_run else '✅'} {entity}: {count} entries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
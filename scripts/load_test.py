@@ -0,0 +1,296 @@
+# scripts/load_test.py - Drive simulated WhatsApp conversations through the app against fake backends
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Make the sherlock-bot modules and the test fakes importable
+sys.path.insert(0, os.path.join(ROOT_DIR, 'sherlock-bot'))
+sys.path.insert(0, ROOT_DIR)
+
+SAMPLE_CV_LINES = [
+    'ADA OKONKWO', 'ada.okonkwo@example.com | +234 801 234 5678 | linkedin.com/in/adaokonkwo', '',
+    'SUMMARY', 'Backend engineer with six years of experience building payment and messaging systems.', '',
+    'EXPERIENCE', 'Senior Software Engineer, Paystack, Lagos - March 2021 to Present',
+    '- Led the migration of settlement jobs to an event-driven pipeline, cutting payout delays by 35%',
+    '- Mentored four engineers and introduced weekly architecture reviews',
+    'Software Engineer, Interswitch, Lagos - June 2018 to February 2021',
+    '- Built REST APIs in Python and Flask serving 2 million requests per day',
+    '- Reduced database query times by 40% through indexing and caching', '',
+    'EDUCATION', 'B.Sc. Computer Science, University of Lagos, 2018', '',
+    'SKILLS', 'Python, Flask, PostgreSQL, Redis, Docker, Kubernetes, Google Cloud', '',
+    'CERTIFICATIONS', 'Google Professional Cloud Developer'
+]
+
+def make_cv_pdf():
+    """One-page PDF CV sent as every simulated user's attachment"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    y = A4[1] - 60
+    for line in SAMPLE_CV_LINES:
+        pdf.drawString(50, y, line)
+        y -= 16
+    pdf.save()
+    return buffer.getvalue()
+
+def percentile(samples, q):
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return None
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+class Results:
+    """Step latencies and conversation outcomes, shared by the worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps = defaultdict(list)
+        self.errors = Counter()
+        self.outcomes = Counter()
+        self.failed_at = Counter()
+
+    def step(self, name, seconds, ok):
+        with self._lock:
+            self.steps[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def outcome(self, outcome, step=None):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if step:
+                self.failed_at[step] += 1
+
+def peek_session(backends, sender):
+    """Stored session of a sender, read without latency where the backend allows"""
+    from repositories import get_repositories
+
+    repositories = get_repositories()
+    if repositories.backend == 'firebase':
+        return backends.firestore.peek('sessions', sender)
+    return repositories.sessions.get(sender)
+
+class Conversation:
+    """One simulated WhatsApp user going through a basic or advanced review"""
+
+    def __init__(self, client, backends, signer, webhook_url, index, advanced, cv):
+        self.client = client
+        self.backends = backends
+        self.signer = signer
+        self.webhook_url = webhook_url
+        self.sender = f"whatsapp:+2348{index:09d}"
+        self.advanced = advanced
+        self.cv = cv
+
+    def state(self):
+        session = peek_session(self.backends, self.sender) or {}
+        return session.get('state'), bool(session.get('deferred_at'))
+
+    def message(self, body='', media=None):
+        """Post a signed Twilio webhook and return whether the app answered normally"""
+        form = {
+            'From': self.sender, 'To': 'whatsapp:+18383682677', 'Body': body, 'NumMedia': '1' if media else '0',
+            'MessageSid': f"SM{random.getrandbits(128):032x}", 'AccountSid': self.backends.twilio.account_sid
+        }
+        if media:
+            form['MediaUrl0'] = self.backends.twilio.add_media(self.cv, 'application/pdf')
+            form['MediaContentType0'] = 'application/pdf'
+
+        response = self.client.post('/webhook/twilio', data=form, headers={'X-Twilio-Signature': self.signer.compute_signature(self.webhook_url, form)})
+        text = response.get_data(as_text=True)
+        return response.status_code == 200 and 'error occurred' not in text and "couldn't" not in text
+
+    def pay(self):
+        """Complete the Paystack checkout and deliver its webhook"""
+        reference = self.backends.paystack.find(self.sender)
+        if not reference:
+            return False
+        body, signature = self.backends.paystack.pay(reference)
+        response = self.client.post('/webhook/paystack', data=body, content_type='application/json', headers={'x-paystack-signature': signature})
+        return response.status_code == 200
+
+    def run(self, results):
+        """Run the conversation, recording each step"""
+        steps = [
+            ('start', lambda: self.message('start'), ('awaiting_cv',)),
+            ('send_cv', lambda: self.message(media=True), ('awaiting_review_type',))
+        ]
+        if self.advanced:
+            steps += [
+                ('choose_advanced', lambda: self.message('2'), ('awaiting_payment',)),
+                ('payment_webhook', self.pay, ('awaiting_email',)),
+                ('advanced_review', lambda: self.message('skip'), ('completed', 'processing'))
+            ]
+        else:
+            steps.append(('basic_review', lambda: self.message('1'), ('completed', 'processing')))
+
+        for name, send, expected in steps:
+            started = time.perf_counter()
+            try:
+                ok = send()
+            except Exception:
+                ok = False
+            state, deferred = self.state()
+            ok = ok and state in expected and (state != 'processing' or deferred)
+            results.step(name, time.perf_counter() - started, ok)
+            if not ok:
+                results.outcome('failed', name)
+                return self.sender, 'failed'
+
+        outcome = 'deferred' if self.state()[1] else 'completed'
+        results.outcome(outcome)
+        return self.sender, outcome
+
+def drain_deferred(backends, batch):
+    """
+    Resume deferred reviews the way the scheduled job does until none are left
+
+    Returns:
+        tuple: (reviews resumed, seconds taken)
+    """
+    from controllers.webhook_controller import resume_deferred_reviews
+    from services.firebase_service import get_deferred_sessions
+
+    started = time.perf_counter()
+    resumed = 0
+    while get_deferred_sessions(1):
+        count = resume_deferred_reviews(limit=batch)
+        if not count:
+            break
+        resumed += count
+    return resumed, time.perf_counter() - started
+
+def summarize(results, backends, elapsed, drained, final_states):
+    """Throughput, per-step latency percentiles, error rates and backend usage"""
+    requests_made = sum(len(samples) for samples in results.steps.values())
+    conversations = sum(results.outcomes.values())
+    steps = {}
+    for name, samples in results.steps.items():
+        samples = sorted(samples)
+        steps[name] = {
+            'count': len(samples),
+            'errors': results.errors[name],
+            'error_rate': round(results.errors[name] / len(samples), 4),
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 1),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 1),
+            'max_ms': round(samples[-1] * 1000, 1)
+        }
+
+    return {
+        'conversations': conversations,
+        'requests': requests_made,
+        'elapsed_seconds': round(elapsed, 2),
+        'conversations_per_second': round(conversations / elapsed, 2) if elapsed else None,
+        'requests_per_second': round(requests_made / elapsed, 2) if elapsed else None,
+        'outcomes': dict(results.outcomes),
+        'failed_at': dict(results.failed_at),
+        'conversation_error_rate': round(results.outcomes['failed'] / conversations, 4) if conversations else None,
+        'deferred_resumed': drained[0],
+        'drain_seconds': round(drained[1], 2),
+        'final_states': dict(final_states),
+        'steps': steps,
+        'backend_calls': {
+            'twilio': dict(backends.twilio.calls),
+            'paystack': dict(backends.paystack.calls),
+            'cv_api': dict(backends.cv_api.calls),
+            'firestore': {'reads': backends.firestore.reads, 'writes': backends.firestore.writes},
+            'storage_bytes': backends.bucket.total_bytes()
+        }
+    }
+
+def print_summary(summary):
+    print(f"💬 {summary['conversations']} conversations, {summary['requests']} requests in {summary['elapsed_seconds']}s")
+    print(f"🚀 {summary['conversations_per_second']} conversations/s, {summary['requests_per_second']} requests/s")
+    print(f"📊 Outcomes: {summary['outcomes']}, failed at: {summary['failed_at'] or '-'}")
+    print(f"⏳ Resumed {summary['deferred_resumed']} deferred reviews in {summary['drain_seconds']}s, final states: {summary['final_states']}")
+    print()
+    print(f"{'step':<18} {'count':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, step in summary['steps'].items():
+        print(f"{name:<18} {step['count']:>6} {step['errors']:>7} {step['p50_ms']:>9} {step['p95_ms']:>9} {step['p99_ms']:>9} {step['max_ms']:>9}")
+    print()
+    for name, calls in summary['backend_calls'].items():
+        print(f"🔌 {name}: {calls}")
+
+def main():
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description='Drive simulated WhatsApp conversations through the Flask app against in-process fake backends')
+    parser.add_argument('--conversations', type=int, default=1000, help='Simulated users, each running one conversation')
+    parser.add_argument('--concurrency', type=int, default=32, help='Conversations in flight at once')
+    parser.add_argument('--advanced-share', type=float, default=0.2, help='Share of users choosing the paid advanced review')
+    parser.add_argument('--latency', action='append', default=[], metavar='BACKEND=MEDIAN[:P95[:ERROR_RATE]]',
+                        help='Override a backend latency model in seconds, e.g. cv_api=4:12:0.05 (repeatable)')
+    parser.add_argument('--instant', action='store_true', help='Start from zero latency instead of the typical profile')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='Factor applied to every backend delay')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the delays, failures and conversation mix')
+    parser.add_argument('--backend', choices=['firebase', 'sqlite', 'memory'], default=None,
+                        help='Storage backend, defaults to STORAGE_BACKEND; firebase uses the fake Firestore and bucket')
+    parser.add_argument('--log-level', default='ERROR', help='Application log level during the run')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    # Read by Config when the app is imported
+    os.environ['LOG_LEVEL'] = args.log_level
+    os.environ.setdefault('PROFILE_ENABLED', 'false')
+    if args.backend:
+        os.environ['STORAGE_BACKEND'] = args.backend
+
+    from tests.fakes import install, LatencyModel, DEFAULT_PROFILE
+
+    latency = {} if args.instant else dict(DEFAULT_PROFILE)
+    for override in args.latency:
+        name, _, spec = override.partition('=')
+        latency[name] = LatencyModel.parse(spec)
+
+    backends = install(latency, scale=args.latency_scale, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    with backends, tempfile.TemporaryDirectory() as workdir:
+        # Reviews download CVs into ./uploads
+        os.chdir(workdir)
+
+        from twilio.request_validator import RequestValidator
+        from app import app
+        from services.twilio_service import get_firebase_webhook_url
+
+        signer = RequestValidator(backends.twilio.auth_token)
+        webhook_url = get_firebase_webhook_url()
+        cv = make_cv_pdf()
+        clients = threading.local()
+        results = Results()
+
+        def run(index, advanced):
+            if not hasattr(clients, 'client'):
+                clients.client = app.test_client()
+            return Conversation(clients.client, backends, signer, webhook_url, index, advanced, cv).run(results)
+
+        mix = [rng.random() < args.advanced_share for _ in range(args.conversations)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            senders = [sender for sender, _ in executor.map(run, range(args.conversations), mix)]
+        elapsed = time.perf_counter() - started
+
+        drained = drain_deferred(backends, args.concurrency)
+        final_states = Counter((peek_session(backends, sender) or {}).get('state') for sender in senders)
+        summary = summarize(results, backends, elapsed, drained, final_states)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+    return 0 if not results.outcomes['failed'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# scripts/migrate_sessions.py - Move profile and history fields off session documents
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Make the sherlock-bot modules importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot'))
+
+# Load environment variables
+load_dotenv()
+
+from firebase_init import initialize_firebase
+from models.user import User
+
+def main():
+    """Split existing sessions into conversation state and user profiles"""
+    parser = argparse.ArgumentParser(description='Move email, payment details and review history from sessions/{phone} to users/{phone}')
+    parser.add_argument('--dry-run', action='store_true', help='Count sessions to migrate without writing')
+    parser.add_argument('--batch-size', type=int, default=70, help='Sessions per write batch (max 71)')
+    args = parser.parse_args()
+
+    if not initialize_firebase():
+        print("❌ Firebase initialization failed")
+        return 1
+
+    counts = User.migrate_sessions(dry_run=args.dry_run, batch_size=min(args.batch_size, 71))
+
+    print(f"{'🔎' if args.dry_run else '✅'} {counts['migrated']} of {counts['scanned']} sessions {'to migrate' if args.dry_run else 'migrated'}, {counts['profiles']} new profiles")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# scripts/migrate_timestamps.py - Convert ISO string timestamps to native Firestore timestamps
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Make the sherlock-bot modules importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot'))
+
+# Load environment variables
+load_dotenv()
+
+from firebase_init import initialize_firebase
+from models.timestamp_migration import TimestampMigration
+
+def main():
+    """Rewrite created_at, timestamp and last_activity strings as UTC timestamps"""
+    parser = argparse.ArgumentParser(description='Migrate string timestamps to native Firestore timestamps (resumable)')
+    parser.add_argument('--collection', action='append', choices=sorted(TimestampMigration.FIELDS),
+                        help='Collection to migrate (repeatable, default: all)')
+    parser.add_argument('--ops-per-second', type=int, default=200, help='Write rate cap (default: 200)')
+    parser.add_argument('--page-size', type=int, default=500, help='Documents per page and checkpoint (default: 500)')
+    parser.add_argument('--restart', action='store_true', help='Ignore saved checkpoints')
+    parser.add_argument('--dry-run', action='store_true', help='Count documents to convert without writing')
+    args = parser.parse_args()
+
+    if not initialize_firebase():
+        print("❌ Firebase initialization failed")
+        return 1
+
+    results = TimestampMigration.run(
+        args.collection,
+        ops_per_second=args.ops_per_second,
+        page_size=args.page_size,
+        restart=args.restart,
+        dry_run=args.dry_run
+    )
+
+    failed = 0
+    for collection, counts in results.items():
+        failed += counts['failed']
+        print(f"{'🔎' if args.dry_run else '✅'} {collection}: {counts['converted']} of {counts['scanned']} converted, {counts['failed']} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# scripts/run_retention.py - Run the data retention job by hand
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Make the sherlock-bot modules importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sherlock-bot'))
+
+# Load environment variables
+load_dotenv()
+
+from firebase_init import initialize_firebase
+from services.retention_service import run_retention
+
+def main():
+    """Archive old reviews and sessions and expire old uploads and reports"""
+    parser = argparse.ArgumentParser(description='Apply the RETENTION_* windows once, as the daily scheduled job does')
+    parser.add_argument('--dry-run', action='store_true', help='Count what would be archived or deleted without changing anything')
+    args = parser.parse_args()
+
+    if not initialize_firebase():
+        print("❌ Firebase initialization failed")
+        return 1
+
+    summary = run_retention(dry_run=args.dry_run)
+
+    for name, value in summary.items():
+        print(f"{'🔎' if args.dry_run else '✅'} {name}: {value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
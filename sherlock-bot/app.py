@@ -2,7 +2,8 @@
 import os
 import sys
 import traceback
-from flask import Flask, request, jsonify
+import time
+from flask import Flask, request, jsonify, g
 
 # Only load environment variables if not in Cloud Functions
 if not os.getenv('K_SERVICE') and not os.getenv('FUNCTION_TARGET'):
@@ -10,9 +11,14 @@ if not os.getenv('K_SERVICE') and not os.getenv('FUNCTION_TARGET'):
     load_dotenv()
 
 # Initialize logging immediately
-from utils.logger import setup_logger
+from utils.logger import setup_logger, lazy
+from utils.metrics import HTTP_REQUEST_SECONDS
 logger = setup_logger()
 
+# Python allocation tracing for per-stage memory peaks, when MEMORY_TRACEMALLOC is set
+from utils.memory import start_tracemalloc
+start_tracemalloc()
+
 # Initialize Flask app
 app = Flask(__name__, 
     static_folder='static',
@@ -26,18 +32,22 @@ try:
 except Exception as e:
     logger.error(f"❌ Error loading configuration: {str(e)}")
 
-# Initialize Firebase
+# Initialize Firebase (the local storage backends run without it)
+from config import Config
 firebase_initialized = False
-try:
-    from firebase_init import initialize_firebase
-    firebase_initialized = initialize_firebase()
-    if not firebase_initialized:
-        logger.error("❌ Firebase initialization failed, application may not function correctly")
-    else:
-        logger.info("✅ Firebase initialized successfully")
-except Exception as e:
-    logger.error(f"❌ Firebase initialization error: {str(e)}")
-    firebase_initialized = False
+if Config.STORAGE_BACKEND == 'firebase':
+    try:
+        from firebase_init import initialize_firebase
+        firebase_initialized = initialize_firebase()
+        if not firebase_initialized:
+            logger.error("❌ Firebase initialization failed, application may not function correctly")
+        else:
+            logger.info("✅ Firebase initialized successfully")
+    except Exception as e:
+        logger.error(f"❌ Firebase initialization error: {str(e)}")
+        firebase_initialized = False
+else:
+    logger.info(f"🗄️ Using {Config.STORAGE_BACKEND} storage backend, skipping Firebase initialization")
 
 # Register blueprints IMMEDIATELY - this is critical for Cloud Functions
 try:
@@ -62,7 +72,28 @@ try:
 except Exception as e:
     logger.error(f"❌ Error registering admin routes: {str(e)}")
 
+try:
+    from routes.metrics_routes import metrics_bp
+    app.register_blueprint(metrics_bp)
+    logger.info("✅ Metrics route registered at /metrics")
+except Exception as e:
+    logger.error(f"❌ Error registering metrics route: {str(e)}")
+
 # Register middlewares
+try:
+    from middlewares.tracing_middleware import register_tracing
+    register_tracing(app)
+    logger.info("✅ Tracing middleware registered")
+except Exception as e:
+    logger.error(f"❌ Error registering tracing middleware: {str(e)}")
+
+try:
+    from middlewares.accounting_middleware import register_firestore_accounting
+    register_firestore_accounting(app)
+    logger.info("✅ Firestore accounting middleware registered")
+except Exception as e:
+    logger.error(f"❌ Error registering Firestore accounting middleware: {str(e)}")
+
 try:
     from middlewares.auth_middleware import auth_middleware
     app.before_request(auth_middleware)
@@ -80,13 +111,22 @@ except Exception as e:
 # Add request logging for debugging
 @app.before_request
 def log_request_info():
-    logger.info(f"🔄 {request.method} {request.path}")
-    if request.form:
-        logger.info(f"📝 Form data keys: {list(request.form.keys())}")
+    g.request_started = time.perf_counter()
+    logger.debug("🔄 %s %s", request.method, request.path)
+    logger.debug("📝 Form data keys: %s", lazy(lambda: sorted(request.form.keys())))
 
 @app.after_request
 def log_response_info(response):
-    logger.info(f"✅ Response: {response.status_code} for {request.path}")
+    logger.info("✅ Response: %s for %s %s", response.status_code, request.method, request.path)
+    
+    # Label by route pattern, not raw path, so IDs do not create new series
+    if 'request_started' in g:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - g.request_started,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
     return response
 
 # Root endpoint
@@ -105,6 +145,7 @@ def health_check():
     return jsonify({
         'status': 'ok',
         'firebase': 'connected' if firebase_initialized else 'disconnected',
+        'storage_backend': Config.STORAGE_BACKEND,
         'region': 'africa-south1',
         'environment': os.getenv('FLASK_ENV', 'production')
     })
@@ -25,6 +25,12 @@ class Config:
     # Firebase configuration
     STORAGE_BUCKET = os.getenv('STORAGE_BUCKET', 'cvreview-d1d4b.firebasestorage.app')
     
+    # Where sessions, reviews, payments and files live: 'firebase', 'sqlite' (plus a local folder) or 'memory'
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firebase')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/sherlock.db')
+    LOCAL_BLOB_DIR = os.getenv('LOCAL_BLOB_DIR', 'data/blobs')
+    LOCAL_BLOB_URL = os.getenv('LOCAL_BLOB_URL', '')  # public URL the blob folder is served at, file:// links if empty
+    
     # Paystack configuration
     PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
     PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY')
@@ -36,6 +42,10 @@ class Config:
     
     # CV Analysis API
     CV_ANALYSIS_API_URL = os.getenv('CV_ANALYSIS_API_URL', 'https://cv-review-1.onrender.com/api/upload-and-analyze')
+    BASIC_REVIEW_API_DEADLINE = int(os.getenv('BASIC_REVIEW_API_DEADLINE', 25))  # seconds to wait for follow-up insights
+    
+    # Report rendering: 'reportlab' or 'native' (built-in writer, no reportlab import)
+    REPORT_RENDERER = os.getenv('REPORT_RENDERER', 'reportlab')
     
     # Payment configuration
     ADVANCED_REVIEW_PRICE = int(os.getenv('ADVANCED_REVIEW_PRICE', 5000))
@@ -59,12 +69,48 @@ class Config:
     # Admin configuration
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD')
+    ADMIN_DASHBOARD_CACHE_TTL = float(os.getenv('ADMIN_DASHBOARD_CACHE_TTL', 5))  # seconds, 0 disables
+    
+    # Bearer token for scraping /metrics (admins can also view it when logged in)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # On-demand profiling from the admin UI
+    PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'true').lower() == 'true'
+    PROFILE_POLL_SECONDS = float(os.getenv('PROFILE_POLL_SECONDS', 30))  # how often instances check for arming
+    PROFILE_INTERVAL_MS = int(os.getenv('PROFILE_INTERVAL_MS', 10))  # default sampling interval
+    PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))  # hard cap per capture
+    PROFILE_ARM_SECONDS = int(os.getenv('PROFILE_ARM_SECONDS', 3600))  # unused captures lapse after this
+    
+    # Review admission: memory reviews may use on one 512 MB instance, and how long one waits for room before it is deferred
+    MEMORY_BUDGET_MB = int(os.getenv('MEMORY_BUDGET_MB', 320))
+    ADMISSION_WAIT_SECONDS = float(os.getenv('ADMISSION_WAIT_SECONDS', 20))
+    MEMORY_TRACEMALLOC = os.getenv('MEMORY_TRACEMALLOC', 'false').lower() == 'true'  # per-stage Python allocation peaks, slows allocations
+    
+    # Review latency targets in seconds from request to results sent, and how often instances flush latencies to rollups
+    LATENCY_SLO_BASIC_SECONDS = float(os.getenv('LATENCY_SLO_BASIC_SECONDS', 60))
+    LATENCY_SLO_ADVANCED_SECONDS = float(os.getenv('LATENCY_SLO_ADVANCED_SECONDS', 180))
+    LATENCY_FLUSH_SECONDS = float(os.getenv('LATENCY_FLUSH_SECONDS', 60))
     
     # Session configuration
     SESSION_LIFETIME = int(os.getenv('SESSION_LIFETIME', 3600))  # 1 hour
     
+    # Data retention in days (0 keeps data forever)
+    RETENTION_REVIEW_DAYS = int(os.getenv('RETENTION_REVIEW_DAYS', 365))
+    RETENTION_SESSION_DAYS = int(os.getenv('RETENTION_SESSION_DAYS', 180))
+    RETENTION_REPORT_DAYS = int(os.getenv('RETENTION_REPORT_DAYS', 180))
+    RETENTION_CV_UPLOAD_DAYS = int(os.getenv('RETENTION_CV_UPLOAD_DAYS', 30))
+    
     # Logger configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json' if os.getenv('K_SERVICE') else 'text')  # json or text
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'  # format and write on a background thread
+    LOG_DEBUG_SAMPLE_RATES = os.getenv('LOG_DEBUG_SAMPLE_RATES', '')  # e.g. cv_service=0.1,loader=0.01
+    LOG_REDACT_PHONES = os.getenv('LOG_REDACT_PHONES', 'true').lower() == 'true'
+    
+    # Tracing: share of traces whose spans are exported, and where to (both empty disables export)
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.1))
+    TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', '')  # JSONL file, one trace per line
+    TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', '')  # e.g. http://localhost:4318/v1/traces
     
     # Production flags
     IS_PRODUCTION = os.getenv('FLASK_ENV') == 'production'
@@ -1,16 +1,21 @@
 # controllers/cv_controller.py - Production Direct File Upload Only
 import os
-from datetime import datetime
-from services.firebase_service import get_file_download_url
+import time
+from services.firebase_service import get_file_download_url, download_bytes_from_storage
 from services.cv_service import process_basic_review, process_advanced_review
 from services.firestore_service import save_review_result, get_review
 from services.sendgrid_service import send_review_email
+from services.profiling_service import profiled
 from utils.logger import get_logger
+from utils.memory import job_memory, current_job, MB
+from utils.metrics import stage, REVIEW_SECONDS, REVIEW_OUTCOMES, REVIEWS_IN_FLIGHT, REVIEW_PEAK_RSS_BYTES
+from utils.timestamps import utc_now
+from utils.tracing import span, current_trace_id
 
 # Initialize logger
 logger = get_logger()
 
-def process_cv_upload(storage_path, review_type, phone_number, email=None):
+def process_cv_upload(storage_path, review_type, phone_number, email=None, on_insights=None):
     """
     Process CV file from Firebase Storage
     
@@ -19,10 +24,31 @@ def process_cv_upload(storage_path, review_type, phone_number, email=None):
         review_type (str): Type of review (basic or advanced)
         phone_number (str): User's phone number
         email (str, optional): User's email address
+        on_insights (callable, optional): Receives early insights of a basic review
         
     Returns:
         dict: Review results
     """
+    started = time.perf_counter()
+    REVIEWS_IN_FLIGHT.inc(review_type=review_type)
+    
+    try:
+        with span('review', review_type=review_type) as review_span, profiled('review', review_type), \
+                job_memory(review_type) as memory:
+            review_result = _process_cv_upload(storage_path, review_type, phone_number, email, on_insights)
+            if review_span is not None and review_result.get('id'):
+                review_span.set_attribute('review_id', review_result['id'])
+    finally:
+        REVIEWS_IN_FLIGHT.dec(review_type=review_type)
+    
+    REVIEW_SECONDS.observe(time.perf_counter() - started, review_type=review_type)
+    REVIEW_PEAK_RSS_BYTES.observe(memory.peak_rss, review_type=review_type)
+    logger.info(f"🧠 {review_type} review peaked at {memory.peak_rss / MB:.0f} MB RSS (+{(memory.peak_rss - memory.rss_start) / MB:.0f} MB)")
+    REVIEW_OUTCOMES.inc(review_type=review_type, outcome='success' if review_result.get('success') else 'error')
+    return review_result
+
+def _process_cv_upload(storage_path, review_type, phone_number, email, on_insights):
+    """Review, email and save steps of process_cv_upload"""
     logger.info(f"🚀 Starting CV processing for {review_type} review")
     logger.info(f"📁 Storage path: {storage_path}")
     
@@ -31,7 +57,7 @@ def process_cv_upload(storage_path, review_type, phone_number, email=None):
         logger.info(f"🔄 Starting {review_type} review processing...")
         
         if review_type == 'basic':
-            review_result = process_basic_review(storage_path)
+            review_result = process_basic_review(storage_path, on_insights=on_insights)
         else:
             review_result = process_advanced_review(storage_path)
         
@@ -44,23 +70,39 @@ def process_cv_upload(storage_path, review_type, phone_number, email=None):
                 'error': error_msg
             }
         
+        # Report PDF is only needed for the email attachment, never stored
+        report_bytes = review_result.pop('report_bytes', None)
+        
         # Add metadata
-        review_result['timestamp'] = datetime.now().isoformat()
+        review_result['timestamp'] = utc_now()
         review_result['review_type'] = review_type
         review_result['cv_storage_path'] = storage_path
         
+        # Lets a slow review be looked up in the logs and trace export
+        review_result['trace_id'] = current_trace_id()
+        
+        # Peak memory per stage, for tuning the admission controller's estimates
+        if current_job() is not None:
+            review_result['memory'] = current_job().summary()
+        
         # Handle email for advanced review
         if email and review_type == 'advanced':
             download_link = review_result.get('download_link', '')
             
             if download_link:
                 try:
-                    email_result = send_review_email(
-                        email,
-                        phone_number,
-                        review_result,
-                        download_link
-                    )
+                    # Reused reports were not rendered in this run, fetch the stored copy
+                    if report_bytes is None and review_result.get('report_path'):
+                        report_bytes = download_bytes_from_storage(review_result['report_path'])
+                    
+                    with stage(review_type, 'email'):
+                        email_result = send_review_email(
+                            email,
+                            phone_number,
+                            review_result,
+                            download_link,
+                            report_bytes=report_bytes
+                        )
                     review_result['email_sent'] = email_result.get('success', False)
                     review_result['email'] = email
                     logger.info(f"📧 Email sent to {email}: {email_result.get('success', False)}")
@@ -70,7 +112,8 @@ def process_cv_upload(storage_path, review_type, phone_number, email=None):
         
         # Save review to Firestore
         try:
-            review_id = save_review_result(phone_number, review_result)
+            with stage(review_type, 'save'):
+                review_id = save_review_result(phone_number, review_result)
             review_result['id'] = review_id
             logger.info(f"💾 Review saved with ID: {review_id}")
         except Exception as save_error:
@@ -5,6 +5,7 @@ from flask import request, jsonify, url_for
 from services.paystack_service import create_payment_session, verify_payment
 from services.firebase_service import get_user_session, update_user_session
 from services.twilio_service import send_whatsapp_message
+from models.payment import Payment
 from utils.logger import get_logger
 from config import Config
 
@@ -130,6 +131,16 @@ def handle_successful_payment(data):
             logger.warning(f"Payment verification failed for {reference}: {verification.get('error')}")
             return jsonify({'status': 'error', 'message': 'Payment verification failed'}), 400
         
+        # Record the payment (idempotent per reference)
+        Payment.record({
+            'reference': reference,
+            'user_id': formatted_phone,
+            'amount': verification.get('amount'),
+            'currency': verification.get('currency'),
+            'status': 'completed',
+            'payment_date': verification.get('payment_date')
+        })
+        
         # Get user session
         session = get_user_session(formatted_phone)
         
@@ -2,16 +2,22 @@
 import os
 import time
 import traceback
-from datetime import datetime
 from flask import request
 from twilio.twiml.messaging_response import MessagingResponse
-from services.firebase_service import get_user_session, update_user_session, upload_cv_to_storage
+from services.firebase_service import get_user_session, update_user_session, upload_cv_to_storage, get_deferred_sessions
+from services.admission_service import admission, estimate_review_memory
+from services.latency_service import record_job, job_started, job_finished
+from services.cv_service import BASIC_INSIGHTS_SHOWN
 from services.twilio_service import send_whatsapp_message
 from controllers.cv_controller import process_cv_upload
 from controllers.payment_controller import create_payment_link
 from utils.logger import get_logger
-from utils.file_utils import save_temp_file, get_file_extension, allowed_file
+from utils.metrics import stage
+from utils.latency import job_timing
+from utils.tracing import current_trace_id
+from utils.file_utils import save_temp_file, get_file_extension, allowed_file, count_pages
 from utils.validation import validate_email
+from utils.timestamps import utc_now, to_datetime
 from config import Config
 
 # Initialize logger
@@ -38,7 +44,7 @@ def handle_whatsapp_message(request):
     Returns:
         Response: TwiML response
     """
-    logger.info("🚀 Starting production WhatsApp message handler")
+    logger.debug("🚀 Starting production WhatsApp message handler")
     
     try:
         # Extract message data
@@ -46,14 +52,14 @@ def handle_whatsapp_message(request):
         sender = request.form.get('From', '')
         num_media = int(request.form.get('NumMedia', 0))
         
-        logger.info(f"📨 Message received from {sender}: {message_body}")
-        logger.info(f"📎 Number of media attachments: {num_media}")
+        logger.info("📨 Message received from %s (%d chars, %d attachments)", sender, len(message_body), num_media)
+        logger.debug("💬 Message body: %s", message_body)
         
         # Get or create user session
         session = get_user_session(sender)
         current_state = session.get('state', STATES['WELCOME'])
         
-        logger.info(f"👤 User state: {current_state}")
+        logger.debug("👤 User state: %s", current_state)
         
         # Create TwiML response
         resp = MessagingResponse()
@@ -161,9 +167,11 @@ def handle_awaiting_cv_state(resp, session, sender, message_body, num_media, req
             storage_path = upload_cv_to_storage(local_file_path, sender)
             logger.info(f"☁️ CV uploaded to Firebase: {storage_path}")
             
-            # Store in session
+            # Store in session, with what the admission controller needs to project the review's memory
             session['cv_storage_path'] = storage_path
             session['cv_file_name'] = f"cv.{file_extension}"
+            session['cv_file_size'] = os.path.getsize(local_file_path)
+            session['cv_page_count'] = count_pages(local_file_path)
             session['state'] = STATES['AWAITING_REVIEW_TYPE']
             update_user_session(sender, session)
             
@@ -322,8 +330,8 @@ def handle_completed_state(resp, session, sender, message_body):
         session = {
             'phone_number': sender,
             'state': STATES['WELCOME'],
-            'created_at': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
+            'created_at': utc_now(),
+            'last_activity': utc_now()
         }
         update_user_session(sender, session)
         handle_welcome_state(resp, session, sender, 'start')
@@ -332,7 +340,31 @@ def handle_completed_state(resp, session, sender, message_body):
 
 
 def process_cv_async(sender, session, review_type, email=None):
-    """Process CV review asynchronously"""
+    """Process CV review asynchronously, recording its time from request to results sent"""
+    # A resumed review has already waited since it was deferred
+    deferred_at = to_datetime(session.get('deferred_at'))
+    
+    job_started()
+    try:
+        with job_timing(review_type) as timing:
+            result = _process_cv_async(sender, session, review_type, email)
+        
+        if result is not None:
+            record_job(
+                timing,
+                'success' if result.get('success') else 'error',
+                review_id=result.get('id'),
+                trace_id=current_trace_id(),
+                queued_seconds=max((utc_now() - deferred_at).total_seconds() - timing.elapsed(), 0) if deferred_at else 0
+            )
+    
+    finally:
+        # The last running review writes out latencies the periodic flush has not
+        job_finished()
+
+
+def _process_cv_async(sender, session, review_type, email):
+    """Steps of process_cv_async, returning the review result (None if it did not run)"""
     try:
         # Get CV storage path from session
         cv_storage_path = session.get('cv_storage_path')
@@ -341,25 +373,49 @@ def process_cv_async(sender, session, review_type, email=None):
             send_whatsapp_message(sender, "❌ Error: CV file not found. Please start over by typing 'start'.")
             session['state'] = STATES['WELCOME']
             update_user_session(sender, session)
-            return
+            return None
         
         # Process the CV
         logger.info(f"Processing CV from storage: {cv_storage_path}")
         
-        # Process CV using storage path
-        result = process_cv_upload(cv_storage_path, review_type, sender, email)
+        # Basic reviews send the fast internal insights before the API has answered
+        delivered = []
+        on_insights = None
+        if review_type == 'basic':
+            def on_insights(insights):
+                send_basic_review_insights(sender, insights)
+                delivered.extend(insights)
+        
+        # Wait for room or defer when the reviews on this instance would exceed the memory budget
+        estimate = estimate_review_memory(review_type, session.get('cv_file_size'), session.get('cv_page_count'))
+        with admission(review_type, estimate) as admitted:
+            if not admitted:
+                defer_review(sender, session, email)
+                return None
+            
+            if session.get('deferred_at'):
+                session['deferred_at'] = None
+                session['deferred_email'] = None
+                update_user_session(sender, session)
+            
+            # Process CV using storage path
+            result = process_cv_upload(cv_storage_path, review_type, sender, email, on_insights=on_insights)
         
         if result.get('success'):
             # Update session state to COMPLETED FIRST
             session['state'] = STATES['COMPLETED']
-            session['last_review'] = result
+            session['last_review_id'] = result.get('id')
             update_user_session(sender, session)
             
             # Send results
-            if review_type == 'basic':
-                send_basic_review_results(sender, result)
-            else:
-                send_advanced_review_results(sender, result)
+            with stage(review_type, 'send_results'):
+                if review_type == 'basic' and delivered:
+                    send_basic_review_followup(sender, result.get('followup_insights', []), len(delivered) + 1)
+                    send_basic_review_next_steps(sender)
+                elif review_type == 'basic':
+                    send_basic_review_results(sender, result)
+                else:
+                    send_advanced_review_results(sender, result)
             
         else:
             error_msg = result.get('error', 'Unknown error occurred')
@@ -368,6 +424,8 @@ def process_cv_async(sender, session, review_type, email=None):
             # Reset state
             session['state'] = STATES['WELCOME']
             update_user_session(sender, session)
+        
+        return result
             
     except Exception as e:
         logger.error(f"Error in process_cv_async: {str(e)}")
@@ -376,6 +434,47 @@ def process_cv_async(sender, session, review_type, email=None):
         # Reset state
         session['state'] = STATES['WELCOME']
         update_user_session(sender, session)
+        return {'success': False, 'error': str(e)}
+
+
+def defer_review(sender, session, email=None):
+    """Park a review until resume_deferred_reviews finds memory for it"""
+    # A review deferred again keeps its place in the line
+    if session.get('deferred_at'):
+        return
+    
+    session['deferred_at'] = utc_now()
+    session['deferred_email'] = email
+    update_user_session(sender, session)
+    
+    send_whatsapp_message(sender, "⏳ We're reviewing a lot of CVs right now. Yours is in the queue and will start within a few minutes, no need to send it again.")
+
+
+def resume_deferred_reviews(limit=5):
+    """
+    Start reviews deferred by the admission controller, oldest first
+    
+    Args:
+        limit (int): Maximum number of reviews to start
+        
+    Returns:
+        int: Reviews started (the rest stay deferred)
+    """
+    started = 0
+    
+    for sender, session in get_deferred_sessions(limit):
+        if session.get('state') != STATES['PROCESSING']:
+            # The user restarted or the session expired meanwhile
+            session['deferred_at'] = None
+            update_user_session(sender, session)
+            continue
+        
+        process_cv_async(sender, session, session.get('review_type', 'basic'), email=session.get('deferred_email'))
+        if not session.get('deferred_at'):
+            started += 1
+    
+    logger.info(f"⏳ Resumed {started} deferred reviews")
+    return started
 
 
 def send_basic_review_results(sender, result):
@@ -383,6 +482,16 @@ def send_basic_review_results(sender, result):
     insights = result.get('insights', [])
     
     # Send complete insights across multiple messages
+    messages_sent = send_basic_review_insights(sender, insights)
+    
+    if send_basic_review_next_steps(sender):
+        messages_sent += 1
+    
+    logger.info(f"✅ Basic review results sent to {sender} in {messages_sent} messages")
+
+
+def send_basic_review_insights(sender, insights):
+    """Send the basic review header and first insights, returning the number of messages sent"""
     messages_sent = 0
     
     # Message 1: Header + First 2-3 insights
@@ -400,13 +509,32 @@ def send_basic_review_results(sender, result):
     if len(insights) > 3:
         message2 = "🔍 **Additional Recommendations:**"
         
-        for i, insight in enumerate(insights[3:6], start=4):
+        for i, insight in enumerate(insights[3:BASIC_INSIGHTS_SHOWN], start=4):
             message2 += f"\n\n{i}. {insight}"
         
         if send_whatsapp_message(sender, message2).get('success'):
             messages_sent += 1
     
-    # Final message: Next steps
+    return messages_sent
+
+
+def send_basic_review_followup(sender, insights, start=1):
+    """Send extra insights that arrived after the first delivery"""
+    if not insights:
+        return False
+    
+    message = "🧠 **More Insights from our CV Analyzer:**"
+    
+    for i, insight in enumerate(insights[:4], start=start):
+        message += f"\n\n{i}. {insight}"
+    
+    sent = send_whatsapp_message(sender, message).get('success', False)
+    logger.info(f"✅ Sent {min(len(insights), 4)} follow-up insights to {sender}")
+    return sent
+
+
+def send_basic_review_next_steps(sender):
+    """Send the closing message of a basic review"""
     final_message = """💡 **Next Steps:**
 1. Update your CV based on these suggestions
 2. Consider our Advanced Review for detailed analysis
@@ -414,10 +542,7 @@ def send_basic_review_results(sender, result):
 
 Type 'start' to review another CV or upgrade to Advanced Review for comprehensive analysis with a professional PDF report!"""
     
-    if send_whatsapp_message(sender, final_message).get('success'):
-        messages_sent += 1
-    
-    logger.info(f"✅ Basic review results sent to {sender} in {messages_sent} messages")
+    return send_whatsapp_message(sender, final_message).get('success', False)
 
 
 def send_advanced_review_results(sender, result):
@@ -3,6 +3,7 @@ import os
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
 from utils.logger import get_logger
+from utils.firestore_accounting import install as install_firestore_accounting
 
 # Initialize logger
 logger = get_logger()
@@ -59,6 +60,10 @@ def initialize_firebase():
         # Test the connection
         logger.info("Testing Firebase connection...")
         db = firestore.client()
+        
+        # Count reads, writes and deletes per request and job
+        install_firestore_accounting(db)
+        
         bucket = storage.bucket()
         logger.info(f"✅ Storage bucket name: {bucket.name}")
         logger.info(f"✅ Firestore connected successfully")
@@ -0,0 +1,43 @@
+# middlewares/accounting_middleware.py - Attribute Firestore operations to the route serving them
+from flask import request, g
+from utils.firestore_accounting import begin_scope, end_scope
+from utils.logger import get_logger
+from config import Config
+
+# Initialize logger
+logger = get_logger()
+
+def register_firestore_accounting(app):
+    """
+    Register Firestore accounting hooks for the Flask app
+    
+    Operations made while handling a request are counted against its route
+    pattern, logged when the request ends and added to /metrics. Outside
+    production the totals are also returned in the X-Firestore-Ops header.
+    
+    Args:
+        app: Flask app instance
+        
+    Returns:
+        None
+    """
+    @app.before_request
+    def start_firestore_scope():
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.firestore_scope = begin_scope(f"{request.method} {route}")
+    
+    @app.after_request
+    def add_firestore_header(response):
+        if not Config.IS_PRODUCTION and 'firestore_scope' in g:
+            summary = g.firestore_scope[0].summary()
+            response.headers['X-Firestore-Ops'] = (
+                f"reads={summary['reads']}; writes={summary['writes']}; "
+                f"deletes={summary['deletes']}; bytes={summary['bytes']}"
+            )
+        return response
+    
+    @app.teardown_request
+    def finish_firestore_scope(error=None):
+        handle = g.pop('firestore_scope', None)
+        if handle is not None:
+            end_scope(handle)
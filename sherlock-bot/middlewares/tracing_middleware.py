@@ -0,0 +1,43 @@
+# middlewares/tracing_middleware.py - Start a trace for every inbound request
+from flask import request, g
+from utils.tracing import begin_trace, end_trace
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+def register_tracing(app):
+    """
+    Register request tracing hooks for the Flask app
+    
+    Must be registered before other before_request hooks so their log lines
+    carry the trace ID too. An incoming W3C traceparent header is continued,
+    and the trace ID is returned in the X-Trace-Id response header.
+    
+    Args:
+        app: Flask app instance
+        
+    Returns:
+        None
+    """
+    @app.before_request
+    def start_request_trace():
+        g.trace = begin_trace(
+            f"{request.method} {request.path}",
+            request.headers.get('traceparent'),
+            method=request.method,
+            path=request.path
+        )
+    
+    @app.after_request
+    def add_trace_header(response):
+        if 'trace' in g:
+            g.trace[0].set_attribute('status', response.status_code)
+            response.headers['X-Trace-Id'] = g.trace[0].trace.trace_id
+        return response
+    
+    @app.teardown_request
+    def finish_request_trace(error=None):
+        handle = g.pop('trace', None)
+        if handle is not None:
+            end_trace(handle, error)
@@ -0,0 +1,225 @@
+# models/aggregate.py - Maintained counters and sums for dashboard totals
+import random
+from firebase_admin import firestore
+from utils.logger import get_logger
+from utils.timestamps import utc_now
+
+# Initialize logger
+logger = get_logger()
+
+class Aggregate:
+    """
+    Sharded counter documents
+
+    Each aggregate lives at aggregates/{name} with NUM_SHARDS shard documents
+    holding partial 'count' and 'sum' values. Writers increment one random shard
+    in the same batch as the document they create, readers add up the shards.
+    The first read of an aggregate seeds a base value from a Firestore
+    aggregation query so history written before the counters existed is included.
+    """
+
+    COLLECTION = 'aggregates'
+    NUM_SHARDS = 10
+
+    # Aggregate name -> (collection, filters, summed field) used for seeding.
+    # Users are counted from their profiles, which outlive archived sessions.
+    SOURCES = {
+        'users': ('users', [], None),
+        'reviews': ('reviews', [], None),
+        'reviews_basic': ('reviews', [('review_type', '==', 'basic')], None),
+        'reviews_advanced': ('reviews', [('review_type', '==', 'advanced')], None),
+        'payments': ('payments', [], 'amount')
+    }
+
+    @classmethod
+    def _shard_refs(cls, db, name):
+        parent = db.collection(cls.COLLECTION).document(name)
+        return parent, [parent.collection('shards').document(str(i)) for i in range(cls.NUM_SHARDS)]
+
+    @classmethod
+    def increment(cls, batch, name, count=1, amount=0):
+        """
+        Add an increment to a write batch
+
+        Args:
+            batch (WriteBatch): Batch that also holds the document write
+            name (str): Aggregate name
+            count (int): Count delta
+            amount (float): Sum delta
+        """
+        db = firestore.client()
+        shard_ref = db.collection(cls.COLLECTION).document(name).collection('shards').document(
+            str(random.randrange(cls.NUM_SHARDS))
+        )
+
+        values = {'count': firestore.Increment(count)}
+        if amount:
+            values['sum'] = firestore.Increment(amount)
+
+        batch.set(shard_ref, values, merge=True)
+
+    @classmethod
+    def get(cls, name):
+        """
+        Get the current value of an aggregate
+
+        Args:
+            name (str): Aggregate name
+
+        Returns:
+            dict: 'count' and 'sum'
+        """
+        db = firestore.client()
+        parent_ref, shard_refs = cls._shard_refs(db, name)
+
+        # Parent plus shards in one round trip
+        count, total, parent = 0, 0.0, None
+        for snapshot in db.get_all([parent_ref] + shard_refs):
+            if not snapshot.exists:
+                continue
+            data = snapshot.to_dict()
+            if snapshot.reference.path == parent_ref.path:
+                parent = data
+            else:
+                count += data.get('count', 0)
+                total += float(data.get('sum', 0))
+
+        if not parent or not parent.get('seeded'):
+            parent = cls.seed(name, count, total, parent)
+
+        return {
+            'count': count + parent.get('base_count', 0),
+            'sum': total + parent.get('base_sum', 0.0)
+        }
+
+    @classmethod
+    def seed(cls, name, shard_count=0, shard_sum=0.0, parent=None):
+        """
+        Seed the base value of an aggregate from an aggregation query
+
+        Documents already archived out of the source collection are added
+        back, so totals keep counting them.
+
+        Args:
+            name (str): Aggregate name
+            shard_count (int): Count already held by the shards
+            shard_sum (float): Sum already held by the shards
+            parent (dict, optional): Existing parent document data
+
+        Returns:
+            dict: Parent document data
+        """
+        db = firestore.client()
+        collection, filters, sum_field = cls.SOURCES[name]
+
+        query = db.collection(collection)
+        for field, op, value in filters:
+            query = query.where(field, op, value)
+
+        count = cls.query_count(query)
+        total = cls.query_sum(query, sum_field) if sum_field else 0.0
+
+        archived = parent or {}
+        parent = {
+            'base_count': count + archived.get('archived_count', 0) - shard_count,
+            'base_sum': total + archived.get('archived_sum', 0.0) - shard_sum,
+            'seeded': True,
+            'seeded_at': utc_now()
+        }
+        db.collection(cls.COLLECTION).document(name).set(parent, merge=True)
+        logger.info(f"Seeded aggregate {name}: count={count}, sum={total}")
+
+        return parent
+
+    @classmethod
+    def record_archived(cls, name, count, amount=0):
+        """
+        Note documents removed from the source collection
+
+        Totals are all-time values and do not change when documents are
+        archived; this only keeps a later re-seed from losing them.
+
+        Args:
+            name (str): Aggregate name
+            count (int): Documents archived
+            amount (float): Sum of their summed field
+        """
+        db = firestore.client()
+
+        values = {'archived_count': firestore.Increment(count)}
+        if amount:
+            values['archived_sum'] = firestore.Increment(amount)
+
+        db.collection(cls.COLLECTION).document(name).set(values, merge=True)
+
+    @staticmethod
+    def query_count(query):
+        """
+        Count documents with a server-side aggregation query
+
+        Args:
+            query (Query): Firestore query
+
+        Returns:
+            int: Document count
+        """
+        result = query.count(alias='count').get()
+        return int(result[0][0].value)
+
+    @staticmethod
+    def query_sum(query, field):
+        """
+        Sum a numeric field with a server-side aggregation query
+
+        Args:
+            query (Query): Firestore query
+            field (str): Field to sum
+
+        Returns:
+            float: Sum
+        """
+        result = query.sum(field, alias='sum').get()
+        return float(result[0][0].value or 0)
+
+    @classmethod
+    def get_count(cls, name):
+        """
+        Get an aggregate count, falling back to a count query
+
+        Args:
+            name (str): Aggregate name
+
+        Returns:
+            int: Count
+        """
+        try:
+            return cls.get(name)['count']
+
+        except Exception as e:
+            logger.error(f"Error reading aggregate {name}, using count query: {str(e)}")
+            db = firestore.client()
+            collection, filters, _ = cls.SOURCES[name]
+            query = db.collection(collection)
+            for field, op, value in filters:
+                query = query.where(field, op, value)
+            return cls.query_count(query)
+
+    @classmethod
+    def get_sum(cls, name):
+        """
+        Get an aggregate sum, falling back to a sum query
+
+        Args:
+            name (str): Aggregate name
+
+        Returns:
+            float: Sum
+        """
+        try:
+            return cls.get(name)['sum']
+
+        except Exception as e:
+            logger.error(f"Error reading aggregate {name}, using sum query: {str(e)}")
+            db = firestore.client()
+            collection, _, sum_field = cls.SOURCES[name]
+            return cls.query_sum(db.collection(collection), sum_field)
@@ -0,0 +1,91 @@
+# models/latency_rollup.py - Hourly latency histograms of review jobs
+from datetime import timedelta
+from firebase_admin import firestore
+from utils.latency import new_summary, merge_summary
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+class LatencyRollup:
+    """
+    Hourly latency histograms of review jobs
+
+    latency_rollups/{review_type}_{YYYYMMDDHH} holds bucket counts of the
+    end-to-end time and of each stage, plus the slowest jobs of the hour.
+    Instances merge their recent jobs in periodically, so the latency page
+    reads one document per review type and hour instead of the reviews.
+    """
+
+    COLLECTION = 'latency_rollups'
+
+    @classmethod
+    def doc_id(cls, review_type, hour):
+        """
+        Document ID of the hour holding a point in time
+
+        Args:
+            review_type (str): basic or advanced
+            hour (datetime): Any time within the hour (UTC)
+
+        Returns:
+            str: Document ID
+        """
+        return f"{review_type}_{hour.strftime('%Y%m%d%H')}"
+
+    @classmethod
+    def merge(cls, review_type, hour, summary, keep_slowest):
+        """
+        Add an instance's jobs to an hour's document
+
+        Args:
+            review_type (str): basic or advanced
+            hour (datetime): Start of the hour (UTC)
+            summary (dict): Jobs of the hour, from utils.latency
+            keep_slowest (int): Slowest jobs kept per document
+        """
+        db = firestore.client()
+        ref = db.collection(cls.COLLECTION).document(cls.doc_id(review_type, hour))
+
+        # Other instances merge into the same hour, so read and write together
+        @firestore.transactional
+        def update(transaction):
+            snapshot = ref.get(transaction=transaction)
+            merged = merge_summary(new_summary(), snapshot.to_dict() if snapshot.exists else {}, keep_slowest)
+            merge_summary(merged, summary, keep_slowest)
+            merged.update({'review_type': review_type, 'hour': hour})
+            transaction.set(ref, merged)
+
+        update(db.transaction())
+
+    @classmethod
+    def get_window(cls, review_types, start, end):
+        """
+        Read the hourly documents of a time range
+
+        Args:
+            review_types (list): Review types to read
+            start (datetime): Range start (UTC)
+            end (datetime): Range end (UTC)
+
+        Returns:
+            dict: review_type -> list of hourly summaries
+        """
+        db = firestore.client()
+        collection = db.collection(cls.COLLECTION)
+
+        hours = []
+        current = start.replace(minute=0, second=0, microsecond=0)
+        while current <= end:
+            hours.append(current)
+            current += timedelta(hours=1)
+
+        refs = [collection.document(cls.doc_id(review_type, hour)) for review_type in review_types for hour in hours]
+        window = {review_type: [] for review_type in review_types}
+        for snapshot in db.get_all(refs):
+            if snapshot.exists:
+                data = snapshot.to_dict()
+                if data.get('review_type') in window:
+                    window[data['review_type']].append(data)
+
+        return window
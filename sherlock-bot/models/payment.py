@@ -1,7 +1,12 @@
 # models/payment.py - Payment model
-from datetime import datetime
 from firebase_admin import firestore
+from models.aggregate import Aggregate
+from models.rollup import Rollup
+from models.search_index import SearchIndex
+from repositories import get_repositories
 from utils.logger import get_logger
+from utils.pagination import paginate_query
+from utils.timestamps import normalize_timestamps, utc_now, MIN_TIMESTAMP
 
 # Initialize logger
 logger = get_logger()
@@ -9,6 +14,9 @@ logger = get_logger()
 class Payment:
     """Payment model class for database operations"""
     
+    # Columns shown by the admin list views; list queries fetch only these
+    LIST_FIELDS = ['reference', 'user_id', 'amount', 'status', 'timestamp']
+    
     def __init__(self):
         """Initialize Payment model"""
         self.db = firestore.client()
@@ -29,7 +37,7 @@ class Payment:
             feedback_data = {
                 'reason': reason,
                 'feedback': feedback_text,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': utc_now()
             }
             
             # Save to database
@@ -43,6 +51,34 @@ class Payment:
             logger.error(f"Error saving payment feedback: {str(e)}")
             return None
     
+    @classmethod
+    def record(cls, payment_data):
+        """
+        Record a completed payment
+        
+        The payment reference is the document ID, so webhook retries do not
+        create duplicates or count the payment twice.
+        
+        Args:
+            payment_data (dict): Payment data including 'reference' and 'amount'
+            
+        Returns:
+            bool: Whether the payment was newly recorded
+        """
+        try:
+            if 'timestamp' not in payment_data:
+                payment_data['timestamp'] = utc_now()
+            
+            if not get_repositories().payments.record(payment_data):
+                logger.info(f"Payment {payment_data.get('reference')} already recorded")
+                return False
+            
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error recording payment: {str(e)}")
+            return False
+    
     @classmethod
     def get_count(cls):
         """
@@ -52,9 +88,7 @@ class Payment:
             int: Payment count
         """
         try:
-            db = firestore.client()
-            payments_ref = db.collection('payments')
-            return len(list(payments_ref.stream()))
+            return Aggregate.get_count('payments')
         
         except Exception as e:
             logger.error(f"Error getting payment count: {str(e)}")
@@ -69,18 +103,7 @@ class Payment:
             float: Total amount
         """
         try:
-            db = firestore.client()
-            total = 0.0
-            
-            # Get all payments
-            payments_ref = db.collection('payments').stream()
-            
-            for payment_doc in payments_ref:
-                payment_data = payment_doc.to_dict()
-                amount = payment_data.get('amount', 0)
-                total += float(amount)
-            
-            return total
+            return Aggregate.get_sum('payments')
         
         except Exception as e:
             logger.error(f"Error getting total payment amount: {str(e)}")
@@ -98,57 +121,43 @@ class Payment:
             list: Payment data
         """
         try:
-            db = firestore.client()
-            payments = []
-            
-            payments_ref = db.collection('payments').where('user_id', '==', user_id).order_by('timestamp', direction=firestore.Query.DESCENDING)
-            
-            for payment_doc in payments_ref.stream():
-                payment_data = payment_doc.to_dict()
-                payment_data['id'] = payment_doc.id
-                payments.append(payment_data)
-            
-            return payments
+            return [normalize_timestamps(payment) for payment in get_repositories().payments.list_by_user(user_id)]
         
         except Exception as e:
             logger.error(f"Error getting payments for user {user_id}: {str(e)}")
             return []
     
     @classmethod
-    def get_paginated(cls, page=1, per_page=20):
+    def get_paginated(cls, per_page=20, cursor=None):
         """
-        Get paginated payments
+        Get a page of payments using keyset pagination
         
         Args:
-            page (int): Page number
             per_page (int): Items per page
+            cursor (str, optional): Page cursor from a previous call
             
         Returns:
-            tuple: (payments, total_count)
+            tuple: (payments, total_count, cursors with 'next' and 'prev' tokens)
         """
         try:
             db = firestore.client()
             
-            # Get total count
+            # Total comes from the maintained counter
             total = cls.get_count()
             
-            # Calculate offset
-            offset = (page - 1) * per_page
-            
-            # Get payments with pagination
-            payments_ref = db.collection('payments').order_by('timestamp', direction=firestore.Query.DESCENDING).limit(per_page).offset(offset)
+            docs, cursors = paginate_query(db.collection('payments'), 'timestamp', per_page, cursor, cls.LIST_FIELDS)
             
             payments = []
-            for payment_doc in payments_ref.stream():
-                payment_data = payment_doc.to_dict()
+            for payment_doc in docs:
+                payment_data = normalize_timestamps(payment_doc.to_dict())
                 payment_data['id'] = payment_doc.id
                 payments.append(payment_data)
             
-            return payments, total
+            return payments, total, cursors
         
         except Exception as e:
             logger.error(f"Error getting paginated payments: {str(e)}")
-            return [], 0
+            return [], 0, {'next': None, 'prev': None}
     
     @classmethod
     def search(cls, query, page=1, per_page=20):
@@ -164,14 +173,19 @@ class Payment:
             tuple: (payments, total_count)
         """
         try:
+            # Index lookup, reading only the matches
+            indexed = SearchIndex.search('payments', query, page, per_page, cls.LIST_FIELDS)
+            if indexed is not None:
+                return indexed
+            
             db = firestore.client()
             payments = []
             
-            # Get all payments (Firestore doesn't support text search)
+            # Queries under three characters are too short for the index, scan the collection
             payments_ref = db.collection('payments').stream()
             
             for payment_doc in payments_ref:
-                payment_data = payment_doc.to_dict()
+                payment_data = normalize_timestamps(payment_doc.to_dict())
                 payment_data['id'] = payment_doc.id
                 
                 # Filter payments manually
@@ -179,7 +193,7 @@ class Payment:
                     payments.append(payment_data)
             
             # Sort by timestamp
-            payments.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            payments.sort(key=lambda x: x.get('timestamp') or MIN_TIMESTAMP, reverse=True)
             
             # Calculate total
             total = len(payments)
@@ -198,7 +212,7 @@ class Payment:
     @classmethod
     def get_stats(cls, start_date, end_date, interval='day'):
         """
-        Get payment statistics
+        Get payment statistics from rollup buckets
         
         Args:
             start_date (datetime): Start date
@@ -209,55 +223,12 @@ class Payment:
             dict: Payment statistics
         """
         try:
-            db = firestore.client()
-            
-            # Convert dates to strings
-            start_str = start_date.isoformat()
-            end_str = end_date.isoformat()
-            
-            # Get payments in date range
-            payments_ref = db.collection('payments').where('timestamp', '>=', start_str).where('timestamp', '<=', end_str).stream()
-            
-            payments = []
-            for payment_doc in payments_ref:
-                payment_data = payment_doc.to_dict()
-                payment_data['id'] = payment_doc.id
-                payments.append(payment_data)
-            
-            # Group by interval
-            count_grouped = {}
-            amount_grouped = {}
-            
-            for payment in payments:
-                timestamp = payment.get('timestamp')
-                amount = float(payment.get('amount', 0))
-                
-                if not timestamp:
-                    continue
-                
-                payment_date = datetime.fromisoformat(timestamp)
-                
-                # Format key based on interval
-                if interval == 'hour':
-                    key = payment_date.strftime('%Y-%m-%d %H:00')
-                elif interval == 'day':
-                    key = payment_date.strftime('%Y-%m-%d')
-                elif interval == 'month':
-                    key = payment_date.strftime('%Y-%m')
-                else:
-                    key = payment_date.strftime('%Y-%m-%d')
-                
-                if key not in count_grouped:
-                    count_grouped[key] = 0
-                    amount_grouped[key] = 0.0
-                
-                count_grouped[key] += 1
-                amount_grouped[key] += amount
+            buckets = Rollup.get_series(['payments'], start_date, end_date, interval)['payments']
             
             # Format for chart
-            labels = sorted(count_grouped.keys())
-            count_values = [count_grouped[key] for key in labels]
-            amount_values = [amount_grouped[key] for key in labels]
+            labels = sorted(buckets.keys())
+            count_values = [buckets[key]['count'] for key in labels]
+            amount_values = [buckets[key]['sum'] for key in labels]
             
             return {
                 'labels': labels,
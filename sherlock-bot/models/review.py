@@ -1,8 +1,13 @@
 # models/review.py - Review model
 import uuid
-from datetime import datetime
 from firebase_admin import firestore
+from models.aggregate import Aggregate
+from models.rollup import Rollup
+from models.search_index import SearchIndex
+from utils.loader import get_loader
 from utils.logger import get_logger
+from utils.pagination import paginate_query
+from utils.timestamps import utc_now, normalize_timestamps, MIN_TIMESTAMP
 
 # Initialize logger
 logger = get_logger()
@@ -10,6 +15,9 @@ logger = get_logger()
 class Review:
     """Review model class for database operations"""
     
+    # Columns shown by the admin list views; list queries fetch only these
+    LIST_FIELDS = ['user_id', 'review_type', 'improvement_score', 'timestamp', 'cv_file_name', 'report_path', 'download_link']
+    
     @classmethod
     def get_by_id(cls, review_id):
         """
@@ -22,20 +30,33 @@ class Review:
             dict: Review data
         """
         try:
-            db = firestore.client()
-            review_doc = db.collection('reviews').document(review_id).get()
-            
-            if review_doc.exists:
-                review_data = review_doc.to_dict()
-                review_data['id'] = review_id
-                return review_data
-            
-            return None
+            # Served from the request's identity map when already loaded
+            return get_loader().load('reviews', review_id)
         
         except Exception as e:
             logger.error(f"Error getting review {review_id}: {str(e)}")
             return None
     
+    @classmethod
+    def get_by_ids(cls, review_ids):
+        """
+        Get several reviews in batched reads
+        
+        Args:
+            review_ids (list): Review IDs
+            
+        Returns:
+            list: Review data, newest first, skipping reviews that no longer exist
+        """
+        try:
+            reviews = [review for review in get_loader().load_many('reviews', list(dict.fromkeys(review_ids))) if review]
+            reviews.sort(key=lambda x: x.get('timestamp') or MIN_TIMESTAMP, reverse=True)
+            return reviews
+        
+        except Exception as e:
+            logger.error(f"Error getting reviews {review_ids}: {str(e)}")
+            return []
+    
     @classmethod
     def get_by_user(cls, user_id):
         """
@@ -53,9 +74,10 @@ class Review:
             
             reviews_ref = db.collection('reviews').where('user_id', '==', user_id).order_by('timestamp', direction=firestore.Query.DESCENDING)
             
+            loader = get_loader()
             for review_doc in reviews_ref.stream():
-                review_data = review_doc.to_dict()
-                review_data['id'] = review_doc.id
+                review_data = normalize_timestamps(review_doc.to_dict())
+                loader.prime('reviews', review_doc.id, review_data)
                 reviews.append(review_data)
             
             return reviews
@@ -73,9 +95,7 @@ class Review:
             int: Review count
         """
         try:
-            db = firestore.client()
-            reviews_ref = db.collection('reviews')
-            return len(list(reviews_ref.stream()))
+            return Aggregate.get_count('reviews')
         
         except Exception as e:
             logger.error(f"Error getting review count: {str(e)}")
@@ -93,9 +113,13 @@ class Review:
             int: Review count
         """
         try:
+            name = f"reviews_{review_type}"
+            if name in Aggregate.SOURCES:
+                return Aggregate.get_count(name)
+            
+            # Unknown type, count on the server instead of streaming
             db = firestore.client()
-            reviews_ref = db.collection('reviews').where('review_type', '==', review_type)
-            return len(list(reviews_ref.stream()))
+            return Aggregate.query_count(db.collection('reviews').where('review_type', '==', review_type))
         
         except Exception as e:
             logger.error(f"Error getting review count by type {review_type}: {str(e)}")
@@ -117,10 +141,10 @@ class Review:
             reviews = []
             
             # Get reviews sorted by timestamp
-            reviews_ref = db.collection('reviews').order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
+            reviews_ref = db.collection('reviews').select(cls.LIST_FIELDS).order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
             
             for review_doc in reviews_ref.stream():
-                review_data = review_doc.to_dict()
+                review_data = normalize_timestamps(review_doc.to_dict())
                 review_data['id'] = review_doc.id
                 reviews.append(review_data)
             
@@ -131,53 +155,49 @@ class Review:
             return []
     
     @classmethod
-    def get_paginated(cls, page=1, per_page=20):
+    def get_paginated(cls, per_page=20, cursor=None):
         """
-        Get paginated reviews
+        Get a page of reviews using keyset pagination
         
         Args:
-            page (int): Page number
             per_page (int): Items per page
+            cursor (str, optional): Page cursor from a previous call
             
         Returns:
-            tuple: (reviews, total_count)
+            tuple: (reviews, total_count, cursors with 'next' and 'prev' tokens)
         """
         try:
             db = firestore.client()
             
-            # Get total count
+            # Total comes from the maintained counter
             total = cls.get_count()
             
-            # Calculate offset
-            offset = (page - 1) * per_page
-            
-            # Get reviews with pagination
-            reviews_ref = db.collection('reviews').order_by('timestamp', direction=firestore.Query.DESCENDING).limit(per_page).offset(offset)
+            docs, cursors = paginate_query(db.collection('reviews'), 'timestamp', per_page, cursor, cls.LIST_FIELDS)
             
             reviews = []
-            for review_doc in reviews_ref.stream():
-                review_data = review_doc.to_dict()
+            for review_doc in docs:
+                review_data = normalize_timestamps(review_doc.to_dict())
                 review_data['id'] = review_doc.id
                 reviews.append(review_data)
             
-            return reviews, total
+            return reviews, total, cursors
         
         except Exception as e:
             logger.error(f"Error getting paginated reviews: {str(e)}")
-            return [], 0
+            return [], 0, {'next': None, 'prev': None}
     
     @classmethod
-    def get_by_type(cls, review_type, page=1, per_page=20):
+    def get_by_type(cls, review_type, per_page=20, cursor=None):
         """
-        Get reviews by type
+        Get a page of reviews of one type using keyset pagination
         
         Args:
             review_type (str): Review type
-            page (int): Page number
             per_page (int): Items per page
+            cursor (str, optional): Page cursor from a previous call
             
         Returns:
-            tuple: (reviews, total_count)
+            tuple: (reviews, total_count, cursors with 'next' and 'prev' tokens)
         """
         try:
             db = firestore.client()
@@ -185,23 +205,20 @@ class Review:
             # Get total count for this type
             total = cls.get_count_by_type(review_type)
             
-            # Calculate offset
-            offset = (page - 1) * per_page
-            
-            # Get reviews with pagination
-            reviews_ref = db.collection('reviews').where('review_type', '==', review_type).order_by('timestamp', direction=firestore.Query.DESCENDING).limit(per_page).offset(offset)
+            query = db.collection('reviews').where('review_type', '==', review_type)
+            docs, cursors = paginate_query(query, 'timestamp', per_page, cursor, cls.LIST_FIELDS)
             
             reviews = []
-            for review_doc in reviews_ref.stream():
-                review_data = review_doc.to_dict()
+            for review_doc in docs:
+                review_data = normalize_timestamps(review_doc.to_dict())
                 review_data['id'] = review_doc.id
                 reviews.append(review_data)
             
-            return reviews, total
+            return reviews, total, cursors
         
         except Exception as e:
             logger.error(f"Error getting reviews by type {review_type}: {str(e)}")
-            return [], 0
+            return [], 0, {'next': None, 'prev': None}
     
     @classmethod
     def search(cls, query, page=1, per_page=20):
@@ -217,14 +234,19 @@ class Review:
             tuple: (reviews, total_count)
         """
         try:
+            # Index lookup, reading only the matches
+            indexed = SearchIndex.search('reviews', query, page, per_page, cls.LIST_FIELDS)
+            if indexed is not None:
+                return indexed
+            
             db = firestore.client()
             reviews = []
             
-            # Get all reviews (Firestore doesn't support text search)
+            # Queries under three characters are too short for the index, scan the collection
             reviews_ref = db.collection('reviews').stream()
             
             for review_doc in reviews_ref:
-                review_data = review_doc.to_dict()
+                review_data = normalize_timestamps(review_doc.to_dict())
                 review_data['id'] = review_doc.id
                 
                 # Filter reviews manually
@@ -232,7 +254,7 @@ class Review:
                     reviews.append(review_data)
             
             # Sort by timestamp
-            reviews.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            reviews.sort(key=lambda x: x.get('timestamp') or MIN_TIMESTAMP, reverse=True)
             
             # Calculate total
             total = len(reviews)
@@ -251,7 +273,7 @@ class Review:
     @classmethod
     def get_stats(cls, start_date, end_date, interval='day'):
         """
-        Get review statistics
+        Get review statistics from rollup buckets
         
         Args:
             start_date (datetime): Start date
@@ -262,64 +284,17 @@ class Review:
             dict: Review statistics
         """
         try:
-            db = firestore.client()
-            
-            # Convert dates to strings
-            start_str = start_date.isoformat()
-            end_str = end_date.isoformat()
-            
-            # Get reviews in date range
-            reviews_ref = db.collection('reviews').where('timestamp', '>=', start_str).where('timestamp', '<=', end_str).stream()
-            
-            reviews = []
-            for review_doc in reviews_ref:
-                review_data = review_doc.to_dict()
-                review_data['id'] = review_doc.id
-                reviews.append(review_data)
-            
-            # Group by interval and type
-            grouped = {
-                'basic': {},
-                'advanced': {}
-            }
-            
-            for review in reviews:
-                timestamp = review.get('timestamp')
-                review_type = review.get('review_type', 'basic')
-                
-                if not timestamp:
-                    continue
-                
-                review_date = datetime.fromisoformat(timestamp)
-                
-                # Format key based on interval
-                if interval == 'hour':
-                    key = review_date.strftime('%Y-%m-%d %H:00')
-                elif interval == 'day':
-                    key = review_date.strftime('%Y-%m-%d')
-                elif interval == 'month':
-                    key = review_date.strftime('%Y-%m')
-                else:
-                    key = review_date.strftime('%Y-%m-%d')
-                
-                if key not in grouped[review_type]:
-                    grouped[review_type][key] = 0
-                
-                grouped[review_type][key] += 1
-            
-            # Get all keys
-            all_keys = set()
-            for review_type in grouped:
-                all_keys.update(grouped[review_type].keys())
+            series = Rollup.get_series(['reviews_basic', 'reviews_advanced'], start_date, end_date, interval)
             
             # Sort keys
-            labels = sorted(all_keys)
+            labels = sorted(set(series['reviews_basic']) | set(series['reviews_advanced']))
             
             # Build datasets
             datasets = []
             
             for review_type in ['basic', 'advanced']:
-                data = [grouped[review_type].get(key, 0) for key in labels]
+                buckets = series[f"reviews_{review_type}"]
+                data = [buckets[key]['count'] if key in buckets else 0 for key in labels]
                 
                 datasets.append({
                     'label': f"{review_type.capitalize()} Reviews",
@@ -330,7 +305,7 @@ class Review:
             return {
                 'labels': labels,
                 'datasets': datasets,
-                'total': sum(datasets[0]['total'] + datasets[1]['total'])
+                'total': datasets[0]['total'] + datasets[1]['total']
             }
         
         except Exception as e:
@@ -360,10 +335,18 @@ class Review:
             
             # Add timestamp if not present
             if 'timestamp' not in review_data:
-                review_data['timestamp'] = datetime.now().isoformat()
-            
-            # Save to database
-            db.collection('reviews').document(review_id).set(review_data)
+                review_data['timestamp'] = utc_now()
+            
+            # Save to database together with the review counters
+            batch = db.batch()
+            batch.set(db.collection('reviews').document(review_id), review_data)
+            Aggregate.increment(batch, 'reviews')
+            if f"reviews_{review_data.get('review_type')}" in Aggregate.SOURCES:
+                Aggregate.increment(batch, f"reviews_{review_data.get('review_type')}")
+                Rollup.record(batch, f"reviews_{review_data.get('review_type')}", review_data['timestamp'])
+            SearchIndex.index(batch, 'reviews', review_id, review_data)
+            batch.commit()
+            SearchIndex.committed(batch)
             
             return review_id
         
@@ -0,0 +1,249 @@
+# models/rollup.py - Time-bucketed rollups for admin statistics
+import random
+from datetime import timedelta
+from firebase_admin import firestore
+from utils.logger import get_logger
+from utils.timestamps import utc_now, to_datetime
+
+# Initialize logger
+logger = get_logger()
+
+class Rollup:
+    """
+    Hourly, daily and monthly event buckets
+
+    Every event is added to one random shard per interval at
+    rollups/{metric}_{interval}_{bucket}_{shard}, holding a 'count' and a 'sum',
+    so a busy month bucket is not a single hot document. Stats queries fetch
+    the shards in a date range with one range query and add them up instead
+    of scanning the underlying collection.
+    """
+
+    COLLECTION = 'rollups'
+    INTERVALS = ('hour', 'day', 'month')
+    NUM_SHARDS = 10
+
+    # Metric -> (collection, timestamp field, filter, summed field) used by backfill.
+    # Users are dated by their profiles, which outlive archived and restarted sessions.
+    SOURCES = {
+        'reviews_basic': ('reviews', 'timestamp', ('review_type', 'basic'), None),
+        'reviews_advanced': ('reviews', 'timestamp', ('review_type', 'advanced'), None),
+        'payments': ('payments', 'timestamp', None, 'amount'),
+        'users': ('users', 'created_at', None, None)
+    }
+
+    # interval -> (document key format, chart label format)
+    FORMATS = {
+        'hour': ('%Y%m%d%H', '%Y-%m-%d %H:00'),
+        'day': ('%Y%m%d', '%Y-%m-%d'),
+        'month': ('%Y%m', '%Y-%m')
+    }
+
+    @classmethod
+    def bucket_key(cls, interval, when):
+        """
+        Key of the bucket holding a point in time
+
+        Keys sort in time order, so a date range is a range of keys.
+
+        Args:
+            interval (str): hour, day or month
+            when (datetime): Point in time
+
+        Returns:
+            str: Bucket key
+        """
+        return when.strftime(cls.FORMATS[interval][0])
+
+    @classmethod
+    def doc_id(cls, metric, interval, when, shard):
+        """
+        Document ID of one shard of the bucket holding a point in time
+
+        Args:
+            metric (str): Metric name
+            interval (str): hour, day or month
+            when (datetime): Point in time
+            shard (int): Shard number
+
+        Returns:
+            str: Document ID
+        """
+        return f"{metric}_{interval}_{cls.bucket_key(interval, when)}_{shard}"
+
+    @classmethod
+    def bucket_starts(cls, start_date, end_date, interval):
+        """
+        Start of every bucket overlapping a date range
+
+        Args:
+            start_date (datetime): Range start
+            end_date (datetime): Range end
+            interval (str): hour, day or month
+
+        Returns:
+            list: Bucket start datetimes in order
+        """
+        if interval == 'hour':
+            current = start_date.replace(minute=0, second=0, microsecond=0)
+        elif interval == 'month':
+            current = start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        else:
+            current = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        starts = []
+        while current <= end_date:
+            starts.append(current)
+            if interval == 'hour':
+                current += timedelta(hours=1)
+            elif interval == 'month':
+                current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            else:
+                current += timedelta(days=1)
+
+        return starts
+
+    @classmethod
+    def record(cls, batch, metric, when=None, amount=0):
+        """
+        Add an event to the hourly, daily and monthly buckets
+
+        Args:
+            batch (WriteBatch): Batch that also holds the event document write
+            metric (str): Metric name
+            when (datetime or str, optional): Event time, defaults to now
+            amount (float): Value added to the bucket sums
+        """
+        db = firestore.client()
+
+        # Buckets are UTC; legacy ISO strings are converted from server local time
+        when = to_datetime(when) or utc_now()
+
+        for interval in cls.INTERVALS:
+            values = {
+                'metric': metric,
+                'interval': interval,
+                'bucket': cls.bucket_key(interval, when),
+                'label': when.strftime(cls.FORMATS[interval][1]),
+                'count': firestore.Increment(1)
+            }
+            if amount:
+                values['sum'] = firestore.Increment(amount)
+
+            shard = random.randrange(cls.NUM_SHARDS)
+            batch.set(db.collection(cls.COLLECTION).document(cls.doc_id(metric, interval, when, shard)), values, merge=True)
+
+    @classmethod
+    def get_series(cls, metrics, start_date, end_date, interval='day'):
+        """
+        Read bucket values for several metrics over a date range
+
+        Args:
+            metrics (list): Metric names
+            start_date (datetime): Range start
+            end_date (datetime): Range end
+            interval (str): hour, day or month
+
+        Returns:
+            dict: metric -> {label: {'count': int, 'sum': float}} for non-empty buckets
+        """
+        if interval not in cls.INTERVALS:
+            interval = 'day'
+
+        db = firestore.client()
+        starts = cls.bucket_starts(start_date, end_date, interval)
+
+        series = {metric: {} for metric in metrics}
+        if not starts:
+            return series
+
+        # Only shards that were written come back, however many buckets the range spans
+        query = db.collection(cls.COLLECTION).where('metric', 'in', list(metrics)).where('interval', '==', interval)
+        query = query.where('bucket', '>=', cls.bucket_key(interval, starts[0])).where('bucket', '<=', cls.bucket_key(interval, starts[-1]))
+
+        for snapshot in query.select(['metric', 'label', 'count', 'sum']).stream():
+            data = snapshot.to_dict()
+            if data.get('metric') not in series or not data.get('count'):
+                continue
+            bucket = series[data['metric']].setdefault(data['label'], {'count': 0, 'sum': 0.0})
+            bucket['count'] += data.get('count', 0)
+            bucket['sum'] += float(data.get('sum', 0))
+
+        return series
+
+    @classmethod
+    def backfill(cls, metrics=None, dry_run=False):
+        """
+        Rebuild buckets from existing documents
+
+        Bucket totals are written to shard 0 and every other document of the
+        metric is deleted, so the backfill can be re-run safely. Run it while no
+        events are being written, or re-run it afterwards, since increments
+        landing mid-run are overwritten. Unsharded bucket documents from before
+        sharding are removed too.
+
+        Args:
+            metrics (list, optional): Metrics to rebuild, defaults to all
+            dry_run (bool): Compute buckets without writing them
+
+        Returns:
+            dict: metric -> number of bucket documents
+        """
+        db = firestore.client()
+        metrics = metrics or list(cls.SOURCES)
+        written = {}
+
+        for metric in metrics:
+            collection, time_field, doc_filter, sum_field = cls.SOURCES[metric]
+            query = db.collection(collection)
+            if doc_filter:
+                query = query.where(doc_filter[0], '==', doc_filter[1])
+
+            buckets = {}
+            for doc in query.select([f for f in (time_field, sum_field) if f]).stream():
+                data = doc.to_dict()
+                when = to_datetime(data.get(time_field))
+                if not when:
+                    continue
+
+                amount = float(data.get(sum_field, 0) or 0) if sum_field else 0
+
+                for interval in cls.INTERVALS:
+                    key = f"{metric}_{interval}_{cls.bucket_key(interval, when)}"
+                    bucket = buckets.setdefault(key, {
+                        'metric': metric,
+                        'interval': interval,
+                        'bucket': cls.bucket_key(interval, when),
+                        'label': when.strftime(cls.FORMATS[interval][1]),
+                        'count': 0,
+                        'sum': 0.0
+                    })
+                    bucket['count'] += 1
+                    bucket['sum'] += amount
+
+            if not dry_run:
+                collection = db.collection(cls.COLLECTION)
+                writes = {f"{key}_0": bucket for key, bucket in buckets.items()}
+
+                # Every other document of the metric goes, including buckets with no source documents left
+                stale = [doc.id for doc in collection.where('metric', '==', metric).select([]).stream() if doc.id not in writes]
+
+                batch = db.batch()
+                pending = 0
+                for doc_id in list(writes) + stale:
+                    if doc_id in writes:
+                        batch.set(collection.document(doc_id), writes[doc_id])
+                    else:
+                        batch.delete(collection.document(doc_id))
+                    pending += 1
+                    if pending == 400:
+                        batch.commit()
+                        batch = db.batch()
+                        pending = 0
+                if pending:
+                    batch.commit()
+
+            written[metric] = len(buckets)
+            logger.info(f"Rollup backfill for {metric}: {len(buckets)} buckets")
+
+        return written
@@ -0,0 +1,377 @@
+# models/search_index.py - Write-maintained search index for admin search
+import re
+import weakref
+import hashlib
+import threading
+from firebase_admin import firestore
+from utils.logger import get_logger
+from utils.timestamps import to_datetime, normalize_timestamps
+
+# Initialize logger
+logger = get_logger()
+
+class SearchIndex:
+    """
+    Search entries for users, reviews and payments
+
+    Every searchable document has an entry at search_index/{entity}_{doc_id},
+    written in the same batch as the document itself. An entry holds the
+    lowercased searchable text, a 'grams' map with one key per trigram of that
+    text and a 'terms' map with phone-number prefixes, email tokens and payment
+    references. Searches are equality filters on those map keys, which
+    Firestore answers from its single-field indexes, so they read the matching
+    entries only instead of streaming the whole collection.
+    """
+
+    COLLECTION = 'search_index'
+
+    # Entity -> (collection, sort field, searchable fields, phone fields, email fields, reference fields)
+    ENTITIES = {
+        'users': (
+            'users', 'created_at',
+            ['phone_number', 'email', 'payment_reference'],
+            ['phone_number'], ['email'], ['payment_reference']
+        ),
+        'reviews': (
+            'reviews', 'timestamp',
+            ['user_id', 'email', 'review_type', 'cv_file_name', 'improvement_score'],
+            ['user_id'], ['email'], []
+        ),
+        'payments': (
+            'payments', 'timestamp',
+            ['reference', 'user_id', 'email', 'amount', 'currency', 'status', 'service'],
+            ['user_id'], ['email'], ['reference']
+        )
+    }
+
+    # Firestore caps the number of filters per query; this many trigrams is plenty to narrow a search
+    MAX_QUERY_GRAMS = 8
+
+    # Shortest phone prefix worth indexing
+    MIN_PHONE_PREFIX = 4
+
+    # Entry fingerprints written by this process, so unchanged documents are not re-indexed
+    _written = {}
+    WRITTEN_CACHE_SIZE = 10000
+
+    # Batch -> fingerprints of its entries, recorded in _written once committed()
+    _pending = weakref.WeakKeyDictionary()
+    _pending_lock = threading.Lock()
+
+    @staticmethod
+    def _key(prefix, value):
+        # Hex keeps arbitrary characters usable as map field names without quoting
+        return prefix + value.encode('utf-8').hex()
+
+    @staticmethod
+    def trigrams(text):
+        """
+        Trigrams of a string
+
+        Args:
+            text (str): Lowercased text
+
+        Returns:
+            set: Three-character substrings
+        """
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def phone_digits(value):
+        """
+        Normalize a phone number to its international digits
+
+        Args:
+            value (str): Phone number in any format, e.g. 'whatsapp:+234...' or '0801...'
+
+        Returns:
+            str: Digits with the Nigerian country code applied to local numbers
+        """
+        digits = re.sub(r'\D', '', str(value))
+        if len(digits) in (10, 11) and digits.startswith('0'):
+            digits = '234' + digits[1:]
+        return digits
+
+    @classmethod
+    def phone_terms(cls, value):
+        """
+        Prefixes of a phone number in international and local form
+
+        Args:
+            value (str): Phone number
+
+        Returns:
+            set: Prefix terms
+        """
+        digits = cls.phone_digits(value)
+        forms = [digits]
+        if digits.startswith('234'):
+            forms.append('0' + digits[3:])
+
+        return {
+            f"phone:{form[:end]}"
+            for form in forms
+            for end in range(cls.MIN_PHONE_PREFIX, len(form) + 1)
+        }
+
+    @staticmethod
+    def email_terms(value):
+        """
+        Tokens of an email address
+
+        Args:
+            value (str): Email address
+
+        Returns:
+            set: The full address, local part, domain and their word tokens
+        """
+        email = str(value).strip().lower()
+        if '@' not in email:
+            return set()
+
+        local, _, domain = email.partition('@')
+        tokens = {email, local, domain}
+        tokens.update(token for token in re.split(r'[^a-z0-9]+', email) if token)
+        return {f"email:{token}" for token in tokens}
+
+    @classmethod
+    def build_entry(cls, entity, doc_id, data):
+        """
+        Build the index entry for a document
+
+        Args:
+            entity (str): users, reviews or payments
+            doc_id (str): Document ID
+            data (dict): Document data
+
+        Returns:
+            dict: Index entry
+        """
+        _, sort_field, fields, phone_fields, email_fields, reference_fields = cls.ENTITIES[entity]
+
+        values = [str(doc_id).lower()]
+        values.extend(str(data[field]).lower() for field in fields if data.get(field) not in (None, ''))
+
+        terms = set()
+        for field in phone_fields:
+            if data.get(field):
+                terms |= cls.phone_terms(data[field])
+        for field in email_fields:
+            if data.get(field):
+                terms |= cls.email_terms(data[field])
+        for field in reference_fields:
+            if data.get(field):
+                terms.add(f"ref:{str(data[field]).strip().lower()}")
+
+        grams = set()
+        for value in values:
+            grams |= cls.trigrams(value)
+
+        # UTC ISO strings sort correctly whichever format the document stores
+        sort_time = to_datetime(data.get(sort_field))
+        sort_key = sort_time.isoformat() if sort_time else ''
+
+        return {
+            'entity': entity,
+            'doc_id': doc_id,
+            'sort_key': sort_key,
+            'text': '\n'.join(values),
+            'grams': {cls._key('g', gram): True for gram in grams},
+            'terms': {cls._key('t', term): True for term in terms}
+        }
+
+    @classmethod
+    def index(cls, batch, entity, doc_id, data):
+        """
+        Add an index entry write to a batch
+
+        Entries are only written when their searchable content changed since
+        this process last wrote them. Call committed() after the batch commits
+        so the entry counts as written; a failed commit leaves it to be
+        written again.
+
+        Args:
+            batch (WriteBatch): Batch that also holds the document write
+            entity (str): users, reviews or payments
+            doc_id (str): Document ID
+            data (dict): Document data
+        """
+        entry = cls.build_entry(entity, doc_id, data)
+        fingerprint = hashlib.sha1(f"{entry['sort_key']}\n{entry['text']}".encode('utf-8')).hexdigest()
+
+        if cls._written.get((entity, doc_id)) == fingerprint:
+            return
+
+        db = firestore.client()
+        batch.set(db.collection(cls.COLLECTION).document(f"{entity}_{doc_id}"), entry)
+        with cls._pending_lock:
+            cls._pending.setdefault(batch, {})[(entity, doc_id)] = fingerprint
+
+    @classmethod
+    def committed(cls, batch):
+        """
+        Record the entries of a successfully committed batch as written
+
+        Args:
+            batch (WriteBatch): Batch passed to index()
+        """
+        with cls._pending_lock:
+            fingerprints = cls._pending.pop(batch, None)
+        if not fingerprints:
+            return
+
+        if len(cls._written) + len(fingerprints) > cls.WRITTEN_CACHE_SIZE:
+            cls._written.clear()
+        cls._written.update(fingerprints)
+
+    @classmethod
+    def remove(cls, batch, entity, doc_id):
+        """
+        Add an index entry delete to a batch
+
+        Args:
+            batch (WriteBatch): Batch that also holds the document delete
+            entity (str): users, reviews or payments
+            doc_id (str): Document ID
+        """
+        db = firestore.client()
+        batch.delete(db.collection(cls.COLLECTION).document(f"{entity}_{doc_id}"))
+        cls._written.pop((entity, doc_id), None)
+
+    @classmethod
+    def _matching_entries(cls, base, keys):
+        query = base
+        for key in keys:
+            query = query.where(key, '==', True)
+        return query.select(['doc_id', 'sort_key', 'text']).stream()
+
+    @classmethod
+    def find(cls, entity, query):
+        """
+        Find documents whose searchable text contains a query string
+
+        Matches are case-insensitive substrings of the document ID or any
+        searchable field, like the old full scan. Phone-number queries also
+        match local and international forms of the same number, email queries
+        match address tokens and references match exactly.
+
+        Args:
+            entity (str): users, reviews or payments
+            query (str): Search query
+
+        Returns:
+            list: Matching document IDs, newest first, or None if the query
+                is shorter than three characters
+        """
+        needle = query.strip().lower()
+        if len(needle) < 3:
+            return None
+
+        db = firestore.client()
+        base = db.collection(cls.COLLECTION).where('entity', '==', entity)
+        matches = {}
+
+        # Exact terms: normalized phone prefixes, email tokens, references
+        terms = {f"email:{needle}", f"ref:{needle}"}
+        if re.fullmatch(r'[\d\s()+-]+', needle) and len(re.sub(r'\D', '', needle)) >= cls.MIN_PHONE_PREFIX:
+            terms.add(f"phone:{cls.phone_digits(needle)}")
+        for term in terms:
+            for entry in cls._matching_entries(base, [f"terms.{cls._key('t', term)}"]):
+                data = entry.to_dict()
+                matches[data['doc_id']] = data.get('sort_key', '')
+
+        # Substrings: entries holding every trigram, confirmed against the stored text
+        grams = sorted(cls.trigrams(needle))
+        step = max(1, len(grams) // cls.MAX_QUERY_GRAMS)
+        keys = [f"grams.{cls._key('g', gram)}" for gram in grams[::step][:cls.MAX_QUERY_GRAMS]]
+        for entry in cls._matching_entries(base, keys):
+            data = entry.to_dict()
+            if needle in data.get('text', ''):
+                matches[data['doc_id']] = data.get('sort_key', '')
+
+        return [doc_id for doc_id, _ in sorted(matches.items(), key=lambda m: m[1], reverse=True)]
+
+    @classmethod
+    def search(cls, entity, query, page=1, per_page=20, fields=None):
+        """
+        Search one page of documents
+
+        Args:
+            entity (str): users, reviews or payments
+            query (str): Search query
+            page (int): Page number
+            per_page (int): Items per page
+            fields (list, optional): Fields to fetch, defaults to whole documents
+
+        Returns:
+            tuple: (documents with 'id', total_count), or None if the query
+                is shorter than three characters
+        """
+        doc_ids = cls.find(entity, query)
+        if doc_ids is None:
+            return None
+
+        db = firestore.client()
+        collection = db.collection(cls.ENTITIES[entity][0])
+        start = (page - 1) * per_page
+        page_ids = doc_ids[start:start + per_page]
+
+        # Only the requested page is read from the source collection
+        snapshots = {snapshot.id: snapshot for snapshot in db.get_all([collection.document(doc_id) for doc_id in page_ids], field_paths=fields)}
+
+        results = []
+        for doc_id in page_ids:
+            snapshot = snapshots.get(doc_id)
+            if snapshot is not None and snapshot.exists:
+                data = normalize_timestamps(snapshot.to_dict())
+                data['id'] = doc_id
+                results.append(data)
+
+        return results, len(doc_ids)
+
+    @classmethod
+    def backfill(cls, entities=None, dry_run=False):
+        """
+        Build index entries for existing documents
+
+        Entries are overwritten, so the backfill can be re-run safely.
+
+        Args:
+            entities (list, optional): Entities to index, defaults to all
+            dry_run (bool): Build entries without writing them
+
+        Returns:
+            dict: entity -> number of entries
+        """
+        db = firestore.client()
+        entities = entities or list(cls.ENTITIES)
+        written = {}
+
+        def index_chunk(entity, docs):
+            batch = db.batch()
+            for doc in docs:
+                cls.index(batch, entity, doc.id, doc.to_dict())
+            batch.commit()
+            cls.committed(batch)
+
+        for entity in entities:
+            collection, sort_field, fields = cls.ENTITIES[entity][:3]
+            chunk = []
+            count = 0
+
+            for doc in db.collection(collection).select([sort_field] + fields).stream():
+                count += 1
+                if dry_run:
+                    continue
+                chunk.append(doc)
+                if len(chunk) == 400:
+                    index_chunk(entity, chunk)
+                    chunk = []
+
+            if chunk:
+                index_chunk(entity, chunk)
+
+            written[entity] = count
+            logger.info(f"Search index backfill for {entity}: {count} entries")
+
+        return written
@@ -0,0 +1,145 @@
+# models/timestamp_migration.py - Rewrite legacy ISO string timestamps as native Firestore timestamps
+from firebase_admin import firestore
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from utils.logger import get_logger
+from utils.timestamps import to_datetime, utc_now
+
+# Initialize logger
+logger = get_logger()
+
+class TimestampMigration:
+    """
+    Converts string timestamp fields to UTC timestamps
+
+    Each collection is walked in document ID order one page at a time. Updates
+    go through a BulkWriter whose rate is capped, and after each page the
+    writer is flushed and the last document ID is saved to
+    migrations/timestamps_{collection}, so an interrupted run resumes where it
+    stopped. Only fields that still hold strings are written, which makes
+    re-runs cheap.
+    """
+
+    COLLECTION = 'migrations'
+
+    # Collection -> timestamp fields
+    FIELDS = {
+        'sessions': ['created_at', 'last_activity'],
+        'users': ['created_at', 'last_review_date'],
+        'reviews': ['created_at', 'timestamp'],
+        'payments': ['timestamp'],
+        'payment_feedback': ['timestamp'],
+        'report_store': ['created_at', 'last_used_at'],
+        'aggregates': ['seeded_at']
+    }
+
+    # Attempts per document before a write is reported as failed
+    MAX_ATTEMPTS = 5
+
+    @staticmethod
+    def converted_fields(data, fields):
+        """
+        Updates for the string timestamp fields of a document
+
+        Args:
+            data (dict): Document data
+            fields (list): Timestamp field names
+
+        Returns:
+            dict: Field -> UTC datetime for every field still stored as a parseable string
+        """
+        updates = {}
+        for field in fields:
+            value = data.get(field)
+            if isinstance(value, str):
+                when = to_datetime(value)
+                if when:
+                    updates[field] = when
+        return updates
+
+    @classmethod
+    def run(cls, collections=None, ops_per_second=200, page_size=500, restart=False, dry_run=False):
+        """
+        Migrate collections, resuming from saved checkpoints
+
+        Args:
+            collections (list, optional): Collections to migrate, defaults to all
+            ops_per_second (int): Write rate cap
+            page_size (int): Documents read per page (and per checkpoint)
+            restart (bool): Ignore saved checkpoints and start from the beginning
+            dry_run (bool): Count documents to convert without writing
+
+        Returns:
+            dict: collection -> {'scanned', 'converted', 'failed'}
+        """
+        db = firestore.client()
+        results = {}
+
+        for collection in collections or list(cls.FIELDS):
+            fields = cls.FIELDS[collection]
+            checkpoint_ref = db.collection(cls.COLLECTION).document(f"timestamps_{collection}")
+            checkpoint = {} if restart or dry_run else (checkpoint_ref.get().to_dict() or {})
+
+            if checkpoint.get('done'):
+                logger.info(f"Timestamp migration for {collection} already complete, skipping")
+                results[collection] = {'scanned': 0, 'converted': 0, 'failed': 0}
+                continue
+
+            counts = {'scanned': 0, 'converted': 0, 'failed': 0}
+            failures = []
+
+            writer = db.bulk_writer(BulkWriterOptions(
+                initial_ops_per_second=min(ops_per_second, 500),
+                max_ops_per_second=ops_per_second
+            ))
+
+            def on_error(failure, _writer):
+                # Returning True retries the write with backoff
+                if failure.attempts < cls.MAX_ATTEMPTS:
+                    return True
+                failures.append(failure.reference.id)
+                logger.error(f"Timestamp migration failed for {failure.reference.path}: {failure.message}")
+                return False
+
+            writer.on_write_error(on_error)
+            last_id = checkpoint.get('last_id')
+
+            while True:
+                query = db.collection(collection).order_by('__name__').select(fields).limit(page_size)
+                if last_id:
+                    query = query.start_after({'__name__': last_id})
+
+                docs = list(query.stream())
+                if not docs:
+                    break
+
+                for doc in docs:
+                    counts['scanned'] += 1
+                    updates = cls.converted_fields(doc.to_dict(), fields)
+                    if not updates:
+                        continue
+
+                    counts['converted'] += 1
+                    if not dry_run:
+                        writer.update(doc.reference, updates)
+
+                last_id = docs[-1].id
+                if not dry_run:
+                    writer.flush()
+                    checkpoint_ref.set({
+                        'last_id': last_id,
+                        'scanned': firestore.Increment(len(docs)),
+                        'updated_at': utc_now()
+                    }, merge=True)
+
+                logger.info(f"Timestamp migration for {collection}: {counts['scanned']} scanned, {counts['converted']} converted")
+
+            writer.close()
+            counts['failed'] = len(failures)
+
+            # A collection with failures stays resumable; re-run with --restart to retry them
+            if not dry_run and not failures:
+                checkpoint_ref.set({'done': True, 'completed_at': utc_now()}, merge=True)
+
+            results[collection] = counts
+
+        return results
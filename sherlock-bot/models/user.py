@@ -1,18 +1,67 @@
 # models/user.py - User model
-from datetime import datetime
 from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists
+from models.aggregate import Aggregate
+from models.rollup import Rollup
+from models.search_index import SearchIndex
+from utils.loader import get_loader
 from utils.logger import get_logger
+from utils.pagination import paginate_query
+from utils.timestamps import normalize_timestamps, MIN_TIMESTAMP
 
 # Initialize logger
 logger = get_logger()
 
 class User:
-    """User model class for database operations"""
+    """
+    User model class for database operations
+    
+    A user is split over two documents with the phone number as ID:
+    sessions/{phone} holds the small, fixed-size conversation state read on
+    every message, and users/{phone} holds the profile (email, payment details,
+    review count and recent review IDs), read only when needed.
+    """
+    
+    PROFILE_COLLECTION = 'users'
+    
+    # Fields of the conversation state document; anything else belongs to the profile
+    SESSION_FIELDS = (
+        'phone_number', 'state', 'created_at', 'last_activity', 'review_type',
+        'cv_storage_path', 'cv_file_name', 'cv_file_size', 'cv_page_count', 'payment_link',
+        'last_review_id', 'deferred_at', 'deferred_email'
+    )
+    
+    # Profile fields conversation handlers set on the session dict
+    PROFILE_FIELDS = ('email', 'payment_status', 'payment_reference', 'payment_amount', 'payment_date')
+    
+    # Review IDs kept on the profile, newest first
+    RECENT_REVIEWS = 20
+    
+    # Columns shown by the admin list views. Lists page over the profiles, which
+    # outlive archived sessions, fetching only these; the conversation state
+    # columns are then merged in from the sessions.
+    LIST_FIELDS = ['created_at', 'email', 'review_count']
+    SESSION_LIST_FIELDS = ('last_activity', 'state')
+    
+    @classmethod
+    def split_session_data(cls, session_data):
+        """
+        Split a flat session dict into conversation state and profile fields
+        
+        Args:
+            session_data (dict): Session data as used by the conversation handlers
+            
+        Returns:
+            tuple: (session fields, profile fields)
+        """
+        session_fields = {key: value for key, value in session_data.items() if key in cls.SESSION_FIELDS}
+        profile_fields = {key: value for key, value in session_data.items() if key in cls.PROFILE_FIELDS}
+        return session_fields, profile_fields
     
     @classmethod
     def get_by_id(cls, user_id):
         """
-        Get user by ID
+        Get user by ID, with the profile merged over the session
         
         Args:
             user_id (str): User ID (phone number)
@@ -21,20 +70,72 @@ class User:
             dict: User data
         """
         try:
-            db = firestore.client()
-            user_doc = db.collection('sessions').document(user_id).get()
+            # Both documents in one batched read, served from the request's identity map when already loaded
+            loader = get_loader()
+            loader.want(cls.PROFILE_COLLECTION, [user_id])
+            session = loader.load('sessions', user_id)
+            profile = loader.load(cls.PROFILE_COLLECTION, user_id)
             
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                user_data['id'] = user_id
-                return user_data
+            if not session and not profile:
+                return None
             
-            return None
+            user_data = dict(session or {})
+            user_data.update(profile or {})
+            return user_data
         
         except Exception as e:
             logger.error(f"Error getting user {user_id}: {str(e)}")
             return None
     
+    @classmethod
+    def get_profile(cls, user_id):
+        """
+        Get a user's profile document
+        
+        Args:
+            user_id (str): User ID (phone number)
+            
+        Returns:
+            dict: Profile data, or None if the user has no profile yet
+        """
+        try:
+            return get_loader().load(cls.PROFILE_COLLECTION, user_id)
+        
+        except Exception as e:
+            logger.error(f"Error getting profile {user_id}: {str(e)}")
+            return None
+    
+    @classmethod
+    def attach_sessions(cls, users):
+        """
+        Add conversation state columns (last activity, state) to a list of profiles
+        
+        Users whose session was archived keep empty state columns.
+        
+        Args:
+            users (list): Profile data with 'id'
+            
+        Returns:
+            list: The same users with 'last_activity' and 'state' set
+        """
+        try:
+            sessions = get_loader().load_many('sessions', [user['id'] for user in users])
+        
+        except Exception as e:
+            logger.error(f"Error loading user sessions: {str(e)}")
+            sessions = [None] * len(users)
+        
+        for user, session in zip(users, sessions):
+            session = session or {}
+            for key in cls.SESSION_LIST_FIELDS:
+                user[key] = session.get(key)
+            
+            # Sessions not yet migrated still carry their own email and review list
+            user['email'] = user.get('email') or session.get('email')
+            user['review_count'] = user.get('review_count', 0) + len(session.get('reviews') or [])
+        
+        return users
+    
     @classmethod
     def get_count(cls):
         """
@@ -44,9 +145,7 @@ class User:
             int: User count
         """
         try:
-            db = firestore.client()
-            users_ref = db.collection('sessions')
-            return len(list(users_ref.stream()))
+            return Aggregate.get_count('users')
         
         except Exception as e:
             logger.error(f"Error getting user count: {str(e)}")
@@ -68,10 +167,10 @@ class User:
             users = []
             
             # Get users sorted by created_at
-            users_ref = db.collection('sessions').order_by('created_at', direction=firestore.Query.DESCENDING).limit(limit)
+            users_ref = db.collection(cls.PROFILE_COLLECTION).select(cls.LIST_FIELDS).order_by('created_at', direction=firestore.Query.DESCENDING).limit(limit)
             
             for user_doc in users_ref.stream():
-                user_data = user_doc.to_dict()
+                user_data = normalize_timestamps(user_doc.to_dict())
                 user_data['id'] = user_doc.id
                 users.append(user_data)
             
@@ -82,40 +181,36 @@ class User:
             return []
     
     @classmethod
-    def get_paginated(cls, page=1, per_page=20):
+    def get_paginated(cls, per_page=20, cursor=None):
         """
-        Get paginated users
+        Get a page of users using keyset pagination
         
         Args:
-            page (int): Page number
             per_page (int): Items per page
+            cursor (str, optional): Page cursor from a previous call
             
         Returns:
-            tuple: (users, total_count)
+            tuple: (users, total_count, cursors with 'next' and 'prev' tokens)
         """
         try:
             db = firestore.client()
             
-            # Get total count
+            # Total comes from the maintained counter, which counts the same profiles
             total = cls.get_count()
             
-            # Calculate offset
-            offset = (page - 1) * per_page
-            
-            # Get users with pagination
-            users_ref = db.collection('sessions').order_by('created_at', direction=firestore.Query.DESCENDING).limit(per_page).offset(offset)
+            docs, cursors = paginate_query(db.collection(cls.PROFILE_COLLECTION), 'created_at', per_page, cursor, cls.LIST_FIELDS)
             
             users = []
-            for user_doc in users_ref.stream():
-                user_data = user_doc.to_dict()
+            for user_doc in docs:
+                user_data = normalize_timestamps(user_doc.to_dict())
                 user_data['id'] = user_doc.id
                 users.append(user_data)
             
-            return users, total
+            return users, total, cursors
         
         except Exception as e:
             logger.error(f"Error getting paginated users: {str(e)}")
-            return [], 0
+            return [], 0, {'next': None, 'prev': None}
     
     @classmethod
     def search(cls, query, page=1, per_page=20):
@@ -131,14 +226,19 @@ class User:
             tuple: (users, total_count)
         """
         try:
+            # Index lookup, reading only the matches
+            indexed = SearchIndex.search('users', query, page, per_page, cls.LIST_FIELDS)
+            if indexed is not None:
+                return indexed
+            
             db = firestore.client()
             users = []
             
-            # Get all users (Firestore doesn't support text search)
-            users_ref = db.collection('sessions').stream()
+            # Queries under three characters are too short for the index, scan the collection
+            users_ref = db.collection(cls.PROFILE_COLLECTION).stream()
             
             for user_doc in users_ref:
-                user_data = user_doc.to_dict()
+                user_data = normalize_timestamps(user_doc.to_dict())
                 user_data['id'] = user_doc.id
                 
                 # Filter users manually
@@ -146,7 +246,7 @@ class User:
                     users.append(user_data)
             
             # Sort by created_at
-            users.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            users.sort(key=lambda x: x.get('created_at') or MIN_TIMESTAMP, reverse=True)
             
             # Calculate total
             total = len(users)
@@ -165,7 +265,7 @@ class User:
     @classmethod
     def get_stats(cls, start_date, end_date, interval='day'):
         """
-        Get user statistics
+        Get user statistics from rollup buckets
         
         Args:
             start_date (datetime): Start date
@@ -176,49 +276,11 @@ class User:
             dict: User statistics
         """
         try:
-            db = firestore.client()
-            
-            # Convert dates to strings
-            start_str = start_date.isoformat()
-            end_str = end_date.isoformat()
-            
-            # Get users in date range
-            users_ref = db.collection('sessions').where('created_at', '>=', start_str).where('created_at', '<=', end_str).stream()
-            
-            users = []
-            for user_doc in users_ref:
-                user_data = user_doc.to_dict()
-                user_data['id'] = user_doc.id
-                users.append(user_data)
-            
-            # Group by interval
-            grouped = {}
-            
-            for user in users:
-                created_at = user.get('created_at')
-                if not created_at:
-                    continue
-                
-                created_date = datetime.fromisoformat(created_at)
-                
-                # Format key based on interval
-                if interval == 'hour':
-                    key = created_date.strftime('%Y-%m-%d %H:00')
-                elif interval == 'day':
-                    key = created_date.strftime('%Y-%m-%d')
-                elif interval == 'month':
-                    key = created_date.strftime('%Y-%m')
-                else:
-                    key = created_date.strftime('%Y-%m-%d')
-                
-                if key not in grouped:
-                    grouped[key] = 0
-                
-                grouped[key] += 1
+            buckets = Rollup.get_series(['users'], start_date, end_date, interval)['users']
             
             # Format for chart
-            labels = sorted(grouped.keys())
-            values = [grouped[key] for key in labels]
+            labels = sorted(buckets.keys())
+            values = [buckets[key]['count'] for key in labels]
             
             return {
                 'labels': labels,
@@ -232,4 +294,113 @@ class User:
                 'labels': [],
                 'values': [],
                 'total': 0
-            }
\ No newline at end of file
+            }
+    
+    @classmethod
+    def build_profile_update(cls, session_data, profile=None):
+        """
+        Profile values for the user data held on a legacy session document
+        
+        Reviews recorded since the profile was created are kept: the legacy
+        review list and the profile's recent reviews never overlap.
+        
+        Args:
+            session_data (dict): Legacy session document
+            profile (dict, optional): Existing profile document
+            
+        Returns:
+            dict: Profile fields to merge
+        """
+        profile = profile or {}
+        legacy_reviews = list(reversed(session_data.get('reviews') or []))
+        
+        update = {key: session_data[key] for key in cls.PROFILE_FIELDS if key in session_data and key not in profile}
+        update['phone_number'] = session_data.get('phone_number')
+        update['created_at'] = profile.get('created_at') or session_data.get('created_at')
+        update['review_count'] = profile.get('review_count', 0) + len(legacy_reviews)
+        update['recent_review_ids'] = (profile.get('recent_review_ids', []) + legacy_reviews)[:cls.RECENT_REVIEWS]
+        
+        for key in ('last_review_id', 'last_review_type', 'last_review_date'):
+            if key in session_data and key not in profile:
+                update[key] = session_data[key]
+        
+        return update
+    
+    @classmethod
+    def migrate_sessions(cls, dry_run=False, batch_size=70):
+        """
+        Move profile and history fields off existing session documents
+        
+        Sessions without a profile get one, counted in the user total and
+        rollups in the same batch, so users from before the split are listed
+        and counted like new ones. Sessions that only hold conversation state
+        and already have a profile are skipped, so the migration can be
+        interrupted and re-run.
+        
+        Args:
+            dry_run (bool): Count sessions to migrate without writing
+            batch_size (int): Sessions per write batch (up to seven writes each, batches hold 500)
+            
+        Returns:
+            dict: 'scanned' and 'migrated' session counts, and 'profiles' created
+        """
+        db = firestore.client()
+        profiles = db.collection(cls.PROFILE_COLLECTION)
+        counts = {'scanned': 0, 'migrated': 0, 'profiles': 0}
+        pending = []
+        
+        def migrate(chunk):
+            snapshots = db.get_all([profiles.document(doc.id) for doc in chunk])
+            existing = {snapshot.id: snapshot.to_dict() for snapshot in snapshots if snapshot.exists}
+            
+            batch = db.batch()
+            migrated, created = 0, 0
+            for doc in chunk:
+                data = doc.to_dict()
+                legacy = any(key not in cls.SESSION_FIELDS for key in data)
+                if not legacy and doc.id in existing:
+                    continue
+                
+                migrated += 1
+                profile_update = cls.build_profile_update(data, existing.get(doc.id))
+                
+                if doc.id in existing:
+                    batch.set(profiles.document(doc.id), profile_update, merge=True)
+                else:
+                    # create() fails if the user's first message raced the migration, so they are counted once
+                    created += 1
+                    batch.create(profiles.document(doc.id), profile_update)
+                    Aggregate.increment(batch, 'users')
+                    Rollup.record(batch, 'users', profile_update.get('created_at'))
+                
+                # Drop everything that is not conversation state, including the last_review copy
+                if legacy:
+                    batch.update(doc.reference, {
+                        key: firestore.DELETE_FIELD for key in data if key not in cls.SESSION_FIELDS
+                    })
+                SearchIndex.index(batch, 'users', doc.id, {**data, **profile_update})
+            
+            if not dry_run and migrated:
+                try:
+                    batch.commit()
+                    SearchIndex.committed(batch)
+                
+                except AlreadyExists:
+                    # Re-read the profiles and try the chunk again
+                    return migrate(chunk)
+            
+            counts['migrated'] += migrated
+            counts['profiles'] += created
+        
+        for doc in db.collection('sessions').stream():
+            counts['scanned'] += 1
+            pending.append(doc)
+            if len(pending) == batch_size:
+                migrate(pending)
+                pending = []
+        
+        if pending:
+            migrate(pending)
+        
+        logger.info(f"Session migration: {counts['migrated']} of {counts['scanned']} sessions migrated, {counts['profiles']} profiles created")
+        return counts
@@ -0,0 +1,67 @@
+# repositories/__init__.py - Storage backend selection
+import importlib
+import threading
+from config import Config
+from repositories.base import Repositories
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# STORAGE_BACKEND value -> module with a create() function
+BACKENDS = {
+    'firebase': 'repositories.firestore',
+    'sqlite': 'repositories.sqlite',
+    'memory': 'repositories.memory'
+}
+
+_repositories = None
+_repositories_lock = threading.Lock()
+
+def create_repositories(backend=None):
+    """
+    Build the repositories of a storage backend
+
+    Backend modules are imported on demand, so the local backends do not
+    need the Firebase SDK to be configured.
+
+    Args:
+        backend (str, optional): Key of BACKENDS, defaults to Config.STORAGE_BACKEND
+
+    Returns:
+        Repositories: Repositories of the backend
+    """
+    backend = (backend or Config.STORAGE_BACKEND or 'firebase').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    return importlib.import_module(BACKENDS[backend]).create()
+
+def get_repositories():
+    """
+    Repositories of the configured backend, created on first use
+
+    Returns:
+        Repositories: Shared repositories
+    """
+    global _repositories
+
+    if _repositories is None:
+        with _repositories_lock:
+            if _repositories is None:
+                _repositories = create_repositories()
+                logger.info(f"🗄️ Using {_repositories.backend} storage backend")
+    return _repositories
+
+def set_repositories(repositories):
+    """
+    Replace the shared repositories, e.g. with in-memory ones in tests
+
+    Args:
+        repositories (Repositories): Repositories to use, None to recreate from config
+    """
+    global _repositories
+
+    with _repositories_lock:
+        _repositories = repositories
+
+__all__ = ['Repositories', 'BACKENDS', 'create_repositories', 'get_repositories', 'set_repositories']
@@ -0,0 +1,227 @@
+# repositories/base.py - Storage interfaces for sessions, reviews, payments, reports and files
+from models.user import User
+
+class SessionRepository:
+    """
+    Conversation state and profiles, keyed by WhatsApp number
+
+    The state holds User.SESSION_FIELDS and is read on every message; the
+    profile holds User.PROFILE_FIELDS plus review bookkeeping.
+    """
+
+    def get(self, phone_number, fields=None):
+        """
+        Read a session
+
+        Args:
+            phone_number (str): User's phone number
+            fields (list, optional): Fields to read, all when None
+
+        Returns:
+            dict: Session data, None if there is no session
+        """
+        raise NotImplementedError
+
+    def create(self, phone_number, session_data):
+        """Store a new session, and a profile if the user has none yet"""
+        raise NotImplementedError
+
+    def replace(self, phone_number, session_data):
+        """Overwrite a session, e.g. one that expired"""
+        raise NotImplementedError
+
+    def touch(self, phone_number, last_activity):
+        """Set an existing session's last activity time"""
+        raise NotImplementedError
+
+    def save(self, phone_number, state, profile_fields):
+        """
+        Merge conversation state into the session and changed fields into the profile
+
+        Args:
+            phone_number (str): User's phone number
+            state (dict): Session fields to merge
+            profile_fields (dict): Profile fields, written only if they changed
+        """
+        raise NotImplementedError
+
+    def get_profile(self, phone_number, fields=None):
+        """
+        Read a profile
+
+        Returns:
+            dict: Profile data, None if the user has no profile
+        """
+        raise NotImplementedError
+
+    def get_deferred(self, before, limit):
+        """
+        Sessions whose review was deferred at or before a time, oldest first
+
+        Args:
+            before (datetime): Latest deferral time
+            limit (int): Maximum number of sessions
+
+        Returns:
+            list: (phone number, session data) tuples
+        """
+        raise NotImplementedError
+
+class ReviewRepository:
+    """Finished reviews"""
+
+    def add(self, phone_number, review_data):
+        """
+        Store a review and record it on the user's profile
+
+        Args:
+            phone_number (str): User's phone number
+            review_data (dict): Review data
+
+        Returns:
+            str: Review ID
+        """
+        raise NotImplementedError
+
+    def get(self, review_id):
+        """
+        Read a review
+
+        Returns:
+            dict: Review data with 'id', None if it does not exist
+        """
+        raise NotImplementedError
+
+    def list_by_user(self, user_id):
+        """
+        A user's reviews
+
+        Returns:
+            list: Review data with 'id', newest first
+        """
+        raise NotImplementedError
+
+class PaymentRepository:
+    """Completed payments, keyed by Paystack reference"""
+
+    def record(self, payment_data):
+        """
+        Store a payment unless its reference is already recorded
+
+        Args:
+            payment_data (dict): Payment data including 'reference' and 'timestamp'
+
+        Returns:
+            bool: Whether the payment was newly recorded
+        """
+        raise NotImplementedError
+
+    def list_by_user(self, user_id):
+        """
+        A user's payments
+
+        Returns:
+            list: Payment data with 'id', newest first
+        """
+        raise NotImplementedError
+
+class ReportRepository:
+    """Metadata of stored PDF reports, keyed by content digest"""
+
+    def exists(self, digest):
+        """Whether a report with this digest is stored"""
+        raise NotImplementedError
+
+    def mark_used(self, digest, used_at):
+        """
+        Count one more use of a stored report
+
+        Returns:
+            bool: False if the report is no longer stored
+        """
+        raise NotImplementedError
+
+    def add(self, digest, metadata):
+        """Store a new report's metadata"""
+        raise NotImplementedError
+
+class BlobStore:
+    """Uploaded CVs, reports and other files, addressed by path"""
+
+    def upload_file(self, file_path, storage_path, content_type=None):
+        raise NotImplementedError
+
+    def upload_bytes(self, data, storage_path, content_type=None):
+        raise NotImplementedError
+
+    def download_to_file(self, storage_path, file_path):
+        raise NotImplementedError
+
+    def download_bytes(self, storage_path):
+        raise NotImplementedError
+
+    def exists(self, storage_path):
+        raise NotImplementedError
+
+    def delete(self, storage_path):
+        raise NotImplementedError
+
+    def signed_url(self, storage_path, expiration, method='GET', credentials=None):
+        """
+        URL a user can download the file from
+
+        Args:
+            storage_path (str): Path of the file
+            expiration (timedelta): How long the URL stays valid, where supported
+            method (str): HTTP method the URL is for
+            credentials (optional): Signing credentials, where supported
+
+        Returns:
+            str: URL
+        """
+        raise NotImplementedError
+
+class Repositories:
+    """The repositories of one storage backend"""
+
+    def __init__(self, backend, sessions, reviews, payments, reports, blobs):
+        self.backend = backend
+        self.sessions = sessions
+        self.reviews = reviews
+        self.payments = payments
+        self.reports = reports
+        self.blobs = blobs
+
+def changed_profile_fields(profile, profile_fields):
+    """
+    Profile fields that differ from the stored profile
+
+    Profile fields ride along on the session dict, so most saves carry
+    values that are already stored.
+
+    Returns:
+        dict: Fields to write, empty if nothing changed
+    """
+    return {key: value for key, value in profile_fields.items() if (profile or {}).get(key) != value}
+
+def review_profile_update(profile, review_id, review_data, reviewed_at):
+    """
+    Profile fields recording a new review, keeping a bounded list of recent IDs
+
+    Args:
+        profile (dict): Stored profile, None for a new one
+        review_id (str): New review's ID
+        review_data (dict): New review's data
+        reviewed_at (datetime): UTC time of the review
+
+    Returns:
+        dict: Fields to merge into the profile
+    """
+    profile = profile or {}
+    return {
+        'review_count': profile.get('review_count', 0) + 1,
+        'recent_review_ids': ([review_id] + profile.get('recent_review_ids', []))[:User.RECENT_REVIEWS],
+        'last_review_id': review_id,
+        'last_review_type': review_data.get('review_type', 'basic'),
+        'last_review_date': reviewed_at
+    }
@@ -0,0 +1,218 @@
+# repositories/firestore.py - Firestore and Cloud Storage backend
+import uuid
+from firebase_admin import firestore, storage
+from google.api_core.exceptions import AlreadyExists, NotFound
+from models.aggregate import Aggregate
+from models.rollup import Rollup
+from models.search_index import SearchIndex
+from models.user import User
+from repositories.base import (
+    SessionRepository, ReviewRepository, PaymentRepository, ReportRepository, BlobStore, Repositories,
+    changed_profile_fields
+)
+from utils.timestamps import normalize_timestamps, utc_now
+
+class FirestoreSessionRepository(SessionRepository):
+    """sessions/{phone} and users/{phone}, with the user counters and search index kept in the same batches"""
+
+    def get(self, phone_number, fields=None):
+        session = firestore.client().collection('sessions').document(phone_number).get(field_paths=fields)
+        return session.to_dict() if session.exists else None
+
+    def create(self, phone_number, session_data):
+        db = firestore.client()
+        session_ref = db.collection('sessions').document(phone_number)
+        profile_ref = db.collection(User.PROFILE_COLLECTION).document(phone_number)
+
+        # Users whose session was archived keep their profile and are not counted again.
+        # create() fails if the profile exists, so of two concurrent first messages only
+        # one counts the user; the other falls through to the plain session write.
+        if not profile_ref.get(field_paths=['created_at']).exists:
+            try:
+                batch = db.batch()
+                batch.set(session_ref, session_data)
+                batch.create(profile_ref, {
+                    'phone_number': phone_number,
+                    'created_at': session_data['created_at']
+                })
+                Aggregate.increment(batch, 'users')
+                Rollup.record(batch, 'users', session_data['created_at'])
+                SearchIndex.index(batch, 'users', phone_number, session_data)
+                batch.commit()
+                SearchIndex.committed(batch)
+                return
+
+            except AlreadyExists:
+                pass
+
+        # The profile and its search entry are unchanged
+        session_ref.set(session_data)
+
+    def replace(self, phone_number, session_data):
+        firestore.client().collection('sessions').document(phone_number).set(session_data)
+
+    def touch(self, phone_number, last_activity):
+        try:
+            firestore.client().collection('sessions').document(phone_number).update({'last_activity': last_activity})
+        except NotFound:
+            pass
+
+    def save(self, phone_number, state, profile_fields):
+        db = firestore.client()
+        batch = db.batch()
+        batch.set(db.collection('sessions').document(phone_number), state, merge=True)
+
+        if profile_fields:
+            profile_ref = db.collection(User.PROFILE_COLLECTION).document(phone_number)
+            profile_doc = profile_ref.get()
+            profile = profile_doc.to_dict() if profile_doc.exists else {}
+
+            if changed_profile_fields(profile, profile_fields):
+                profile.update(profile_fields)
+                profile.setdefault('phone_number', phone_number)
+                profile.setdefault('created_at', state.get('created_at'))
+                batch.set(profile_ref, profile, merge=True)
+                SearchIndex.index(batch, 'users', phone_number, profile)
+
+        batch.commit()
+        SearchIndex.committed(batch)
+
+    def get_profile(self, phone_number, fields=None):
+        profile = firestore.client().collection(User.PROFILE_COLLECTION).document(phone_number).get(field_paths=fields)
+        return profile.to_dict() if profile.exists else None
+
+    def get_deferred(self, before, limit):
+        # The range filter skips sessions whose deferral was cleared (None)
+        query = firestore.client().collection('sessions').where('deferred_at', '<=', before).order_by('deferred_at').limit(limit)
+        return [(doc.id, doc.to_dict()) for doc in query.stream()]
+
+class FirestoreReviewRepository(ReviewRepository):
+    """reviews/{id}, saved together with the review counters, rollups, search index and profile"""
+
+    def add(self, phone_number, review_data):
+        db = firestore.client()
+        review_id = str(uuid.uuid4())
+
+        batch = db.batch()
+        batch.set(db.collection('reviews').document(review_id), review_data)
+
+        review_type = review_data.get('review_type', 'basic')
+        Aggregate.increment(batch, 'reviews')
+        if f"reviews_{review_type}" in Aggregate.SOURCES:
+            Aggregate.increment(batch, f"reviews_{review_type}")
+            Rollup.record(batch, f"reviews_{review_type}", review_data.get('timestamp') or review_data['created_at'])
+        SearchIndex.index(batch, 'reviews', review_id, review_data)
+
+        # Record the review on the profile, keeping a bounded list of recent IDs
+        profile_ref = db.collection(User.PROFILE_COLLECTION).document(phone_number)
+        profile_doc = profile_ref.get(field_paths=['recent_review_ids'])
+        recent = profile_doc.to_dict().get('recent_review_ids', []) if profile_doc.exists else []
+
+        batch.set(profile_ref, {
+            'phone_number': phone_number,
+            'review_count': firestore.Increment(1),
+            'recent_review_ids': ([review_id] + recent)[:User.RECENT_REVIEWS],
+            'last_review_id': review_id,
+            'last_review_type': review_type,
+            'last_review_date': utc_now()
+        }, merge=True)
+
+        batch.commit()
+        SearchIndex.committed(batch)
+        return review_id
+
+    def get(self, review_id):
+        review_doc = firestore.client().collection('reviews').document(review_id).get()
+        if not review_doc.exists:
+            return None
+        review_data = review_doc.to_dict()
+        review_data['id'] = review_id
+        return review_data
+
+    def list_by_user(self, user_id):
+        query = firestore.client().collection('reviews').where('user_id', '==', user_id).order_by('timestamp', direction=firestore.Query.DESCENDING)
+        return [dict(normalize_timestamps(doc.to_dict()), id=doc.id) for doc in query.stream()]
+
+class FirestorePaymentRepository(PaymentRepository):
+    """payments/{reference}, saved together with the payment counters, rollups and search index"""
+
+    def record(self, payment_data):
+        db = firestore.client()
+
+        # create() fails if the payment exists, which aborts the counter update too
+        try:
+            batch = db.batch()
+            batch.create(db.collection('payments').document(payment_data['reference']), payment_data)
+            Aggregate.increment(batch, 'payments', amount=float(payment_data.get('amount', 0)))
+            Rollup.record(batch, 'payments', payment_data['timestamp'], amount=float(payment_data.get('amount', 0)))
+            SearchIndex.index(batch, 'payments', payment_data['reference'], payment_data)
+            batch.commit()
+            SearchIndex.committed(batch)
+            return True
+
+        except AlreadyExists:
+            return False
+
+    def list_by_user(self, user_id):
+        query = firestore.client().collection('payments').where('user_id', '==', user_id).order_by('timestamp', direction=firestore.Query.DESCENDING)
+        return [dict(normalize_timestamps(doc.to_dict()), id=doc.id) for doc in query.stream()]
+
+class FirestoreReportRepository(ReportRepository):
+    """report_store/{digest}, pruned by the retention job"""
+
+    def exists(self, digest):
+        return firestore.client().collection('report_store').document(digest).get().exists
+
+    def mark_used(self, digest, used_at):
+        try:
+            firestore.client().collection('report_store').document(digest).update({
+                'use_count': firestore.Increment(1),
+                'last_used_at': used_at
+            })
+            return True
+
+        except NotFound:
+            return False
+
+    def add(self, digest, metadata):
+        firestore.client().collection('report_store').document(digest).set(metadata)
+
+class CloudStorageBlobStore(BlobStore):
+    """The default Firebase Storage bucket"""
+
+    def upload_file(self, file_path, storage_path, content_type=None):
+        storage.bucket().blob(storage_path).upload_from_filename(file_path, content_type=content_type)
+
+    def upload_bytes(self, data, storage_path, content_type=None):
+        storage.bucket().blob(storage_path).upload_from_string(data, content_type=content_type)
+
+    def download_to_file(self, storage_path, file_path):
+        storage.bucket().blob(storage_path).download_to_filename(file_path)
+
+    def download_bytes(self, storage_path):
+        return storage.bucket().blob(storage_path).download_as_bytes()
+
+    def exists(self, storage_path):
+        return storage.bucket().blob(storage_path).exists()
+
+    def delete(self, storage_path):
+        storage.bucket().blob(storage_path).delete()
+
+    def signed_url(self, storage_path, expiration, method='GET', credentials=None):
+        return storage.bucket().blob(storage_path).generate_signed_url(
+            version='v4',
+            expiration=expiration,
+            method=method,
+            credentials=credentials
+        )
+
+def create():
+    """Repositories backed by Firestore and Cloud Storage"""
+    return Repositories(
+        'firebase',
+        FirestoreSessionRepository(),
+        FirestoreReviewRepository(),
+        FirestorePaymentRepository(),
+        FirestoreReportRepository(),
+        CloudStorageBlobStore()
+    )
@@ -0,0 +1,194 @@
+# repositories/memory.py - In-memory backend for tests and local runs
+import copy
+import uuid
+import threading
+from repositories.base import (
+    SessionRepository, ReviewRepository, PaymentRepository, ReportRepository, BlobStore, Repositories,
+    changed_profile_fields, review_profile_update
+)
+from models.user import User
+from utils.timestamps import to_datetime, utc_now, MIN_TIMESTAMP
+
+class MemoryStore:
+    """Dicts of documents per table behind one lock; everything in or out is copied"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.tables = {}
+
+    def table(self, name):
+        return self.tables.setdefault(name, {})
+
+    def get(self, name, key, fields=None):
+        with self.lock:
+            data = self.table(name).get(key)
+            if data is None:
+                return None
+            if fields is not None:
+                data = {field: data[field] for field in fields if field in data}
+            return copy.deepcopy(data)
+
+    def merge(self, name, key, data):
+        with self.lock:
+            self.table(name).setdefault(key, {}).update(copy.deepcopy(data))
+
+    def put(self, name, key, data):
+        with self.lock:
+            self.table(name)[key] = copy.deepcopy(data)
+
+    def values(self, name):
+        with self.lock:
+            return copy.deepcopy(list(self.table(name).items()))
+
+class MemorySessionRepository(SessionRepository):
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, phone_number, fields=None):
+        return self.store.get('sessions', phone_number, fields)
+
+    def create(self, phone_number, session_data):
+        with self.store.lock:
+            self.store.put('sessions', phone_number, session_data)
+            if self.store.get(User.PROFILE_COLLECTION, phone_number) is None:
+                self.store.put(User.PROFILE_COLLECTION, phone_number, {
+                    'phone_number': phone_number,
+                    'created_at': session_data['created_at']
+                })
+
+    def replace(self, phone_number, session_data):
+        self.store.put('sessions', phone_number, session_data)
+
+    def touch(self, phone_number, last_activity):
+        with self.store.lock:
+            if self.store.get('sessions', phone_number, []) is not None:
+                self.store.merge('sessions', phone_number, {'last_activity': last_activity})
+
+    def save(self, phone_number, state, profile_fields):
+        with self.store.lock:
+            self.store.merge('sessions', phone_number, state)
+            profile = self.store.get(User.PROFILE_COLLECTION, phone_number)
+            changes = changed_profile_fields(profile, profile_fields)
+            if changes:
+                defaults = {} if profile else {'phone_number': phone_number, 'created_at': state.get('created_at')}
+                self.store.merge(User.PROFILE_COLLECTION, phone_number, dict(defaults, **changes))
+
+    def get_profile(self, phone_number, fields=None):
+        return self.store.get(User.PROFILE_COLLECTION, phone_number, fields)
+
+    def get_deferred(self, before, limit):
+        deferred = [
+            (phone_number, session) for phone_number, session in self.store.values('sessions')
+            if session.get('deferred_at') and to_datetime(session['deferred_at']) <= before
+        ]
+        deferred.sort(key=lambda item: to_datetime(item[1]['deferred_at']))
+        return deferred[:limit]
+
+class MemoryReviewRepository(ReviewRepository):
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, phone_number, review_data):
+        review_id = str(uuid.uuid4())
+        with self.store.lock:
+            self.store.put('reviews', review_id, review_data)
+            profile = self.store.get(User.PROFILE_COLLECTION, phone_number)
+            update = review_profile_update(profile, review_id, review_data, utc_now())
+            self.store.merge(User.PROFILE_COLLECTION, phone_number, dict(update, phone_number=phone_number))
+        return review_id
+
+    def get(self, review_id):
+        review_data = self.store.get('reviews', review_id)
+        return dict(review_data, id=review_id) if review_data is not None else None
+
+    def list_by_user(self, user_id):
+        reviews = [dict(data, id=review_id) for review_id, data in self.store.values('reviews') if data.get('user_id') == user_id]
+        reviews.sort(key=lambda review: to_datetime(review.get('timestamp')) or MIN_TIMESTAMP, reverse=True)
+        return reviews
+
+class MemoryPaymentRepository(PaymentRepository):
+
+    def __init__(self, store):
+        self.store = store
+
+    def record(self, payment_data):
+        with self.store.lock:
+            if self.store.get('payments', payment_data['reference'], []) is not None:
+                return False
+            self.store.put('payments', payment_data['reference'], payment_data)
+            return True
+
+    def list_by_user(self, user_id):
+        payments = [dict(data, id=reference) for reference, data in self.store.values('payments') if data.get('user_id') == user_id]
+        payments.sort(key=lambda payment: to_datetime(payment.get('timestamp')) or MIN_TIMESTAMP, reverse=True)
+        return payments
+
+class MemoryReportRepository(ReportRepository):
+
+    def __init__(self, store):
+        self.store = store
+
+    def exists(self, digest):
+        return self.store.get('report_store', digest, []) is not None
+
+    def mark_used(self, digest, used_at):
+        with self.store.lock:
+            report = self.store.get('report_store', digest)
+            if report is None:
+                return False
+            self.store.merge('report_store', digest, {'use_count': report.get('use_count', 0) + 1, 'last_used_at': used_at})
+            return True
+
+    def add(self, digest, metadata):
+        self.store.put('report_store', digest, metadata)
+
+class MemoryBlobStore(BlobStore):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blobs = {}
+
+    def upload_file(self, file_path, storage_path, content_type=None):
+        with open(file_path, 'rb') as f:
+            self.upload_bytes(f.read(), storage_path, content_type)
+
+    def upload_bytes(self, data, storage_path, content_type=None):
+        with self._lock:
+            self._blobs[storage_path] = bytes(data)
+
+    def download_to_file(self, storage_path, file_path):
+        data = self.download_bytes(storage_path)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+    def download_bytes(self, storage_path):
+        with self._lock:
+            if storage_path not in self._blobs:
+                raise FileNotFoundError(f"No blob at {storage_path}")
+            return self._blobs[storage_path]
+
+    def exists(self, storage_path):
+        with self._lock:
+            return storage_path in self._blobs
+
+    def delete(self, storage_path):
+        with self._lock:
+            if self._blobs.pop(storage_path, None) is None:
+                raise FileNotFoundError(f"No blob at {storage_path}")
+
+    def signed_url(self, storage_path, expiration, method='GET', credentials=None):
+        return f"memory://{storage_path}"
+
+def create():
+    """Repositories keeping everything in this process"""
+    store = MemoryStore()
+    return Repositories(
+        'memory',
+        MemorySessionRepository(store),
+        MemoryReviewRepository(store),
+        MemoryPaymentRepository(store),
+        MemoryReportRepository(store),
+        MemoryBlobStore()
+    )
@@ -0,0 +1,294 @@
+# repositories/sqlite.py - SQLite and local filesystem backend for self-hosted runs
+import os
+import json
+import uuid
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from config import Config
+from repositories.base import (
+    SessionRepository, ReviewRepository, PaymentRepository, ReportRepository, BlobStore, Repositories,
+    changed_profile_fields, review_profile_update
+)
+from utils.timestamps import to_datetime, utc_now
+
+# Sortable text form of the indexed time columns, always UTC
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (phone TEXT PRIMARY KEY, deferred_at TEXT, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS sessions_deferred_at ON sessions (deferred_at) WHERE deferred_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS profiles (phone TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS reviews (id TEXT PRIMARY KEY, user_id TEXT, timestamp TEXT, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS reviews_user_id ON reviews (user_id, timestamp);
+CREATE TABLE IF NOT EXISTS payments (reference TEXT PRIMARY KEY, user_id TEXT, timestamp TEXT, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS payments_user_id ON payments (user_id, timestamp);
+CREATE TABLE IF NOT EXISTS reports (digest TEXT PRIMARY KEY, data TEXT NOT NULL);
+"""
+
+def _time_key(value):
+    """Indexed column value for a stored timestamp, None if it has none"""
+    when = to_datetime(value)
+    return when.strftime(TIME_FORMAT) if when else None
+
+def _encode(value):
+    """JSON for a document, keeping datetimes as tagged ISO strings"""
+    def default(obj):
+        if isinstance(obj, datetime):
+            return {'$datetime': obj.isoformat()}
+        raise TypeError(f"Cannot store {type(obj).__name__} in SQLite backend")
+    return json.dumps(value, default=default)
+
+def _decode(text):
+    def hook(obj):
+        if len(obj) == 1 and '$datetime' in obj:
+            return datetime.fromisoformat(obj['$datetime'])
+        return obj
+    return json.loads(text, object_hook=hook)
+
+def _project(data, fields):
+    return data if fields is None else {field: data[field] for field in fields if field in data}
+
+class SQLiteDatabase:
+    """One connection per thread to a database file in WAL mode"""
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # executescript() manages its own transaction
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; writes use explicit transactions below
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction taking the lock up front, so read-modify-write cannot interleave"""
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def read(self, conn, table, key_column, key):
+        row = conn.execute(f"SELECT data FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+        return _decode(row[0]) if row else None
+
+class SQLiteSessionRepository(SessionRepository):
+
+    def __init__(self, db):
+        self.db = db
+
+    def _write(self, conn, phone_number, session_data):
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (phone, deferred_at, data) VALUES (?, ?, ?)",
+            (phone_number, _time_key(session_data.get('deferred_at')), _encode(session_data))
+        )
+
+    def get(self, phone_number, fields=None):
+        session = self.db.read(self.db.connection(), 'sessions', 'phone', phone_number)
+        return _project(session, fields) if session is not None else None
+
+    def create(self, phone_number, session_data):
+        with self.db.transaction() as conn:
+            self._write(conn, phone_number, session_data)
+            conn.execute(
+                "INSERT OR IGNORE INTO profiles (phone, data) VALUES (?, ?)",
+                (phone_number, _encode({'phone_number': phone_number, 'created_at': session_data['created_at']}))
+            )
+
+    def replace(self, phone_number, session_data):
+        with self.db.transaction() as conn:
+            self._write(conn, phone_number, session_data)
+
+    def touch(self, phone_number, last_activity):
+        with self.db.transaction() as conn:
+            session = self.db.read(conn, 'sessions', 'phone', phone_number)
+            if session is not None:
+                session['last_activity'] = last_activity
+                self._write(conn, phone_number, session)
+
+    def save(self, phone_number, state, profile_fields):
+        with self.db.transaction() as conn:
+            session = self.db.read(conn, 'sessions', 'phone', phone_number) or {}
+            session.update(state)
+            self._write(conn, phone_number, session)
+
+            profile = self.db.read(conn, 'profiles', 'phone', phone_number)
+            changes = changed_profile_fields(profile, profile_fields)
+            if changes:
+                profile = profile or {'phone_number': phone_number, 'created_at': state.get('created_at')}
+                profile.update(changes)
+                conn.execute("INSERT OR REPLACE INTO profiles (phone, data) VALUES (?, ?)", (phone_number, _encode(profile)))
+
+    def get_profile(self, phone_number, fields=None):
+        profile = self.db.read(self.db.connection(), 'profiles', 'phone', phone_number)
+        return _project(profile, fields) if profile is not None else None
+
+    def get_deferred(self, before, limit):
+        rows = self.db.connection().execute(
+            "SELECT phone, data FROM sessions WHERE deferred_at IS NOT NULL AND deferred_at <= ? ORDER BY deferred_at LIMIT ?",
+            (_time_key(before), limit)
+        ).fetchall()
+        return [(phone_number, _decode(data)) for phone_number, data in rows]
+
+class SQLiteReviewRepository(ReviewRepository):
+
+    def __init__(self, db):
+        self.db = db
+
+    def add(self, phone_number, review_data):
+        review_id = str(uuid.uuid4())
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO reviews (id, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                (review_id, review_data.get('user_id'), _time_key(review_data.get('timestamp')), _encode(review_data))
+            )
+
+            profile = self.db.read(conn, 'profiles', 'phone', phone_number) or {'phone_number': phone_number}
+            profile.update(review_profile_update(profile, review_id, review_data, utc_now()))
+            conn.execute("INSERT OR REPLACE INTO profiles (phone, data) VALUES (?, ?)", (phone_number, _encode(profile)))
+        return review_id
+
+    def get(self, review_id):
+        review_data = self.db.read(self.db.connection(), 'reviews', 'id', review_id)
+        return dict(review_data, id=review_id) if review_data is not None else None
+
+    def list_by_user(self, user_id):
+        rows = self.db.connection().execute(
+            "SELECT id, data FROM reviews WHERE user_id = ? ORDER BY timestamp DESC", (user_id,)
+        ).fetchall()
+        return [dict(_decode(data), id=review_id) for review_id, data in rows]
+
+class SQLitePaymentRepository(PaymentRepository):
+
+    def __init__(self, db):
+        self.db = db
+
+    def record(self, payment_data):
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO payments (reference, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                (payment_data['reference'], payment_data.get('user_id'), _time_key(payment_data.get('timestamp')), _encode(payment_data))
+            )
+            return cursor.rowcount == 1
+
+    def list_by_user(self, user_id):
+        rows = self.db.connection().execute(
+            "SELECT reference, data FROM payments WHERE user_id = ? ORDER BY timestamp DESC", (user_id,)
+        ).fetchall()
+        return [dict(_decode(data), id=reference) for reference, data in rows]
+
+class SQLiteReportRepository(ReportRepository):
+
+    def __init__(self, db):
+        self.db = db
+
+    def exists(self, digest):
+        return self.db.connection().execute("SELECT 1 FROM reports WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def mark_used(self, digest, used_at):
+        with self.db.transaction() as conn:
+            report = self.db.read(conn, 'reports', 'digest', digest)
+            if report is None:
+                return False
+            report['use_count'] = report.get('use_count', 0) + 1
+            report['last_used_at'] = used_at
+            conn.execute("UPDATE reports SET data = ? WHERE digest = ?", (_encode(report), digest))
+            return True
+
+    def add(self, digest, metadata):
+        with self.db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO reports (digest, data) VALUES (?, ?)", (digest, _encode(metadata)))
+
+class FileSystemBlobStore(BlobStore):
+    """Files under a local folder, optionally served at a public URL"""
+
+    def __init__(self, root, base_url=''):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip('/')
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, storage_path):
+        path = (self.root / storage_path).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Storage path {storage_path} is outside the blob folder")
+        return path
+
+    def upload_file(self, file_path, storage_path, content_type=None):
+        with open(file_path, 'rb') as f:
+            self.upload_bytes(f.read(), storage_path, content_type)
+
+    def upload_bytes(self, data, storage_path, content_type=None):
+        path = self._path(storage_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write next to the target and rename, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.upload_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def download_to_file(self, storage_path, file_path):
+        with open(file_path, 'wb') as f:
+            f.write(self.download_bytes(storage_path))
+
+    def download_bytes(self, storage_path):
+        return self._path(storage_path).read_bytes()
+
+    def exists(self, storage_path):
+        return self._path(storage_path).is_file()
+
+    def delete(self, storage_path):
+        self._path(storage_path).unlink()
+
+    def signed_url(self, storage_path, expiration, method='GET', credentials=None):
+        # Local files are not signed; serve the folder behind access control if it is public
+        path = self._path(storage_path)
+        if self.base_url:
+            return f"{self.base_url}/{path.relative_to(self.root).as_posix()}"
+        return path.as_uri()
+
+def create(path=None, blob_dir=None, blob_url=None):
+    """
+    Repositories backed by a SQLite file and a local folder
+
+    Args:
+        path (str, optional): Database file, defaults to Config.SQLITE_PATH
+        blob_dir (str, optional): Blob folder, defaults to Config.LOCAL_BLOB_DIR
+        blob_url (str, optional): URL the folder is served at, defaults to Config.LOCAL_BLOB_URL
+
+    Returns:
+        Repositories: SQLite repositories
+    """
+    db = SQLiteDatabase(path or Config.SQLITE_PATH)
+    return Repositories(
+        'sqlite',
+        SQLiteSessionRepository(db),
+        SQLiteReviewRepository(db),
+        SQLitePaymentRepository(db),
+        SQLiteReportRepository(db),
+        FileSystemBlobStore(blob_dir or Config.LOCAL_BLOB_DIR, Config.LOCAL_BLOB_URL if blob_url is None else blob_url)
+    )
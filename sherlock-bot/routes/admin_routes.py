@@ -1,11 +1,17 @@
 # routes/admin_routes.py - Admin dashboard routes
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from models.user import User
 from models.review import Review
 from models.payment import Payment
+from services.firebase_service import get_file_download_url, get_file_download_urls
+from services import profiling_service, latency_service
+from utils.cache import TTLCache
 from utils.logger import get_logger
+from utils.tracing import propagate
+from utils.timestamps import utc_now, format_timestamp
 from config import Config
 
 # Initialize logger
@@ -14,6 +20,17 @@ logger = get_logger()
 # Create blueprint
 admin_bp = Blueprint('admin', __name__)
 
+# Dashboard reads are independent, run them side by side
+_dashboard_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='admin-dashboard')
+
+# Assembled dashboard data, shared by admins refreshing within the TTL
+_dashboard_cache = TTLCache(ttl=Config.ADMIN_DASHBOARD_CACHE_TTL)
+
+@admin_bp.app_template_filter('timestamp')
+def timestamp_filter(value):
+    """Display a stored timestamp (native or legacy ISO string) in UTC"""
+    return format_timestamp(value)
+
 def login_required(f):
     """
     Login required decorator
@@ -90,31 +107,30 @@ def dashboard():
     Returns:
         Template: Dashboard page
     """
-    # Get stats
-    user_count = User.get_count()
-    review_count = Review.get_count()
-    basic_review_count = Review.get_count_by_type('basic')
-    advanced_review_count = Review.get_count_by_type('advanced')
-    payment_count = Payment.get_count()
-    payment_total = Payment.get_total_amount()
+    snapshot = _dashboard_cache.get_or_load('dashboard', load_dashboard_snapshot)
     
-    # Get recent reviews
-    recent_reviews = Review.get_recent(5)
-    
-    # Get recent users
-    recent_users = User.get_recent(5)
+    return render_template('admin/dashboard.html', **snapshot)
+
+def load_dashboard_snapshot():
+    """
+    Gather dashboard data with the reads running concurrently
     
-    return render_template(
-        'admin/dashboard.html',
-        user_count=user_count,
-        review_count=review_count,
-        basic_review_count=basic_review_count,
-        advanced_review_count=advanced_review_count,
-        payment_count=payment_count,
-        payment_total=payment_total,
-        recent_reviews=recent_reviews,
-        recent_users=recent_users
-    )
+    Returns:
+        dict: Template values
+    """
+    loaders = {
+        'user_count': User.get_count,
+        'review_count': Review.get_count,
+        'basic_review_count': lambda: Review.get_count_by_type('basic'),
+        'advanced_review_count': lambda: Review.get_count_by_type('advanced'),
+        'payment_count': Payment.get_count,
+        'payment_total': Payment.get_total_amount,
+        'recent_reviews': lambda: Review.get_recent(5),
+        'recent_users': lambda: User.attach_sessions(User.get_recent(5))
+    }
+    
+    futures = {name: _dashboard_executor.submit(propagate(loader)) for name, loader in loaders.items()}
+    return {name: future.result() for name, future in futures.items()}
 
 @admin_bp.route('/users')
 @login_required
@@ -130,11 +146,17 @@ def users():
     per_page = int(request.args.get('per_page', 20))
     search = request.args.get('search', '')
     
+    cursor = request.args.get('cursor')
+    cursors = None
+    
     # Get users
     if search:
         users, total = User.search(search, page, per_page)
     else:
-        users, total = User.get_paginated(page, per_page)
+        users, total, cursors = User.get_paginated(per_page, cursor)
+    
+    # Last activity and state live on the sessions, one batched read for the page
+    users = User.attach_sessions(users)
     
     return render_template(
         'admin/users.html',
@@ -143,6 +165,7 @@ def users():
         page=page,
         per_page=per_page,
         search=search,
+        cursors=cursors,
         total_pages=(total + per_page - 1) // per_page
     )
 
@@ -161,13 +184,22 @@ def reviews():
     review_type = request.args.get('type', '')
     search = request.args.get('search', '')
     
+    cursor = request.args.get('cursor')
+    cursors = None
+    
     # Get reviews
     if search:
         reviews, total = Review.search(search, page, per_page)
     elif review_type:
-        reviews, total = Review.get_by_type(review_type, page, per_page)
+        reviews, total, cursors = Review.get_by_type(review_type, per_page, cursor)
     else:
-        reviews, total = Review.get_paginated(page, per_page)
+        reviews, total, cursors = Review.get_paginated(per_page, cursor)
+    
+    # Stored links expire after a day, re-sign report links (cached per path)
+    report_urls = get_file_download_urls([review.get('report_path') for review in reviews])
+    for review in reviews:
+        if report_urls.get(review.get('report_path')):
+            review['download_link'] = report_urls[review['report_path']]
     
     return render_template(
         'admin/reviews.html',
@@ -177,6 +209,7 @@ def reviews():
         per_page=per_page,
         review_type=review_type,
         search=search,
+        cursors=cursors,
         total_pages=(total + per_page - 1) // per_page
     )
 
@@ -194,11 +227,14 @@ def payments():
     per_page = int(request.args.get('per_page', 20))
     search = request.args.get('search', '')
     
+    cursor = request.args.get('cursor')
+    cursors = None
+    
     # Get payments
     if search:
         payments, total = Payment.search(search, page, per_page)
     else:
-        payments, total = Payment.get_paginated(page, per_page)
+        payments, total, cursors = Payment.get_paginated(per_page, cursor)
     
     return render_template(
         'admin/payments.html',
@@ -207,6 +243,7 @@ def payments():
         page=page,
         per_page=per_page,
         search=search,
+        cursors=cursors,
         total_pages=(total + per_page - 1) // per_page
     )
 
@@ -229,8 +266,13 @@ def user_detail(user_id):
         flash('User not found', 'error')
         return redirect(url_for('admin.users'))
     
-    # Get user reviews
-    reviews = Review.get_by_user(user_id)
+    # Get user reviews by the IDs on the profile in one batched read, falling back
+    # to the query when the profile does not list them all
+    recent_ids = user.get('recent_review_ids') or list(reversed(user.get('reviews') or []))
+    if recent_ids and user.get('review_count', len(recent_ids)) <= len(recent_ids):
+        reviews = Review.get_by_ids(recent_ids)
+    else:
+        reviews = Review.get_by_user(user_id)
     
     # Get user payments
     payments = Payment.get_by_user(user_id)
@@ -261,6 +303,10 @@ def review_detail(review_id):
         flash('Review not found', 'error')
         return redirect(url_for('admin.reviews'))
     
+    # Stored links expire after a day, re-sign the report link (cached per path)
+    if review.get('report_path'):
+        review['download_link'] = get_file_download_url(review['report_path']) or review.get('download_link')
+    
     # Get user
     user = User.get_by_id(review.get('user_id'))
     
@@ -283,7 +329,7 @@ def stats():
     date_range = request.args.get('range', 'week')
     
     # Set date range
-    end_date = datetime.now()
+    end_date = utc_now()
     
     if date_range == 'day':
         start_date = end_date - timedelta(days=1)
@@ -312,4 +358,88 @@ def stats():
         review_stats=review_stats,
         payment_stats=payment_stats,
         user_stats=user_stats
+    )
+
+@admin_bp.route('/profiles')
+@login_required
+def profiles():
+    """
+    Profiling captures and arming controls
+    
+    Returns:
+        Template: Profiles page
+    """
+    try:
+        captures = profiling_service.list_profiles()
+    except Exception as e:
+        logger.error(f"Error listing profiles: {str(e)}")
+        captures = []
+    
+    links = get_file_download_urls([capture['path'] for capture in captures]) if captures else {}
+    for capture in captures:
+        capture['download_link'] = links.get(capture['path'])
+    
+    return render_template(
+        'admin/profiles.html',
+        captures=captures,
+        state=profiling_service.get_state(),
+        targets=profiling_service.TARGETS,
+        max_captures=profiling_service.MAX_CAPTURES,
+        enabled=Config.PROFILE_ENABLED,
+        max_seconds=Config.PROFILE_MAX_SECONDS,
+        default_interval=Config.PROFILE_INTERVAL_MS
+    )
+
+@admin_bp.route('/profiles/arm', methods=['POST'])
+@login_required
+def arm_profiler():
+    """
+    Profile the next N webhook requests or review jobs
+    
+    Returns:
+        Redirect: To the profiles page
+    """
+    try:
+        state = profiling_service.arm(
+            request.form.get('target', 'webhook'),
+            request.form.get('count', 1, type=int),
+            request.form.get('interval_ms', Config.PROFILE_INTERVAL_MS, type=int)
+        )
+        flash(f"Profiling the next {state['remaining']} {state['target']} runs (capture {state['capture_id']})", 'success')
+    except ValueError as e:
+        flash(str(e), 'error')
+    
+    return redirect(url_for('admin.profiles'))
+
+@admin_bp.route('/profiles/disarm', methods=['POST'])
+@login_required
+def disarm_profiler():
+    """
+    Cancel remaining captures
+    
+    Returns:
+        Redirect: To the profiles page
+    """
+    profiling_service.disarm()
+    flash('Profiling stopped', 'success')
+    return redirect(url_for('admin.profiles'))
+
+@admin_bp.route('/latency')
+@login_required
+def latency():
+    """
+    Review latency against the SLOs, by stage, with the slowest recent jobs
+    
+    Returns:
+        Template: Latency page
+    """
+    hours = min(max(request.args.get('hours', 24, type=int), 1), 168)
+    slowest = min(max(request.args.get('n', 10, type=int), 1), latency_service.SLOWEST_KEPT)
+    
+    return render_template(
+        'admin/latency.html',
+        report=latency_service.get_latency_report(hours, slowest),
+        hours=hours,
+        slowest=slowest,
+        window_options=(1, 6, 24, 72, 168)
     )
\ No newline at end of file
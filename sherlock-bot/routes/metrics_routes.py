@@ -0,0 +1,40 @@
+# routes/metrics_routes.py - Prometheus scrape endpoint
+import hmac
+from flask import Blueprint, Response, request, session
+from utils.logger import get_logger
+from utils.metrics import registry
+from config import Config
+
+# Initialize logger
+logger = get_logger()
+
+# Create blueprint
+metrics_bp = Blueprint('metrics', __name__)
+
+def is_authorized():
+    """
+    Check access to /metrics
+    
+    Returns:
+        bool: Whether the request carries the metrics bearer token or an admin session
+    """
+    if 'admin_logged_in' in session:
+        return True
+    
+    header = request.headers.get('Authorization', '')
+    token = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+    return bool(Config.METRICS_TOKEN) and hmac.compare_digest(token, Config.METRICS_TOKEN)
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """
+    Current metrics in Prometheus text exposition format
+    
+    Returns:
+        Response: Metrics text, or 401 without a valid token
+    """
+    if not is_authorized():
+        logger.warning(f"Unauthorized metrics request from {request.remote_addr}")
+        return Response('Unauthorized\n', status=401, headers={'WWW-Authenticate': 'Bearer'}, mimetype='text/plain')
+    
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 from services.twilio_service import validate_twilio_request
 from controllers.webhook_controller import handle_whatsapp_message
 from controllers.payment_controller import process_payment_webhook
+from services.profiling_service import profiled
 from utils.logger import get_logger
 from utils.file_utils import cleanup_temp_files
 from config import Config
@@ -19,7 +20,7 @@ def twilio_webhook():
     """Handle incoming WhatsApp messages via Twilio"""
     
     try:
-        logger.info(f"📨 Received WhatsApp webhook from {request.remote_addr}")
+        logger.info("📨 Received WhatsApp webhook from %s", request.remote_addr)
         
         # Validate Twilio request in production
         if Config.IS_PRODUCTION:
@@ -32,7 +33,8 @@ def twilio_webhook():
             logger.info(f"Development mode - Signature valid: {is_valid}")
         
         # Process the WhatsApp message
-        result = handle_whatsapp_message(request)
+        with profiled('webhook'):
+            result = handle_whatsapp_message(request)
         
         # Clean up old temp files periodically
         try:
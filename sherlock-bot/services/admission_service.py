@@ -0,0 +1,143 @@
+# services/admission_service.py - Admit review jobs while their projected memory fits the instance
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from config import Config
+from utils.logger import get_logger
+from utils.memory import MB
+from utils.metrics import registry
+
+# Initialize logger
+logger = get_logger()
+
+ADMISSION_DECISIONS = registry.counter(
+    'sherlock_admission_decisions_total', 'Review admission decisions', ['review_type', 'outcome'])
+RESERVED_BYTES = registry.gauge(
+    'sherlock_admission_reserved_bytes', 'Projected memory of the reviews running on this instance')
+
+# Fixed cost per review type: text, sentences and analysis, plus the report document for advanced reviews
+BASE_MB = {'basic': 24, 'advanced': 48}
+
+# Parsed documents (PyPDF2 object graph, python-docx XML tree) relative to the file size
+FILE_SIZE_FACTOR = 8
+
+# Extracted text and per-page objects
+PAGE_MB = 1.5
+
+# Assumed when the upload predates size and page tracking
+DEFAULT_FILE_SIZE = 512 * 1024
+DEFAULT_PAGE_COUNT = 3
+
+def estimate_review_memory(review_type, file_size=None, page_count=None):
+    """
+    Project the memory a review will hold at its peak
+
+    Args:
+        review_type (str): basic or advanced
+        file_size (int, optional): CV size in bytes
+        page_count (int, optional): PDF pages (None for Word documents)
+
+    Returns:
+        int: Projected bytes
+    """
+    file_size = file_size or DEFAULT_FILE_SIZE
+    page_count = page_count or DEFAULT_PAGE_COUNT
+    projected = BASE_MB.get(review_type, BASE_MB['advanced']) * MB
+    projected += file_size * (1 + FILE_SIZE_FACTOR)
+    projected += page_count * PAGE_MB * MB
+    return int(projected)
+
+class AdmissionController:
+    """
+    Admits reviews first come, first served while their projected memory fits the budget
+
+    Memory is per instance, so the controller is too: concurrent requests
+    served by the same instance share it.
+    """
+
+    def __init__(self):
+        self.reserved = 0
+        self.running = 0
+        self._waiting = deque()
+        self._condition = threading.Condition()
+
+    def _fits(self, estimate):
+        # A review larger than the whole budget still runs once it has the instance to itself
+        return self.running == 0 or self.reserved + estimate <= Config.MEMORY_BUDGET_MB * MB
+
+    def acquire(self, estimate, timeout):
+        """
+        Reserve memory for a review, waiting behind earlier reviews for room
+
+        Args:
+            estimate (int): Projected bytes
+            timeout (float): Seconds to wait for room
+
+        Returns:
+            bool: Whether the review was admitted
+        """
+        ticket = object()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._waiting.append(ticket)
+            try:
+                while self._waiting[0] is not ticket or not self._fits(estimate):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+
+                self.reserved += estimate
+                self.running += 1
+                RESERVED_BYTES.set(self.reserved)
+                return True
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+    def release(self, estimate):
+        """Return the memory reserved by acquire"""
+        with self._condition:
+            self.reserved -= estimate
+            self.running -= 1
+            RESERVED_BYTES.set(self.reserved)
+            self._condition.notify_all()
+
+# Controller shared by the requests of this instance
+controller = AdmissionController()
+
+@contextmanager
+def admission(review_type, estimate, wait_seconds=None):
+    """
+    Run the enclosed review only if its projected memory fits
+
+    Args:
+        review_type (str): basic or advanced
+        estimate (int): Projected bytes from estimate_review_memory
+        wait_seconds (float, optional): Seconds to queue for room (default Config.ADMISSION_WAIT_SECONDS)
+
+    Yields:
+        bool: True if admitted; False means the caller should defer the review
+    """
+    wait_seconds = Config.ADMISSION_WAIT_SECONDS if wait_seconds is None else wait_seconds
+    started = time.monotonic()
+
+    if not controller.acquire(estimate, wait_seconds):
+        ADMISSION_DECISIONS.inc(review_type=review_type, outcome='deferred')
+        logger.warning(
+            f"🧠 Deferring {review_type} review: {estimate / MB:.0f} MB projected, "
+            f"{controller.reserved / MB:.0f} of {Config.MEMORY_BUDGET_MB} MB reserved by {controller.running} reviews"
+        )
+        yield False
+        return
+
+    waited = time.monotonic() - started
+    ADMISSION_DECISIONS.inc(review_type=review_type, outcome='queued' if waited >= 0.05 else 'admitted')
+    if waited >= 0.05:
+        logger.info(f"🧠 {review_type} review admitted after waiting {waited:.1f}s for memory")
+
+    try:
+        yield True
+    finally:
+        controller.release(estimate)
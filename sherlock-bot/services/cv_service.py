@@ -1,25 +1,30 @@
 # services/cv_service.py - COMPLETELY FIXED CV analysis service
 import os
-import uuid
 import time
 import requests
 import PyPDF2
 import docx
 import traceback
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import re
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle
-from firebase_admin import storage
 from services.firebase_service import download_file_from_storage, get_file_download_url
-from utils.logger import get_logger
+from services.report_service import render_report, store_report
+from utils.logger import get_logger, lazy
+from utils.metrics import stage, dependency, FALLBACKS
+from utils.tracing import outbound_headers, propagate
+from utils.text_utils import dedupe_insights
+from utils.timestamps import utc_now
 from config import Config
 
 # Initialize logger
 logger = get_logger()
 
+# Worker pool for external API calls that run alongside internal analysis
+_analysis_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cv-api')
+
+# Insights shown by the first basic review messages; progressive reviews send no more up front
+BASIC_INSIGHTS_SHOWN = 6
+
 # FIXED: Handle NLTK properly with fallbacks
 try:
     import nltk
@@ -60,26 +65,44 @@ except ImportError:
         return [s.strip() for s in sentences if s.strip()]
 
 
-def process_basic_review(storage_path):
-    """Process basic CV review with comprehensive error handling"""
+def process_basic_review(storage_path, on_insights=None):
+    """
+    Process basic CV review with comprehensive error handling
+    
+    Args:
+        storage_path (str): Firebase Storage path of the CV
+        on_insights (callable, optional): Called with the internal insights as soon as they
+            are ready. When given, the external API only contributes extra insights that
+            arrive before Config.BASIC_REVIEW_API_DEADLINE.
+        
+    Returns:
+        dict: Review result. In progressive mode 'followup_insights' holds the API insights
+            that were not part of the first delivery.
+    """
     try:
+        started = time.monotonic()
         logger.info(f"🔄 Starting basic review for: {storage_path}")
         
         # Download file from storage
-        local_file_path = download_file_from_storage(storage_path)
+        with stage('basic', 'download'):
+            local_file_path = download_file_from_storage(storage_path)
         logger.info(f"📥 Downloaded file to: {local_file_path}")
         
         # Extract CV data
-        cv_data = extract_text_from_cv(local_file_path)
+        with stage('basic', 'extract'):
+            cv_data = extract_text_from_cv(local_file_path)
         cv_data['file_path'] = local_file_path
 
         # Process review
-        if Config.CV_ANALYSIS_API_URL:
-            logger.info("🔗 Using external CV analysis API")
-            review_result = call_cv_analysis_api(cv_data, 'basic')
-        else:
-            logger.info("🤖 Using internal CV analysis")
-            review_result = analyze_cv_basic(cv_data)
+        with stage('basic', 'analysis'):
+            if on_insights is not None:
+                review_result = progressive_basic_review(cv_data, on_insights, started)
+            elif Config.CV_ANALYSIS_API_URL:
+                logger.info("🔗 Using external CV analysis API")
+                review_result = call_cv_analysis_api(cv_data, 'basic')
+            else:
+                logger.info("🤖 Using internal CV analysis")
+                review_result = analyze_cv_basic(cv_data)
 
         # Add metadata
         review_result['cv_file_name'] = os.path.basename(storage_path)
@@ -99,49 +122,143 @@ def process_basic_review(storage_path):
         return {'success': False, 'error': str(e)}
 
 
+def progressive_basic_review(cv_data, on_insights, started=None):
+    """
+    Deliver internal insights immediately and enrich them with the external API
+    
+    Args:
+        cv_data (dict): Extracted CV data including 'file_path'
+        on_insights (callable): Receives the internal insights list
+        started (float, optional): time.monotonic() at which the review started
+        
+    Returns:
+        dict: Combined review result with 'followup_insights'
+    """
+    started = started if started is not None else time.monotonic()
+
+    # Give the slow external API a head start while we analyse locally. The worker
+    # uploads a copy of the file, so it never opens a temp file the review has removed,
+    # and its request ends with the deadline instead of holding a worker for longer.
+    api_future = None
+    if Config.CV_ANALYSIS_API_URL:
+        api_cv_data = dict(cv_data)
+        if cv_data.get('file_path'):
+            with open(cv_data['file_path'], 'rb') as f:
+                api_cv_data['file_bytes'] = f.read()
+        api_future = _analysis_executor.submit(
+            propagate(request_cv_analysis), api_cv_data, 'basic', Config.BASIC_REVIEW_API_DEADLINE
+        )
+
+    internal_result = analyze_cv_basic(cv_data)
+
+    if not internal_result.get('success'):
+        # Nothing to send early, wait for the API until the deadline
+        if api_future is not None:
+            api_result = _await_api_result(api_future, started)
+            if api_result and api_result.get('success') and api_result.get('insights'):
+                return api_result
+        return internal_result
+
+    # Insights past what the first messages show are dropped rather than counted as delivered
+    initial_insights = list(internal_result['insights'])[:BASIC_INSIGHTS_SHOWN]
+    on_insights(initial_insights)
+    logger.info(f"⚡ Sent {len(initial_insights)} internal insights after {time.monotonic() - started:.1f}s")
+
+    review_result = dict(internal_result)
+    review_result['followup_insights'] = []
+
+    if api_future is None:
+        return review_result
+
+    api_result = _await_api_result(api_future, started)
+    if api_result is None:
+        return review_result
+
+    if not api_result.get('success'):
+        FALLBACKS.inc(component='cv_api', reason='no_insights')
+        logger.warning(f"⚠️ CV API returned no usable insights: {api_result.get('error')}")
+        return review_result
+
+    followup = dedupe_insights(api_result.get('insights', []), initial_insights)
+    logger.info(f"✅ CV API added {len(followup)} new insights after {time.monotonic() - started:.1f}s")
+
+    if followup:
+        review_result['insights'] = initial_insights + followup
+        review_result['followup_insights'] = followup
+        review_result['api_provider'] = f"{internal_result.get('api_provider')} + {api_result.get('api_provider')}"
+
+    return review_result
+
+
+def _await_api_result(api_future, started):
+    """
+    Wait for a CV API call until the basic review deadline
+    
+    Args:
+        api_future (Future): Pending request_cv_analysis call
+        started (float): time.monotonic() at which the review started
+        
+    Returns:
+        dict: API result, or None if the call failed or missed the deadline
+    """
+    remaining = Config.BASIC_REVIEW_API_DEADLINE - (time.monotonic() - started)
+    try:
+        return api_future.result(timeout=max(remaining, 0))
+    
+    except FutureTimeoutError:
+        # A call still queued never starts; a running one ends at its own timeout
+        api_future.cancel()
+        FALLBACKS.inc(component='cv_api', reason='deadline')
+        logger.warning(f"⏱️ CV API missed the {Config.BASIC_REVIEW_API_DEADLINE}s deadline, keeping internal insights")
+    
+    except Exception as e:
+        FALLBACKS.inc(component='cv_api', reason='error')
+        logger.error(f"Error calling CV analysis API: {str(e)}")
+    
+    return None
+
+
 def process_advanced_review(storage_path):
     """Process advanced CV review"""
     try:
         logger.info(f"🔄 Starting advanced review for: {storage_path}")
         
-        local_file_path = download_file_from_storage(storage_path)
-        cv_data = extract_text_from_cv(local_file_path)
+        with stage('advanced', 'download'):
+            local_file_path = download_file_from_storage(storage_path)
+        with stage('advanced', 'extract'):
+            cv_data = extract_text_from_cv(local_file_path)
         cv_data['file_path'] = local_file_path
 
-        if Config.CV_ANALYSIS_API_URL:
-            review_result = call_cv_analysis_api(cv_data, 'advanced')
-        else:
-            review_result = analyze_cv_advanced(cv_data)
-
-        # Generate PDF report
-        report_path = generate_pdf_report(review_result, local_file_path)
-
-        # Upload report to Firebase Storage
-        path_parts = storage_path.split('/')
-        phone_number = path_parts[1] if len(path_parts) > 1 else 'unknown'
+        with stage('advanced', 'analysis'):
+            if Config.CV_ANALYSIS_API_URL:
+                review_result = call_cv_analysis_api(cv_data, 'advanced')
+            else:
+                review_result = analyze_cv_advanced(cv_data)
 
-        report_folder = 'review-reports'
-        report_filename = f"report_{int(time.time())}_{uuid.uuid4().hex[:8]}.pdf"
-        report_storage_path = f"{report_folder}/{phone_number}/{report_filename}"
+        # Reuse an identical stored report or render and upload a new one
+        with stage('advanced', 'report'):
+            report = store_report(review_result)
+        report_storage_path = report['storage_path']
 
-        bucket = storage.bucket()
-        blob = bucket.blob(report_storage_path)
-        blob.upload_from_filename(report_path)
-        blob.content_type = 'application/pdf'
-
-        download_url = get_file_download_url(report_storage_path)
+        with stage('advanced', 'download_url'):
+            download_url = get_file_download_url(report_storage_path)
         review_result['download_link'] = download_url
 
         review_result['cv_file_name'] = os.path.basename(storage_path)
         review_result['review_type'] = 'advanced'
         review_result['report_path'] = report_storage_path
+        review_result['report_digest'] = report['digest']
+        review_result['report_reused'] = report['reused']
+        if not report['reused']:
+            review_result['report_render_ms'] = report['render_ms']
+            review_result['report_size_bytes'] = report['size_bytes']
+            # Raw PDF for the email attachment, removed by the controller before saving
+            review_result['report_bytes'] = report['content']
         review_result['success'] = True
 
         # Clean up temporary files
         if os.path.exists(local_file_path):
             os.remove(local_file_path)
-        if os.path.exists(report_path):
-            os.remove(report_path)
 
         logger.info("✅ Advanced review completed successfully")
         return review_result
@@ -391,7 +508,7 @@ def analyze_cv_basic(cv_data):
 
         return {
             'success': True,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': utc_now(),
             'insights': insights[:8],  # Limit to 8 insights
             'api_provider': 'Internal Analysis'
         }
@@ -449,7 +566,7 @@ def analyze_cv_advanced(cv_data):
         
         return {
             'success': True,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': utc_now(),
             'improvement_score': score,
             'insights': insights[:10],
             'api_provider': 'Internal Analysis'
@@ -464,73 +581,96 @@ def analyze_cv_advanced(cv_data):
 
 
 def call_cv_analysis_api(cv_data, review_type):
-    """Call external CV analysis API with correct parameters"""
+    """Call external CV analysis API, falling back to internal analysis"""
     try:
-        local_file_path = cv_data.get('file_path', None)
-        if not local_file_path:
-            logger.error("File path missing from CV data")
-            return analyze_cv_fallback(cv_data, review_type)
-
-        logger.info(f"📤 Calling CV API with file: {os.path.basename(local_file_path)}")
-
-        # Open file for upload
-        with open(local_file_path, 'rb') as f:
-            files = {
-                'cv': (os.path.basename(local_file_path), f, 'application/octet-stream')
-            }
-
-            # FIXED: Use correct form data with all three required fields
-            form_data = {
-                'job_title': 'General Application',  # Can be customized based on user input
-                'job_description': 'Seeking opportunities in various industries. Review CV for general job applications including corporate, technical, and professional roles.'
-            }
-
-            api_url = Config.CV_ANALYSIS_API_URL
-            logger.info(f"🌐 API URL: {api_url}")
-            
-            response = requests.post(
-                api_url,
-                files=files,
-                data=form_data,
-                timeout=60
-            )
-
-        logger.info(f"📥 API Response Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            logger.error(f"API returned status {response.status_code}: {response.text[:500]}")
-            return analyze_cv_fallback(cv_data, review_type)
-
-        try:
-            result = response.json()
-            logger.info(f"📊 API Response Keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
-            logger.info(f"📝 First 200 chars of response: {str(result)[:200]}")
-        except Exception as json_error:
-            logger.error(f"Failed to parse API JSON response: {json_error}")
-            logger.error(f"Raw response: {response.text[:500]}")
-            return analyze_cv_fallback(cv_data, review_type)
-
-        if review_type == 'basic':
-            processed_result = process_basic_api_response(result)
-        else:
-            processed_result = process_advanced_api_response(result)
-            
-        logger.info(f"✅ Processed result has {len(processed_result.get('insights', []))} insights")
+        processed_result = request_cv_analysis(cv_data, review_type)
         
         # If no insights from API, use fallback
-        if not processed_result.get('insights'):
+        if not processed_result.get('success') or not processed_result.get('insights'):
+            FALLBACKS.inc(component='cv_api', reason='no_insights')
             logger.warning("⚠️ No insights from API, using fallback")
             return analyze_cv_fallback(cv_data, review_type)
             
         return processed_result
 
     except Exception as e:
+        FALLBACKS.inc(component='cv_api', reason='error')
         logger.error(f"Error calling CV analysis API: {str(e)}")
-        import traceback
         logger.error(f"Full error: {traceback.format_exc()}")
         return analyze_cv_fallback(cv_data, review_type)
 
 
+def request_cv_analysis(cv_data, review_type, timeout=60):
+    """
+    Send the CV to the external analysis API and process its response
+    
+    Args:
+        cv_data (dict): Extracted CV data including 'file_path', and optionally
+            'file_bytes' to upload instead of reading the file
+        review_type (str): Type of review (basic or advanced)
+        timeout (float): Request timeout in seconds
+        
+    Returns:
+        dict: Processed API result, with 'success' False when the API gave nothing usable
+    """
+    local_file_path = cv_data.get('file_path', None)
+    if not local_file_path:
+        logger.error("File path missing from CV data")
+        return {'success': False, 'error': 'File path missing from CV data'}
+
+    logger.info(f"📤 Calling CV API with file: {os.path.basename(local_file_path)}")
+
+    # Read the file for upload unless the caller already did
+    file_bytes = cv_data.get('file_bytes')
+    if file_bytes is None:
+        with open(local_file_path, 'rb') as f:
+            file_bytes = f.read()
+
+    files = {
+        'cv': (os.path.basename(local_file_path), file_bytes, 'application/octet-stream')
+    }
+
+    # FIXED: Use correct form data with all three required fields
+    form_data = {
+        'job_title': 'General Application',  # Can be customized based on user input
+        'job_description': 'Seeking opportunities in various industries. Review CV for general job applications including corporate, technical, and professional roles.'
+    }
+
+    api_url = Config.CV_ANALYSIS_API_URL
+    logger.info(f"🌐 API URL: {api_url}")
+    
+    with dependency('cv_api', review_type):
+        response = requests.post(
+            api_url,
+            files=files,
+            data=form_data,
+            headers=outbound_headers(),
+            timeout=timeout
+        )
+
+    logger.info(f"📥 API Response Status: {response.status_code}")
+    
+    if response.status_code != 200:
+        logger.error(f"API returned status {response.status_code}: {response.text[:500]}")
+        return {'success': False, 'error': f"API returned status {response.status_code}"}
+
+    try:
+        result = response.json()
+        logger.debug("📊 API Response Keys: %s", lazy(lambda: list(result.keys()) if isinstance(result, dict) else 'Not a dict'))
+    except Exception as json_error:
+        logger.error(f"Failed to parse API JSON response: {json_error}")
+        logger.error(f"Raw response: {response.text[:500]}")
+        return {'success': False, 'error': 'Invalid JSON from API'}
+
+    if review_type == 'basic':
+        processed_result = process_basic_api_response(result)
+    else:
+        processed_result = process_advanced_api_response(result)
+        
+    logger.info(f"✅ Processed result has {len(processed_result.get('insights', []))} insights")
+    return processed_result
+
+
 def analyze_cv_fallback(cv_data, review_type):
     """Fallback analysis"""
     if review_type == 'basic':
@@ -552,7 +692,7 @@ def process_basic_api_response(result):
         }
     
     # Log the response structure for debugging
-    logger.info(f"API Response structure: {list(result.keys()) if isinstance(result, dict) else type(result)}")
+    logger.debug("API Response structure: %s", lazy(lambda: list(result.keys()) if isinstance(result, dict) else type(result)))
     
     # Extract insights from the nested structure
     analysis_results = result.get('analysis_results', {})
@@ -602,7 +742,7 @@ def process_basic_api_response(result):
 
     return {
         'success': True,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': utc_now(),
         'insights': insights[:8],
         'api_provider': 'CV Analyzer API'
     }
@@ -619,7 +759,7 @@ def process_advanced_api_response(result):
         }
     
     # Log the response structure for debugging
-    logger.info(f"API Response structure: {list(result.keys()) if isinstance(result, dict) else type(result)}")
+    logger.debug("API Response structure: %s", lazy(lambda: list(result.keys()) if isinstance(result, dict) else type(result)))
     
     insights = []
     score = 65  # Default score
@@ -682,7 +822,7 @@ def process_advanced_api_response(result):
 
     return {
         'success': True,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': utc_now(),
         'improvement_score': score,
         'section_scores': section_scores,
         'insights': insights[:10],
@@ -690,57 +830,22 @@ def process_advanced_api_response(result):
     }
 
 
-def generate_pdf_report(review_result, cv_path):
-    """Generate PDF report - simplified version"""
-    try:
-        timestamp = int(time.time())
-        report_filename = f"cv_review_report_{timestamp}.pdf"
+def generate_pdf_report(review_result, cv_path=None):
+    """
+    Generate PDF report in memory
+    
+    Args:
+        review_result (dict): Review results
+        cv_path (str, optional): Unused, kept for backward compatibility
         
-        # Create uploads directory if it doesn't exist
-        uploads_dir = '/tmp/uploads' if os.path.exists('/tmp') else 'uploads'
-        os.makedirs(uploads_dir, exist_ok=True)
-        report_path = os.path.join(uploads_dir, report_filename)
-
-        doc = SimpleDocTemplate(
-            report_path,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-
-        styles = getSampleStyleSheet()
-        content = []
-
-        # Title
-        content.append(Paragraph("CV Review Report", styles['Title']))
-        content.append(Spacer(1, 12))
-
-        # Date
-        date_text = f"Generated on: {datetime.now().strftime('%d %B %Y')}"
-        content.append(Paragraph(date_text, styles['Normal']))
-        content.append(Spacer(1, 24))
-
-        # Score (if available)
-        score = review_result.get('improvement_score')
-        if score:
-            content.append(Paragraph(f"CV Improvement Score: {score}/100", styles['Heading1']))
-            content.append(Spacer(1, 12))
-
-        # Insights
-        content.append(Paragraph("Key Insights and Recommendations", styles['Heading1']))
-        content.append(Spacer(1, 12))
-
-        insights = review_result.get('insights', [])
-        for i, insight in enumerate(insights, 1):
-            content.append(Paragraph(f"{i}. {insight}", styles['Normal']))
-            content.append(Spacer(1, 6))
-
-        doc.build(content)
-        logger.info(f"✅ Generated PDF report: {report_path}")
-        return report_path
+    Returns:
+        dict: Report with 'content' (PDF bytes), 'render_ms' and 'size_bytes'
+    """
+    try:
+        report = render_report(review_result)
+        logger.info(f"✅ Generated PDF report ({report['size_bytes']} bytes in {report['render_ms']}ms)")
+        return report
 
     except Exception as e:
         logger.error(f"❌ Error generating PDF report: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e
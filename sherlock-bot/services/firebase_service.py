@@ -1,15 +1,38 @@
-# services/firebase_service.py - Consolidated Firebase service
+# services/firebase_service.py - Sessions, reviews and file storage on the configured storage backend
 import os
+import json
 import uuid
 import time
+import threading
 import requests
-from datetime import datetime, timedelta
-from firebase_admin import firestore, storage
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from models.user import User
+from repositories import get_repositories
 from utils.logger import get_logger
+from utils.metrics import dependency
+from utils.tracing import propagate
+from utils.timestamps import utc_now, to_datetime
 
 # Initialize logger
 logger = get_logger()
 
+# Signed URL cache: (storage_path, method) -> (url, expires_at epoch seconds)
+SIGNED_URL_LIFETIME = timedelta(days=1)
+SIGNED_URL_REFRESH_MARGIN = timedelta(hours=1)
+SIGNED_URL_CACHE_SIZE = 1000
+_signed_url_cache = {}
+_signed_url_lock = threading.Lock()
+_signing_credentials = None
+_signing_credentials_loaded = False
+
+# Content types for uploaded files
+CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.doc': 'application/msword'
+}
+
 # User session functions
 def get_user_session(phone_number):
     """
@@ -22,47 +45,40 @@ def get_user_session(phone_number):
         dict: User session data
     """
     try:
-        # Get Firestore client
-        db = firestore.client()
+        sessions = get_repositories().sessions
         
-        # Get user session
-        session_ref = db.collection('sessions').document(phone_number)
-        session = session_ref.get()
+        # Get user session (conversation state only, profile fields are not needed per message)
+        session_data = sessions.get(phone_number, User.SESSION_FIELDS)
         
-        if session.exists:
-            # Return existing session
-            session_data = session.to_dict()
-            
+        if session_data is not None:
             # Check if session is expired (24 hours)
             last_activity = session_data.get('last_activity')
             if last_activity:
-                last_activity_time = datetime.fromisoformat(last_activity)
-                if datetime.now() - last_activity_time > timedelta(hours=24):
+                last_activity_time = to_datetime(last_activity)
+                if last_activity_time and utc_now() - last_activity_time > timedelta(hours=24):
                     # Session expired, create new session
                     session_data = {
                         'phone_number': phone_number,
-                        'created_at': datetime.now().isoformat(),
-                        'last_activity': datetime.now().isoformat(),
+                        'created_at': utc_now(),
+                        'last_activity': utc_now(),
                         'state': 'welcome'
                     }
-                    session_ref.set(session_data)
+                    sessions.replace(phone_number, session_data)
             
             # Update last activity
-            session_ref.update({
-                'last_activity': datetime.now().isoformat()
-            })
+            sessions.touch(phone_number, utc_now())
             
             return session_data
         
         else:
-            # Create new session
+            # Create new session and profile, and count the new user
             session_data = {
                 'phone_number': phone_number,
-                'created_at': datetime.now().isoformat(),
-                'last_activity': datetime.now().isoformat(),
+                'created_at': utc_now(),
+                'last_activity': utc_now(),
                 'state': 'welcome'
             }
-            session_ref.set(session_data)
+            sessions.create(phone_number, session_data)
             
             return session_data
     
@@ -72,8 +88,8 @@ def get_user_session(phone_number):
         # Return empty session
         return {
             'phone_number': phone_number,
-            'created_at': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat(),
+            'created_at': utc_now(),
+            'last_activity': utc_now(),
             'state': 'welcome'
         }
 
@@ -89,14 +105,12 @@ def update_user_session(phone_number, session_data):
         bool: Success status
     """
     try:
-        # Get Firestore client
-        db = firestore.client()
-        
         # Update session with last activity timestamp
-        session_data['last_activity'] = datetime.now().isoformat()
+        session_data['last_activity'] = utc_now()
         
-        # Update session
-        db.collection('sessions').document(phone_number).set(session_data, merge=True)
+        # Conversation state goes to the session, email and payment details to the profile
+        state, profile_fields = User.split_session_data(session_data)
+        get_repositories().sessions.save(phone_number, state, profile_fields)
         
         return True
     
@@ -104,34 +118,43 @@ def update_user_session(phone_number, session_data):
         logger.error(f"Error updating user session: {str(e)}")
         return False
 
+def get_deferred_sessions(limit=10):
+    """
+    Sessions whose review was deferred for lack of memory, oldest first
+    
+    Args:
+        limit (int): Maximum number of sessions
+        
+    Returns:
+        list: (phone number, session data) tuples
+    """
+    try:
+        return get_repositories().sessions.get_deferred(utc_now(), limit)
+    
+    except Exception as e:
+        logger.error(f"Error getting deferred sessions: {str(e)}")
+        return []
+
 # Storage functions
 def upload_file_to_storage(file_path, destination_path):
     """
-    Upload a file to Firebase Storage
+    Upload a file to storage
     
     Args:
         file_path (str): Path to local file
-        destination_path (str): Path in Firebase Storage
+        destination_path (str): Path in storage
         
     Returns:
         str: Storage path
     """
     try:
-        # Get bucket
-        bucket = storage.bucket()
+        # Set content type based on file extension (must be known before the upload to be stored)
+        file_extension = os.path.splitext(file_path)[1].lower()
+        content_type = CONTENT_TYPES.get(file_extension)
         
         # Upload file
-        blob = bucket.blob(destination_path)
-        blob.upload_from_filename(file_path)
-        
-        # Set content type based on file extension
-        file_extension = os.path.splitext(file_path)[1].lower()
-        if file_extension == '.pdf':
-            blob.content_type = 'application/pdf'
-        elif file_extension == '.docx':
-            blob.content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        elif file_extension == '.doc':
-            blob.content_type = 'application/msword'
+        with dependency('storage', 'upload'):
+            get_repositories().blobs.upload_file(file_path, destination_path, content_type)
         
         logger.info(f"Uploaded file to {destination_path}")
         
@@ -141,9 +164,34 @@ def upload_file_to_storage(file_path, destination_path):
         logger.error(f"Error uploading file to storage: {str(e)}")
         raise e
 
+def upload_bytes_to_storage(data, destination_path, content_type):
+    """
+    Upload in-memory content to storage in a single request
+    
+    Args:
+        data (bytes): File content
+        destination_path (str): Path in storage
+        content_type (str): MIME type stored with the object
+        
+    Returns:
+        str: Storage path
+    """
+    try:
+        # Upload content with its content type
+        with dependency('storage', 'upload'):
+            get_repositories().blobs.upload_bytes(data, destination_path, content_type)
+        
+        logger.info(f"Uploaded {len(data)} bytes to {destination_path}")
+        
+        return destination_path
+    
+    except Exception as e:
+        logger.error(f"Error uploading content to storage: {str(e)}")
+        raise e
+
 def upload_cv_to_storage(file_path, phone_number):
     """
-    Upload CV file to Firebase Storage
+    Upload CV file to storage
     
     Args:
         file_path (str): Path to local CV file
@@ -172,10 +220,10 @@ def upload_cv_to_storage(file_path, phone_number):
 
 def download_file_from_storage(storage_path):
     """
-    Download file from Firebase Storage
+    Download file from storage
     
     Args:
-        storage_path (str): Path in Firebase Storage
+        storage_path (str): Path in storage
         
     Returns:
         str: Local file path
@@ -195,12 +243,9 @@ def download_file_from_storage(storage_path):
             f"temp_{int(time.time())}_{uuid.uuid4().hex[:8]}{file_extension}"
         )
         
-        # Get bucket
-        bucket = storage.bucket()
-        
         # Download file
-        blob = bucket.blob(storage_path)
-        blob.download_to_filename(local_file_path)
+        with dependency('storage', 'download'):
+            get_repositories().blobs.download_to_file(storage_path, local_file_path)
         
         logger.info(f"Downloaded {storage_path} to {local_file_path}")
         
@@ -210,40 +255,162 @@ def download_file_from_storage(storage_path):
         logger.error(f"Error downloading file from storage: {str(e)}")
         raise e
 
-def get_file_download_url(storage_path):
+def download_bytes_from_storage(storage_path):
     """
-    Get download URL for a file in Firebase Storage
+    Download file content from storage into memory
     
     Args:
-        storage_path (str): Path in Firebase Storage
+        storage_path (str): Path in storage
         
     Returns:
-        str: Download URL
+        bytes: File content
+    """
+    try:
+        with dependency('storage', 'download'):
+            return get_repositories().blobs.download_bytes(storage_path)
+    
+    except Exception as e:
+        logger.error(f"Error downloading {storage_path} from storage: {str(e)}")
+        raise e
+
+def get_signing_credentials():
+    """
+    Get service account credentials for local URL signing
+    
+    With a private key available, signed URLs are computed in-process instead of
+    calling the IAM signBlob API.
+    
+    Returns:
+        google.oauth2.service_account.Credentials: Credentials, or None to use the default signer
     """
+    global _signing_credentials, _signing_credentials_loaded
+    
+    if _signing_credentials_loaded:
+        return _signing_credentials
+    
+    _signing_credentials_loaded = True
+    
     try:
-        # Get bucket
-        bucket = storage.bucket()
+        from google.oauth2 import service_account
         
-        # Get blob
-        blob = bucket.blob(storage_path)
+        key_json = os.getenv('SIGNING_SERVICE_ACCOUNT_JSON')
+        key_path = os.getenv('SIGNING_SERVICE_ACCOUNT_PATH') or os.getenv('SERVICE_ACCOUNT_PATH')
         
-        # Generate signed URL (valid for 1 day)
-        url = blob.generate_signed_url(
-            version='v4',
-            expiration=timedelta(days=1),
-            method='GET'
-        )
+        if key_json:
+            _signing_credentials = service_account.Credentials.from_service_account_info(json.loads(key_json))
+        elif key_path and os.path.exists(key_path):
+            _signing_credentials = service_account.Credentials.from_service_account_file(key_path)
         
-        return url
+        if _signing_credentials:
+            logger.info("Signing storage URLs locally with service account key")
+    
+    except Exception as e:
+        logger.warning(f"Could not load signing key, falling back to default signer: {str(e)}")
+        _signing_credentials = None
+    
+    return _signing_credentials
+
+def _sign_url(storage_path, method):
+    """Sign a URL for a blob and return it with its expiry time"""
+    blobs = get_repositories().blobs
+    
+    # Only Cloud Storage signs with a service account key
+    credentials = get_signing_credentials() if get_repositories().backend == 'firebase' else None
+    
+    expires_at = time.time() + SIGNED_URL_LIFETIME.total_seconds()
+    with dependency('storage', 'sign_url'):
+        url = blobs.signed_url(storage_path, SIGNED_URL_LIFETIME, method=method, credentials=credentials)
+    
+    with _signed_url_lock:
+        _signed_url_cache[(storage_path, method)] = (url, expires_at)
+        
+        # Drop expired entries so the cache cannot grow without bound
+        if len(_signed_url_cache) > SIGNED_URL_CACHE_SIZE:
+            now = time.time()
+            for key, (_, expiry) in list(_signed_url_cache.items()):
+                if expiry - SIGNED_URL_REFRESH_MARGIN.total_seconds() <= now:
+                    del _signed_url_cache[key]
+            while len(_signed_url_cache) > SIGNED_URL_CACHE_SIZE:
+                _signed_url_cache.pop(next(iter(_signed_url_cache)))
+    
+    return url
+
+def _cached_signed_url(storage_path, method):
+    """Return a cached signed URL that is not about to expire, or None"""
+    with _signed_url_lock:
+        entry = _signed_url_cache.get((storage_path, method))
+    
+    if entry and entry[1] - SIGNED_URL_REFRESH_MARGIN.total_seconds() > time.time():
+        return entry[0]
+    
+    return None
+
+def get_file_download_url(storage_path, method='GET'):
+    """
+    Get download URL for a file in storage
+    
+    Signed URLs are cached per path and method and re-signed before they expire.
+    
+    Args:
+        storage_path (str): Path in storage
+        method (str): HTTP method the URL is signed for
+        
+    Returns:
+        str: Download URL
+    """
+    try:
+        url = _cached_signed_url(storage_path, method)
+        if url:
+            return url
+        
+        # Generate signed URL (valid for 1 day)
+        return _sign_url(storage_path, method)
     
     except Exception as e:
         logger.error(f"Error getting download URL: {str(e)}")
         return None
 
+def get_file_download_urls(storage_paths, method='GET'):
+    """
+    Get download URLs for several files, signing cache misses concurrently
+    
+    Args:
+        storage_paths (list): Paths in storage
+        method (str): HTTP method the URLs are signed for
+        
+    Returns:
+        dict: Storage path to download URL (None where signing failed)
+    """
+    urls = {}
+    missing = []
+    
+    for storage_path in dict.fromkeys(p for p in storage_paths if p):
+        url = _cached_signed_url(storage_path, method)
+        if url:
+            urls[storage_path] = url
+        else:
+            missing.append(storage_path)
+    
+    if not missing:
+        return urls
+    
+    if get_repositories().backend != 'firebase' or get_signing_credentials() is not None or len(missing) == 1:
+        # Local signing and local backends are CPU only, no point in fanning out
+        for storage_path in missing:
+            urls[storage_path] = get_file_download_url(storage_path, method)
+        return urls
+    
+    # Each remote signature is an IAM round trip, overlap them
+    with ThreadPoolExecutor(max_workers=min(len(missing), 8)) as executor:
+        for storage_path, url in zip(missing, executor.map(propagate(lambda p: get_file_download_url(p, method)), missing)):
+            urls[storage_path] = url
+    
+    return urls
+
 # Review and payment data functions
 def save_review_result(phone_number, review_data):
     """
-    Save review result to Firestore
+    Save review result
     
     Args:
         phone_number (str): User's phone number
@@ -253,38 +420,12 @@ def save_review_result(phone_number, review_data):
         str: Review ID
     """
     try:
-        # Get Firestore client
-        db = firestore.client()
-        
-        # Generate review ID
-        review_id = str(uuid.uuid4())
-        
         # Add metadata
         review_data['user_id'] = phone_number
-        review_data['created_at'] = datetime.now().isoformat()
-        
-        # Save review
-        db.collection('reviews').document(review_id).set(review_data)
-        
-        # Update user session with review reference
-        user_ref = db.collection('sessions').document(phone_number)
-        user_doc = user_ref.get()
-        
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            
-            # Create or update reviews array
-            reviews = user_data.get('reviews', [])
-            reviews.append(review_id)
-            
-            user_ref.update({
-                'reviews': reviews,
-                'last_review_id': review_id,
-                'last_review_type': review_data.get('review_type', 'basic'),
-                'last_review_date': datetime.now().isoformat()
-            })
+        review_data['created_at'] = utc_now()
         
-        return review_id
+        # Save review and record it on the profile
+        return get_repositories().reviews.add(phone_number, review_data)
     
     except Exception as e:
         logger.error(f"Error saving review result: {str(e)}")
@@ -301,19 +442,7 @@ def get_review(review_id):
         dict: Review data
     """
     try:
-        # Get Firestore client
-        db = firestore.client()
-        
-        # Get review
-        review_ref = db.collection('reviews').document(review_id)
-        review_doc = review_ref.get()
-        
-        if review_doc.exists:
-            review_data = review_doc.to_dict()
-            review_data['id'] = review_id
-            return review_data
-        
-        return None
+        return get_repositories().reviews.get(review_id)
     
     except Exception as e:
         logger.error(f"Error getting review {review_id}: {str(e)}")
@@ -330,16 +459,18 @@ def get_user_email(phone_number):
         str: Email address or None
     """
     try:
-        # Get Firestore client
-        db = firestore.client()
+        sessions = get_repositories().sessions
+        
+        # Get user profile
+        profile = sessions.get_profile(phone_number, ['email'])
         
-        # Get user document
-        user_ref = db.collection('sessions').document(phone_number)
-        user_doc = user_ref.get()
+        if profile and profile.get('email'):
+            return profile['email']
         
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            return user_data.get('email')
+        # Sessions not yet migrated still hold the email
+        session = sessions.get(phone_number, ['email'])
+        if session:
+            return session.get('email')
         
         return None
     
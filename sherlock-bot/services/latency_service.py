@@ -0,0 +1,239 @@
+# services/latency_service.py - Recent review latencies and their hourly rollups
+import time
+import atexit
+import threading
+from collections import deque
+from datetime import timedelta
+from config import Config
+from models.latency_rollup import LatencyRollup
+from utils.latency import new_summary, add_job, merge_summary, quantile, share_within
+from utils.logger import get_logger
+from utils.timestamps import utc_now
+
+# Initialize logger
+logger = get_logger()
+
+REVIEW_TYPES = ('basic', 'advanced')
+
+# Finished jobs kept per instance; flushed to rollups long before this fills
+RING_SIZE = 1000
+
+# Slowest jobs kept per rollup document and shown on the latency page
+SLOWEST_KEPT = 20
+
+# Pipeline order of the stages, for the breakdown table
+STAGE_ORDER = ('deferred', 'download', 'extract', 'analysis', 'report', 'download_url', 'email', 'save', 'send_results')
+
+class JobRecord:
+    """Compact record of one finished review job"""
+
+    __slots__ = ('seq', 'finished_at', 'review_type', 'outcome', 'seconds', 'stages', 'trace_id', 'review_id')
+
+    def __init__(self, seq, finished_at, review_type, outcome, seconds, stages, trace_id, review_id):
+        self.seq = seq
+        self.finished_at = finished_at
+        self.review_type = review_type
+        self.outcome = outcome
+        self.seconds = seconds
+        self.stages = stages
+        self.trace_id = trace_id
+        self.review_id = review_id
+
+    def entry(self):
+        """Description kept in the slowest jobs lists"""
+        return {
+            'seconds': round(self.seconds, 2),
+            'finished_at': self.finished_at,
+            'outcome': self.outcome,
+            'trace_id': self.trace_id,
+            'review_id': self.review_id,
+            'stages': {name: round(seconds, 2) for name, seconds in self.stages.items()}
+        }
+
+_ring = deque(maxlen=RING_SIZE)
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_seq = 0
+_flushed_seq = 0
+_last_flush = time.monotonic()
+_running = 0
+
+def slo_seconds(review_type):
+    """End-to-end latency target of a review type"""
+    return Config.LATENCY_SLO_ADVANCED_SECONDS if review_type == 'advanced' else Config.LATENCY_SLO_BASIC_SECONDS
+
+def job_started():
+    """Note a review job starting on this instance"""
+    global _running
+    with _lock:
+        _running += 1
+
+def job_finished():
+    """
+    Note a review job ending, flushing pending jobs once none are running
+
+    An instance may be idled or shut down after its last job, so its jobs
+    are not left waiting for a flush that only a later job would trigger.
+
+    Returns:
+        int: Jobs flushed
+    """
+    global _running
+    with _lock:
+        _running = max(_running - 1, 0)
+        idle = _running == 0
+
+    return flush() if idle else 0
+
+def record_job(timing, outcome, review_id=None, trace_id=None, queued_seconds=0):
+    """
+    Record a finished review job and flush to the rollups when due
+
+    Args:
+        timing (JobTiming): Timing collected by utils.latency.job_timing
+        outcome (str): success or error
+        review_id (str, optional): Saved review ID
+        trace_id (str, optional): Trace ID of the job
+        queued_seconds (float): Time the review spent deferred before this run
+
+    Returns:
+        JobRecord: The record
+    """
+    global _seq
+    stages = dict(timing.stages)
+    if queued_seconds:
+        stages['deferred'] = queued_seconds
+    seconds = timing.elapsed() + queued_seconds
+
+    with _lock:
+        _seq += 1
+        record = JobRecord(_seq, utc_now(), timing.review_type, outcome, seconds, stages, trace_id, review_id)
+        _ring.append(record)
+
+    if seconds > slo_seconds(timing.review_type):
+        slowest_stage = max(stages.items(), key=lambda item: item[1], default=('-', 0))
+        logger.warning(
+            "🐢 Slow %s review: %.1fs (SLO %ss), slowest stage %s %.1fs, review %s, trace %s",
+            timing.review_type, seconds, slo_seconds(timing.review_type),
+            slowest_stage[0], slowest_stage[1], review_id, trace_id
+        )
+
+    if time.monotonic() - _last_flush >= Config.LATENCY_FLUSH_SECONDS:
+        flush()
+    return record
+
+def recent_jobs():
+    """
+    Jobs in this instance's ring buffer
+
+    Returns:
+        list: JobRecords, oldest first
+    """
+    with _lock:
+        return list(_ring)
+
+def _summaries(records):
+    # (review_type, hour) -> summary of the records finishing in that hour
+    summaries = {}
+    for record in records:
+        hour = record.finished_at.replace(minute=0, second=0, microsecond=0)
+        summary = summaries.setdefault((record.review_type, hour), new_summary())
+        add_job(summary, record.seconds, record.stages, record.entry(), SLOWEST_KEPT)
+    return summaries
+
+def flush():
+    """
+    Merge jobs recorded since the last flush into the hourly rollups
+
+    Only one thread flushes at a time; others return straight away and
+    their jobs are picked up before the flushing thread finishes.
+
+    Returns:
+        int: Jobs flushed
+    """
+    global _flushed_seq, _last_flush
+    if not _flush_lock.acquire(blocking=False):
+        return 0
+
+    flushed = 0
+    try:
+        _last_flush = time.monotonic()
+        while True:
+            pending = [record for record in recent_jobs() if record.seq > _flushed_seq]
+            if not pending:
+                return flushed
+
+            for (review_type, hour), summary in _summaries(pending).items():
+                LatencyRollup.merge(review_type, hour, summary, SLOWEST_KEPT)
+
+            _flushed_seq = pending[-1].seq
+            flushed += len(pending)
+            logger.info("⏱️ Flushed %d review latencies to rollups", len(pending))
+
+    except Exception as e:
+        # Pending jobs stay in the buffer for the next flush
+        logger.error(f"Error flushing latency rollups: {str(e)}")
+        return flushed
+
+    finally:
+        _flush_lock.release()
+
+# Instances shut down cleanly write out what they still hold
+atexit.register(flush)
+
+def get_latency_report(hours=24, slowest=SLOWEST_KEPT):
+    """
+    Latency percentiles, stage breakdown and slowest jobs over a time window
+
+    Reads the hourly rollups and adds this instance's jobs not flushed yet.
+
+    Args:
+        hours (int): Window length
+        slowest (int): Slowest jobs listed per review type
+
+    Returns:
+        dict: review_type -> {'count', 'p50', 'p95', 'p99', 'mean', 'slo',
+            'within_slo', 'stages', 'slowest'}
+    """
+    end = utc_now()
+    start = end - timedelta(hours=hours)
+    totals = {review_type: new_summary() for review_type in REVIEW_TYPES}
+
+    try:
+        for review_type, documents in LatencyRollup.get_window(REVIEW_TYPES, start, end).items():
+            for document in documents:
+                merge_summary(totals[review_type], document, slowest)
+    except Exception as e:
+        logger.error(f"Error reading latency rollups: {str(e)}")
+
+    pending = [record for record in recent_jobs() if record.seq > _flushed_seq and record.finished_at >= start]
+    for (review_type, _), summary in _summaries(pending).items():
+        if review_type in totals:
+            merge_summary(totals[review_type], summary, slowest)
+
+    report = {}
+    for review_type, summary in totals.items():
+        total = summary['total']
+        stage_names = sorted(summary['stages'], key=lambda name: (STAGE_ORDER.index(name) if name in STAGE_ORDER else len(STAGE_ORDER), name))
+        report[review_type] = {
+            'count': total['count'],
+            'p50': quantile(total, 0.5),
+            'p95': quantile(total, 0.95),
+            'p99': quantile(total, 0.99),
+            'mean': total['sum'] / total['count'] if total['count'] else None,
+            'slo': slo_seconds(review_type),
+            'within_slo': share_within(total, slo_seconds(review_type)),
+            'stages': [
+                {
+                    'name': name,
+                    'count': summary['stages'][name]['count'],
+                    'p50': quantile(summary['stages'][name], 0.5),
+                    'p95': quantile(summary['stages'][name], 0.95),
+                    'mean': summary['stages'][name]['sum'] / summary['stages'][name]['count'],
+                    'share': summary['stages'][name]['sum'] / total['sum'] if total['sum'] else None
+                }
+                for name in stage_names if summary['stages'][name]['count']
+            ],
+            'slowest': summary['slowest'][:slowest]
+        }
+    return report
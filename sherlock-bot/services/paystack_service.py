@@ -6,6 +6,8 @@ import requests
 import uuid
 from datetime import datetime
 from utils.logger import get_logger
+from utils.metrics import dependency
+from utils.tracing import outbound_headers
 from config import Config
 
 # Initialize logger
@@ -52,11 +54,12 @@ def create_payment_session(amount, currency, description, customer_email, metada
         }
         
         # Make API request
-        response = requests.post(
-            'https://api.paystack.co/transaction/initialize',
-            json=data,
-            headers=headers
-        )
+        with dependency('paystack', 'initialize'):
+            response = requests.post(
+                'https://api.paystack.co/transaction/initialize',
+                json=data,
+                headers=outbound_headers(headers)
+            )
         
         # Check response
         if response.status_code == 200:
@@ -108,10 +111,11 @@ def verify_payment(reference):
         }
         
         # Make API request to verification endpoint
-        response = requests.get(
-            f'https://api.paystack.co/transaction/verify/{reference}',
-            headers=headers
-        )
+        with dependency('paystack', 'verify'):
+            response = requests.get(
+                f'https://api.paystack.co/transaction/verify/{reference}',
+                headers=outbound_headers(headers)
+            )
         
         # Check response
         if response.status_code == 200:
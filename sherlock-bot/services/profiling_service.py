@@ -0,0 +1,254 @@
+# services/profiling_service.py - On-demand stack-sampling profiler for webhook requests and review jobs
+import sys
+import time
+import uuid
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from firebase_admin import firestore, storage
+from services.firebase_service import upload_bytes_to_storage
+from utils.cache import TTLCache
+from utils.logger import get_logger
+from utils.timestamps import utc_now, to_datetime
+from config import Config
+
+# Initialize logger
+logger = get_logger()
+
+# Firestore document holding the arming state shared by all instances
+CONFIG_COLLECTION = 'profiler'
+CONFIG_DOCUMENT = 'config'
+
+# Storage folder for collapsed-stack files
+PROFILE_FOLDER = 'profiles'
+
+# What can be profiled
+TARGETS = ('webhook', 'review')
+
+# Upper bounds an admin can request
+MAX_CAPTURES = 20
+MIN_INTERVAL_MS = 1
+
+# Arming state per instance, re-read at most every PROFILE_POLL_SECONDS
+_state_cache = TTLCache(ttl=Config.PROFILE_POLL_SECONDS, max_entries=1)
+
+def _load_state():
+    snapshot = firestore.client().collection(CONFIG_COLLECTION).document(CONFIG_DOCUMENT).get()
+    return snapshot.to_dict() if snapshot.exists else {}
+
+def get_state():
+    """
+    Current arming state
+
+    Returns:
+        dict: 'target', 'remaining', 'interval_ms', 'expires_at' and 'capture_id',
+            or an empty dict when disarmed
+    """
+    try:
+        state = _state_cache.get_or_load('state', _load_state)
+    except Exception as e:
+        logger.warning(f"Could not read profiler state: {str(e)}")
+        return {}
+
+    if not state.get('remaining') or (to_datetime(state.get('expires_at')) or utc_now()) <= utc_now():
+        return {}
+    return state
+
+def arm(target, count, interval_ms=None):
+    """
+    Profile the next requests or jobs of a kind
+
+    Args:
+        target (str): webhook or review
+        count (int): Number of captures to take
+        interval_ms (int, optional): Sampling interval, defaults to Config.PROFILE_INTERVAL_MS
+
+    Returns:
+        dict: New arming state
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown profiling target: {target}")
+
+    state = {
+        'target': target,
+        'remaining': max(1, min(int(count), MAX_CAPTURES)),
+        'interval_ms': max(MIN_INTERVAL_MS, int(interval_ms or Config.PROFILE_INTERVAL_MS)),
+        'capture_id': uuid.uuid4().hex[:8],
+        'armed_at': utc_now(),
+        # Unused slots lapse, so a forgotten session does not profile traffic days later
+        'expires_at': utc_now() + timedelta(seconds=Config.PROFILE_ARM_SECONDS)
+    }
+
+    firestore.client().collection(CONFIG_COLLECTION).document(CONFIG_DOCUMENT).set(state)
+    _state_cache.invalidate()
+    logger.info(f"🔬 Profiler armed for {state['remaining']} {target} captures ({state['capture_id']})")
+    return state
+
+def disarm():
+    """Stop taking captures"""
+    firestore.client().collection(CONFIG_COLLECTION).document(CONFIG_DOCUMENT).set({'remaining': 0})
+    _state_cache.invalidate()
+    logger.info("🔬 Profiler disarmed")
+
+def _claim(target):
+    """Take one capture slot, returning the arming state or None if none are left"""
+    state = get_state()
+    if state.get('target') != target:
+        return None
+
+    db = firestore.client()
+    ref = db.collection(CONFIG_COLLECTION).document(CONFIG_DOCUMENT)
+
+    @firestore.transactional
+    def claim(transaction):
+        current = ref.get(transaction=transaction).to_dict() or {}
+        if current.get('capture_id') != state['capture_id'] or current.get('remaining', 0) <= 0:
+            return None
+        transaction.update(ref, {'remaining': current['remaining'] - 1})
+        return dict(current, remaining=current['remaining'] - 1)
+
+    try:
+        claimed = claim(db.transaction())
+    except Exception as e:
+        logger.warning(f"Could not claim a profiling slot: {str(e)}")
+        return None
+
+    if claimed is None or claimed['remaining'] == 0:
+        _state_cache.invalidate()
+    return claimed
+
+def frame_name(frame):
+    """
+    Name of a stack frame for collapsed stacks
+
+    Args:
+        frame: Python frame
+
+    Returns:
+        str: e.g. 'services.cv_service:extract_text_from_pdf'
+    """
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+class StackSampler:
+    """
+    Samples the call stack of one thread from a background thread
+
+    Each sample walks the target thread's current frame to the root and counts
+    the stack, giving the collapsed format flamegraph tools read
+    ('root;caller;callee count'). Sampling stops at the hard time cap even if
+    the profiled code is still running.
+    """
+
+    def __init__(self, thread_id, interval, max_seconds):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.truncated = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                self.truncated = True
+                return
+
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        """
+        Samples in collapsed-stack format
+
+        Returns:
+            str: One 'frame;frame;frame count' line per distinct stack
+        """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _save(sampler, state, target, label, elapsed):
+    name = f"{utc_now().strftime('%Y%m%dT%H%M%S')}-{target}-{label or 'capture'}"
+    path = f"{PROFILE_FOLDER}/{state['capture_id']}/{name}.folded"
+    try:
+        upload_bytes_to_storage(sampler.collapsed().encode('utf-8'), path, 'text/plain')
+        logger.info(
+            f"🔬 Saved {sampler.samples} samples of {target} ({elapsed:.1f}s"
+            f"{', truncated' if sampler.truncated else ''}) to {path}"
+        )
+    except Exception as e:
+        logger.error(f"Could not save profile {path}: {str(e)}")
+
+@contextmanager
+def profiled(target, label=None):
+    """
+    Profile the enclosed block when the profiler is armed for this target
+
+    While disarmed this costs a cache lookup; the arming document is re-read
+    at most every PROFILE_POLL_SECONDS per instance.
+
+    Args:
+        target (str): webhook or review
+        label (str, optional): Added to the file name, e.g. the review type
+    """
+    if not Config.PROFILE_ENABLED or not get_state():
+        yield
+        return
+
+    state = _claim(target)
+    if state is None:
+        yield
+        return
+
+    sampler = StackSampler(threading.get_ident(), state['interval_ms'] / 1000, Config.PROFILE_MAX_SECONDS)
+    started = time.monotonic()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        # Upload off the request thread
+        threading.Thread(
+            target=_save, args=(sampler, state, target, label, time.monotonic() - started),
+            name='profile-upload', daemon=True
+        ).start()
+
+def list_profiles(limit=50):
+    """
+    Saved captures, newest first
+
+    Args:
+        limit (int): Maximum number of files
+
+    Returns:
+        list: Dicts with 'path', 'capture_id', 'name', 'size' and 'created'
+    """
+    blobs = storage.bucket().list_blobs(prefix=f"{PROFILE_FOLDER}/")
+    profiles = [
+        {
+            'path': blob.name,
+            'capture_id': blob.name.split('/')[1],
+            'name': blob.name.rsplit('/', 1)[-1],
+            'size': blob.size,
+            'created': blob.time_created
+        }
+        for blob in blobs if blob.name.endswith('.folded')
+    ]
+    profiles.sort(key=lambda p: p['created'] or utc_now(), reverse=True)
+    return profiles[:limit]
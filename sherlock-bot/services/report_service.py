@@ -0,0 +1,299 @@
+# services/report_service.py - In-memory PDF report rendering
+import io
+import json
+import time
+import hashlib
+from datetime import datetime
+from repositories import get_repositories
+from services.firebase_service import upload_bytes_to_storage
+from utils.pdf_writer import SimplePDFWriter, LETTER
+from utils.logger import get_logger
+from utils.timestamps import utc_now
+from config import Config
+
+# Initialize logger
+logger = get_logger()
+
+# Page layout shared by every report (points)
+PAGE_SIZE = LETTER
+PAGE_MARGIN = 72
+
+# Bump whenever the report layout or wording changes so stored reports are not reused
+REPORT_TEMPLATE_VERSION = 1
+
+# Shared, content-addressed reports live here
+REPORT_STORE_FOLDER = 'review-reports/shared'
+
+class ReportRenderer:
+    """Base class for report renderers"""
+
+    name = None
+
+    def render(self, review_result):
+        """
+        Render a review report
+
+        Args:
+            review_result (dict): Review results
+
+        Returns:
+            bytes: PDF content
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def report_lines(review_result):
+        """
+        Report content as (kind, text) pairs shared by all renderers
+
+        Args:
+            review_result (dict): Review results
+
+        Returns:
+            list: (kind, text) tuples with kind one of title, date, heading, item
+        """
+        lines = [
+            ('title', "CV Review Report"),
+            ('date', f"Generated on: {datetime.now().strftime('%d %B %Y')}")
+        ]
+
+        # Score (if available)
+        score = review_result.get('improvement_score')
+        if score:
+            lines.append(('heading', f"CV Improvement Score: {score}/100"))
+
+        # Insights
+        lines.append(('heading', "Key Insights and Recommendations"))
+        for i, insight in enumerate(review_result.get('insights', []), 1):
+            lines.append(('item', f"{i}. {insight}"))
+
+        return lines
+
+class ReportlabRenderer(ReportRenderer):
+    """Renders reports with reportlab platypus"""
+
+    name = 'reportlab'
+
+    def __init__(self):
+        # reportlab is imported here so the native backend never pays for it
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+        self._doc_template = SimpleDocTemplate
+        self._paragraph = Paragraph
+        self._spacer = Spacer
+
+        # Stylesheet is built once per process (getSampleStyleSheet is not free)
+        self.styles = getSampleStyleSheet()
+        self.page_options = {
+            'pagesize': PAGE_SIZE,
+            'rightMargin': PAGE_MARGIN,
+            'leftMargin': PAGE_MARGIN,
+            'topMargin': PAGE_MARGIN,
+            'bottomMargin': PAGE_MARGIN,
+            'title': 'CV Review Report',
+            'author': 'Sherlock CV Review'
+        }
+
+    def render(self, review_result):
+        styles = self.styles
+        Paragraph, Spacer = self._paragraph, self._spacer
+        content = []
+
+        for kind, text in self.report_lines(review_result):
+            if kind == 'title':
+                content.append(Paragraph(text, styles['Title']))
+                content.append(Spacer(1, 12))
+            elif kind == 'date':
+                content.append(Paragraph(text, styles['Normal']))
+                content.append(Spacer(1, 24))
+            elif kind == 'heading':
+                content.append(Paragraph(text, styles['Heading1']))
+                content.append(Spacer(1, 12))
+            else:
+                content.append(Paragraph(text, styles['Normal']))
+                content.append(Spacer(1, 6))
+
+        buffer = io.BytesIO()
+        doc = self._doc_template(buffer, **self.page_options)
+        doc.build(content)
+        return buffer.getvalue()
+
+class NativeRenderer(ReportRenderer):
+    """Renders reports with the built-in PDF writer, mirroring the reportlab layout"""
+
+    name = 'native'
+
+    # font, size, leading, align, space before, space after
+    STYLES = {
+        'title': ('Helvetica-Bold', 18, 22, 'center', 0, 18),
+        'date': ('Helvetica', 10, 12, 'left', 0, 24),
+        'heading': ('Helvetica-Bold', 18, 22, 'left', 10, 18),
+        'item': ('Helvetica', 10, 12, 'left', 0, 6)
+    }
+
+    def render(self, review_result):
+        writer = SimplePDFWriter(page_size=PAGE_SIZE, margin=PAGE_MARGIN, title='CV Review Report')
+
+        for kind, text in self.report_lines(review_result):
+            font, size, leading, align, space_before, space_after = self.STYLES[kind]
+            writer.add_paragraph(
+                text,
+                font=font,
+                size=size,
+                leading=leading,
+                align=align,
+                space_before=space_before,
+                space_after=space_after
+            )
+
+        return writer.to_bytes()
+
+RENDERERS = {
+    ReportlabRenderer.name: ReportlabRenderer,
+    NativeRenderer.name: NativeRenderer
+}
+
+# One renderer instance per backend and process
+_renderers = {}
+
+def resolve_renderer_name(name=None):
+    """
+    Validate a backend name
+
+    Args:
+        name (str, optional): Backend name, defaults to Config.REPORT_RENDERER
+
+    Returns:
+        str: Known backend name
+    """
+    name = name or Config.REPORT_RENDERER
+
+    if name not in RENDERERS:
+        logger.warning(f"Unknown report renderer '{name}', using reportlab")
+        name = ReportlabRenderer.name
+
+    return name
+
+def get_renderer(name=None):
+    """
+    Get the renderer for a backend
+
+    Args:
+        name (str, optional): Backend name, defaults to Config.REPORT_RENDERER
+
+    Returns:
+        ReportRenderer: Renderer instance
+    """
+    name = resolve_renderer_name(name)
+
+    if name not in _renderers:
+        _renderers[name] = RENDERERS[name]()
+
+    return _renderers[name]
+
+def render_report(review_result, renderer=None):
+    """
+    Render a review report into memory
+
+    Args:
+        review_result (dict): Review results
+        renderer (str, optional): Backend name, defaults to Config.REPORT_RENDERER
+
+    Returns:
+        dict: Report with 'content' (PDF bytes), 'render_ms', 'size_bytes' and 'renderer'
+    """
+    backend = get_renderer(renderer)
+    started = time.perf_counter()
+
+    content = backend.render(review_result)
+
+    render_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"📄 Rendered PDF report with {backend.name} in {render_ms:.1f}ms ({len(content)} bytes)")
+
+    return {
+        'content': content,
+        'render_ms': round(render_ms, 1),
+        'size_bytes': len(content),
+        'renderer': backend.name
+    }
+
+# Digests known to be stored, so repeat hits skip the existence read
+_stored_digests = set()
+
+def report_digest(review_result, renderer=None):
+    """
+    Content hash of a report
+
+    The date line is deliberately left out: reports that differ only in their
+    generation date are treated as identical.
+
+    Args:
+        review_result (dict): Review results
+        renderer (str, optional): Backend name, defaults to Config.REPORT_RENDERER
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = {
+        'template_version': REPORT_TEMPLATE_VERSION,
+        'renderer': resolve_renderer_name(renderer),
+        'improvement_score': review_result.get('improvement_score'),
+        'insights': review_result.get('insights', [])
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def store_report(review_result, renderer=None):
+    """
+    Get the stored report for a review result, rendering and uploading it only once
+
+    Args:
+        review_result (dict): Review results
+        renderer (str, optional): Backend name, defaults to Config.REPORT_RENDERER
+
+    Returns:
+        dict: 'storage_path', 'digest', 'reused', and for new reports
+            'content', 'render_ms', 'size_bytes' and 'renderer'
+    """
+    digest = report_digest(review_result, renderer)
+    storage_path = f"{REPORT_STORE_FOLDER}/{digest}.pdf"
+
+    reports = get_repositories().reports
+    now = utc_now()
+
+    if digest in _stored_digests or reports.exists(digest):
+        # Reuse: a single metadata write instead of a render plus an upload
+        if reports.mark_used(digest, now):
+            _stored_digests.add(digest)
+            logger.info(f"♻️ Reusing stored report {digest[:12]}")
+            return {
+                'storage_path': storage_path,
+                'digest': digest,
+                'reused': True,
+                'content': None
+            }
+        
+        # Pruned by the retention job since this process last saw it
+        _stored_digests.discard(digest)
+
+    report = render_report(review_result, renderer)
+    upload_bytes_to_storage(report['content'], storage_path, 'application/pdf')
+
+    reports.add(digest, {
+        'storage_path': storage_path,
+        'size_bytes': report['size_bytes'],
+        'renderer': report['renderer'],
+        'template_version': REPORT_TEMPLATE_VERSION,
+        'created_at': now,
+        'last_used_at': now,
+        'use_count': 1
+    })
+    _stored_digests.add(digest)
+
+    report.update({
+        'storage_path': storage_path,
+        'digest': digest,
+        'reused': False
+    })
+    return report
@@ -0,0 +1,255 @@
+# services/retention_service.py - Archive and expire old data
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta
+from firebase_admin import firestore, storage
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from config import Config
+from models.aggregate import Aggregate
+from models.search_index import SearchIndex
+from services.firebase_service import upload_bytes_to_storage
+from utils.logger import get_logger
+from utils.timestamps import utc_now
+
+# Initialize logger
+logger = get_logger()
+
+# Storage folder for archived documents
+ARCHIVE_FOLDER = 'archive'
+
+# Documents archived per part file (and per delete flush)
+ARCHIVE_PAGE_SIZE = 500
+
+# Collection -> (timestamp field, search index entity, retention setting).
+# Users are indexed from their profiles, which stay, so archived sessions keep their entries.
+ARCHIVED_COLLECTIONS = {
+    'reviews': ('timestamp', 'reviews', 'RETENTION_REVIEW_DAYS'),
+    'sessions': ('last_activity', None, 'RETENTION_SESSION_DAYS')
+}
+
+# Legacy per-user reports; shared reports are pruned through report_store instead
+LEGACY_REPORT_PREFIX = 'review-reports/'
+CV_UPLOAD_PREFIX = 'cv-uploads/'
+
+def _json_default(value):
+    # Firestore timestamps are datetime subclasses
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def encode_archive(records):
+    """
+    Encode documents as gzip-compressed JSON lines
+
+    Args:
+        records (list): Document data, each with an 'id'
+
+    Returns:
+        bytes: Compressed JSONL
+    """
+    lines = ''.join(json.dumps(record, default=_json_default, sort_keys=True) + '\n' for record in records)
+    return gzip.compress(lines.encode('utf-8'))
+
+def _cutoff(days):
+    """
+    Cutoff values for a retention window
+
+    Args:
+        days (int): Retention window in days
+
+    Returns:
+        tuple: (UTC datetime, naive local ISO string) matching both stored formats
+    """
+    cutoff = utc_now() - timedelta(days=days)
+    return cutoff, cutoff.astimezone().replace(tzinfo=None).isoformat()
+
+def _expired_queries(collection, field, days):
+    # Native timestamps and legacy strings sort separately, so each needs its own range.
+    # Strings are only left on documents scripts/migrate_timestamps.py has not reached yet.
+    db = firestore.client()
+    return [
+        db.collection(collection).where(field, '<', cutoff).order_by(field)
+        for cutoff in _cutoff(days)
+    ]
+
+def _bulk_writer(db):
+    writer = db.bulk_writer(BulkWriterOptions(initial_ops_per_second=200, max_ops_per_second=500))
+    writer.on_write_error(lambda failure, _writer: failure.attempts < 5)
+    return writer
+
+def archive_collection(collection, days, run_id, dry_run=False):
+    """
+    Export documents older than the retention window to Storage and delete them
+
+    Each page is uploaded as archive/{collection}/{date}/{run_id}-{part}.jsonl.gz
+    before its documents and search entries are deleted, so nothing is removed
+    that was not archived first. Review totals keep counting archived reviews;
+    user totals, lists and search are unaffected because profiles stay.
+
+    Args:
+        collection (str): reviews or sessions
+        days (int): Retention window in days
+        run_id (str): Identifier shared by the part files of one run
+        dry_run (bool): Count expired documents without archiving them
+
+    Returns:
+        dict: {'archived', 'files'}
+    """
+    field, entity, _ = ARCHIVED_COLLECTIONS[collection]
+    db = firestore.client()
+    result = {'archived': 0, 'files': 0}
+    seen = set()
+    date = utc_now().strftime('%Y-%m-%d')
+
+    for query in _expired_queries(collection, field, days):
+        while True:
+            docs = [doc for doc in query.limit(ARCHIVE_PAGE_SIZE).stream() if doc.id not in seen]
+            if not docs:
+                break
+
+            seen.update(doc.id for doc in docs)
+            result['archived'] += len(docs)
+
+            if dry_run:
+                # Nothing is deleted, so page past what was already counted
+                query = query.start_after(docs[-1])
+                continue
+
+            records = [dict(doc.to_dict(), id=doc.id) for doc in docs]
+            path = f"{ARCHIVE_FOLDER}/{collection}/{date}/{run_id}-{result['files']:04d}.jsonl.gz"
+            upload_bytes_to_storage(encode_archive(records), path, 'application/gzip')
+            result['files'] += 1
+
+            writer = _bulk_writer(db)
+            for doc in docs:
+                writer.delete(doc.reference)
+                if entity:
+                    SearchIndex.remove(writer, entity, doc.id)
+            writer.close()
+
+            # Keep a later re-seed of the review aggregates from dropping archived reviews.
+            # The user total is seeded from profiles, which are never archived.
+            if collection == 'reviews':
+                Aggregate.record_archived('reviews', len(records))
+                for review_type in {record.get('review_type') for record in records}:
+                    name = f"reviews_{review_type}"
+                    if name in Aggregate.SOURCES:
+                        Aggregate.record_archived(name, sum(1 for record in records if record.get('review_type') == review_type))
+
+            logger.info(f"📦 Archived {len(records)} {collection} to {path}")
+
+    return result
+
+def prune_shared_reports(days, dry_run=False):
+    """
+    Delete shared reports that have not been reused within the retention window
+
+    Args:
+        days (int): Retention window in days
+        dry_run (bool): Count expired reports without deleting them
+
+    Returns:
+        int: Reports deleted (or that would be)
+    """
+    bucket = storage.bucket()
+    deleted = 0
+
+    for query in _expired_queries('report_store', 'last_used_at', days):
+        for doc in query.select(['storage_path']).stream():
+            deleted += 1
+            if dry_run:
+                continue
+
+            storage_path = doc.to_dict().get('storage_path')
+            if storage_path:
+                blob = bucket.blob(storage_path)
+                if blob.exists():
+                    blob.delete()
+            doc.reference.delete()
+
+    return deleted
+
+def _delete_old_blobs(prefix, days, dry_run=False, skip_prefix=None):
+    bucket = storage.bucket()
+    cutoff = utc_now() - timedelta(days=days)
+    deleted = 0
+
+    for blob in bucket.list_blobs(prefix=prefix):
+        if skip_prefix and blob.name.startswith(skip_prefix):
+            continue
+        if blob.time_created and blob.time_created < cutoff:
+            deleted += 1
+            if not dry_run:
+                blob.delete()
+
+    return deleted
+
+def apply_upload_lifecycle(days, dry_run=False):
+    """
+    Expire uploaded CVs with a bucket lifecycle rule
+
+    Storage deletes matching objects itself once the rule is in place. If the
+    bucket policy cannot be changed (e.g. missing permission), old uploads are
+    listed and deleted instead.
+
+    Args:
+        days (int): Age in days after which uploads are deleted
+        dry_run (bool): Report without changing the bucket
+
+    Returns:
+        str: 'lifecycle', 'listed' or 'dry-run'
+    """
+    if dry_run:
+        return 'dry-run'
+
+    bucket = storage.bucket()
+    try:
+        bucket.reload()
+        rules = [
+            rule for rule in bucket.lifecycle_rules
+            if rule.get('condition', {}).get('matchesPrefix') != [CV_UPLOAD_PREFIX]
+        ]
+        bucket.lifecycle_rules = rules
+        bucket.add_lifecycle_delete_rule(age=days, matches_prefix=[CV_UPLOAD_PREFIX])
+        bucket.patch()
+        return 'lifecycle'
+
+    except Exception as e:
+        logger.warning(f"⚠️ Could not set lifecycle rule on {bucket.name}, deleting uploads directly: {str(e)}")
+        deleted = _delete_old_blobs(CV_UPLOAD_PREFIX, days)
+        logger.info(f"🗑️ Deleted {deleted} CV uploads older than {days} days")
+        return 'listed'
+
+def run_retention(dry_run=False):
+    """
+    Apply every configured retention window
+
+    A window of 0 days disables that part of the job.
+
+    Args:
+        dry_run (bool): Count what would be archived or deleted without changing anything
+
+    Returns:
+        dict: Summary per collection or storage prefix
+    """
+    run_id = uuid.uuid4().hex[:12]
+    summary = {'run_id': run_id, 'dry_run': dry_run}
+
+    for collection, (_, _, setting) in ARCHIVED_COLLECTIONS.items():
+        days = getattr(Config, setting)
+        if days > 0:
+            summary[collection] = archive_collection(collection, days, run_id, dry_run)
+
+    if Config.RETENTION_REPORT_DAYS > 0:
+        summary['report_store'] = prune_shared_reports(Config.RETENTION_REPORT_DAYS, dry_run)
+        summary['legacy_reports'] = _delete_old_blobs(
+            LEGACY_REPORT_PREFIX, Config.RETENTION_REPORT_DAYS, dry_run,
+            skip_prefix=f"{LEGACY_REPORT_PREFIX}shared/"
+        )
+
+    if Config.RETENTION_CV_UPLOAD_DAYS > 0:
+        summary['cv_uploads'] = apply_upload_lifecycle(Config.RETENTION_CV_UPLOAD_DAYS, dry_run)
+
+    logger.info(f"🧹 Retention run {run_id} finished: {summary}")
+    return summary
@@ -4,12 +4,13 @@ from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
 import base64
 from utils.logger import get_logger
+from utils.metrics import dependency
 from config import Config
 
 # Initialize logger
 logger = get_logger()
 
-def send_review_email(email, phone_number, review_result, download_link, report_path=None):
+def send_review_email(email, phone_number, review_result, download_link, report_path=None, report_bytes=None):
     """
     Send review email with PDF attachment
     
@@ -19,6 +20,7 @@ def send_review_email(email, phone_number, review_result, download_link, report_
         review_result (dict): Review results
         download_link (str): Download link for the report
         report_path (str, optional): Path to PDF report file
+        report_bytes (bytes, optional): PDF report content, used instead of report_path
         
     Returns:
         dict: Email send status
@@ -36,22 +38,24 @@ def send_review_email(email, phone_number, review_result, download_link, report_
             html_content=generate_email_html(review_type, score, download_link, phone_number)
         )
         
-        # Add PDF attachment if file path provided
-        if report_path and os.path.exists(report_path):
+        # Add PDF attachment if content or file path provided
+        if report_bytes is None and report_path and os.path.exists(report_path):
             with open(report_path, 'rb') as f:
-                file_content = f.read()
-                
-                attachment = Attachment()
-                attachment.file_content = FileContent(base64.b64encode(file_content).decode())
-                attachment.file_name = FileName('CV_Review_Report.pdf')
-                attachment.file_type = FileType('application/pdf')
-                attachment.disposition = Disposition('attachment')
-                
-                message.attachment = attachment
+                report_bytes = f.read()
+        
+        if report_bytes:
+            attachment = Attachment()
+            attachment.file_content = FileContent(base64.b64encode(report_bytes).decode())
+            attachment.file_name = FileName('CV_Review_Report.pdf')
+            attachment.file_type = FileType('application/pdf')
+            attachment.disposition = Disposition('attachment')
+            
+            message.attachment = attachment
         
         # Send email
         sg = SendGridAPIClient(Config.SENDGRID_API_KEY)
-        response = sg.send(message)
+        with dependency('sendgrid', 'send'):
+            response = sg.send(message)
         
         # Log result
         if response.status_code == 202:
@@ -1,9 +1,12 @@
 # services/twilio_service.py - Production WhatsApp Business
 import os
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from twilio.base.exceptions import TwilioRestException
 from twilio.request_validator import RequestValidator
 from utils.logger import get_logger
+from utils.metrics import dependency
+from utils.tracing import outbound_headers
 from config import Config
 
 # Initialize logger
@@ -13,12 +16,18 @@ logger = get_logger()
 twilio_client = None
 twilio_validator = None
 
+class TracingHttpClient(TwilioHttpClient):
+    """Twilio HTTP client that sends the current traceparent header"""
+    
+    def request(self, method, url, params=None, data=None, headers=None, **kwargs):
+        return super().request(method, url, params=params, data=data, headers=outbound_headers(headers), **kwargs)
+
 def get_twilio_client():
     """Get or initialize Twilio client"""
     global twilio_client, twilio_validator
     
     if twilio_client is None:
-        twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+        twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN, http_client=TracingHttpClient())
         twilio_validator = RequestValidator(Config.TWILIO_AUTH_TOKEN)
         logger.info(f"Initialized Twilio client with WhatsApp Business: {Config.TWILIO_PHONE_NUMBER}")
     
@@ -39,13 +48,14 @@ def send_whatsapp_message(to, body):
         if len(body) > 1500:
             logger.warning(f"Message length ({len(body)}) exceeds recommended limit, sending anyway")
 
-        message = client.messages.create(
-            from_=sender,
-            body=body,
-            to=recipient
-        )
+        with dependency('twilio', 'send_message'):
+            message = client.messages.create(
+                from_=sender,
+                body=body,
+                to=recipient
+            )
 
-        logger.info(f"✅ Sent WhatsApp message to {to} with SID: {message.sid}")
+        logger.info("✅ Sent WhatsApp message to %s with SID: %s", to, message.sid)
         return {
             'success': True,
             'sid': message.sid,
@@ -77,14 +87,15 @@ def send_whatsapp_message_with_media(to, body, media_url):
         if not sender.startswith('whatsapp:'):
             sender = f"whatsapp:{sender}"
 
-        message = client.messages.create(
-            from_=sender,
-            body=body,
-            media_url=[media_url],
-            to=recipient
-        )
+        with dependency('twilio', 'send_media'):
+            message = client.messages.create(
+                from_=sender,
+                body=body,
+                media_url=[media_url],
+                to=recipient
+            )
 
-        logger.info(f"✅ Sent WhatsApp message with media to {to} with SID: {message.sid}")
+        logger.info("✅ Sent WhatsApp message with media to %s with SID: %s", to, message.sid)
         return {
             'success': True,
             'sid': message.sid,
@@ -0,0 +1,98 @@
+# utils/cache.py - In-process TTL cache with single-flight loading
+import time
+import threading
+
+class _Flight:
+    """A load in progress that other callers wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """
+    Small thread-safe cache whose entries expire after a fixed time
+
+    When several threads ask for the same missing key at once, only the first
+    runs the loader; the others wait for its result instead of repeating the work.
+    """
+
+    def __init__(self, ttl, max_entries=128):
+        """
+        Initialize cache
+
+        Args:
+            ttl (float): Seconds an entry stays fresh
+            max_entries (int): Entries kept before the oldest are dropped
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Get a fresh value, loading it once if missing or expired
+
+        Args:
+            key: Cache key
+            loader (callable): Function called without arguments to produce the value
+            ttl (float, optional): Override of the cache TTL for this value
+
+        Returns:
+            Cached or freshly loaded value; loader exceptions are raised to every waiter
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.value, self.ttl if ttl is None else ttl)
+                self._flights.pop(key, None)
+            flight.event.set()
+
+        return flight.value
+
+    def _store(self, key, value, ttl):
+        if ttl <= 0:
+            return
+
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Dicts keep insertion order, so the first key is the oldest
+            self._entries.pop(next(iter(self._entries)))
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when no key is given
+
+        Args:
+            key (optional): Cache key
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
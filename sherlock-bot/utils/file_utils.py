@@ -3,6 +3,7 @@ import os
 import uuid
 import time
 import requests
+import PyPDF2
 from twilio.rest import Client
 from config import Config
 from utils.logger import get_logger
@@ -180,4 +181,25 @@ def cleanup_temp_files(directory=None, older_than_hours=1):
                     logger.info(f"🗑️ Cleaned up old file: {filename}")
                     
     except Exception as e:
-        logger.error(f"Error cleaning up temp files: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error cleaning up temp files: {str(e)}")
+
+def count_pages(file_path):
+    """
+    Count the pages of a PDF without extracting its text
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        int: Page count, or None for Word documents and unreadable PDFs
+    """
+    if not file_path.lower().endswith('.pdf'):
+        return None
+    
+    try:
+        with open(file_path, 'rb') as f:
+            return len(PyPDF2.PdfReader(f).pages)
+    
+    except Exception as e:
+        logger.warning(f"Could not count pages of {file_path}: {str(e)}")
+        return None
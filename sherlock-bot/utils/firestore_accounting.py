@@ -0,0 +1,262 @@
+# utils/firestore_accounting.py - Count Firestore reads, writes and deletes per request and job
+import sys
+import threading
+import contextvars
+from contextlib import contextmanager
+from utils.logger import get_logger
+from utils.metrics import registry
+
+# Initialize logger
+logger = get_logger()
+
+FIRESTORE_OPERATIONS = registry.counter(
+    'sherlock_firestore_operations_total', 'Billed Firestore document operations',
+    ['route', 'caller', 'operation'])
+FIRESTORE_BYTES = registry.counter(
+    'sherlock_firestore_bytes_total', 'Bytes sent to and received from Firestore',
+    ['route', 'direction'])
+
+# Modules whose functions are reported as the caller of a Firestore operation
+CALLER_PREFIXES = ('models.', 'services.', 'controllers.', 'routes.')
+
+# Accounting scope of the running request or job
+_current_scope = contextvars.ContextVar('sherlock_firestore_scope', default=None)
+
+class OperationScope:
+    """Firestore operations of one request or job, by calling function"""
+
+    def __init__(self, name):
+        self.name = name
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.by_caller = {}
+        self._lock = threading.Lock()
+
+    def add(self, caller, reads=0, writes=0, deletes=0, sent=0, received=0):
+        """Record operations made by one caller"""
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            self.deletes += deletes
+            self.bytes_sent += sent
+            self.bytes_received += received
+            counts = self.by_caller.setdefault(caller, [0, 0, 0])
+            counts[0] += reads
+            counts[1] += writes
+            counts[2] += deletes
+
+    def summary(self):
+        """
+        Totals of the scope
+
+        Returns:
+            dict: 'reads', 'writes', 'deletes', 'bytes' and 'callers' sorted by operation count
+        """
+        with self._lock:
+            callers = sorted(self.by_caller.items(), key=lambda item: sum(item[1]), reverse=True)
+            return {
+                'reads': self.reads,
+                'writes': self.writes,
+                'deletes': self.deletes,
+                'bytes': self.bytes_sent + self.bytes_received,
+                'callers': [
+                    {'caller': caller, 'reads': counts[0], 'writes': counts[1], 'deletes': counts[2]}
+                    for caller, counts in callers
+                ]
+            }
+
+    def export(self):
+        """Add the scope's totals to the /metrics counters"""
+        with self._lock:
+            by_caller = {caller: list(counts) for caller, counts in self.by_caller.items()}
+            sent, received = self.bytes_sent, self.bytes_received
+
+        for caller, (reads, writes, deletes) in by_caller.items():
+            for operation, count in (('read', reads), ('write', writes), ('delete', deletes)):
+                if count:
+                    FIRESTORE_OPERATIONS.inc(count, route=self.name, caller=caller, operation=operation)
+        if sent:
+            FIRESTORE_BYTES.inc(sent, route=self.name, direction='sent')
+        if received:
+            FIRESTORE_BYTES.inc(received, route=self.name, direction='received')
+
+def begin_scope(name):
+    """
+    Start attributing Firestore operations to a request or job
+
+    Args:
+        name (str): Route pattern or job name
+
+    Returns:
+        tuple: (scope, context token) for end_scope
+    """
+    scope = OperationScope(name)
+    return scope, _current_scope.set(scope)
+
+def end_scope(handle):
+    """
+    Stop attributing operations, export them to /metrics and log a summary
+
+    Args:
+        handle (tuple): Value returned by begin_scope
+
+    Returns:
+        dict: Scope summary
+    """
+    scope, token = handle
+    _current_scope.reset(token)
+    scope.export()
+
+    summary = scope.summary()
+    if summary['reads'] or summary['writes'] or summary['deletes']:
+        top = summary['callers'][0]['caller'] if summary['callers'] else '-'
+        logger.info(
+            f"🔥 Firestore {scope.name}: {summary['reads']} reads, {summary['writes']} writes, "
+            f"{summary['deletes']} deletes, {summary['bytes'] / 1024:.1f} KB (most from {top})"
+        )
+    return summary
+
+@contextmanager
+def accounting_scope(name):
+    """
+    Attribute Firestore operations in the enclosed block to a job
+
+    Args:
+        name (str): Job name
+
+    Yields:
+        OperationScope: The scope
+    """
+    handle = begin_scope(name)
+    try:
+        yield handle[0]
+    finally:
+        end_scope(handle)
+
+def current_scope():
+    """
+    Accounting scope of the running request or job
+
+    Returns:
+        OperationScope: The scope, or None outside one
+    """
+    return _current_scope.get()
+
+def find_caller():
+    """
+    Name the application function that triggered a Firestore call
+
+    Returns:
+        str: e.g. 'models.user.User.get_by_id', or 'other'
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith(CALLER_PREFIXES):
+            return f"{module}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+        frame = frame.f_back
+    return 'other'
+
+def _record(reads=0, writes=0, deletes=0, sent=0, received=0):
+    caller = find_caller()
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.add(caller, reads, writes, deletes, sent, received)
+        return
+
+    # Outside a request or job (e.g. startup), count straight into /metrics
+    for operation, count in (('read', reads), ('write', writes), ('delete', deletes)):
+        if count:
+            FIRESTORE_OPERATIONS.inc(count, route='none', caller=caller, operation=operation)
+
+def _size(message):
+    return getattr(message, '_pb', message).ByteSize()
+
+def _request_size(request):
+    if isinstance(request, dict):
+        return sum(_size(write) for write in request.get('writes') or [])
+    return _size(request) if request is not None else 0
+
+def _write_counts(request):
+    writes = request.get('writes') if isinstance(request, dict) else getattr(request, 'writes', None)
+    write_count = delete_count = 0
+    for write in writes or []:
+        if getattr(write, '_pb', write).WhichOneof('operation') == 'delete':
+            delete_count += 1
+        else:
+            write_count += 1
+    return write_count, delete_count
+
+class AccountedFirestoreApi:
+    """
+    Proxy for the GAPIC Firestore client that counts billed operations
+
+    Every read, query, aggregation and commit the SDK makes goes through this
+    object, so the counts cover all code paths without changing them. Streamed
+    responses are counted as they are consumed.
+    """
+
+    def __init__(self, api):
+        self._api = api
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+    def _counted_stream(self, responses, is_document):
+        documents = 0
+        received = 0
+        try:
+            for response in responses:
+                received += _size(response)
+                if is_document(response):
+                    documents += 1
+                yield response
+        finally:
+            # A query is billed at least one read even when it matches nothing
+            _record(reads=max(documents, 1), received=received)
+
+    def run_query(self, *args, **kwargs):
+        return self._counted_stream(self._api.run_query(*args, **kwargs), lambda r: bool(r.document))
+
+    def batch_get_documents(self, *args, **kwargs):
+        # Lookups of missing documents are billed like found ones
+        return self._counted_stream(self._api.batch_get_documents(*args, **kwargs), lambda r: bool(r.found or r.missing))
+
+    def run_aggregation_query(self, *args, **kwargs):
+        # Billed per 1000 index entries; one read is the floor and the usual case here
+        return self._counted_stream(self._api.run_aggregation_query(*args, **kwargs), lambda r: False)
+
+    def list_documents(self, *args, **kwargs):
+        return self._counted_stream(self._api.list_documents(*args, **kwargs), lambda r: True)
+
+    def commit(self, *args, **kwargs):
+        request = kwargs.get('request', args[0] if args else None)
+        writes, deletes = _write_counts(request)
+        response = self._api.commit(*args, **kwargs)
+        _record(writes=writes, deletes=deletes, sent=_request_size(request))
+        return response
+
+    def batch_write(self, *args, **kwargs):
+        request = kwargs.get('request', args[0] if args else None)
+        writes, deletes = _write_counts(request)
+        response = self._api.batch_write(*args, **kwargs)
+        _record(writes=writes, deletes=deletes, sent=_request_size(request))
+        return response
+
+def install(db):
+    """
+    Route a Firestore client's RPCs through AccountedFirestoreApi
+
+    Args:
+        db (google.cloud.firestore.Client): Client returned by firestore.client()
+
+    Returns:
+        bool: Whether accounting was installed (False if it already was)
+    """
+    if isinstance(db._firestore_api, AccountedFirestoreApi):
+        return False
+    db._firestore_api_internal = AccountedFirestoreApi(db._firestore_api)
+    return True
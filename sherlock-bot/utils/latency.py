@@ -0,0 +1,160 @@
+# utils/latency.py - End-to-end and per-stage timing of review jobs, as mergeable histograms
+import time
+import bisect
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the buckets percentiles are estimated from
+LATENCY_BUCKETS = (0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+
+# Timing of the running review job, shared with its executor threads via propagate
+_current_job = contextvars.ContextVar('sherlock_latency_job', default=None)
+
+class JobTiming:
+    """Wall time of one review job, from the request to the results being sent"""
+
+    __slots__ = ('review_type', 'started', 'stages')
+
+    def __init__(self, review_type):
+        self.review_type = review_type
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add_stage(self, name, seconds):
+        """Add time spent in a pipeline stage"""
+        self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def elapsed(self):
+        """Seconds since the job started"""
+        return time.perf_counter() - self.started
+
+@contextmanager
+def job_timing(review_type):
+    """
+    Collect the stage times of the enclosed review job
+
+    Args:
+        review_type (str): basic or advanced
+
+    Yields:
+        JobTiming: The job's timing
+    """
+    timing = JobTiming(review_type)
+    token = _current_job.set(timing)
+    try:
+        yield timing
+    finally:
+        _current_job.reset(token)
+
+def record_stage(name, seconds):
+    """Add a stage's time to the running job, if any"""
+    timing = _current_job.get()
+    if timing is not None:
+        timing.add_stage(name, seconds)
+
+def new_histogram():
+    """Empty histogram: count, sum and one count per bucket plus overflow"""
+    return {'count': 0, 'sum': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+
+def observe(histogram, seconds):
+    """Add one observation to a histogram"""
+    histogram['count'] += 1
+    histogram['sum'] += seconds
+    histogram['buckets'][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+def merge_histogram(into, other):
+    """Add the counts of one histogram to another"""
+    into['count'] += other.get('count', 0)
+    into['sum'] += other.get('sum', 0.0)
+    for index, count in enumerate(other.get('buckets', [])[:len(into['buckets'])]):
+        into['buckets'][index] += count
+    return into
+
+def quantile(histogram, q):
+    """
+    Estimate a percentile by interpolating within its bucket
+
+    Args:
+        histogram (dict): Histogram from new_histogram
+        q (float): Quantile between 0 and 1
+
+    Returns:
+        float: Seconds, None for an empty histogram. Values in the overflow
+            bucket are reported as the largest bound.
+    """
+    if not histogram['count']:
+        return None
+
+    rank = q * histogram['count']
+    seen = 0
+    for index, count in enumerate(histogram['buckets']):
+        if count and seen + count >= rank:
+            if index == len(LATENCY_BUCKETS):
+                return float(LATENCY_BUCKETS[-1])
+            lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+            return lower + (LATENCY_BUCKETS[index] - lower) * (rank - seen) / count
+        seen += count
+    return float(LATENCY_BUCKETS[-1])
+
+def share_within(histogram, seconds):
+    """
+    Estimate the share of observations at or below a threshold
+
+    Args:
+        histogram (dict): Histogram from new_histogram
+        seconds (float): Threshold, e.g. an SLO target
+
+    Returns:
+        float: Share between 0 and 1, None for an empty histogram
+    """
+    if not histogram['count']:
+        return None
+
+    within = 0.0
+    lower = 0.0
+    for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+        if seconds >= bound:
+            within += count
+        elif seconds > lower:
+            within += count * (seconds - lower) / (bound - lower)
+        lower = bound
+    return min(within / histogram['count'], 1.0)
+
+def new_summary():
+    """Latency of a set of jobs: end-to-end and per-stage histograms, slowest jobs"""
+    return {'total': new_histogram(), 'stages': {}, 'slowest': []}
+
+def add_job(summary, seconds, stages, entry, keep_slowest):
+    """
+    Add one finished job to a summary
+
+    Args:
+        summary (dict): Summary from new_summary
+        seconds (float): End-to-end time
+        stages (dict): Stage name -> seconds
+        entry (dict): Compact description kept if the job is among the slowest
+        keep_slowest (int): Slowest jobs kept
+    """
+    observe(summary['total'], seconds)
+    for name, stage_seconds in stages.items():
+        observe(summary['stages'].setdefault(name, new_histogram()), stage_seconds)
+    _keep_slowest(summary, [entry], keep_slowest)
+
+def merge_summary(into, other, keep_slowest):
+    """Add another summary (e.g. a rollup document) to a summary"""
+    merge_histogram(into['total'], other.get('total', {}))
+    for name, histogram in (other.get('stages') or {}).items():
+        merge_histogram(into['stages'].setdefault(name, new_histogram()), histogram)
+    _keep_slowest(into, other.get('slowest') or [], keep_slowest)
+    return into
+
+def _keep_slowest(summary, entries, keep):
+    # The same job can arrive from both the ring buffer and a rollup
+    seen = {(entry.get('trace_id'), entry.get('finished_at')) for entry in summary['slowest']}
+    for entry in entries:
+        key = (entry.get('trace_id'), entry.get('finished_at'))
+        if key not in seen:
+            seen.add(key)
+            summary['slowest'].append(entry)
+    summary['slowest'].sort(key=lambda entry: entry['seconds'], reverse=True)
+    del summary['slowest'][keep:]
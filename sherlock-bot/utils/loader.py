@@ -0,0 +1,115 @@
+# utils/loader.py - Request-scoped batched document loading
+from flask import g, has_request_context
+from firebase_admin import firestore
+from utils.timestamps import normalize_timestamps
+
+class DocumentLoader:
+    """
+    Batched document loader with an identity map
+
+    References requested with want() are collected and fetched together with
+    db.get_all() on the next load, so a page that needs many documents pays a
+    few round trips instead of one per document. Every loaded document is kept
+    for the rest of the request and never fetched twice.
+    """
+
+    # Documents per get_all call
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self):
+        self._documents = {}
+        self._pending = {}
+
+    def prime(self, collection, doc_id, data):
+        """
+        Add a document obtained elsewhere (e.g. from a query) to the identity map
+
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+            data (dict): Document data
+        """
+        if data is not None:
+            normalize_timestamps(data)
+            data['id'] = doc_id
+        self._documents[(collection, doc_id)] = data
+        self._pending.pop((collection, doc_id), None)
+
+    def want(self, collection, doc_ids):
+        """
+        Queue documents for the next batched fetch
+
+        Args:
+            collection (str): Collection name
+            doc_ids (list): Document IDs
+        """
+        for doc_id in doc_ids:
+            key = (collection, doc_id)
+            if doc_id and key not in self._documents:
+                self._pending[key] = None
+
+    def load_many(self, collection, doc_ids):
+        """
+        Load documents, fetching everything still queued
+
+        Args:
+            collection (str): Collection name
+            doc_ids (list): Document IDs
+
+        Returns:
+            list: Document data with 'id' and UTC datetime timestamps in the order of doc_ids,
+                None for missing documents
+        """
+        self.want(collection, doc_ids)
+        self._flush()
+        return [self._documents.get((collection, doc_id)) for doc_id in doc_ids]
+
+    def load(self, collection, doc_id):
+        """
+        Load one document
+
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+
+        Returns:
+            dict: Document data with 'id', or None if it does not exist
+        """
+        return self.load_many(collection, [doc_id])[0]
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        db = firestore.client()
+        keys = list(self._pending)
+        self._pending = {}
+
+        for start in range(0, len(keys), self.MAX_BATCH_SIZE):
+            chunk = keys[start:start + self.MAX_BATCH_SIZE]
+
+            # Documents that do not exist stay None in the identity map
+            for key in chunk:
+                self._documents[key] = None
+            refs = [db.collection(collection).document(doc_id) for collection, doc_id in chunk]
+            for snapshot in db.get_all(refs):
+                if snapshot.exists:
+                    key = (snapshot.reference.parent.id, snapshot.id)
+                    data = normalize_timestamps(snapshot.to_dict())
+                    data['id'] = snapshot.id
+                    self._documents[key] = data
+
+def get_loader():
+    """
+    Get the loader for the current request
+
+    Returns:
+        DocumentLoader: Loader shared by the request, or a fresh one outside a request
+    """
+    if not has_request_context():
+        return DocumentLoader()
+
+    if 'document_loader' not in g:
+        g.document_loader = DocumentLoader()
+
+    return g.document_loader
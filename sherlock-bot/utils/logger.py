@@ -1,46 +1,240 @@
 # utils/logger.py - Logging configuration
-import logging
 import os
-from datetime import datetime
+import re
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config import Config
+from utils.tracing import TraceIdFilter, current_trace_id
+
+# Records waiting for the listener thread; beyond this they are dropped rather than block a request
+LOG_QUEUE_SIZE = 10000
+
+# E.164 numbers as Twilio sends them (whatsapp:+2348012345678), keeping country code and last 4 digits
+PHONE_PATTERN = re.compile(r'(?:(?<=whatsapp:)|(?<=\+))(\d{3})\d{3,8}(\d{4})(?!\d)')
+
+# LogRecord attributes that are not extra fields passed by the caller
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'trace_id'}
 
-def setup_logger():
+_listener = None
+
+def redact_phones(text):
+    """
+    Mask phone numbers in a log line
+
+    Args:
+        text (str): Formatted message
+
+    Returns:
+        str: e.g. 'whatsapp:+234****5678'
+    """
+    return PHONE_PATTERN.sub(r'\1****\2', text) if Config.LOG_REDACT_PHONES else text
+
+class lazy:
+    """
+    Log argument computed only if the line is actually emitted
+
+    Example:
+        logger.debug("API response: %s", lazy(lambda: str(result)[:200]))
+    """
+
+    __slots__ = ('fn',)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __str__(self):
+        return str(self.fn())
+
+    __repr__ = __str__
+
+def parse_sample_rates(value):
+    """
+    Read LOG_DEBUG_SAMPLE_RATES
+
+    Args:
+        value (str): e.g. 'cv_service=0.1,sherlock_bot.loader=0.01'
+
+    Returns:
+        dict: Logger or module name -> share of debug lines kept
+    """
+    rates = {}
+    for item in (value or '').split(','):
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a share of debug lines per logger or module
+
+    The decision follows the trace ID, so a sampled request keeps all of its
+    debug lines and an unsampled one none. Other levels always pass.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+
+        rate = self.rates.get(record.name, self.rates.get(record.module))
+        if rate is None or rate >= 1:
+            return True
+
+        trace_id = current_trace_id()
+        if trace_id:
+            return (zlib.crc32(trace_id.encode()) % 10000) < rate * 10000
+        return random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, in the shape Cloud Logging parses"""
+
+    def __init__(self):
+        super().__init__()
+        project = os.getenv('GOOGLE_CLOUD_PROJECT') or os.getenv('GCLOUD_PROJECT')
+        self.trace_prefix = f"projects/{project}/traces/" if project else None
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'severity': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': redact_phones(record.getMessage())
+        }
+
+        trace_id = getattr(record, 'trace_id', '-')
+        if trace_id != '-':
+            entry['trace_id'] = trace_id
+            if self.trace_prefix:
+                entry['logging.googleapis.com/trace'] = self.trace_prefix + trace_id
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = redact_phones(record.exc_text)
+
+        # Fields passed with extra={...}
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = redact_phones(value) if isinstance(value, str) else value
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        # trace_id ties together the lines of one webhook or job
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s')
+
+    def format(self, record):
+        return redact_phones(super().format(record))
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread
+
+    Only the message arguments are merged on the calling thread, while lazy
+    values and request objects are still valid. JSON encoding, redaction and
+    writing happen on the listener thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks hold frames of the calling thread, render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _formatter():
+    return JsonFormatter() if Config.LOG_FORMAT == 'json' else TextFormatter()
+
+def setup_logger(stream=None):
     """
     Set up the main application logger
-    
+
+    Args:
+        stream (file, optional): Where lines are written (default stderr)
+
     Returns:
         logging.Logger: Configured logger instance
     """
+    global _listener
+
     # Create logger
     logger = logging.getLogger('sherlock_bot')
-    
+
     # Set log level from environment or default to INFO
-    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-    logger.setLevel(getattr(logging, log_level, logging.INFO))
-    
+    level = getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO)
+    logger.setLevel(level)
+
     # Prevent duplicate handlers
     if logger.handlers:
         return logger
-    
-    # Create console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_handler.setFormatter(formatter)
-    
-    # Add handler to logger
-    logger.addHandler(console_handler)
-    
+
+    output_handler = logging.StreamHandler(stream)
+    output_handler.setLevel(level)
+    output_handler.setFormatter(_formatter())
+
+    filters = [TraceIdFilter(), SamplingFilter(parse_sample_rates(Config.LOG_DEBUG_SAMPLE_RATES))]
+
+    if Config.LOG_ASYNC:
+        queue_handler = AsyncQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        for log_filter in filters:
+            queue_handler.addFilter(log_filter)
+        logger.addHandler(queue_handler)
+
+        _listener = QueueListener(queue_handler.queue, output_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        for log_filter in filters:
+            output_handler.addFilter(log_filter)
+        logger.addHandler(output_handler)
+
     return logger
 
-def get_logger():
+def stop_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_logger(name=None):
     """
     Get the application logger
-    
+
+    Args:
+        name (str, optional): Child logger name, e.g. 'cv_service', for per-logger sampling
+
     Returns:
         logging.Logger: Logger instance
     """
-    return logging.getLogger('sherlock_bot')
\ No newline at end of file
+    return logging.getLogger(f"sherlock_bot.{name}" if name else 'sherlock_bot')
@@ -0,0 +1,158 @@
+# utils/memory.py - Memory usage of review jobs and their pipeline stages
+import os
+import resource
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from config import Config
+
+# Memory record of the running review job, shared with its executor threads via propagate
+_current_job = contextvars.ContextVar('sherlock_memory_job', default=None)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+MB = 1024 * 1024
+
+def rss_bytes():
+    """
+    Resident set size of the process
+
+    Returns:
+        int: Bytes currently resident
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # Without /proc the high-water mark is the closest figure available
+        return max_rss_bytes()
+
+def max_rss_bytes():
+    """
+    Highest resident set size the process has reached
+
+    Returns:
+        int: Bytes (ru_maxrss is KB on Linux)
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def start_tracemalloc():
+    """
+    Trace Python allocations when MEMORY_TRACEMALLOC is set
+
+    Tracing slows every allocation, so it is off by default and meant for
+    diagnosing which stage holds memory.
+
+    Returns:
+        bool: Whether allocations are being traced
+    """
+    if Config.MEMORY_TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return tracemalloc.is_tracing()
+
+class JobMemory:
+    """Memory measurements of one review job, by stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rss_start = rss_bytes()
+        self.peak_rss = self.rss_start
+        self.traced_peak = 0
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, usage):
+        """Record the measurements of a finished stage"""
+        with self._lock:
+            self.stages[name] = usage
+            self.peak_rss = max(self.peak_rss, usage['peak_rss'])
+            self.traced_peak = max(self.traced_peak, usage.get('traced_peak', 0))
+
+    def summary(self):
+        """
+        Peaks of the job so far
+
+        Returns:
+            dict: 'peak_rss_mb', 'growth_mb' above the RSS at the job start,
+                'traced_peak_mb' (with tracemalloc) and per-stage 'stages'
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    'peak_rss_mb': round(usage['peak_rss'] / MB, 1),
+                    'delta_mb': round(usage['rss_delta'] / MB, 1),
+                    **({'traced_peak_mb': round(usage['traced_peak'] / MB, 1)} if 'traced_peak' in usage else {})
+                }
+                for name, usage in self.stages.items()
+            }
+            summary = {
+                'peak_rss_mb': round(self.peak_rss / MB, 1),
+                'growth_mb': round((self.peak_rss - self.rss_start) / MB, 1),
+                'stages': stages
+            }
+            if self.traced_peak:
+                summary['traced_peak_mb'] = round(self.traced_peak / MB, 1)
+            return summary
+
+@contextmanager
+def job_memory(name):
+    """
+    Collect the stage measurements of the enclosed review job
+
+    Args:
+        name (str): Job name, e.g. the review type
+
+    Yields:
+        JobMemory: The job's record
+    """
+    job = JobMemory(name)
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+def current_job():
+    """
+    Memory record of the running review job
+
+    Returns:
+        JobMemory: The record, or None outside a job
+    """
+    return _current_job.get()
+
+@contextmanager
+def measure_stage(name):
+    """
+    Sample memory around a pipeline stage
+
+    RSS is read before and after the stage. If the process high-water mark
+    rose meanwhile, that new mark is the stage's peak, which catches object
+    graphs (e.g. a parsed PDF) freed before the stage returns. Reviews running
+    side by side share the process, so their figures include each other.
+
+    Args:
+        name (str): Stage name
+
+    Yields:
+        dict: Filled with 'rss_delta', 'peak_rss' and, when tracing, 'traced_peak' once the stage ends
+    """
+    job = _current_job.get()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    before = rss_bytes()
+    high_before = max_rss_bytes()
+    usage = {}
+    try:
+        yield usage
+    finally:
+        after = rss_bytes()
+        high_after = max_rss_bytes()
+        usage['rss_delta'] = after - before
+        usage['peak_rss'] = max(before, after, high_after if high_after > high_before else 0)
+        if tracing:
+            usage['traced_peak'] = tracemalloc.get_traced_memory()[1]
+        if job is not None:
+            job.add_stage(name, usage)
@@ -0,0 +1,285 @@
+# utils/metrics.py - In-process counters, gauges and histograms in Prometheus text format
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from utils.tracing import span
+from utils.memory import measure_stage
+from utils.latency import record_stage
+
+# Latency buckets in seconds, from a fast Firestore read to a slow CV API call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Memory buckets in bytes, up to the 512 MB instance limit
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (16, 32, 64, 96, 128, 192, 256, 320, 384, 448, 512))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    """Base for a metric family with a fixed set of label names"""
+
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        # Missing labels are exported as empty strings rather than raising on the hot path
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic count, e.g. review outcomes"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Add to the counter
+
+        Args:
+            amount (float): Increment
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_label_text(self.label_names, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. jobs in flight"""
+
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        """Add to the gauge"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """Subtract from the gauge"""
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        """Replace the gauge value"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in flight"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_label_text(self.label_names, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. stage durations in seconds"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        """
+        Record one observation
+
+        Args:
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum, count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the enclosed block, including when it raises
+
+        Args:
+            **labels: Label values
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels):
+        """
+        Current state of one series
+
+        Returns:
+            dict: 'buckets' (cumulative counts by upper bound), 'sum' and 'count'
+        """
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            counts, total, count = (list(series[0]), series[1], series[2]) if series else ([0] * (len(self.buckets) + 1), 0.0, 0)
+
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {'buckets': cumulative, 'sum': total, 'count': count}
+
+    def samples(self):
+        with self._lock:
+            keys = sorted(self._values)
+
+        lines = []
+        for key in keys:
+            snapshot = self.snapshot(**dict(zip(self.label_names, key)))
+            for bound, count in snapshot['buckets']:
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.label_names, key)} {snapshot['sum']:.6f}")
+            lines.append(f"{self.name}_count{_label_text(self.label_names, key)} {snapshot['count']}")
+        return lines
+
+class Registry:
+    """Set of metrics exported together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, description, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, labels, **kwargs)
+            return metric
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name, description, labels=()):
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, description, labels, buckets=buckets)
+
+    def render(self):
+        """
+        Export every metric
+
+        Returns:
+            str: Prometheus text exposition format (version 0.0.4)
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+# Registry exported at /metrics
+registry = Registry()
+
+# Review pipeline
+REVIEW_SECONDS = registry.histogram(
+    'sherlock_review_seconds', 'Time from starting a review to having its results', ['review_type'])
+STAGE_SECONDS = registry.histogram(
+    'sherlock_review_stage_seconds', 'Time spent in each review pipeline stage', ['review_type', 'stage'])
+REVIEW_OUTCOMES = registry.counter(
+    'sherlock_review_outcomes_total', 'Finished reviews by outcome', ['review_type', 'outcome'])
+REVIEWS_IN_FLIGHT = registry.gauge(
+    'sherlock_reviews_in_flight', 'Reviews currently being processed', ['review_type'])
+REVIEW_PEAK_RSS_BYTES = registry.histogram(
+    'sherlock_review_peak_rss_bytes', 'Highest process RSS seen during a review', ['review_type'], MEMORY_BUCKETS)
+STAGE_PEAK_RSS_BYTES = registry.histogram(
+    'sherlock_review_stage_peak_rss_bytes', 'Highest process RSS seen during each review stage',
+    ['review_type', 'stage'], MEMORY_BUCKETS)
+FALLBACKS = registry.counter(
+    'sherlock_fallbacks_total', 'Times a degraded path replaced the normal one', ['component', 'reason'])
+
+# Outbound calls
+DEPENDENCY_SECONDS = registry.histogram(
+    'sherlock_dependency_seconds', 'Duration of calls to external services', ['dependency', 'operation'])
+DEPENDENCY_ERRORS = registry.counter(
+    'sherlock_dependency_errors_total', 'Failed calls to external services', ['dependency', 'operation'])
+
+# Inbound HTTP
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'sherlock_http_request_seconds', 'Time to handle inbound HTTP requests', ['endpoint', 'method', 'status'])
+
+@contextmanager
+def stage(review_type, name):
+    """
+    Time one review pipeline stage, also as a trace span and for the job's breakdown, and sample its memory
+
+    Args:
+        review_type (str): basic or advanced
+        name (str): Stage name, e.g. download, extract, analysis
+    """
+    usage = {}
+    started = time.perf_counter()
+    try:
+        with span(f"stage.{name}", review_type=review_type), \
+                STAGE_SECONDS.time(review_type=review_type, stage=name), measure_stage(name) as usage:
+            yield
+    finally:
+        # Feeds the per-job breakdown on the admin latency page
+        record_stage(name, time.perf_counter() - started)
+        if usage:
+            STAGE_PEAK_RSS_BYTES.observe(usage['peak_rss'], review_type=review_type, stage=name)
+
+@contextmanager
+def dependency(name, operation):
+    """
+    Time a call to an external service, also as a trace span, counting it as an error if it raises
+
+    Args:
+        name (str): Service, e.g. cv_api, twilio, storage
+        operation (str): Call, e.g. analyze, send_message, download
+    """
+    started = time.perf_counter()
+    try:
+        with span(f"{name}.{operation}"):
+            yield
+    except Exception:
+        DEPENDENCY_ERRORS.inc(dependency=name, operation=operation)
+        raise
+    finally:
+        DEPENDENCY_SECONDS.observe(time.perf_counter() - started, dependency=name, operation=operation)
@@ -0,0 +1,102 @@
+# utils/pagination.py - Keyset (cursor) pagination for Firestore queries
+import json
+import base64
+from datetime import datetime
+from firebase_admin import firestore
+
+def encode_cursor(value, doc_id, direction='next'):
+    """
+    Encode a page boundary as a URL-safe token
+
+    Args:
+        value: Order field value of the boundary document
+        doc_id (str): Boundary document ID
+        direction (str): 'next' to page after the boundary, 'prev' to page before it
+
+    Returns:
+        str: Cursor token
+    """
+    if isinstance(value, datetime):
+        value = {'$dt': value.isoformat()}
+
+    payload = json.dumps({'v': value, 'id': doc_id, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a cursor token
+
+    Args:
+        token (str): Cursor token from encode_cursor
+
+    Returns:
+        dict: 'v', 'id' and 'd', or None if the token is missing or invalid
+    """
+    if not token:
+        return None
+
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+
+        if isinstance(cursor.get('v'), dict) and '$dt' in cursor['v']:
+            cursor['v'] = datetime.fromisoformat(cursor['v']['$dt'])
+
+        if cursor.get('d') not in ('next', 'prev') or not cursor.get('id'):
+            return None
+
+        return cursor
+
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def paginate_query(query, order_field, per_page, cursor=None, fields=None):
+    """
+    Fetch one page of a query ordered newest first
+
+    Documents are ordered by order_field and then by document ID, both
+    descending, so the page boundary is unambiguous. Each page costs
+    per_page + 1 reads whatever its position.
+
+    Args:
+        query (Query): Filtered Firestore query or collection
+        order_field (str): Field to order by
+        per_page (int): Page size
+        cursor (str, optional): Token from a previous page
+        fields (list, optional): Fields to fetch, defaults to whole documents
+
+    Returns:
+        tuple: (document snapshots, {'next': token or None, 'prev': token or None})
+    """
+    descending = firestore.Query.DESCENDING
+    if fields:
+        # The order field is needed to build the cursors
+        query = query.select(sorted(set(fields) | {order_field}))
+    ordered = query.order_by(order_field, direction=descending).order_by('__name__', direction=descending)
+    boundary = decode_cursor(cursor)
+
+    if boundary and boundary['d'] == 'prev':
+        # Page backwards: the per_page documents just before the boundary
+        docs = list(
+            ordered.end_before({order_field: boundary['v'], '__name__': boundary['id']})
+            .limit_to_last(per_page + 1)
+            .get()
+        )
+        has_before = len(docs) > per_page
+        docs = docs[-per_page:]
+        has_after = True
+    else:
+        if boundary:
+            ordered = ordered.start_after({order_field: boundary['v'], '__name__': boundary['id']})
+        docs = list(ordered.limit(per_page + 1).stream())
+        has_after = len(docs) > per_page
+        docs = docs[:per_page]
+        has_before = boundary is not None
+
+    cursors = {'next': None, 'prev': None}
+    if docs and has_after:
+        cursors['next'] = encode_cursor(docs[-1].get(order_field), docs[-1].id, 'next')
+    if docs and has_before:
+        cursors['prev'] = encode_cursor(docs[0].get(order_field), docs[0].id, 'prev')
+
+    return docs, cursors
@@ -0,0 +1,258 @@
+# utils/pdf_writer.py - Minimal dependency-free PDF writer for text reports
+import re
+import zlib
+
+# Glyph widths (1/1000 em) of the standard Helvetica fonts for characters 32-126,
+# taken from the Adobe AFM files so lines can be wrapped without a font library
+FONT_WIDTHS = {
+    'Helvetica': [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584
+    ],
+    'Helvetica-Bold': [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584
+    ]
+}
+
+# Width used for characters outside the table (bullets, accented letters, ...)
+DEFAULT_WIDTH = 556
+
+# Characters WinAnsiEncoding cannot represent
+CHAR_REPLACEMENTS = {
+    '₦': 'N',
+    '→': '->',
+    '\t': '    '
+}
+
+LETTER = (612, 792)
+
+def string_width(text, font, size):
+    """
+    Width of a string in points
+
+    Args:
+        text (str): Text to measure
+        font (str): 'Helvetica' or 'Helvetica-Bold'
+        size (float): Font size in points
+
+    Returns:
+        float: Width in points
+    """
+    widths = FONT_WIDTHS[font]
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += widths[code - 32] if 32 <= code <= 126 else DEFAULT_WIDTH
+    return total * size / 1000.0
+
+def wrap_text(text, font, size, max_width):
+    """
+    Greedily wrap text into lines that fit max_width
+
+    Args:
+        text (str): Text to wrap
+        font (str): Font name
+        size (float): Font size in points
+        max_width (float): Available width in points
+
+    Returns:
+        list: Lines of text
+    """
+    lines = []
+    space_width = string_width(' ', font, size)
+
+    for paragraph in text.split('\n'):
+        line = ''
+        line_width = 0.0
+
+        for word in paragraph.split():
+            word_width = string_width(word, font, size)
+
+            # Hard-split words longer than a whole line (URLs, long tokens)
+            while word_width > max_width:
+                if line:
+                    lines.append(line)
+                    line, line_width = '', 0.0
+                cut = len(word)
+                while cut > 1 and string_width(word[:cut], font, size) > max_width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = string_width(word, font, size)
+
+            if not word:
+                continue
+
+            if line and line_width + space_width + word_width <= max_width:
+                line += ' ' + word
+                line_width += space_width + word_width
+            elif line:
+                lines.append(line)
+                line, line_width = word, word_width
+            else:
+                line, line_width = word, word_width
+
+        lines.append(line)
+
+    return lines
+
+def encode_text(text):
+    """
+    Encode text as an escaped PDF string literal body
+
+    Args:
+        text (str): Text to encode
+
+    Returns:
+        bytes: WinAnsi encoded and escaped text
+    """
+    for char, replacement in CHAR_REPLACEMENTS.items():
+        text = text.replace(char, replacement)
+
+    data = text.encode('cp1252', errors='replace')
+    return re.sub(rb'([\\()])', rb'\\\1', data)
+
+class SimplePDFWriter:
+    """Lays out flowing text on pages and serializes a PDF"""
+
+    FONT_KEYS = {'Helvetica': 'F1', 'Helvetica-Bold': 'F2'}
+
+    def __init__(self, page_size=LETTER, margin=72, title=None, compress=True):
+        """
+        Initialize writer
+
+        Args:
+            page_size (tuple): Page width and height in points
+            margin (float): Margin on every side in points
+            title (str, optional): Document title for the info dictionary
+            compress (bool): Whether to deflate page content streams
+        """
+        self.page_width, self.page_height = page_size
+        self.margin = margin
+        self.title = title
+        self.compress = compress
+        self.pages = []
+        self._new_page()
+
+    def _new_page(self):
+        self.pages.append([])
+        self.cursor = self.page_height - self.margin
+
+    @property
+    def frame_width(self):
+        return self.page_width - 2 * self.margin
+
+    def add_space(self, height):
+        """Add vertical space, dropped at the top of a page"""
+        if self.cursor < self.page_height - self.margin:
+            self.cursor -= height
+
+    def add_paragraph(self, text, font='Helvetica', size=10, leading=12, align='left', space_before=0, space_after=0):
+        """
+        Add a wrapped paragraph
+
+        Args:
+            text (str): Paragraph text
+            font (str): 'Helvetica' or 'Helvetica-Bold'
+            size (float): Font size in points
+            leading (float): Line height in points
+            align (str): 'left' or 'center'
+            space_before (float): Space above the paragraph
+            space_after (float): Space below the paragraph
+        """
+        self.add_space(space_before)
+
+        for line in wrap_text(text, font, size, self.frame_width):
+            if self.cursor - leading < self.margin:
+                self._new_page()
+
+            self.cursor -= leading
+            x = self.margin
+            if align == 'center':
+                x += (self.frame_width - string_width(line, font, size)) / 2
+
+            # Baseline sits roughly a fifth of the leading above the line bottom
+            baseline = self.cursor + (leading - size) / 2 + size * 0.2
+            self.pages[-1].append((self.FONT_KEYS[font], size, x, baseline, line))
+
+        self.add_space(space_after)
+
+    def _content_stream(self, lines):
+        parts = []
+        for font_key, size, x, y, text in lines:
+            parts.append(b'BT /%s %g Tf %.2f %.2f Td (%s) Tj ET' % (
+                font_key.encode(), size, x, y, encode_text(text)
+            ))
+        return b'\n'.join(parts)
+
+    def to_bytes(self):
+        """
+        Serialize the document
+
+        Returns:
+            bytes: PDF file content
+        """
+        objects = []
+
+        def add_object(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog_id = add_object(None)
+        pages_id = add_object(None)
+        fonts = {
+            key: add_object(b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % name.encode())
+            for name, key in self.FONT_KEYS.items()
+        }
+        font_resources = b' '.join(b'/%s %d 0 R' % (key.encode(), obj_id) for key, obj_id in fonts.items())
+
+        page_ids = []
+        for lines in self.pages:
+            stream = self._content_stream(lines)
+            if self.compress:
+                stream = zlib.compress(stream)
+                header = b'<< /Length %d /Filter /FlateDecode >>' % len(stream)
+            else:
+                header = b'<< /Length %d >>' % len(stream)
+            content_id = add_object(header + b'\nstream\n' + stream + b'\nendstream')
+            page_ids.append(add_object(
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %g %g] /Resources << /Font << %s >> >> /Contents %d 0 R >>' % (
+                    pages_id, self.page_width, self.page_height, font_resources, content_id
+                )
+            ))
+
+        objects[catalog_id - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id
+        objects[pages_id - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids)
+        )
+
+        info_id = None
+        if self.title:
+            info_id = add_object(b'<< /Title (%s) /Producer (Sherlock Bot) >>' % encode_text(self.title))
+
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for obj_id, body in enumerate(objects, 1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n' % obj_id + body + b'\nendobj\n'
+
+        xref_offset = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            output += b'%010d 00000 n \n' % offset
+
+        trailer = b'<< /Size %d /Root %d 0 R' % (len(objects) + 1, catalog_id)
+        if info_id:
+            trailer += b' /Info %d 0 R' % info_id
+        output += b'trailer\n' + trailer + b' >>\nstartxref\n%d\n%%%%EOF\n' % xref_offset
+
+        return bytes(output)
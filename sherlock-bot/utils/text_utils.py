@@ -107,4 +107,55 @@ def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     if not text or len(text) <= max_length:
         return text
     
-    return text[:max_length - len(suffix)] + suffix
\ No newline at end of file
+    return text[:max_length - len(suffix)] + suffix
+
+def normalize_insight(text: str) -> str:
+    """
+    Normalize an insight for duplicate detection
+    
+    Args:
+        text (str): Insight text
+        
+    Returns:
+        str: Lowercased insight without punctuation, section prefix or extra whitespace
+    """
+    if not text:
+        return ""
+    
+    # Drop "SECTION:" prefixes added to API feedback
+    text = re.sub(r'^[A-Z][A-Z _-]{1,30}:\s*', '', text.strip())
+    text = text.lower().translate(str.maketrans('', '', string.punctuation))
+    return re.sub(r'\s+', ' ', text).strip()
+
+def dedupe_insights(candidates: List[str], already_sent: List[str], similarity: float = 0.8) -> List[str]:
+    """
+    Remove insights that duplicate ones already sent
+    
+    Args:
+        candidates (List[str]): New insights
+        already_sent (List[str]): Insights the user has already received
+        similarity (float): Word overlap ratio above which two insights are considered duplicates
+        
+    Returns:
+        List[str]: Candidates that are not duplicates, in their original order
+    """
+    seen = [set(normalize_insight(i).split()) for i in already_sent if i]
+    unique = []
+    
+    for insight in candidates:
+        words = set(normalize_insight(insight).split())
+        if not words:
+            continue
+        
+        duplicate = False
+        for other in seen:
+            overlap = len(words & other) / max(len(words), len(other))
+            if overlap >= similarity:
+                duplicate = True
+                break
+        
+        if not duplicate:
+            unique.append(insight)
+            seen.append(words)
+    
+    return unique
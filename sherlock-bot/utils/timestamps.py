@@ -0,0 +1,74 @@
+# utils/timestamps.py - UTC timestamps with support for legacy ISO string values
+from datetime import datetime, timezone
+
+# Fields stored as native Firestore timestamps. Documents written before the
+# migration hold naive ISO strings in server local time instead.
+TIMESTAMP_FIELDS = ('created_at', 'timestamp', 'last_activity')
+
+# Sort key for documents without a timestamp
+MIN_TIMESTAMP = datetime.min.replace(tzinfo=timezone.utc)
+
+def utc_now():
+    """
+    Current time for storing in Firestore
+
+    Returns:
+        datetime: Timezone-aware UTC datetime
+    """
+    return datetime.now(timezone.utc)
+
+def to_datetime(value):
+    """
+    Read a stored timestamp in either format
+
+    Args:
+        value: Firestore timestamp, datetime or ISO string
+
+    Returns:
+        datetime: Timezone-aware UTC datetime, or None if the value is empty or invalid
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    if not isinstance(value, datetime):
+        return None
+
+    # Naive values were written in server local time
+    if value.tzinfo is None:
+        value = value.astimezone()
+
+    return value.astimezone(timezone.utc)
+
+def normalize_timestamps(data, fields=TIMESTAMP_FIELDS):
+    """
+    Convert the timestamp fields of a document to UTC datetimes in place
+
+    Args:
+        data (dict): Document data
+        fields (tuple): Field names to convert
+
+    Returns:
+        dict: The same document
+    """
+    if data:
+        for field in fields:
+            if data.get(field) is not None:
+                data[field] = to_datetime(data[field])
+    return data
+
+def format_timestamp(value, fmt='%Y-%m-%d %H:%M:%S'):
+    """
+    Format a stored timestamp for display
+
+    Args:
+        value: Firestore timestamp, datetime or ISO string
+        fmt (str): strftime format
+
+    Returns:
+        str: Formatted UTC time, or 'N/A'
+    """
+    when = to_datetime(value)
+    return when.strftime(fmt) if when else 'N/A'
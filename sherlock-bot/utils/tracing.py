@@ -0,0 +1,328 @@
+# utils/tracing.py - Lightweight request and job tracing
+import os
+import json
+import time
+import queue
+import random
+import logging
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+import requests
+from config import Config
+
+# Span of the code currently running, carried across calls (and into executor threads via propagate)
+_current_span = contextvars.ContextVar('sherlock_current_span', default=None)
+
+# Finished sampled traces waiting for the exporter thread
+EXPORT_QUEUE_SIZE = 1000
+_export_queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+_exporter = None
+_exporter_lock = threading.Lock()
+
+# Spans kept per trace, so a runaway loop cannot hold unbounded memory
+MAX_SPANS_PER_TRACE = 500
+
+class Trace:
+    """Spans of one inbound request or job"""
+
+    __slots__ = ('trace_id', 'sampled', 'spans', 'lock')
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+        self.lock = threading.Lock()
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'status')
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = 'ok'
+
+    def set_attribute(self, key, value):
+        """Attach a value to the span, e.g. a review ID known only after saving"""
+        self.attributes[key] = value
+
+    def to_dict(self):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            'attributes': self.attributes,
+            'status': self.status
+        }
+
+def _exporting():
+    return bool(Config.TRACE_EXPORT_PATH or Config.TRACE_OTLP_ENDPOINT)
+
+def parse_traceparent(header):
+    """
+    Read a W3C traceparent header
+
+    Args:
+        header (str): e.g. '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+
+    Returns:
+        tuple: (trace_id, parent span ID, sampled), or None if missing or malformed
+    """
+    parts = (header or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+def begin_trace(name, traceparent=None, **attributes):
+    """
+    Start a trace and make its root span current
+
+    Trace IDs are always created so log lines can be correlated. Spans are
+    only collected when the trace is sampled and an export target is set.
+
+    Args:
+        name (str): Root span name, e.g. 'POST /webhook/twilio' or 'retention_job'
+        traceparent (str, optional): Incoming W3C traceparent header to continue
+        **attributes: Root span attributes
+
+    Returns:
+        tuple: (root span, context token) for end_trace
+    """
+    parent = parse_traceparent(traceparent)
+    if parent:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+        sampled = random.random() < Config.TRACE_SAMPLE_RATE
+
+    trace = Trace(trace_id, sampled and _exporting())
+    root = Span(trace, name, parent_id, attributes)
+    return root, _current_span.set(root)
+
+def end_trace(handle, error=None):
+    """
+    Finish a trace started with begin_trace and queue it for export when sampled
+
+    Args:
+        handle (tuple): Value returned by begin_trace
+        error (Exception, optional): Error that ended the trace
+    """
+    root, token = handle
+    root.end_ns = time.time_ns()
+    if error is not None:
+        root.status = 'error'
+        root.attributes['error'] = str(error)
+    _current_span.reset(token)
+
+    trace = root.trace
+    if trace.sampled:
+        with trace.lock:
+            spans = [root] + trace.spans
+        _enqueue({'trace_id': trace.trace_id, 'name': root.name, 'spans': [s.to_dict() for s in spans]})
+
+@contextmanager
+def start_trace(name, traceparent=None, **attributes):
+    """
+    Run the enclosed block as a new trace (see begin_trace)
+
+    Yields:
+        Span: Root span
+    """
+    handle = begin_trace(name, traceparent, **attributes)
+    try:
+        yield handle[0]
+    except Exception as e:
+        end_trace(handle, e)
+        raise
+    else:
+        end_trace(handle)
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the enclosed block as a child of the current span
+
+    Outside a trace, or in an unsampled one, only the parent is made
+    current again for nested code and nothing is recorded.
+
+    Args:
+        name (str): Span name, e.g. 'stage.extract' or 'twilio.send_message'
+        **attributes: Span attributes
+
+    Yields:
+        Span: The new span, or None when not recording
+    """
+    parent = _current_span.get()
+    if parent is None or not parent.trace.sampled:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.status = 'error'
+        child.attributes['error'] = str(e)
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current_span.reset(token)
+        with parent.trace.lock:
+            if len(parent.trace.spans) < MAX_SPANS_PER_TRACE:
+                parent.trace.spans.append(child)
+
+def current_trace_id():
+    """
+    Trace ID of the running request or job
+
+    Returns:
+        str: 32 hex characters, or None outside a trace
+    """
+    current = _current_span.get()
+    return current.trace.trace_id if current else None
+
+def outbound_headers(headers=None):
+    """
+    Add the W3C traceparent header for an outbound HTTP call
+
+    Args:
+        headers (dict, optional): Existing headers, not modified
+
+    Returns:
+        dict: Headers including traceparent when inside a trace
+    """
+    headers = dict(headers or {})
+    current = _current_span.get()
+    if current:
+        headers['traceparent'] = f"00-{current.trace.trace_id}-{current.span_id}-{'01' if current.trace.sampled else '00'}"
+    return headers
+
+def propagate(fn):
+    """
+    Bind a callable to the current context so it keeps the trace in an executor thread
+
+    Args:
+        fn (callable): Function submitted to a thread pool
+
+    Returns:
+        callable: Wrapper running fn in a copy of the caller's context
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+class TraceIdFilter(logging.Filter):
+    """Adds the current trace ID to log records as %(trace_id)s"""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or '-'
+        return True
+
+def _enqueue(trace):
+    _ensure_exporter()
+    try:
+        _export_queue.put_nowait(trace)
+    except queue.Full:
+        # Dropping a trace beats blocking the request that produced it
+        pass
+
+def _ensure_exporter():
+    global _exporter
+    if _exporter is not None:
+        return
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name='trace-exporter', daemon=True)
+            _exporter.start()
+
+def _export_loop():
+    while True:
+        batch = [_export_queue.get()]
+        while len(batch) < 50:
+            try:
+                batch.append(_export_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            export_traces(batch)
+        except Exception as e:
+            logging.getLogger('sherlock_bot').warning(f"Trace export failed: {str(e)}")
+
+def export_traces(traces):
+    """
+    Write finished traces to the configured targets
+
+    TRACE_EXPORT_PATH receives one JSON object per trace and line.
+    TRACE_OTLP_ENDPOINT receives OTLP/HTTP JSON, e.g. a local OpenTelemetry
+    collector at http://localhost:4318/v1/traces.
+
+    Args:
+        traces (list): Trace dicts with 'trace_id', 'name' and 'spans'
+    """
+    if Config.TRACE_EXPORT_PATH:
+        with open(Config.TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+            for trace in traces:
+                f.write(json.dumps(trace, default=str) + '\n')
+
+    if Config.TRACE_OTLP_ENDPOINT:
+        requests.post(Config.TRACE_OTLP_ENDPOINT, json=to_otlp(traces), timeout=5)
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def to_otlp(traces):
+    """
+    Convert traces to an OTLP/HTTP JSON export request
+
+    Args:
+        traces (list): Trace dicts as produced by end_trace
+
+    Returns:
+        dict: ExportTraceServiceRequest body
+    """
+    spans = []
+    for trace in traces:
+        for item in trace['spans']:
+            end_ns = item['start_ns'] + int((item['duration_ms'] or 0) * 1e6)
+            spans.append({
+                'traceId': trace['trace_id'],
+                'spanId': item['span_id'],
+                'parentSpanId': item['parent_id'] or '',
+                'name': item['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(item['start_ns']),
+                'endTimeUnixNano': str(end_ns),
+                'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in item['attributes'].items()],
+                'status': {'code': 2 if item['status'] == 'error' else 1}
+            })
+
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': 'sherlock-bot'}},
+                {'key': 'service.instance.id', 'value': {'stringValue': os.getenv('K_REVISION', 'local')}}
+            ]},
+            'scopeSpans': [{'scope': {'name': 'sherlock_bot.tracing'}, 'spans': spans}]
+        }]
+    }
@@ -0,0 +1,79 @@
+# tests/fakes/__init__.py - In-process stand-ins for Firebase, Twilio, Paystack and the CV API
+from contextlib import ExitStack
+from unittest.mock import patch
+from tests.fakes.latency import LatencyModel, Delay, INSTANT, DEFAULT_PROFILE
+from tests.fakes.firestore import FakeFirestoreClient, transactional
+from tests.fakes.storage import FakeBucket
+from tests.fakes.http import FakeHttp, FakeTwilio, FakePaystack, FakeCvApi
+
+# Credentials the fakes accept, set on Config while installed
+ACCOUNT_SID = 'AC' + '0' * 32
+AUTH_TOKEN = 'fake-twilio-auth-token'
+PAYSTACK_SECRET_KEY = 'sk_test_fake'
+
+class FakeBackends:
+    """Fake backends installed by install(), with their recorded state"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.firestore = FakeFirestoreClient(delay)
+        self.bucket = FakeBucket(delay=delay)
+        self.http = FakeHttp()
+        self.twilio = self.http.register(FakeTwilio(ACCOUNT_SID, AUTH_TOKEN, delay))
+        self.paystack = self.http.register(FakePaystack(PAYSTACK_SECRET_KEY, delay))
+        self.cv_api = self.http.register(FakeCvApi(delay, seed=delay.seed))
+        self._patches = ExitStack()
+
+    def start(self):
+        # Imported here so the fakes can be loaded before the app's modules
+        import firebase_init
+        from firebase_admin import firestore, storage
+        from config import Config
+        from services import twilio_service
+
+        for target, name, value in (
+            (firestore, 'client', lambda app=None: self.firestore),
+            (firestore, 'transactional', transactional),
+            (storage, 'bucket', lambda name=None, app=None: self.bucket),
+            (firebase_init, 'initialize_firebase', lambda: True),
+            (Config, 'TWILIO_ACCOUNT_SID', ACCOUNT_SID),
+            (Config, 'TWILIO_AUTH_TOKEN', AUTH_TOKEN),
+            (Config, 'PAYSTACK_SECRET_KEY', PAYSTACK_SECRET_KEY),
+            (Config, 'CV_ANALYSIS_API_URL', FakeCvApi.URL),
+            # Rebuilt with the fake credentials on first use
+            (twilio_service, 'twilio_client', None),
+            (twilio_service, 'twilio_validator', None)
+        ):
+            self._patches.enter_context(patch.object(target, name, value))
+
+        self.http.install()
+        self._patches.callback(self.http.uninstall)
+        return self
+
+    def stop(self):
+        self._patches.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def install(latency=None, scale=1.0, seed=None):
+    """
+    Swap Firestore, Storage, Twilio, Paystack and the CV API for in-process fakes
+
+    Install before importing app so that initialize_firebase() is skipped.
+    SendGrid is not faked: leave SENDGRID_API_KEY unset or skip the email.
+
+    Args:
+        latency (dict, optional): Backend name ('firestore', 'storage', 'twilio',
+            'twilio_media', 'paystack', 'cv_api') -> LatencyModel. Backends left
+            out answer instantly.
+        scale (float): Factor applied to every delay
+        seed (int, optional): Seed of the delays, failures and CV API scores
+
+    Returns:
+        FakeBackends: The started fakes; call stop() or use as a context manager
+    """
+    return FakeBackends(Delay(latency, scale, seed)).start()
@@ -0,0 +1,604 @@
+# tests/fakes/firestore.py - In-memory stand-in for the Firestore client
+import copy
+import uuid
+import functools
+import threading
+from datetime import datetime, timezone
+from google.api_core.exceptions import AlreadyExists, NotFound, ServiceUnavailable
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
+from tests.fakes.latency import Delay
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+# Cross-type sort order of Firestore values
+_NULL, _BOOL, _NUMBER, _TIMESTAMP, _STRING, _BYTES, _REFERENCE, _ARRAY, _MAP = range(9)
+
+def _rank(value):
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        return _BOOL
+    if isinstance(value, (int, float)):
+        return _NUMBER
+    if isinstance(value, datetime):
+        return _TIMESTAMP
+    if isinstance(value, str):
+        return _STRING
+    if isinstance(value, bytes):
+        return _BYTES
+    if isinstance(value, FakeDocumentReference):
+        return _REFERENCE
+    if isinstance(value, list):
+        return _ARRAY
+    return _MAP
+
+def _compare(a, b):
+    """Three-way comparison in Firestore's value order"""
+    rank_a, rank_b = _rank(a), _rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == _NULL:
+        return 0
+    if rank_a == _REFERENCE:
+        a, b = a._path, b._path
+    elif rank_a == _ARRAY:
+        for item_a, item_b in zip(a, b):
+            result = _compare(item_a, item_b)
+            if result:
+                return result
+        a, b = len(a), len(b)
+    elif rank_a == _MAP:
+        for (key_a, item_a), (key_b, item_b) in zip(sorted(a.items()), sorted(b.items())):
+            result = _compare(key_a, key_b) or _compare(item_a, item_b)
+            if result:
+                return result
+        a, b = len(a), len(b)
+    return (a > b) - (a < b)
+
+def _encode(value):
+    """Copy of a value as Firestore stores it: naive datetimes are UTC, tuples are arrays"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+def _lookup(data, field_path):
+    """(found, value) of a dotted field path"""
+    value = data
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+def _project(data, field_paths):
+    """Copy of the given fields of a document"""
+    projected = {}
+    for field_path in field_paths:
+        found, value = _lookup(data, field_path)
+        if not found:
+            continue
+        parts = field_path.split('.')
+        target = projected
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy.deepcopy(value)
+    return projected
+
+def _write_field(document, parts, value, merge):
+    """Apply a value or field transform at a field path"""
+    parent = document
+    for part in parts[:-1]:
+        if not isinstance(parent.get(part), dict):
+            parent[part] = {}
+        parent = parent[part]
+
+    name = parts[-1]
+    current = parent.get(name)
+    numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+
+    if value is transforms.DELETE_FIELD:
+        parent.pop(name, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        parent[name] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        parent[name] = (current if numeric else 0) + value.value
+    elif isinstance(value, transforms.Maximum):
+        parent[name] = max(current, value.value) if numeric else value.value
+    elif isinstance(value, transforms.Minimum):
+        parent[name] = min(current, value.value) if numeric else value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        items = list(current) if isinstance(current, list) else []
+        items.extend(_encode(item) for item in value.values if not any(_compare(item, existing) == 0 for existing in items))
+        parent[name] = items
+    elif isinstance(value, transforms.ArrayRemove):
+        items = list(current) if isinstance(current, list) else []
+        parent[name] = [item for item in items if not any(_compare(item, removed) == 0 for removed in value.values)]
+    elif merge and isinstance(value, dict) and value:
+        if not isinstance(current, dict):
+            parent[name] = {}
+        for key, item in value.items():
+            _write_field(parent[name], [key], item, merge)
+    else:
+        parent[name] = _encode(value)
+
+class FakeDocumentSnapshot:
+    """Result of reading one document"""
+
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self.exists else None
+
+    def get(self, field_path):
+        found, value = _lookup(self._data or {}, field_path)
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+class FakeQuery:
+    """Filters, ordering, cursors, limits and projections over one collection"""
+
+    def __init__(self, client, path, filters=(), orders=(), limit=None, offset=0, projection=None, start=None, end=None):
+        self._client = client
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._offset = offset
+        self._projection = projection
+        self._start = start
+        self._end = end
+
+    def _copy(self, **changes):
+        values = {
+            'filters': self._filters, 'orders': self._orders, 'limit': self._limit, 'offset': self._offset,
+            'projection': self._projection, 'start': self._start, 'end': self._end
+        }
+        values.update(changes)
+        return FakeQuery(self._client, self._path, **values)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string.replace('_', '-'), value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip):
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def _matches(self, doc_id, data):
+        for field_path, op, expected in self._filters:
+            found, value = (True, self._client.document(*self._path, doc_id)) if field_path == '__name__' else _lookup(data, field_path)
+            if not found:
+                return False
+            if op == '==':
+                matched = _compare(value, expected) == 0
+            elif op == '!=':
+                matched = value is not None and _compare(value, expected) != 0
+            elif op in ('<', '<=', '>', '>='):
+                if _rank(value) != _rank(expected):
+                    return False
+                result = _compare(value, expected)
+                matched = {'<': result < 0, '<=': result <= 0, '>': result > 0, '>=': result >= 0}[op]
+            elif op == 'in':
+                matched = any(_compare(value, item) == 0 for item in expected)
+            elif op == 'not-in':
+                matched = value is not None and all(_compare(value, item) != 0 for item in expected)
+            elif op == 'array-contains':
+                matched = isinstance(value, list) and any(_compare(item, expected) == 0 for item in value)
+            elif op == 'array-contains-any':
+                matched = isinstance(value, list) and any(_compare(item, wanted) == 0 for item in value for wanted in expected)
+            else:
+                raise ValueError(f"Unsupported operator {op!r}")
+            if not matched:
+                return False
+        return True
+
+    def _sort_values(self, doc_id, data):
+        # None when the document lacks an ordered field and is left out, as in Firestore
+        values = []
+        for field_path, _ in self._orders:
+            found, value = (True, doc_id) if field_path == '__name__' else _lookup(data, field_path)
+            if not found:
+                return None
+            values.append(value)
+        return values + [doc_id]
+
+    def _cursor_values(self, cursor):
+        if isinstance(cursor, FakeDocumentSnapshot):
+            values = [cursor.id if field_path == '__name__' else cursor.get(field_path) for field_path, _ in self._orders]
+            return values + [cursor.id]
+        if isinstance(cursor, dict):
+            return [cursor[field_path] for field_path, _ in self._orders]
+        return list(cursor)
+
+    def _compare_rows(self, a, b):
+        directions = [direction for _, direction in self._orders] + [ASCENDING]
+        for value_a, value_b, direction in zip(a, b, directions):
+            result = _compare(value_a, value_b)
+            if result:
+                return -result if direction == DESCENDING else result
+        return 0
+
+    def _rows(self):
+        """Matching (doc_id, data) pairs in query order, before projection"""
+        rows = []
+        for doc_id, data in self._client._collection(self._path).items():
+            if self._matches(doc_id, data):
+                values = self._sort_values(doc_id, data)
+                if values is not None:
+                    rows.append((values, doc_id, data))
+        rows.sort(key=functools.cmp_to_key(lambda a, b: self._compare_rows(a[0], b[0])))
+
+        if self._start is not None:
+            cursor, exclusive = self._start
+            cursor = self._cursor_values(cursor)
+            rows = [row for row in rows if self._compare_rows(row[0][:len(cursor)], cursor) > (0 if exclusive else -1)]
+        if self._end is not None:
+            cursor, exclusive = self._end
+            cursor = self._cursor_values(cursor)
+            rows = [row for row in rows if self._compare_rows(row[0][:len(cursor)], cursor) < (0 if exclusive else 1)]
+
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [(doc_id, data) for _, doc_id, data in rows]
+
+    def stream(self, transaction=None):
+        self._client._call()
+        with self._client._lock:
+            rows = self._rows()
+            snapshots = [
+                FakeDocumentSnapshot(
+                    self._client.document(*self._path, doc_id),
+                    _project(data, self._projection) if self._projection is not None else copy.deepcopy(data),
+                    self._client._update_times.get(self._path + (doc_id,))
+                )
+                for doc_id, data in rows
+            ]
+        return iter(snapshots)
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction=transaction))
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self, 'count', alias)
+
+    def sum(self, field_ref, alias=None):
+        return FakeAggregationQuery(self, 'sum', alias, field_ref)
+
+    def avg(self, field_ref, alias=None):
+        return FakeAggregationQuery(self, 'avg', alias, field_ref)
+
+class FakeAggregationQuery:
+    """count(), sum() or avg() of a query"""
+
+    def __init__(self, query, kind, alias, field_path=None):
+        self._query = query
+        self._kind = kind
+        self._alias = alias or 'field_1'
+        self._field_path = field_path
+
+    def get(self, transaction=None, **kwargs):
+        self._query._client._call()
+        with self._query._client._lock:
+            rows = self._query._rows()
+
+        if self._kind == 'count':
+            value = len(rows)
+        else:
+            numbers = []
+            for _, data in rows:
+                found, number = _lookup(data, self._field_path)
+                if found and isinstance(number, (int, float)) and not isinstance(number, bool):
+                    numbers.append(number)
+            if self._kind == 'sum':
+                value = sum(numbers)
+            else:
+                value = sum(numbers) / len(numbers) if numbers else None
+
+        return [[AggregationResult(alias=self._alias, value=value)]]
+
+class FakeCollectionReference(FakeQuery):
+    """Collection of documents, also usable as a query over all of them"""
+
+    def __init__(self, client, path):
+        super().__init__(client, path)
+
+    @property
+    def id(self):
+        return self._path[-1]
+
+    @property
+    def parent(self):
+        return FakeDocumentReference(self._client, self._path[:-1]) if len(self._path) > 1 else None
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._client, self._path + (document_id or uuid.uuid4().hex[:20],))
+
+    def add(self, document_data, document_id=None):
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return self._client._update_times.get(reference._path), reference
+
+    def list_documents(self, page_size=None):
+        with self._client._lock:
+            doc_ids = list(self._client._collection(self._path))
+        return [self.document(doc_id) for doc_id in doc_ids]
+
+class FakeDocumentReference:
+    """Reference to one document"""
+
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+
+    @property
+    def id(self):
+        return self._path[-1]
+
+    @property
+    def path(self):
+        return '/'.join(self._path)
+
+    @property
+    def parent(self):
+        return FakeCollectionReference(self._client, self._path[:-1])
+
+    def collection(self, collection_id):
+        return FakeCollectionReference(self._client, self._path + (collection_id,))
+
+    def get(self, field_paths=None, transaction=None):
+        self._client._call()
+        return self._client._read(self, field_paths)
+
+    def create(self, document_data):
+        return self._client._commit([('create', self, document_data, False)])
+
+    def set(self, document_data, merge=False):
+        return self._client._commit([('set', self, document_data, merge)])
+
+    def update(self, field_updates):
+        return self._client._commit([('update', self, field_updates, False)])
+
+    def delete(self):
+        return self._client._commit([('delete', self, None, False)])
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and other._path == self._path
+
+    def __hash__(self):
+        return hash(self._path)
+
+    def __repr__(self):
+        return f"FakeDocumentReference({self.path!r})"
+
+class FakeWriteBatch:
+    """Writes applied together on commit"""
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, document_data, False))
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference, document_data, merge))
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference, field_updates, False))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, False))
+
+    def __len__(self):
+        return len(self._writes)
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes) if writes else []
+
+class FakeTransaction(FakeWriteBatch):
+    """Batch whose reads happen under the client lock, see transactional"""
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return iter([ref_or_query.get(transaction=self)])
+        return ref_or_query.stream(transaction=self)
+
+    def get_all(self, references):
+        return self._client.get_all(references, transaction=self)
+
+class FakeBulkWriter:
+    """Bulk writer applying each operation straight away"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, reference, document_data):
+        self._client._commit([('create', reference, document_data, False)])
+
+    def set(self, reference, document_data, merge=False):
+        self._client._commit([('set', reference, document_data, merge)])
+
+    def update(self, reference, field_updates):
+        self._client._commit([('update', reference, field_updates, False)])
+
+    def delete(self, reference):
+        self._client._commit([('delete', reference, None, False)])
+
+    def on_write_result(self, callback):
+        pass
+
+    def on_write_error(self, callback):
+        pass
+
+    def on_batch_result(self, callback):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakeFirestoreClient:
+    """
+    In-memory Firestore holding documents per collection path
+
+    Covers what the app uses: documents, batches, transactions, queries with
+    filters, ordering, cursors, projections and count/sum aggregations, and
+    the Increment, DELETE_FIELD, SERVER_TIMESTAMP and array transforms.
+    Every read and commit pays one round trip from the 'firestore' latency
+    model, and fails with ServiceUnavailable at its error rate.
+    """
+
+    def __init__(self, delay=None):
+        self._delay = delay or Delay()
+        self._lock = threading.RLock()
+        self._collections = {}
+        self._update_times = {}
+        self.reads = 0
+        self.writes = 0
+
+    def _call(self):
+        if self._delay.wait('firestore'):
+            raise ServiceUnavailable('Injected Firestore failure')
+
+    def _collection(self, path):
+        return self._collections.setdefault(path, {})
+
+    def _read(self, reference, field_paths=None):
+        with self._lock:
+            self.reads += 1
+            data = self._collection(reference._path[:-1]).get(reference.id)
+            if data is not None:
+                data = _project(data, field_paths) if field_paths is not None else copy.deepcopy(data)
+            return FakeDocumentSnapshot(reference, data, self._update_times.get(reference._path))
+
+    def _commit(self, writes):
+        self._call()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            # Check every precondition first so a failing batch changes nothing
+            pending = {}
+            for op, reference, _, _ in writes:
+                exists = pending.get(reference._path, reference.id in self._collection(reference._path[:-1]))
+                if op == 'create' and exists:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+                if op == 'update' and not exists:
+                    raise NotFound(f"No document to update: {reference.path}")
+                pending[reference._path] = op != 'delete'
+
+            for op, reference, data, merge in writes:
+                documents = self._collection(reference._path[:-1])
+                if op == 'delete':
+                    documents.pop(reference.id, None)
+                    self._update_times.pop(reference._path, None)
+                    continue
+
+                document = copy.deepcopy(documents.get(reference.id, {})) if op == 'update' or merge else {}
+                for key, value in data.items():
+                    # update() takes dotted field paths, set() takes field names
+                    _write_field(document, key.split('.') if op == 'update' else [key], value, merge or op != 'update')
+                documents[reference.id] = document
+                self._update_times[reference._path] = now
+
+            self.writes += len(writes)
+        return [now for _ in writes]
+
+    def collection(self, *collection_path):
+        path = tuple(part for segment in collection_path for part in segment.split('/'))
+        return FakeCollectionReference(self, path)
+
+    def document(self, *document_path):
+        path = tuple(part for segment in document_path for part in segment.split('/'))
+        return FakeDocumentReference(self, path)
+
+    def collections(self):
+        with self._lock:
+            return [FakeCollectionReference(self, path) for path, documents in self._collections.items() if len(path) == 1 and documents]
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        self._call()
+        return iter([self._read(reference, field_paths) for reference in references])
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, **kwargs):
+        return FakeTransaction(self)
+
+    def bulk_writer(self, options=None):
+        return FakeBulkWriter(self)
+
+    def peek(self, *document_path):
+        """
+        Copy of one document without a round trip or a counted read
+
+        Returns:
+            dict: Document data, None if it does not exist
+        """
+        path = tuple(part for segment in document_path for part in segment.split('/'))
+        with self._lock:
+            return copy.deepcopy(self._collection(path[:-1]).get(path[-1]))
+
+    def documents(self, *collection_path):
+        """
+        Copy of a collection's documents, for assertions and reports
+
+        Returns:
+            dict: Document ID -> data
+        """
+        path = tuple(part for segment in collection_path for part in segment.split('/'))
+        with self._lock:
+            return copy.deepcopy(self._collection(path))
+
+def transactional(to_wrap):
+    """
+    Stand-in for firestore.transactional
+
+    The wrapped function runs under the client lock and its writes are
+    committed when it returns, so concurrent transactions are serialized
+    and never retried.
+    """
+    @functools.wraps(to_wrap)
+    def run(transaction, *args, **kwargs):
+        with transaction._client._lock:
+            result = to_wrap(transaction, *args, **kwargs)
+            transaction.commit()
+        return result
+
+    return run
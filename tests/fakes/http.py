@@ -0,0 +1,346 @@
+# tests/fakes/http.py - Fake Twilio, Paystack and CV API servers behind the requests library
+import io
+import re
+import hmac
+import json
+import uuid
+import base64
+import random
+import hashlib
+import threading
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit, parse_qs
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from tests.fakes.latency import Delay
+from utils.timestamps import utc_now
+
+class FakeService:
+    """
+    In-process HTTP server for one host
+
+    Subclasses list their endpoints in ROUTES as (method, path regex, endpoint
+    name, handler name). Each call pays a delay from the latency model named
+    after the service, or after the endpoint when one is configured, and
+    fails with a 503 at the model's error rate.
+    """
+
+    HOST = None
+    SERVICE = None
+    ROUTES = ()
+
+    def __init__(self, delay=None):
+        self.delay = delay or Delay()
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._routes = [(method, re.compile(f"^{pattern}$"), endpoint, getattr(self, handler)) for method, pattern, endpoint, handler in self.ROUTES]
+
+    def handle(self, request):
+        """
+        Answer a prepared request
+
+        Returns:
+            tuple: (status, body bytes, content type)
+        """
+        url = urlsplit(request.url)
+        for method, pattern, endpoint, handler in self._routes:
+            match = pattern.match(url.path)
+            if method == request.method and match:
+                with self._lock:
+                    self.calls[endpoint] += 1
+                model_name = endpoint if endpoint in self.delay.models else self.SERVICE
+                if self.delay.wait(model_name):
+                    with self._lock:
+                        self.calls[f"{endpoint}_failed"] += 1
+                    return _json(503, {'status': False, 'message': 'Injected failure'})
+                return handler(request, **match.groupdict())
+
+        return _json(404, {'status': False, 'message': f"No route for {request.method} {url.path}"})
+
+def _json(status, payload):
+    return status, json.dumps(payload, default=str).encode('utf-8'), 'application/json'
+
+def _form(request):
+    body = request.body or ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    return {key: values[-1] for key, values in parse_qs(body).items()}
+
+def _basic_auth(request):
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Basic '):
+        return None
+    return tuple(base64.b64decode(header[6:]).decode('utf-8').split(':', 1))
+
+class FakeTwilio(FakeService):
+    """
+    Twilio REST API: sending messages and serving WhatsApp media
+
+    Outbound messages are kept per recipient. Media added with add_media is
+    served at the same URLs Twilio puts in MediaUrl0.
+    """
+
+    HOST = 'api.twilio.com'
+    SERVICE = 'twilio'
+    ACCOUNT = r'/2010-04-01/Accounts/(?P<account>\w+)'
+    ROUTES = (
+        ('POST', ACCOUNT + r'/Messages\.json', 'twilio', 'create_message'),
+        ('GET', ACCOUNT + r'/Messages/(?P<message>\w+)/Media/(?P<media>\w+)\.json', 'twilio_media', 'fetch_media'),
+        ('GET', ACCOUNT + r'/Messages/(?P<message>\w+)/Media/(?P<media>\w+)', 'twilio_media', 'download_media')
+    )
+
+    def __init__(self, account_sid, auth_token, delay=None):
+        super().__init__(delay)
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self._outbox = defaultdict(list)
+        self._media = {}
+
+    def _authorized(self, request, account):
+        return account == self.account_sid and _basic_auth(request) == (self.account_sid, self.auth_token)
+
+    def add_media(self, content, content_type):
+        """
+        Make a file downloadable the way an incoming WhatsApp attachment is
+
+        Returns:
+            str: Media URL to send as MediaUrl0
+        """
+        message_sid = f"MM{uuid.uuid4().hex}"
+        media_sid = f"ME{uuid.uuid4().hex}"
+        with self._lock:
+            self._media[media_sid] = (message_sid, content, content_type)
+        return f"https://{self.HOST}/2010-04-01/Accounts/{self.account_sid}/Messages/{message_sid}/Media/{media_sid}"
+
+    def sent_to(self, to):
+        """Bodies of the messages sent to a WhatsApp address, oldest first"""
+        with self._lock:
+            return list(self._outbox.get(to, []))
+
+    def create_message(self, request, account):
+        if not self._authorized(request, account):
+            return _json(401, {'code': 20003, 'message': 'Authenticate', 'status': 401})
+
+        form = _form(request)
+        sid = f"SM{uuid.uuid4().hex}"
+        with self._lock:
+            self._outbox[form.get('To')].append(form.get('Body', ''))
+        return _json(201, {
+            'sid': sid, 'account_sid': account, 'to': form.get('To'), 'from': form.get('From'),
+            'body': form.get('Body', ''), 'status': 'queued', 'num_media': '1' if form.get('MediaUrl') else '0',
+            'direction': 'outbound-api', 'api_version': '2010-04-01', 'date_created': utc_now().isoformat(),
+            'uri': f"/2010-04-01/Accounts/{account}/Messages/{sid}.json"
+        })
+
+    def _find_media(self, request, account, message, media):
+        if not self._authorized(request, account):
+            return None, _json(401, {'code': 20003, 'message': 'Authenticate', 'status': 401})
+        with self._lock:
+            stored = self._media.get(media)
+        if stored is None or stored[0] != message:
+            return None, _json(404, {'code': 20404, 'message': 'The requested resource was not found', 'status': 404})
+        return stored, None
+
+    def fetch_media(self, request, account, message, media):
+        stored, error = self._find_media(request, account, message, media)
+        if error:
+            return error
+        return _json(200, {
+            'sid': media, 'account_sid': account, 'parent_sid': message, 'content_type': stored[2],
+            'uri': f"/2010-04-01/Accounts/{account}/Messages/{message}/Media/{media}.json"
+        })
+
+    def download_media(self, request, account, message, media):
+        stored, error = self._find_media(request, account, message, media)
+        if error:
+            return error
+        return 200, stored[1], stored[2]
+
+class FakePaystack(FakeService):
+    """
+    Paystack transactions: initialize, verify and the charge.success webhook
+
+    A transaction stays unpaid until pay() marks it paid and returns the
+    signed webhook the app expects from Paystack.
+    """
+
+    HOST = 'api.paystack.co'
+    SERVICE = 'paystack'
+    ROUTES = (
+        ('POST', r'/transaction/initialize', 'paystack', 'initialize'),
+        ('GET', r'/transaction/verify/(?P<reference>[\w-]+)', 'paystack', 'verify')
+    )
+
+    def __init__(self, secret_key, delay=None):
+        super().__init__(delay)
+        self.secret_key = secret_key
+        self._transactions = {}
+
+    def _authorized(self, request):
+        return request.headers.get('Authorization') == f"Bearer {self.secret_key}"
+
+    def initialize(self, request):
+        if not self._authorized(request):
+            return _json(401, {'status': False, 'message': 'Invalid key'})
+
+        data = json.loads(request.body)
+        reference = data.get('reference') or uuid.uuid4().hex[:10]
+        access_code = uuid.uuid4().hex[:15]
+        with self._lock:
+            if reference in self._transactions:
+                return _json(400, {'status': False, 'message': 'Duplicate Transaction Reference'})
+            self._transactions[reference] = {
+                'reference': reference, 'amount': data['amount'], 'currency': data.get('currency', 'NGN'),
+                'metadata': data.get('metadata') or {}, 'customer': {'email': data.get('email')},
+                'status': 'abandoned', 'paid_at': None
+            }
+        return _json(200, {
+            'status': True, 'message': 'Authorization URL created',
+            'data': {'authorization_url': f"https://checkout.paystack.com/{access_code}", 'access_code': access_code, 'reference': reference}
+        })
+
+    def verify(self, request, reference):
+        if not self._authorized(request):
+            return _json(401, {'status': False, 'message': 'Invalid key'})
+        with self._lock:
+            transaction = dict(self._transactions.get(reference) or {})
+        if not transaction:
+            return _json(400, {'status': False, 'message': 'Transaction reference not found'})
+        return _json(200, {'status': True, 'message': 'Verification successful', 'data': transaction})
+
+    def find(self, phone_number):
+        """Reference of the latest transaction started for a phone number, or None"""
+        phone_number = phone_number.replace('whatsapp:', '')
+        with self._lock:
+            references = [reference for reference, transaction in self._transactions.items() if transaction['metadata'].get('phone_number') == phone_number]
+        return references[-1] if references else None
+
+    def pay(self, reference):
+        """
+        Complete a transaction
+
+        Returns:
+            tuple: (webhook body bytes, x-paystack-signature header)
+        """
+        with self._lock:
+            transaction = self._transactions[reference]
+            transaction['status'] = 'success'
+            transaction['paid_at'] = utc_now().isoformat()
+            body = json.dumps({'event': 'charge.success', 'data': transaction}).encode('utf-8')
+        return body, hmac.new(self.secret_key.encode('utf-8'), body, hashlib.sha512).hexdigest()
+
+class FakeCvApi(FakeService):
+    """CV analysis API answering uploads with a plausible analysis"""
+
+    HOST = 'cv-api.fake.local'
+    SERVICE = 'cv_api'
+    URL = f"https://{HOST}/api/upload-and-analyze"
+    ROUTES = (
+        ('POST', r'/api/upload-and-analyze', 'cv_api', 'analyze'),
+    )
+
+    SUGGESTIONS = (
+        'Quantify achievements with numbers, e.g. revenue grown or time saved.',
+        'Open each bullet point with a strong action verb.',
+        'Add a two-line professional summary tailored to the role.',
+        'List tools and technologies in a dedicated skills section.',
+        'Keep the CV to two pages by trimming roles older than ten years.',
+        'Use consistent date formats across all positions.'
+    )
+
+    def __init__(self, delay=None, seed=None):
+        super().__init__(delay)
+        self._rng = random.Random(seed)
+
+    def analyze(self, request):
+        if b'name="cv"' not in (request.body or b''):
+            return _json(400, {'success': False, 'error': 'No CV file uploaded'})
+
+        with self._lock:
+            score = self._rng.randint(45, 90)
+            suggestions = self._rng.sample(self.SUGGESTIONS, 4)
+        return _json(200, {
+            'success': True,
+            'analysis_results': {
+                'ai_analysis': {
+                    'overall_score': score,
+                    'ats_compatibility': min(score + 5, 100),
+                    'improvement_suggestions': suggestions,
+                    'section_feedback': {
+                        'summary': {'score': score - 5, 'suggestion': 'Lead with your most relevant experience.'},
+                        'experience': {'score': score, 'suggestion': 'Show the impact of each role, not just duties.'},
+                        'skills': {'score': score + 3, 'suggestion': 'Group skills by category.'}
+                    },
+                    'keyword_analysis': {'match_percentage': score - 10}
+                }
+            }
+        })
+
+class FakeHttp:
+    """
+    Routes requests made through the requests library to fake services
+
+    The Twilio SDK, Paystack and CV API calls all go through
+    requests.Session, so swapping its adapter lookup is enough. Requests to
+    hosts without a fake fail with ConnectionError instead of reaching the
+    network.
+    """
+
+    def __init__(self):
+        self._services = {}
+        self._get_adapter = None
+
+    def register(self, service, host=None):
+        self._services[host or service.HOST] = service
+        return service
+
+    def install(self):
+        if self._get_adapter is not None:
+            return
+        fake = self
+        original = self._get_adapter = requests.Session.get_adapter
+
+        def get_adapter(session, url):
+            if urlsplit(url).hostname in fake._services:
+                return _FakeAdapter(fake)
+            if urlsplit(url).scheme in ('http', 'https'):
+                return _BlockingAdapter()
+            return original(session, url)
+
+        requests.Session.get_adapter = get_adapter
+
+    def uninstall(self):
+        if self._get_adapter is not None:
+            requests.Session.get_adapter = self._get_adapter
+            self._get_adapter = None
+
+def _response(request, status, body, content_type):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = requests.status_codes._codes.get(status, ('',))[0].upper().replace('_', ' ')
+    response.headers = CaseInsensitiveDict({'Content-Type': content_type, 'Content-Length': str(len(body))})
+    response.raw = io.BytesIO(body)
+    response.encoding = 'utf-8' if content_type.startswith(('application/json', 'text/')) else None
+    response.url = request.url
+    response.request = request
+    return response
+
+class _FakeAdapter(BaseAdapter):
+    def __init__(self, http):
+        super().__init__()
+        self._http = http
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        service = self._http._services[urlsplit(request.url).hostname]
+        return _response(request, *service.handle(request))
+
+    def close(self):
+        pass
+
+class _BlockingAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        raise requests.ConnectionError(f"No fake backend for {urlsplit(request.url).hostname}, refusing to reach the network", request=request)
+
+    def close(self):
+        pass
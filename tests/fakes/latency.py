@@ -0,0 +1,108 @@
+# tests/fakes/latency.py - Latency and failure distributions of the fake backends
+import math
+import random
+import threading
+import time
+
+# z-score of the 95th percentile of a standard normal distribution
+Z_95 = 1.6449
+
+class LatencyModel:
+    """
+    Lognormal response time given by its median and 95th percentile, plus an error rate
+
+    Lognormal is the usual shape of remote call latency: most calls are close to
+    the median with a long tail of slow ones.
+    """
+
+    def __init__(self, median=0.0, p95=None, error_rate=0.0):
+        self.median = float(median)
+        self.p95 = float(p95) if p95 is not None else self.median
+        self.error_rate = float(error_rate)
+
+        if self.p95 < self.median:
+            raise ValueError(f"p95 ({self.p95}) must not be below the median ({self.median})")
+        if not 0 <= self.error_rate <= 1:
+            raise ValueError(f"Error rate must be between 0 and 1, got {self.error_rate}")
+
+        self.sigma = math.log(self.p95 / self.median) / Z_95 if self.median > 0 else 0.0
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Build a model from 'median[:p95[:error_rate]]' in seconds, e.g. '0.4:1.2:0.01'
+
+        Args:
+            spec (str): Model specification
+
+        Returns:
+            LatencyModel: The model
+        """
+        parts = [float(part) for part in spec.split(':')]
+        if not 1 <= len(parts) <= 3:
+            raise ValueError(f"Expected median[:p95[:error_rate]], got {spec!r}")
+        return cls(*parts)
+
+    def sample(self, rng, scale=1.0):
+        """
+        Draw one call's delay and outcome
+
+        Args:
+            rng (random.Random): Random source
+            scale (float): Factor applied to the delay, to compress long runs
+
+        Returns:
+            tuple: (seconds, failed)
+        """
+        seconds = self.median * math.exp(rng.gauss(0, self.sigma)) if self.median > 0 else 0.0
+        return seconds * scale, rng.random() < self.error_rate
+
+    def __repr__(self):
+        return f"LatencyModel(median={self.median}, p95={self.p95}, error_rate={self.error_rate})"
+
+# No delay and no failures, the default of every fake
+INSTANT = LatencyModel()
+
+# Typical latencies seen from africa-south1, used by the load generator
+DEFAULT_PROFILE = {
+    'firestore': LatencyModel(0.012, 0.045),
+    'storage': LatencyModel(0.04, 0.15),
+    'twilio': LatencyModel(0.18, 0.6, 0.002),
+    'twilio_media': LatencyModel(0.25, 0.9, 0.002),
+    'paystack': LatencyModel(0.35, 1.2, 0.005),
+    'cv_api': LatencyModel(2.5, 8.0, 0.02)
+}
+
+class Delay:
+    """Latency injection shared by the fakes, with a seeded random source"""
+
+    def __init__(self, models=None, scale=1.0, seed=None):
+        self.models = dict(models or {})
+        self.scale = scale
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def model(self, name):
+        """Model of a backend, INSTANT when none is configured"""
+        return self.models.get(name, INSTANT)
+
+    def wait(self, name):
+        """
+        Sleep for one call to a backend
+
+        Args:
+            name (str): Backend name, e.g. 'firestore' or 'cv_api'
+
+        Returns:
+            bool: Whether the call should fail
+        """
+        model = self.model(name)
+        if model is INSTANT:
+            return False
+
+        with self._lock:
+            seconds, failed = model.sample(self._rng, self.scale)
+        if seconds > 0:
+            time.sleep(seconds)
+        return failed
@@ -0,0 +1,152 @@
+# tests/fakes/storage.py - In-memory stand-in for the Cloud Storage bucket
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+from google.api_core.exceptions import NotFound, ServiceUnavailable
+from tests.fakes.latency import Delay
+
+# Host of the URLs returned by generate_signed_url
+SIGNED_URL_HOST = 'storage.fake.local'
+
+class FakeBlob:
+    """Object in a FakeBucket, loaded lazily like the real Blob"""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.size = None
+        self.content_type = None
+        self.time_created = None
+        self.updated = None
+
+    def _load(self, stored):
+        self.size = len(stored['data'])
+        self.content_type = stored['content_type']
+        self.time_created = stored['time_created']
+        self.updated = stored['updated']
+        return self
+
+    def upload_from_string(self, data, content_type=None, **kwargs):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.bucket._put(self.name, bytes(data), content_type or 'application/octet-stream')
+        self._load(self.bucket._objects[self.name])
+
+    def upload_from_file(self, file_obj, content_type=None, **kwargs):
+        self.upload_from_string(file_obj.read(), content_type=content_type)
+
+    def upload_from_filename(self, filename, content_type=None, **kwargs):
+        with open(filename, 'rb') as f:
+            self.upload_from_string(f.read(), content_type=content_type)
+
+    def download_as_bytes(self, **kwargs):
+        return self.bucket._get(self.name)['data']
+
+    def download_as_text(self, encoding='utf-8', **kwargs):
+        return self.download_as_bytes().decode(encoding)
+
+    def download_to_filename(self, filename, **kwargs):
+        data = self.download_as_bytes()
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+    def exists(self, **kwargs):
+        self.bucket._call()
+        return self.name in self.bucket._objects
+
+    def reload(self, **kwargs):
+        self._load(self.bucket._get(self.name))
+
+    def delete(self, **kwargs):
+        self.bucket._delete(self.name)
+
+    def generate_signed_url(self, expiration=None, method='GET', version=None, credentials=None, **kwargs):
+        if isinstance(expiration, timedelta):
+            expiration = int(expiration.total_seconds())
+        return (
+            f"https://{SIGNED_URL_HOST}/{self.bucket.name}/{quote(self.name)}"
+            f"?X-Goog-Method={method}&X-Goog-Expires={expiration or 3600}&X-Goog-Signature=fake"
+        )
+
+    @property
+    def public_url(self):
+        return f"https://{SIGNED_URL_HOST}/{self.bucket.name}/{quote(self.name)}"
+
+class FakeBucket:
+    """
+    In-memory bucket
+
+    Uploads, downloads, existence checks and deletes each pay one round trip
+    from the 'storage' latency model and fail with ServiceUnavailable at its
+    error rate. Lifecycle rules are kept but never applied.
+    """
+
+    def __init__(self, name='fake-bucket', delay=None):
+        self.name = name
+        self.lifecycle_rules = []
+        self._delay = delay or Delay()
+        self._lock = threading.Lock()
+        self._objects = {}
+
+    def _call(self):
+        if self._delay.wait('storage'):
+            raise ServiceUnavailable('Injected Storage failure')
+
+    def _put(self, name, data, content_type):
+        self._call()
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            previous = self._objects.get(name)
+            self._objects[name] = {
+                'data': data,
+                'content_type': content_type,
+                'time_created': previous['time_created'] if previous else now,
+                'updated': now
+            }
+
+    def _get(self, name):
+        self._call()
+        with self._lock:
+            stored = self._objects.get(name)
+        if stored is None:
+            raise NotFound(f"No such object: {self.name}/{name}")
+        return stored
+
+    def _delete(self, name):
+        self._call()
+        with self._lock:
+            if self._objects.pop(name, None) is None:
+                raise NotFound(f"No such object: {self.name}/{name}")
+
+    def blob(self, blob_name, **kwargs):
+        return FakeBlob(self, blob_name)
+
+    def get_blob(self, blob_name, **kwargs):
+        self._call()
+        with self._lock:
+            stored = self._objects.get(blob_name)
+        return FakeBlob(self, blob_name)._load(stored) if stored else None
+
+    def list_blobs(self, prefix=None, max_results=None, **kwargs):
+        self._call()
+        with self._lock:
+            items = sorted((name, stored) for name, stored in self._objects.items() if name.startswith(prefix or ''))
+        blobs = [FakeBlob(self, name)._load(stored) for name, stored in items]
+        return iter(blobs[:max_results] if max_results is not None else blobs)
+
+    def add_lifecycle_delete_rule(self, **conditions):
+        self.lifecycle_rules = list(self.lifecycle_rules) + [{'action': {'type': 'Delete'}, 'condition': conditions}]
+
+    def clear_lifecycle_rules(self):
+        self.lifecycle_rules = []
+
+    def reload(self, **kwargs):
+        pass
+
+    def patch(self, **kwargs):
+        pass
+
+    def total_bytes(self):
+        """Size of all stored objects, for reports"""
+        with self._lock:
+            return sum(len(stored['data']) for stored in self._objects.values())
@@ -0,0 +1,61 @@
+# tests/test_admission_service.py - Test review memory estimates and admission
+import threading
+import unittest
+from unittest.mock import patch
+from config import Config
+from services.admission_service import AdmissionController, estimate_review_memory
+from utils.memory import MB, job_memory, measure_stage
+
+class TestAdmissionService(unittest.TestCase):
+    
+    def test_estimate_grows_with_file_size_and_pages(self):
+        small = estimate_review_memory('basic', 200 * 1024, 2)
+        large = estimate_review_memory('basic', 8 * MB, 40)
+        
+        self.assertGreater(large, small)
+        self.assertGreater(estimate_review_memory('advanced', 200 * 1024, 2), small)
+        self.assertEqual(estimate_review_memory('basic'), estimate_review_memory('basic', 512 * 1024, 3))
+    
+    @patch.object(Config, 'MEMORY_BUDGET_MB', 100)
+    def test_defers_when_budget_is_reserved(self):
+        controller = AdmissionController()
+        
+        self.assertTrue(controller.acquire(60 * MB, timeout=0))
+        self.assertFalse(controller.acquire(60 * MB, timeout=0.05))
+        self.assertTrue(controller.acquire(30 * MB, timeout=0))
+        self.assertEqual(controller.reserved, 90 * MB)
+    
+    @patch.object(Config, 'MEMORY_BUDGET_MB', 100)
+    def test_oversized_review_runs_alone(self):
+        controller = AdmissionController()
+        
+        self.assertTrue(controller.acquire(300 * MB, timeout=0))
+        controller.release(300 * MB)
+        self.assertEqual((controller.reserved, controller.running), (0, 0))
+    
+    @patch.object(Config, 'MEMORY_BUDGET_MB', 100)
+    def test_waiting_review_is_admitted_on_release(self):
+        controller = AdmissionController()
+        controller.acquire(80 * MB, timeout=0)
+        
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(controller.acquire(50 * MB, timeout=5)))
+        waiter.start()
+        controller.release(80 * MB)
+        waiter.join()
+        
+        self.assertEqual(admitted, [True])
+        self.assertEqual(controller.reserved, 50 * MB)
+    
+    def test_stage_memory_is_recorded_on_the_job(self):
+        with job_memory('basic') as job:
+            with measure_stage('extract'):
+                buffer = bytearray(32 * MB)
+            del buffer
+        
+        summary = job.summary()
+        self.assertIn('extract', summary['stages'])
+        self.assertGreaterEqual(summary['peak_rss_mb'], round(job.rss_start / MB, 1))
+
+if __name__ == '__main__':
+    unittest.main()
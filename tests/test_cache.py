@@ -0,0 +1,44 @@
+# tests/test_cache.py - Test the TTL cache
+import time
+import threading
+import unittest
+from utils.cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+    
+    def test_concurrent_misses_load_once(self):
+        cache = TTLCache(ttl=60)
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'user_count': 3}
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('dashboard', loader))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'user_count': 3}] * 5)
+    
+    def test_expiry_and_errors(self):
+        cache = TTLCache(ttl=0.05)
+        self.assertEqual(cache.get_or_load('k', lambda: 1), 1)
+        self.assertEqual(cache.get_or_load('k', lambda: 2), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get_or_load('k', lambda: 3), 3)
+        
+        def failing():
+            raise ValueError('backend down')
+        
+        cache.invalidate()
+        with self.assertRaises(ValueError):
+            cache.get_or_load('k', failing)
+        self.assertEqual(cache.get_or_load('k', lambda: 4), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,19 @@
 # tests/test_cv_service.py - Test CV analysis services
 import os
+import time
 import unittest
 import tempfile
+import threading
 from unittest.mock import patch, MagicMock
 from services.cv_service import (
     extract_text_from_cv,
     analyze_cv_structure,
     identify_sections,
     analyze_cv_basic,
-    analyze_cv_advanced
+    analyze_cv_advanced,
+    progressive_basic_review
 )
+from utils.text_utils import dedupe_insights
 
 class TestCVService(unittest.TestCase):
     
@@ -130,5 +134,79 @@ class TestCVService(unittest.TestCase):
         self.assertIn('section_scores', result)
         self.assertIn('overall_structure', result['section_scores'])
 
+    def test_dedupe_insights(self):
+        sent = ["Proofread carefully for grammar and spelling errors."]
+        candidates = [
+            "SKILLS: Proofread carefully for grammar and spelling errors",
+            "Add a link to your portfolio."
+        ]
+        self.assertEqual(dedupe_insights(candidates, sent), ["Add a link to your portfolio."])
+    
+    @patch('services.cv_service.Config')
+    @patch('services.cv_service.request_cv_analysis')
+    def test_progressive_basic_review(self, mock_request, mock_config):
+        mock_config.CV_ANALYSIS_API_URL = 'http://cv-api.test'
+        mock_config.BASIC_REVIEW_API_DEADLINE = 5
+        mock_request.return_value = {
+            'success': True,
+            'insights': ["Add a link to your portfolio.", "Proofread carefully for grammar and spelling errors."],
+            'api_provider': 'CV Analyzer API'
+        }
+        delivered = []
+        
+        result = progressive_basic_review(self.cv_data, delivered.extend)
+        
+        self.assertTrue(result['success'])
+        self.assertGreaterEqual(len(delivered), 5)
+        self.assertEqual(result['followup_insights'], ["Add a link to your portfolio."])
+        self.assertEqual(result['insights'], delivered + result['followup_insights'])
+    
+    @patch('services.cv_service.Config')
+    @patch('services.cv_service.request_cv_analysis')
+    def test_progressive_basic_review_stops_waiting_at_deadline(self, mock_request, mock_config):
+        mock_config.CV_ANALYSIS_API_URL = 'http://cv-api.test'
+        mock_config.BASIC_REVIEW_API_DEADLINE = 0.2
+        release = threading.Event()
+        self.addCleanup(release.set)
+        mock_request.side_effect = lambda cv_data, review_type, timeout: release.wait(5) and {'success': False}
+        cv_data = dict(self.cv_data, file_path=self.temp_file.name)
+        
+        started = time.monotonic()
+        result = progressive_basic_review(cv_data, [].extend)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(result['followup_insights'], [])
+        
+        # The worker got its own copy of the file and the deadline as its timeout
+        api_cv_data, review_type, timeout = mock_request.call_args[0]
+        self.assertEqual(api_cv_data['file_bytes'], self.sample_cv_text.encode('utf-8'))
+        self.assertEqual(timeout, 0.2)
+        
+        # Without internal insights the API is not waited on past the deadline either
+        with patch('services.cv_service.analyze_cv_basic', return_value={'success': False}):
+            started = time.monotonic()
+            result = progressive_basic_review(cv_data, [].extend)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertFalse(result['success'])
+    
+    @patch('services.cv_service.Config')
+    @patch('services.cv_service.request_cv_analysis')
+    def test_progressive_basic_review_counts_only_shown_insights(self, mock_request, mock_config):
+        mock_config.CV_ANALYSIS_API_URL = 'http://cv-api.test'
+        mock_config.BASIC_REVIEW_API_DEADLINE = 5
+        internal = [
+            "Add a professional summary.", "Quantify your achievements.", "Use consistent date formats.",
+            "List your certifications.", "Shorten long paragraphs.", "Put skills near the top.",
+            "Include a LinkedIn profile link.", "Remove outdated hobbies."
+        ]
+        mock_request.return_value = {'success': True, 'insights': [internal[6]], 'api_provider': 'CV Analyzer API'}
+        delivered = []
+        
+        with patch('services.cv_service.analyze_cv_basic', return_value={'success': True, 'insights': internal}):
+            result = progressive_basic_review(self.cv_data, delivered.extend)
+        
+        # The seventh insight was never shown, so the API may still deliver it
+        self.assertEqual(delivered, internal[:6])
+        self.assertEqual(result['followup_insights'], [internal[6]])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
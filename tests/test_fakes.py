@@ -0,0 +1,97 @@
+# tests/test_fakes.py - Test the in-process fake backends used by the load generator
+import random
+import unittest
+from datetime import datetime, timezone
+from firebase_admin import firestore
+from tests.fakes import install, LatencyModel
+from tests.fakes.firestore import FakeFirestoreClient, transactional
+
+class TestFakeFirestore(unittest.TestCase):
+
+    def setUp(self):
+        self.db = FakeFirestoreClient()
+        reviews = self.db.collection('reviews')
+        for index, review_type in enumerate(['basic', 'advanced', 'basic', 'basic']):
+            reviews.document(f"r{index}").set({
+                'review_type': review_type,
+                'score': index * 10,
+                'timestamp': datetime(2025, 1, 1 + index)
+            })
+
+    def test_query_filters_orders_and_pages(self):
+        query = self.db.collection('reviews').where('review_type', '==', 'basic').order_by('timestamp', direction=firestore.Query.DESCENDING)
+
+        first_page = query.limit(2).get()
+        second_page = query.start_after(first_page[-1]).limit(2).get()
+
+        self.assertEqual([doc.id for doc in first_page], ['r3', 'r2'])
+        self.assertEqual([doc.id for doc in second_page], ['r0'])
+        self.assertEqual(first_page[0].get('timestamp').tzinfo, timezone.utc)
+        self.assertEqual(query.count(alias='count').get()[0][0].value, 3)
+        self.assertEqual(self.db.collection('reviews').sum('score', alias='sum').get()[0][0].value, 60)
+
+    def test_transforms_and_batch_preconditions(self):
+        counter = self.db.collection('aggregates').document('reviews')
+        counter.set({'count': firestore.Increment(2), 'shards': {'a': 1}}, merge=True)
+        counter.set({'count': firestore.Increment(1), 'shards': {'b': 1}}, merge=True)
+        counter.update({'shards.a': firestore.DELETE_FIELD})
+
+        self.assertEqual(counter.get().to_dict(), {'count': 3, 'shards': {'b': 1}})
+
+        # A batch with a failing write leaves everything unchanged
+        batch = self.db.batch()
+        batch.set(counter, {'count': 0})
+        batch.update(self.db.collection('aggregates').document('missing'), {'count': 1})
+        with self.assertRaises(Exception):
+            batch.commit()
+        self.assertEqual(counter.get().get('count'), 3)
+
+    def test_transactional_reads_and_writes_together(self):
+        ref = self.db.collection('rollups').document('h1')
+
+        @transactional
+        def add(transaction, amount):
+            snapshot = ref.get(transaction=transaction)
+            total = snapshot.get('total') if snapshot.exists else 0
+            transaction.set(ref, {'total': total + amount})
+
+        add(self.db.transaction(), 5)
+        add(self.db.transaction(), 7)
+
+        self.assertEqual(self.db.peek('rollups', 'h1'), {'total': 12})
+
+class TestFakeServices(unittest.TestCase):
+
+    def test_latency_model_matches_its_percentiles(self):
+        model = LatencyModel.parse('0.2:0.6:0.1')
+        rng = random.Random(7)
+        samples = sorted(model.sample(rng) for _ in range(20000))
+        delays = [seconds for seconds, _ in samples]
+
+        self.assertAlmostEqual(delays[len(delays) // 2], 0.2, delta=0.01)
+        self.assertAlmostEqual(delays[int(len(delays) * 0.95)], 0.6, delta=0.04)
+        self.assertAlmostEqual(sum(failed for _, failed in samples) / len(samples), 0.1, delta=0.01)
+
+    def test_app_services_talk_to_the_fakes(self):
+        from services.twilio_service import send_whatsapp_message
+        from services.paystack_service import create_payment_session, verify_payment
+        from services.firebase_service import upload_bytes_to_storage, download_bytes_from_storage
+
+        with install(seed=3) as backends:
+            self.assertTrue(send_whatsapp_message('whatsapp:+2348000000001', 'Hello')['success'])
+            self.assertEqual(backends.twilio.sent_to('whatsapp:+2348000000001'), ['Hello'])
+
+            session = create_payment_session(5000, 'NGN', 'Advanced CV Review', 'a@example.com', {'phone_number': '+2348000000001'}, 'https://x/s', 'https://x/c')
+            self.assertTrue(session['success'])
+            self.assertFalse(verify_payment(session['payment_reference'])['success'])
+            backends.paystack.pay(backends.paystack.find('whatsapp:+2348000000001'))
+            self.assertEqual(verify_payment(session['payment_reference'])['amount'], 5000)
+
+            upload_bytes_to_storage(b'%PDF-1.4', 'reports/r1.pdf', 'application/pdf')
+            self.assertEqual(download_bytes_from_storage('reports/r1.pdf'), b'%PDF-1.4')
+
+        # Nothing stays patched after the run
+        self.assertIsNot(firestore.transactional, transactional)
+
+if __name__ == '__main__':
+    unittest.main()
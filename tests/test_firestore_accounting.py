@@ -0,0 +1,67 @@
+# tests/test_firestore_accounting.py - Test counting of Firestore operations
+import unittest
+from google.cloud.firestore_v1.types import (
+    BatchGetDocumentsResponse, CommitResponse, Document, RunQueryResponse, Write
+)
+from utils.firestore_accounting import AccountedFirestoreApi, accounting_scope
+
+class FakeFirestoreApi:
+    """Stand-in for the GAPIC client returning canned responses"""
+    
+    _transport = 'grpc'
+    
+    def run_query(self, request=None, metadata=None):
+        return iter([
+            RunQueryResponse(document=Document(name='projects/p/databases/(default)/documents/reviews/r1')),
+            RunQueryResponse(document=Document(name='projects/p/databases/(default)/documents/reviews/r2')),
+            RunQueryResponse()
+        ])
+    
+    def batch_get_documents(self, request=None, metadata=None):
+        return iter([
+            BatchGetDocumentsResponse(found=Document(name='projects/p/databases/(default)/documents/sessions/a')),
+            BatchGetDocumentsResponse(missing='projects/p/databases/(default)/documents/sessions/b')
+        ])
+    
+    def commit(self, request=None, metadata=None):
+        return CommitResponse()
+
+# Application code is recognized by its module name
+MODEL_GLOBALS = {'__name__': 'models.review'}
+exec("def load_reviews(api):\n    return list(api.run_query(request={}))\n", MODEL_GLOBALS)
+
+class TestFirestoreAccounting(unittest.TestCase):
+    
+    def test_operations_are_counted_per_scope_and_caller(self):
+        api = AccountedFirestoreApi(FakeFirestoreApi())
+        
+        with accounting_scope('POST /webhook/twilio') as scope:
+            MODEL_GLOBALS['load_reviews'](api)
+            list(api.batch_get_documents(request={}))
+            api.commit(request={'writes': [
+                Write(update=Document(name='projects/p/databases/(default)/documents/sessions/a')),
+                Write(delete='projects/p/databases/(default)/documents/reviews/r1')
+            ]})
+        
+        summary = scope.summary()
+        self.assertEqual((summary['reads'], summary['writes'], summary['deletes']), (4, 1, 1))
+        self.assertGreater(summary['bytes'], 0)
+        
+        callers = {item['caller']: item for item in summary['callers']}
+        self.assertEqual(callers['models.review.load_reviews']['reads'], 2)
+        self.assertEqual(callers['other']['reads'], 2)
+        
+        # Everything else is passed through to the wrapped client
+        self.assertEqual(api._transport, 'grpc')
+    
+    def test_empty_query_is_billed_one_read(self):
+        api = AccountedFirestoreApi(FakeFirestoreApi())
+        api._api.run_query = lambda **kwargs: iter([RunQueryResponse()])
+        
+        with accounting_scope('retention_job') as scope:
+            list(api.run_query(request={}))
+        
+        self.assertEqual(scope.summary()['reads'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# tests/test_latency.py - Test latency histograms and the latency report
+import unittest
+from unittest.mock import patch
+from services import latency_service
+from utils.latency import new_histogram, new_summary, observe, quantile, share_within, add_job, merge_summary, job_timing
+
+class TestLatency(unittest.TestCase):
+    
+    def tearDown(self):
+        # Leave no jobs for the flush at exit
+        with patch.object(latency_service.LatencyRollup, 'merge'):
+            latency_service.flush()
+    
+    def test_quantiles_interpolate_within_buckets(self):
+        histogram = new_histogram()
+        for seconds in (1.5, 1.5, 1.5, 1.5, 40):
+            observe(histogram, seconds)
+        
+        self.assertTrue(1 <= quantile(histogram, 0.5) <= 2)
+        self.assertTrue(30 <= quantile(histogram, 0.99) <= 45)
+        self.assertAlmostEqual(share_within(histogram, 30), 0.8)
+        self.assertIsNone(quantile(new_histogram(), 0.5))
+    
+    def test_merge_keeps_slowest_jobs_once(self):
+        first, second = new_summary(), new_summary()
+        add_job(first, 10, {'extract': 1}, {'seconds': 10, 'trace_id': 'a', 'finished_at': 1}, keep_slowest=2)
+        add_job(second, 30, {'extract': 2}, {'seconds': 30, 'trace_id': 'b', 'finished_at': 2}, keep_slowest=2)
+        add_job(second, 5, {'analysis': 4}, {'seconds': 5, 'trace_id': 'c', 'finished_at': 3}, keep_slowest=2)
+        
+        merged = merge_summary(merge_summary(new_summary(), first, 2), second, 2)
+        merge_summary(merged, first, 2)
+        
+        self.assertEqual(merged['total']['count'], 4)
+        self.assertEqual(merged['stages']['extract']['count'], 3)
+        self.assertEqual([entry['trace_id'] for entry in merged['slowest']], ['b', 'a'])
+    
+    @patch.object(latency_service, 'flush')
+    @patch.object(latency_service.LatencyRollup, 'get_window', return_value={'basic': [], 'advanced': []})
+    def test_report_includes_unflushed_jobs(self, get_window, flush):
+        with job_timing('advanced') as timing:
+            timing.add_stage('report', 2.0)
+            timing.started -= 12
+        latency_service.record_job(timing, 'success', review_id='r1', trace_id='t1', queued_seconds=60)
+        
+        report = latency_service.get_latency_report(hours=1, slowest=5)['advanced']
+        self.assertGreaterEqual(report['count'], 1)
+        self.assertIn('t1', [job['trace_id'] for job in report['slowest']])
+        self.assertEqual(report['stages'][0]['name'], 'deferred')
+    
+    @patch.object(latency_service.LatencyRollup, 'merge')
+    def test_last_running_job_flushes(self, merge):
+        latency_service.job_started()
+        latency_service.job_started()
+        with job_timing('basic') as timing:
+            timing.add_stage('analysis', 1.0)
+        latency_service.record_job(timing, 'success', trace_id='t2')
+        
+        # Another review is still running, so the periodic flush stays in charge
+        self.assertEqual(latency_service.job_finished(), 0)
+        merge.assert_not_called()
+        
+        self.assertEqual(latency_service.job_finished(), 1)
+        merge.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
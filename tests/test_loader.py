@@ -0,0 +1,38 @@
+# tests/test_loader.py - Test batched document loading
+import unittest
+from unittest.mock import patch, MagicMock
+from utils.loader import DocumentLoader
+
+def fake_snapshot(collection, doc_id, data):
+    snapshot = MagicMock()
+    snapshot.id = doc_id
+    snapshot.exists = data is not None
+    snapshot.reference.parent.id = collection
+    snapshot.to_dict.return_value = dict(data or {})
+    return snapshot
+
+class TestDocumentLoader(unittest.TestCase):
+    
+    @patch('utils.loader.firestore')
+    def test_batches_and_never_refetches(self, mock_firestore):
+        stored = {'r1': {'timestamp': '2026-01-01'}, 'r2': {'timestamp': '2026-01-02'}}
+        db = MagicMock()
+        db.collection.side_effect = lambda name: MagicMock(document=lambda doc_id: (name, doc_id))
+        db.get_all.side_effect = lambda refs: [fake_snapshot(c, d, stored.get(d)) for c, d in refs]
+        mock_firestore.client.return_value = db
+        
+        loader = DocumentLoader()
+        loader.prime('reviews', 'r0', {'timestamp': '2025-12-31'})
+        
+        reviews = loader.load_many('reviews', ['r0', 'r1', 'r2', 'missing'])
+        self.assertEqual([r and r['id'] for r in reviews], ['r0', 'r1', 'r2', None])
+        self.assertEqual(db.get_all.call_count, 1)
+        self.assertEqual(len(db.get_all.call_args[0][0]), 3)
+        
+        # Identity map: same objects, no further reads
+        self.assertIs(loader.load('reviews', 'r1'), reviews[1])
+        self.assertIsNone(loader.load('reviews', 'missing'))
+        self.assertEqual(db.get_all.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
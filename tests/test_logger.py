@@ -0,0 +1,55 @@
+# tests/test_logger.py - Test structured logging, redaction and sampling
+import io
+import json
+import logging
+import unittest
+from unittest.mock import patch
+from utils.logger import JsonFormatter, SamplingFilter, lazy, parse_sample_rates, redact_phones
+from utils.tracing import start_trace
+
+class TestLogger(unittest.TestCase):
+    
+    def setUp(self):
+        self.stream = io.StringIO()
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(JsonFormatter())
+        self.logger = logging.getLogger('test_logger')
+        self.logger.handlers = [handler]
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+    
+    def test_phone_numbers_are_redacted(self):
+        self.assertEqual(redact_phones('Sent to whatsapp:+2348012345678'), 'Sent to whatsapp:+234****5678')
+        self.assertEqual(redact_phones('cv-uploads/+2348012345678/cv_1700000000.pdf'), 'cv-uploads/+234****5678/cv_1700000000.pdf')
+        self.assertEqual(redact_phones('review 2026-10-19 took 1500ms'), 'review 2026-10-19 took 1500ms')
+    
+    def test_json_line_has_message_and_extra_fields(self):
+        self.logger.info("Sent to %s", 'whatsapp:+2348012345678', extra={'review_type': 'basic'})
+        
+        entry = json.loads(self.stream.getvalue())
+        self.assertEqual(entry['severity'], 'INFO')
+        self.assertEqual(entry['message'], 'Sent to whatsapp:+234****5678')
+        self.assertEqual(entry['review_type'], 'basic')
+    
+    def test_lazy_arguments_of_disabled_lines_are_not_evaluated(self):
+        calls = []
+        self.logger.debug("Response: %s", lazy(lambda: calls.append(1)))
+        
+        self.assertEqual(calls, [])
+        self.assertEqual(self.stream.getvalue(), '')
+    
+    def test_debug_sampling_follows_the_trace(self):
+        sampler = SamplingFilter(parse_sample_rates('cv_service=0.5,bad=x'))
+        self.assertEqual(sampler.rates, {'cv_service': 0.5})
+        
+        record = logging.LogRecord('sherlock_bot', logging.DEBUG, 'cv_service.py', 1, 'line', None, None)
+        with start_trace('test'):
+            decisions = {sampler.filter(record) for _ in range(20)}
+        self.assertEqual(len(decisions), 1)
+        
+        record.levelno = logging.WARNING
+        with patch('utils.logger.random.random', return_value=0.99):
+            self.assertTrue(sampler.filter(record))
+
+if __name__ == '__main__':
+    unittest.main()
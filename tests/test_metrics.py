@@ -0,0 +1,49 @@
+# tests/test_metrics.py - Test the metrics registry and text exposition
+import unittest
+from utils.metrics import Registry
+
+class TestMetrics(unittest.TestCase):
+    
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram('stage_seconds', 'Stage time', ['stage'], buckets=(0.1, 1))
+        histogram.observe(0.05, stage='extract')
+        histogram.observe(0.1, stage='extract')
+        histogram.observe(3, stage='extract')
+        
+        snapshot = histogram.snapshot(stage='extract')
+        self.assertEqual([count for _, count in snapshot['buckets']], [2, 2, 3])
+        self.assertEqual(snapshot['count'], 3)
+        
+        text = registry.render()
+        self.assertIn('# TYPE stage_seconds histogram', text)
+        self.assertIn('stage_seconds_bucket{stage="extract",le="0.1"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="extract",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{stage="extract"} 3', text)
+    
+    def test_counter_gauge_and_timer(self):
+        registry = Registry()
+        counter = registry.counter('outcomes_total', 'Outcomes', ['outcome'])
+        gauge = registry.gauge('in_flight', 'In flight', ['review_type'])
+        histogram = registry.histogram('seconds', 'Time')
+        
+        counter.inc(outcome='success')
+        counter.inc(2, outcome='success')
+        
+        with gauge.track(review_type='basic'):
+            self.assertIn('in_flight{review_type="basic"} 1', registry.render())
+        
+        with self.assertRaises(ValueError):
+            with histogram.time():
+                raise ValueError('failed stage')
+        
+        text = registry.render()
+        self.assertIn('outcomes_total{outcome="success"} 3', text)
+        self.assertIn('in_flight{review_type="basic"} 0', text)
+        self.assertIn('seconds_count 1', text)
+        
+        # Registering the same name returns the existing metric
+        self.assertIs(registry.counter('outcomes_total', 'Outcomes', ['outcome']), counter)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+# tests/test_payment_model.py - Test recording payments from the Paystack webhook
+import unittest
+from datetime import datetime
+from models.payment import Payment
+from tests.fakes import install
+
+class TestPaymentModel(unittest.TestCase):
+
+    def setUp(self):
+        self.backends = install()
+        self.addCleanup(self.backends.stop)
+
+    def test_record_stores_payment_once(self):
+        payment = {'reference': 'ref_1', 'user_id': 'whatsapp:+2348000000001', 'amount': 5000, 'status': 'success'}
+
+        self.assertTrue(Payment.record(dict(payment)))
+        self.assertFalse(Payment.record(dict(payment)))
+
+        stored = self.backends.firestore.peek('payments', 'ref_1')
+        self.assertEqual(stored['amount'], 5000)
+        self.assertIsInstance(stored['timestamp'], datetime)
+        self.assertEqual(Payment.get_count(), 1)
+        self.assertEqual(Payment.get_total_amount(), 5000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# tests/test_profiling_service.py - Test stack sampling for profiles
+import time
+import threading
+import unittest
+from unittest.mock import patch
+from services import profiling_service
+from services.profiling_service import StackSampler, profiled
+
+def busy_extract(seconds):
+    ends = time.monotonic() + seconds
+    while time.monotonic() < ends:
+        sum(range(1000))
+
+class TestProfilingService(unittest.TestCase):
+    
+    def test_sampler_collects_collapsed_stacks(self):
+        sampler = StackSampler(threading.get_ident(), 0.002, max_seconds=5)
+        sampler.start()
+        busy_extract(0.1)
+        sampler.stop()
+        
+        self.assertGreater(sampler.samples, 0)
+        self.assertFalse(sampler.truncated)
+        
+        line = sampler.collapsed().splitlines()[0]
+        stack, count = line.rsplit(' ', 1)
+        self.assertTrue(stack.endswith('test_profiling_service:busy_extract'))
+        self.assertGreater(int(count), 0)
+    
+    def test_sampler_stops_at_hard_cap(self):
+        sampler = StackSampler(threading.get_ident(), 0.002, max_seconds=0.05)
+        sampler.start()
+        busy_extract(0.15)
+        sampler.stop()
+        
+        self.assertTrue(sampler.truncated)
+    
+    def test_disarmed_profiler_does_not_sample(self):
+        with patch.object(profiling_service, 'get_state', return_value={}), \
+                patch.object(profiling_service, 'StackSampler') as sampler:
+            with profiled('webhook'):
+                pass
+        
+        sampler.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
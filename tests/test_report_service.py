@@ -0,0 +1,44 @@
+# tests/test_report_service.py - Test PDF report rendering
+import io
+import unittest
+import PyPDF2
+from services.report_service import render_report, RENDERERS
+from utils.pdf_writer import string_width, wrap_text
+
+class TestReportService(unittest.TestCase):
+    
+    def setUp(self):
+        self.review_result = {
+            'improvement_score': 78,
+            'insights': [
+                "SUMMARY: Add a professional summary (two lines) at the top of your CV.",
+                "Quantify achievements with numbers such as ₦ amounts or percentages. " * 5
+            ]
+        }
+    
+    def test_renderers_produce_readable_pdf(self):
+        for backend in RENDERERS:
+            report = render_report(self.review_result, backend)
+            self.assertEqual(report['renderer'], backend)
+            self.assertTrue(report['content'].startswith(b'%PDF'))
+            self.assertEqual(report['size_bytes'], len(report['content']))
+            
+            text = PyPDF2.PdfReader(io.BytesIO(report['content'])).pages[0].extract_text()
+            self.assertIn('CV Improvement Score: 78/100', text)
+            self.assertIn('professional summary (two lines)', text)
+    
+    def test_native_renderer_paginates(self):
+        result = {'insights': [f"Insight number {i}" for i in range(120)]}
+        report = render_report(result, 'native')
+        self.assertGreater(len(PyPDF2.PdfReader(io.BytesIO(report['content'])).pages), 1)
+    
+    def test_wrap_text(self):
+        text = "Use action verbs at the beginning of bullet points to create a stronger impression."
+        lines = wrap_text(text, 'Helvetica', 10, 150)
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(' '.join(lines), text)
+        for line in lines:
+            self.assertLessEqual(string_width(line, 'Helvetica', 10), 150)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# tests/test_repositories.py - Test that every storage backend keeps the same contract
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from repositories import create_repositories
+from repositories import sqlite as sqlite_backend
+from tests.fakes import install, LatencyModel
+
+PHONE = 'whatsapp:+2348000000001'
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+class RepositoryContract:
+    """Tests run against each backend; subclasses build self.repos in setUp"""
+
+    def test_session_lifecycle(self):
+        sessions = self.repos.sessions
+        self.assertIsNone(sessions.get(PHONE))
+
+        sessions.create(PHONE, {'phone_number': PHONE, 'created_at': NOW, 'last_activity': NOW, 'state': 'welcome'})
+        sessions.touch(PHONE, NOW + timedelta(minutes=5))
+        sessions.save(PHONE, {'state': 'awaiting_email'}, {'email': 'ada@example.com'})
+
+        self.assertEqual(sessions.get(PHONE, ['state', 'last_activity']), {
+            'state': 'awaiting_email',
+            'last_activity': NOW + timedelta(minutes=5)
+        })
+        self.assertEqual(sessions.get_profile(PHONE, ['email']), {'email': 'ada@example.com'})
+        self.assertEqual(sessions.get_profile(PHONE)['created_at'], NOW)
+
+        # Touching a missing session does not create one
+        sessions.touch('whatsapp:+2348000000009', NOW)
+        self.assertIsNone(sessions.get('whatsapp:+2348000000009'))
+
+    def test_deferred_sessions_oldest_first(self):
+        sessions = self.repos.sessions
+        for index, deferred_at in enumerate([NOW - timedelta(minutes=1), NOW - timedelta(minutes=9), None, NOW + timedelta(minutes=1)]):
+            phone = f"whatsapp:+23480000000{index}"
+            sessions.create(phone, {'phone_number': phone, 'created_at': NOW, 'state': 'processing'})
+            sessions.save(phone, {'deferred_at': deferred_at}, {})
+
+        deferred = sessions.get_deferred(NOW, 10)
+        self.assertEqual([phone for phone, _ in deferred], ['whatsapp:+234800000001', 'whatsapp:+234800000000'])
+        self.assertEqual(sessions.get_deferred(NOW, 1)[0][1]['deferred_at'], NOW - timedelta(minutes=9))
+
+    def test_reviews_update_profile(self):
+        self.repos.sessions.create(PHONE, {'phone_number': PHONE, 'created_at': NOW, 'state': 'welcome'})
+        first = self.repos.reviews.add(PHONE, {'user_id': PHONE, 'review_type': 'basic', 'timestamp': NOW, 'created_at': NOW})
+        second = self.repos.reviews.add(PHONE, {'user_id': PHONE, 'review_type': 'advanced', 'timestamp': NOW + timedelta(hours=1), 'created_at': NOW})
+
+        self.assertEqual(self.repos.reviews.get(first)['review_type'], 'basic')
+        self.assertIsNone(self.repos.reviews.get('missing'))
+        self.assertEqual([review['id'] for review in self.repos.reviews.list_by_user(PHONE)], [second, first])
+
+        profile = self.repos.sessions.get_profile(PHONE)
+        self.assertEqual(profile['review_count'], 2)
+        self.assertEqual(profile['recent_review_ids'], [second, first])
+        self.assertEqual(profile['last_review_type'], 'advanced')
+
+    def test_payments_and_reports_are_recorded_once(self):
+        payment = {'reference': 'ref_1', 'user_id': PHONE, 'amount': 5000, 'timestamp': NOW}
+        self.assertTrue(self.repos.payments.record(dict(payment)))
+        self.assertFalse(self.repos.payments.record(dict(payment, amount=1)))
+        self.assertEqual([(p['id'], p['amount']) for p in self.repos.payments.list_by_user(PHONE)], [('ref_1', 5000)])
+
+        reports = self.repos.reports
+        self.assertFalse(reports.exists('abc'))
+        self.assertFalse(reports.mark_used('abc', NOW.isoformat()))
+        reports.add('abc', {'storage_path': 'review-reports/shared/abc.pdf', 'use_count': 1})
+        self.assertTrue(reports.exists('abc'))
+        self.assertTrue(reports.mark_used('abc', NOW.isoformat()))
+
+    def test_blob_round_trip(self):
+        blobs = self.repos.blobs
+        blobs.upload_bytes(b'%PDF-1.4 report', 'reports/a/r1.pdf', 'application/pdf')
+
+        local_path = os.path.join(self.tmpdir, 'cv.pdf')
+        blobs.download_to_file('reports/a/r1.pdf', local_path)
+        with open(local_path, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4 report')
+
+        blobs.upload_file(local_path, 'cv-uploads/a/cv.pdf', 'application/pdf')
+        self.assertEqual(blobs.download_bytes('cv-uploads/a/cv.pdf'), b'%PDF-1.4 report')
+        self.assertTrue(blobs.signed_url('cv-uploads/a/cv.pdf', timedelta(days=1)))
+
+        blobs.delete('cv-uploads/a/cv.pdf')
+        self.assertFalse(blobs.exists('cv-uploads/a/cv.pdf'))
+
+class TestMemoryRepositories(RepositoryContract, unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.repos = create_repositories('memory')
+
+class TestSQLiteRepositories(RepositoryContract, unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.repos = sqlite_backend.create(os.path.join(self.tmpdir, 'sherlock.db'), os.path.join(self.tmpdir, 'blobs'), '')
+
+    def test_blob_paths_stay_inside_the_folder(self):
+        with self.assertRaises(ValueError):
+            self.repos.blobs.upload_bytes(b'x', '../outside.txt')
+
+class TestFirestoreRepositories(RepositoryContract, unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.backends = install()
+        self.addCleanup(self.backends.stop)
+        self.repos = create_repositories('firebase')
+
+    def test_concurrent_first_messages_count_the_user_once(self):
+        # Slow reads let both writers see no profile before either commits
+        backends = install({'firestore': LatencyModel(0.05, 0.05)})
+        self.addCleanup(backends.stop)
+        session = {'phone_number': PHONE, 'created_at': NOW, 'last_activity': NOW, 'state': 'welcome'}
+
+        threads = [threading.Thread(target=self.repos.sessions.create, args=(PHONE, dict(session))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        shards = backends.firestore.documents('aggregates/users/shards')
+        self.assertEqual(sum(shard.get('count', 0) for shard in shards.values()), 1)
+        self.assertEqual(backends.firestore.peek('sessions', PHONE)['state'], 'welcome')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# tests/test_retention_service.py - Test the archive encoding and retention cutoffs
+import gzip
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+from models.aggregate import Aggregate
+from services.firebase_service import get_user_session
+from services.retention_service import encode_archive, archive_collection, _cutoff
+from tests.fakes import install
+from utils.timestamps import to_datetime, utc_now
+
+class TestRetentionService(unittest.TestCase):
+    
+    def test_encode_archive_writes_jsonl(self):
+        when = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        records = [
+            {'id': 'r1', 'timestamp': when, 'review_type': 'basic'},
+            {'id': 'r2', 'timestamp': '2025-01-02T03:04:05', 'improvement_score': 7}
+        ]
+        
+        lines = gzip.decompress(encode_archive(records)).decode('utf-8').splitlines()
+        
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['timestamp'], '2025-01-02T03:04:05+00:00')
+        self.assertEqual(json.loads(lines[1])['improvement_score'], 7)
+    
+    def test_cutoff_matches_both_formats(self):
+        native, legacy = _cutoff(30)
+        
+        # The legacy cutoff is the same instant written the way old documents were
+        self.assertEqual(to_datetime(legacy), native)
+        self.assertNotIn('+', legacy)
+    
+    def test_returning_user_is_counted_once_after_session_archive(self):
+        backends = install()
+        self.addCleanup(backends.stop)
+        phone = 'whatsapp:+2348012345678'
+        get_user_session(phone)
+        
+        # Age the session past the retention window and archive it
+        old = utc_now() - timedelta(days=400)
+        backends.firestore.collection('sessions').document(phone).update({'last_activity': old})
+        self.assertEqual(archive_collection('sessions', 180, 'run1')['archived'], 1)
+        
+        # The user comes back, then the aggregate is re-seeded
+        get_user_session(phone)
+        backends.firestore.collection('aggregates').document('users').set({'seeded': False}, merge=True)
+        
+        self.assertEqual(Aggregate.get_count('users'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
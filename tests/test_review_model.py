@@ -0,0 +1,32 @@
+# tests/test_review_model.py - Test saving reviews
+import unittest
+from datetime import datetime
+from models.aggregate import Aggregate
+from models.review import Review
+from models.rollup import Rollup
+from models.search_index import SearchIndex
+from tests.fakes import install
+
+class TestReviewModel(unittest.TestCase):
+
+    def setUp(self):
+        self.backends = install()
+        self.addCleanup(self.backends.stop)
+        self.addCleanup(SearchIndex._written.clear)
+
+    def test_save_without_timestamp_writes_everything(self):
+        review_id = Review.save({'user_id': 'whatsapp:+2348000000001', 'review_type': 'basic', 'cv_file_name': 'cv_1700000000_ab12cd34.pdf'})
+        self.assertIsNotNone(review_id)
+
+        stored = self.backends.firestore.peek('reviews', review_id)
+        self.assertIsInstance(stored['timestamp'], datetime)
+        self.assertEqual(Aggregate.get_count('reviews'), 1)
+        self.assertEqual(Aggregate.get_count('reviews_basic'), 1)
+
+        when = stored['timestamp']
+        series = Rollup.get_series(['reviews_basic'], when, when, 'day')['reviews_basic']
+        self.assertEqual(series, {when.strftime('%Y-%m-%d'): {'count': 1, 'sum': 0.0}})
+        self.assertEqual(SearchIndex.find('reviews', 'ab12cd34'), [review_id])
+
+if __name__ == '__main__':
+    unittest.main()
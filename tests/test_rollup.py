@@ -0,0 +1,76 @@
+# tests/test_rollup.py - Test sharded rollup buckets
+import unittest
+from datetime import datetime, timedelta, timezone
+from firebase_admin import firestore
+from models.rollup import Rollup
+from services.firebase_service import get_user_session
+from services.retention_service import archive_collection
+from tests.fakes import install
+from utils.timestamps import utc_now
+
+class TestRollup(unittest.TestCase):
+
+    def setUp(self):
+        self.backends = install()
+        self.addCleanup(self.backends.stop)
+        self.db = firestore.client()
+
+    def record(self, metric, when, amount=0):
+        batch = self.db.batch()
+        Rollup.record(batch, metric, when, amount=amount)
+        batch.commit()
+
+    def test_events_spread_over_shards_and_add_up(self):
+        when = datetime(2026, 3, 5, 10, 30, tzinfo=timezone.utc)
+        for _ in range(30):
+            self.record('payments', when, amount=100)
+        self.record('payments', datetime(2026, 3, 7, 9, 0, tzinfo=timezone.utc), amount=50)
+        self.record('reviews_basic', when)
+
+        shards = [doc_id for doc_id in self.backends.firestore.documents('rollups') if doc_id.startswith('payments_month_202603_')]
+        self.assertGreater(len(shards), 1)
+
+        start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        end = datetime(2026, 3, 31, tzinfo=timezone.utc)
+        self.assertEqual(Rollup.get_series(['payments'], start, end, 'month')['payments'], {
+            '2026-03': {'count': 31, 'sum': 3050.0}
+        })
+
+        days = Rollup.get_series(['payments', 'reviews_basic'], start, end, 'day')
+        self.assertEqual(days['payments']['2026-03-05'], {'count': 30, 'sum': 3000.0})
+        self.assertEqual(days['payments']['2026-03-07'], {'count': 1, 'sum': 50.0})
+        self.assertEqual(days['reviews_basic'], {'2026-03-05': {'count': 1, 'sum': 0.0}})
+
+        # Buckets outside the range are left out
+        later = Rollup.get_series(['payments'], datetime(2026, 3, 6, tzinfo=timezone.utc), end, 'day')
+        self.assertEqual(list(later['payments']), ['2026-03-07'])
+
+    def test_backfill_replaces_shards_with_totals(self):
+        when = datetime(2026, 3, 5, 10, 30, tzinfo=timezone.utc)
+        self.db.collection('payments').document('ref_1').set({'timestamp': when, 'amount': 200})
+        for _ in range(5):
+            self.record('payments', when, amount=200)
+
+        self.assertEqual(Rollup.backfill(['payments']), {'payments': 3})
+        self.assertEqual(Rollup.backfill(['payments']), {'payments': 3})
+
+        series = Rollup.get_series(['payments'], when, when, 'hour')
+        self.assertEqual(series['payments'], {'2026-03-05 10:00': {'count': 1, 'sum': 200.0}})
+
+    def test_users_backfill_counts_archived_users(self):
+        for phone in ('whatsapp:+2348000000001', 'whatsapp:+2348000000002'):
+            get_user_session(phone)
+        signup = self.backends.firestore.peek('users', 'whatsapp:+2348000000001')['created_at']
+
+        # One session is archived, the other restarted later with a new created_at
+        old = utc_now() - timedelta(days=400)
+        self.db.collection('sessions').document('whatsapp:+2348000000001').update({'last_activity': old})
+        self.assertEqual(archive_collection('sessions', 180, 'run1')['archived'], 1)
+        self.db.collection('sessions').document('whatsapp:+2348000000002').update({'created_at': signup + timedelta(days=40)})
+
+        self.assertEqual(Rollup.backfill(['users']), {'users': 3})
+        series = Rollup.get_series(['users'], signup, signup, 'day')['users']
+        self.assertEqual(series, {signup.strftime('%Y-%m-%d'): {'count': 2, 'sum': 0.0}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_search_index.py - Test admin search index entries
+import unittest
+from firebase_admin import firestore
+from models.search_index import SearchIndex
+from tests.fakes import install
+from utils.timestamps import to_datetime
+
+class TestSearchIndex(unittest.TestCase):
+    
+    def test_phone_terms_cover_local_and_international_prefixes(self):
+        terms = SearchIndex.phone_terms('whatsapp:+2348012345678')
+        self.assertIn('phone:2348012', terms)
+        self.assertIn('phone:0801', terms)
+        self.assertIn('phone:08012345678', terms)
+        self.assertNotIn('phone:234', terms)
+        self.assertEqual(SearchIndex.phone_digits('0801 234 5678'), '2348012345678')
+    
+    def test_email_terms(self):
+        terms = SearchIndex.email_terms('Ada.Obi@Example.com')
+        for token in ('ada.obi@example.com', 'ada.obi', 'example.com', 'ada', 'obi'):
+            self.assertIn(f'email:{token}', terms)
+        self.assertEqual(SearchIndex.email_terms('skip'), set())
+    
+    def test_build_entry(self):
+        entry = SearchIndex.build_entry('payments', 'REF-123', {
+            'reference': 'REF-123',
+            'user_id': '+2348012345678',
+            'amount': 2000,
+            'timestamp': '2026-01-02T10:00:00',
+            'insights': ['not searchable']
+        })
+        self.assertEqual(entry['sort_key'], to_datetime('2026-01-02T10:00:00').isoformat())
+        self.assertIn('+2348012345678', entry['text'])
+        self.assertNotIn('not searchable', entry['text'])
+        
+        # Every trigram of an indexed substring is present, keyed safely
+        for gram in SearchIndex.trigrams('f-12'):
+            self.assertIn(SearchIndex._key('g', gram), entry['grams'])
+        self.assertIn(SearchIndex._key('t', 'ref:ref-123'), entry['terms'])
+        self.assertTrue(all(key.isalnum() for key in entry['grams']))
+
+class TestSearchIndexWrites(unittest.TestCase):
+    
+    def setUp(self):
+        self.addCleanup(install().stop)
+        self.addCleanup(SearchIndex._written.clear)
+        SearchIndex._written.clear()
+        self.db = firestore.client()
+    
+    def test_reviews_are_found_by_cv_file_name(self):
+        batch = self.db.batch()
+        SearchIndex.index(batch, 'reviews', 'r1', {'user_id': '+2348012345678', 'cv_file_name': 'cv_1700000000_ab12cd34.pdf'})
+        batch.commit()
+        
+        self.assertEqual(SearchIndex.find('reviews', 'ab12cd34'), ['r1'])
+    
+    def test_failed_commit_is_indexed_again(self):
+        payment = {'reference': 'REF-1', 'user_id': '+2348012345678', 'amount': 2000}
+        self.db.collection('payments').document('REF-1').set(payment)
+        
+        batch = self.db.batch()
+        batch.create(self.db.collection('payments').document('REF-1'), payment)
+        SearchIndex.index(batch, 'payments', 'REF-1', payment)
+        with self.assertRaises(Exception):
+            batch.commit()
+        self.assertNotIn(('payments', 'REF-1'), SearchIndex._written)
+        
+        # The next write of the same content still carries the entry
+        batch = self.db.batch()
+        SearchIndex.index(batch, 'payments', 'REF-1', payment)
+        batch.commit()
+        SearchIndex.committed(batch)
+        self.assertIn(('payments', 'REF-1'), SearchIndex._written)
+        self.assertEqual(SearchIndex.find('payments', 'ref-1'), ['REF-1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_timestamps.py - Test reading native and legacy timestamps
+import unittest
+from datetime import datetime, timezone
+from utils.timestamps import to_datetime, normalize_timestamps, format_timestamp
+from models.timestamp_migration import TimestampMigration
+from services.report_service import store_report
+from tests.fakes import install
+
+class TestTimestamps(unittest.TestCase):
+    
+    def test_to_datetime_reads_both_formats(self):
+        native = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+        self.assertEqual(to_datetime(native), native)
+        self.assertEqual(to_datetime('2026-03-01T12:30:00+00:00'), native)
+        
+        # Legacy strings are naive server local time
+        legacy = to_datetime('2026-03-01T12:30:00')
+        self.assertEqual(legacy, datetime(2026, 3, 1, 12, 30).astimezone().astimezone(timezone.utc))
+        self.assertEqual(legacy.tzinfo, timezone.utc)
+        
+        self.assertIsNone(to_datetime(''))
+        self.assertIsNone(to_datetime('not a date'))
+        self.assertIsNone(to_datetime(None))
+    
+    def test_normalize_and_format(self):
+        doc = normalize_timestamps({'timestamp': '2026-03-01T12:30:00+00:00', 'review_type': 'basic'})
+        self.assertIsInstance(doc['timestamp'], datetime)
+        self.assertEqual(format_timestamp(doc['timestamp']), '2026-03-01 12:30:00')
+        self.assertEqual(format_timestamp(None), 'N/A')
+    
+    def test_migration_converts_only_strings(self):
+        native = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        updates = TimestampMigration.converted_fields(
+            {'created_at': '2026-03-01T00:00:00+00:00', 'timestamp': native, 'last_activity': 'bad'},
+            ['created_at', 'timestamp', 'last_activity']
+        )
+        self.assertEqual(updates, {'created_at': native})
+
+    
+    def test_report_store_is_written_and_migrated_as_timestamps(self):
+        backends = install()
+        self.addCleanup(backends.stop)
+        
+        stored = store_report({'review_type': 'basic', 'improvement_score': 70, 'insights': ['Add numbers']})
+        metadata = backends.firestore.peek('report_store', stored['digest'])
+        self.assertIsInstance(metadata['created_at'], datetime)
+        self.assertIsInstance(metadata['last_used_at'], datetime)
+        
+        # Documents written before the change are converted by the migration
+        backends.firestore.collection('report_store').document('old').set({'created_at': '2025-01-01T00:00:00', 'last_used_at': '2025-02-01T00:00:00'})
+        self.assertEqual(TimestampMigration.run(['report_store'])['report_store']['converted'], 1)
+        self.assertEqual(backends.firestore.peek('report_store', 'old')['last_used_at'], to_datetime('2025-02-01T00:00:00'))
+
+if __name__ == '__main__':
+    unittest.main()
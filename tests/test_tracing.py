@@ -0,0 +1,49 @@
+# tests/test_tracing.py - Test trace propagation and span recording
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils import tracing
+
+class TestTracing(unittest.TestCase):
+    
+    def test_parse_traceparent(self):
+        parsed = tracing.parse_traceparent('00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01')
+        self.assertEqual(parsed, ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True))
+        self.assertIsNone(tracing.parse_traceparent('garbage'))
+        self.assertIsNone(tracing.parse_traceparent(None))
+    
+    def test_sampled_trace_records_nested_spans_across_threads(self):
+        exported = []
+        
+        with patch.object(Config, 'TRACE_SAMPLE_RATE', 1.0), \
+                patch.object(Config, 'TRACE_EXPORT_PATH', '/tmp/unused.jsonl'), \
+                patch.object(tracing, '_enqueue', exported.append):
+            with tracing.start_trace('POST /webhook/twilio') as root:
+                with tracing.span('stage.extract'):
+                    header = tracing.outbound_headers()['traceparent']
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    trace_id = executor.submit(tracing.propagate(tracing.current_trace_id)).result()
+        
+        self.assertEqual(trace_id, root.trace.trace_id)
+        self.assertIsNone(tracing.current_trace_id())
+        self.assertEqual(len(exported), 1)
+        
+        spans = {span['name']: span for span in exported[0]['spans']}
+        self.assertEqual(spans['stage.extract']['parent_id'], spans['POST /webhook/twilio']['span_id'])
+        self.assertIn(spans['stage.extract']['span_id'], header)
+        
+        otlp = tracing.to_otlp(exported)['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual({span['traceId'] for span in otlp}, {trace_id})
+    
+    def test_unsampled_trace_keeps_id_without_spans(self):
+        with patch.object(Config, 'TRACE_SAMPLE_RATE', 0.0), patch.object(tracing, '_enqueue') as enqueue:
+            with tracing.start_trace('retention_job'):
+                with tracing.span('stage.extract') as child:
+                    self.assertIsNone(child)
+                    self.assertIsNotNone(tracing.current_trace_id())
+        
+        enqueue.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
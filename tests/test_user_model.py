@@ -0,0 +1,101 @@
+# tests/test_user_model.py - Test the session/profile split
+import unittest
+from datetime import timedelta
+from firebase_admin import firestore
+from models.aggregate import Aggregate
+from models.search_index import SearchIndex
+from models.user import User
+from services.firebase_service import get_user_session
+from services.retention_service import archive_collection
+from tests.fakes import install
+from utils.timestamps import to_datetime, utc_now
+
+class TestUserModel(unittest.TestCase):
+    
+    def test_split_session_data(self):
+        state, profile = User.split_session_data({
+            'phone_number': '+2348012345678',
+            'state': 'processing',
+            'email': 'ada@example.com',
+            'payment_reference': 'REF-1',
+            'last_review': {'insights': ['a'] * 50}
+        })
+        self.assertEqual(state, {'phone_number': '+2348012345678', 'state': 'processing'})
+        self.assertEqual(profile, {'email': 'ada@example.com', 'payment_reference': 'REF-1'})
+    
+    def test_build_profile_update_keeps_newer_profile_data(self):
+        legacy = {
+            'phone_number': '+2348012345678',
+            'created_at': '2025-01-01T00:00:00',
+            'email': 'old@example.com',
+            'reviews': [f'r{i}' for i in range(25)]
+        }
+        profile = {'email': 'new@example.com', 'review_count': 2, 'recent_review_ids': ['n2', 'n1']}
+        
+        update = User.build_profile_update(legacy, profile)
+        self.assertNotIn('email', update)
+        self.assertEqual(update['review_count'], 27)
+        self.assertEqual(update['recent_review_ids'][:3], ['n2', 'n1', 'r24'])
+        self.assertEqual(len(update['recent_review_ids']), User.RECENT_REVIEWS)
+        self.assertEqual(update['created_at'], '2025-01-01T00:00:00')
+
+    
+    def test_archived_users_stay_listed_and_searchable(self):
+        backends = install()
+        self.addCleanup(backends.stop)
+        self.addCleanup(SearchIndex._written.clear)
+        phones = ['whatsapp:+2348000000001', 'whatsapp:+2348000000002', 'whatsapp:+2348000000003']
+        for phone in phones:
+            get_user_session(phone)
+        
+        old = utc_now() - timedelta(days=400)
+        firestore.client().collection('sessions').document(phones[0]).update({'last_activity': old})
+        self.assertEqual(archive_collection('sessions', 180, 'run1')['archived'], 1)
+        
+        # Walking the pages finds as many users as the total says
+        listed, cursor = [], None
+        while True:
+            users, total, cursors = User.get_paginated(per_page=2, cursor=cursor)
+            listed.extend(User.attach_sessions(users))
+            cursor = cursors['next']
+            if not cursor:
+                break
+        self.assertEqual(total, 3)
+        self.assertEqual(sorted(user['id'] for user in listed), phones)
+        
+        archived = next(user for user in listed if user['id'] == phones[0])
+        self.assertIsNone(archived['state'])
+        self.assertIn(phones[0], [user['id'] for user in User.get_recent(5)])
+        
+        users, total = User.search('8000000001', 1, 20)
+        self.assertEqual((total, [user['id'] for user in users]), (1, [phones[0]]))
+
+    
+    def test_migration_counts_legacy_users(self):
+        backends = install()
+        self.addCleanup(backends.stop)
+        self.addCleanup(SearchIndex._written.clear)
+        db = firestore.client()
+        get_user_session('whatsapp:+2348000000003')
+        db.collection('sessions').document('whatsapp:+2348000000001').set({
+            'phone_number': 'whatsapp:+2348000000001', 'state': 'completed', 'created_at': '2025-01-01T00:00:00',
+            'email': 'ada@example.com', 'reviews': ['r1']
+        })
+        db.collection('sessions').document('whatsapp:+2348000000002').set({
+            'phone_number': 'whatsapp:+2348000000002', 'state': 'welcome', 'created_at': '2025-01-02T00:00:00'
+        })
+        
+        # The total was seeded before the migration ran
+        self.assertEqual(Aggregate.get_count('users'), 1)
+        
+        self.assertEqual(User.migrate_sessions(), {'scanned': 3, 'migrated': 2, 'profiles': 2})
+        self.assertEqual(Aggregate.get_count('users'), 3)
+        self.assertEqual(User.get_stats(to_datetime('2025-01-01T00:00:00'), to_datetime('2025-01-31T00:00:00'), 'month')['total'], 2)
+        self.assertEqual(backends.firestore.peek('users', 'whatsapp:+2348000000001')['review_count'], 1)
+        
+        # A re-run finds nothing left to do
+        self.assertEqual(User.migrate_sessions(), {'scanned': 3, 'migrated': 0, 'profiles': 0})
+        self.assertEqual(Aggregate.get_count('users'), 3)
+
+if __name__ == '__main__':
+    unittest.main()